@@ -8,16 +8,27 @@ from __future__ import annotations
 
 from flask import Flask, render_template, jsonify
 from extensions import db, migrate
+import jobs
+import profiling
 import secrets
+import storage
 from itsdangerous import URLSafeSerializer
 from logging import basicConfig, DEBUG
 import locale
+import multiprocessing
 
-from models import License
+from models import License, Match, Player, PlayerRating, PoolStanding, team_strengths
 from common import load_age_categories, AgeCategory
 
 
-def create_app():
+def create_app(background_jobs: bool = True):
+	"""Application Flask.
+
+	:param background_jobs: démarre le gestionnaire de jobs (reprise des jobs en file, tâches
+							nocturnes) ; False pour les scripts, qui ne doivent pas exécuter les jobs du serveur.
+							Jamais dans un processus de calcul (pool « spawn » des simulations ou de
+							l'amorçage) : il réimporte le script principal, wsgi.py crée alors l'application
+	"""
 	app = Flask(__name__, static_folder='static', static_url_path='/static')
 
 	# Set the secret key
@@ -29,9 +40,15 @@ def create_app():
 	# Config
 	app.config.from_object('config.Config')
 
+	# Profil de stockage : DATABASE_URL, options du moteur, PRAGMA SQLite (voir storage.py)
+	storage.configure(app)
+
 	# Initialize extensions
 	db.init_app(app)
+	storage.init_app(app)
 	migrate.init_app(app, db)
+	# SQL, rendu et durée de chaque requête (page /admin/perf)
+	profiling.init_app(app)
 
 	# Register blueprints
 	from blueprints.admin import admin_bp
@@ -49,7 +66,10 @@ def create_app():
 	app.register_blueprint(shop_bp, url_prefix='/shop')
 
 	# Locale settings
-	locale.setlocale(locale.LC_TIME, 'fr_FR')
+	try:
+		locale.setlocale(locale.LC_TIME, 'fr_FR')
+	except locale.Error:
+		app.logger.warning('Locale fr_FR indisponible : dates dans la locale par défaut')
 	basicConfig(level=DEBUG)
 
 	# Add the filter to the Jinja environment
@@ -57,19 +77,29 @@ def create_app():
 	app.jinja_env.filters['sort_players_by'] = sort_players_by
 	app.jinja_env.filters['none_to_zero'] = none_to_zero
 
-	# Créer les tables et migrations au démarrage (une seule fois)
+	# Tables, migrations et données de référence : seulement si les modèles ont changé
 	with app.app_context():
-		db.create_all()
-		_run_column_migrations(app, db)
+		_ensure_schema(app, db)
 
-		# Charger les catégories d'âge par défaut si elles n'existent pas
-		try:
-			if AgeCategory.query.count() == 0:
-				load_age_categories(db)
-				app.logger.info('Catégories d\'âge chargées via common.load_age_categories')
-		except Exception as e:
-			# Ne pas empêcher le démarrage de l'app si l'opération échoue
-			app.logger.debug(f"Impossible de charger les catégories d\'âge: {e}")
+	# Forces d'équipes invalidées par un autre worker : cache du processus vidé
+	app.before_request(team_strengths.sync)
+
+	if background_jobs and multiprocessing.parent_process() is None:
+		# Jobs d'arrière-plan (simulations, imports) : reprise des jobs en file
+		jobs.init_app(app)
+
+		with app.app_context():
+			_enqueue_initial_jobs()
+
+	@app.cli.command('rebuild-standings')
+	def rebuild_standings_command():
+		"""Recalcule pool_standing et affiche les écarts avec le calcul complet."""
+		import standings
+		mismatches = standings.rebuild()
+		db.session.commit()
+		print(f'{len(mismatches)} ligne(s) corrigée(s)')
+		for pool_id, team_id in mismatches:
+			print(f'  poule #{pool_id} - équipe #{team_id}')
 
 	@app.route('/admin/run-migration')
 	def run_migration_endpoint():
@@ -83,9 +113,9 @@ def create_app():
 			tmj_cols = [c['name'] for c in inspector.get_columns('team_matchday_joker')] if 'team_matchday_joker' in inspector.get_table_names() else []
 			from models import PlayerMatchdayAvailability
 			total = db.session.query(PlayerMatchdayAvailability).count()
-			with_roles = db.session.execute(
-				db.text('SELECT COUNT(*) FROM player_matchday_availability WHERE plays_single=1 OR plays_double=1 OR is_substitute=1')
-			).scalar()
+			with_roles = PlayerMatchdayAvailability.query.filter(db.or_(
+				PlayerMatchdayAvailability.plays_single, PlayerMatchdayAvailability.plays_double,
+				PlayerMatchdayAvailability.is_substitute)).count()
 			return jsonify({
 				'status': 'ok',
 				'pma_columns': pma_cols,
@@ -122,42 +152,93 @@ def create_app():
 
 
 
+def _enqueue_initial_jobs():
+	"""Met en file les calculs initiaux manquants (base existante) ; retourne les jobs créés.
+
+	Chaque worker du serveur appelle create_app : la clé `tâche@jour` des tâches
+	nocturnes ne laisse créer le job qu'à l'un d'eux, et le calcul tient lieu
+	de tâche nocturne du jour.
+	"""
+	queued = []
+	# Instantané des ELO absent : calcul initial en arrière-plan
+	if PlayerRating.query.first() is None and Player.query.first() is not None:
+		queued.append(jobs.enqueue_once('refresh_player_ratings', jobs.daily_key('refresh_player_ratings'),
+		                                'Calcul initial des ELO'))
+	# Classements persistés absents : construction initiale de pool_standing
+	if PoolStanding.query.first() is None and Match.query.filter(Match.homeScore.isnot(None)).first() is not None:
+		queued.append(jobs.enqueue_once('rebuild_pool_standings', jobs.daily_key('rebuild_pool_standings'),
+		                                'Calcul initial des classements'))
+	return [job for job in queued if job is not None]
+
+
+def _ensure_schema(app, db):
+	"""Crée les tables, applique les migrations et charge les catégories d'âge, une fois par version des modèles.
+
+	L'empreinte des modèles est comparée à celle du démarrage précédent (une
+	requête) : un démarrage ordinaire n'inspecte pas le schéma.
+	"""
+	fingerprint = storage.schema_fingerprint(db.metadata)
+	if storage.stored_schema_stamp(db.session) == fingerprint:
+		return
+	db.create_all()
+	_run_column_migrations(app, db)
+
+	# Charger les catégories d'âge par défaut si elles n'existent pas
+	try:
+		if AgeCategory.query.count() == 0:
+			load_age_categories(db)
+			app.logger.info('Catégories d\'âge chargées via common.load_age_categories')
+	except Exception as e:
+		# Ne pas empêcher le démarrage de l'app si l'opération échoue
+		app.logger.debug(f"Impossible de charger les catégories d\'âge: {e}")
+		db.session.rollback()
+
+	storage.stamp_schema(db.session, fingerprint)
+	db.session.commit()
+	app.logger.info(f'Schéma à jour (empreinte {fingerprint})')
+
+
 def _run_column_migrations(app, db):
-	"""Ajoute les colonnes manquantes sans utiliser Alembic (SQLite compatible).
+	"""Ajoute les colonnes et index manquants sans utiliser Alembic (SQLite et PostgreSQL).
 	   Appelée une seule fois au démarrage de l'app."""
-	from sqlalchemy import inspect, text
+	from sqlalchemy import inspect
+	from models import (Club, Job, License, PlayerMatchdayAvailability, PoolSimulation, Team,
+						TeamMatchdayJoker, TeamSimulationResult)
 	inspector = inspect(db.engine)
-	tables = inspector.get_table_names()
-
-	# ── player_matchday_availability ─────────────────────────────────────
-	if 'player_matchday_availability' in tables:
-		pma_cols = {c['name'] for c in inspector.get_columns('player_matchday_availability')}
-		for col, ddl in [
-			('plays_single',  'INTEGER NOT NULL DEFAULT 0'),
-			('plays_double',  'INTEGER NOT NULL DEFAULT 0'),
-			('is_substitute', 'INTEGER NOT NULL DEFAULT 0'),
-		]:
-			if col not in pma_cols:
-				db.session.execute(text(f'ALTER TABLE player_matchday_availability ADD COLUMN {col} {ddl}'))
-				app.logger.info(f'Migration: player_matchday_availability.{col} ajouté')
-
-	# ── team_matchday_joker ───────────────────────────────────────────────
-	if 'team_matchday_joker' in tables:
-		tmj_cols = {c['name'] for c in inspector.get_columns('team_matchday_joker')}
-		for col, ddl in [
-			('plays_single', 'INTEGER NOT NULL DEFAULT 0'),
-			('plays_double', 'INTEGER NOT NULL DEFAULT 0'),
-		]:
-			if col not in tmj_cols:
-				db.session.execute(text(f'ALTER TABLE team_matchday_joker ADD COLUMN {col} {ddl}'))
-				app.logger.info(f'Migration: team_matchday_joker.{col} ajouté')
+
+	# {modèle: {colonne: valeur par défaut (NOT NULL) ou None (colonne nullable)}}
+	missing = {
+		PlayerMatchdayAvailability: {'plays_single': False, 'plays_double': False, 'is_substitute': False},
+		TeamMatchdayJoker: {'plays_single': False, 'plays_double': False},
+		PoolSimulation: {'fixed_matches': 0, 'qualified_count': 1, 'relegated_count': 1,
+						 'rank_precision': None, 'probability_precision': None, 'converged': None},
+		TeamSimulationResult: {'qualification_probability': None, 'relegation_probability': None,
+							   'avg_ranking_error': None, 'qualification_error': None, 'relegation_error': None},
+		License: {'tenupHash': None},
+		Job: {'heartbeat_at': None, 'run_key': None},
+	}
+	for model, defaults in missing.items():
+		for col in storage.add_missing_columns(db.session, inspector, model, defaults):
+			app.logger.info(f'Migration: {model.__tablename__}.{col} ajouté')
+
+	# ── VARCHAR élargis (PostgreSQL ; sans effet sous SQLite) ────────────
+	for model in (Club, License, Team):
+		for col in storage.widen_columns(db.session, inspector, model):
+			app.logger.info(f'Migration: {model.__tablename__}.{col} élargi')
+
+	# ── Index des modèles absents d'une base existante (hors Alembic) ────
+	for name in storage.create_missing_indexes(db.session, inspector, db.metadata):
+		app.logger.info(f'Migration: index {name} créé')
 
 	db.session.commit()
 
 
 # Define a custom filter function
 def sort_players_by_elo(players):
-	return sorted(players, key=lambda p: p.refined_elo, reverse=True)
+	"""Joueurs par ELO affiné décroissant : instantané player_rating lu en une requête pour toute la liste."""
+	players = list(players)
+	elos = PlayerRating.refined_elos(players)
+	return sorted(players, key=lambda p: elos[p.id], reverse=True)
 
 
 def sort_players_by(players, sort_criteria):
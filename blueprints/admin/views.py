@@ -1,17 +1,19 @@
 # admin/views.py
 from __future__ import annotations
 
+import json
 import os
 
-import pandas as pd
-from flask import request, render_template, redirect, url_for, flash, make_response, current_app
+from flask import request, render_template, redirect, url_for, flash, make_response, current_app, jsonify
 from models import db, AppSettings, Club
 
 from models import *
 from blueprints.admin import admin_bp
 
 from common import import_all_data, import_players
-from tools.import_csv import extract
+import bootstrap
+import jobs
+import profiling
 
 
 # Define routes for championship management
@@ -25,18 +27,9 @@ def new_club():
 	if request.method == 'POST':
 		club_id = request.form.get('club_id')
 		club_info = [d for d in current_app.config['CLUBS'] if d['id'] == club_id][0]
-		# récupération autres infos dans fichier csv du club
-		BASE_PATH = os.path.dirname(__file__)
-		csv_file = os.path.join(BASE_PATH, f'../../static/data/clubs.csv')
-		df = pd.read_csv(csv_file)
-		colonnes_a_recuperer = ['name', 'city', 'tennis_courts', 'padel_courts', 'beach_courts', 'latitude', 'longitude']
-		club_tenup = extract(df=df, field_criteria='id', field_value=club_info['id'], columns=colonnes_a_recuperer)
-		current_app.logger.debug(f'club_tenup: {club_tenup}')
-		if club_tenup is None:
-			current_app.logger.debug(f'club_tenup is None - see {club_info}')
-			club = Club(id=club_info['id'], name=club_info['name'], city=club_info['city'])
-		else:
-			club = Club(id=club_info['id'], name=club_tenup['name'], city=club_tenup['city'], tennis_courts=club_tenup['tennis_courts'], padel_courts=club_tenup['padel_courts'], beach_courts=club_tenup['beach_courts'], latitude=club_tenup['latitude'], longitude=club_tenup['longitude'])
+		# récupération autres infos dans l'annuaire des clubs (static/data/clubs.csv)
+		directory = bootstrap.load_club_directory(os.path.join(current_app.config['BASE_PATH'], bootstrap.CLUBS_CSV))
+		club = bootstrap.new_club(club_info, directory)
 		db.session.add(club)
 		db.session.commit()
 		current_app.logger.debug(f'nouveau club créé: {club}')
@@ -179,3 +172,57 @@ def create_season():
 	AppSettings.set_season(new_season)
 	flash(f'Nouvelle saison {new_season} créée et activée!', 'success')
 	return redirect(url_for('admin.settings'))
+
+
+def _job_json(job: Job) -> dict:
+	status = jobs.job_status(job)
+	status['result_url'] = None
+	if job.status == Job.DONE and job.result_endpoint:
+		status['result_url'] = url_for(job.result_endpoint, **json.loads(job.result_args or '{}'))
+	return status
+
+
+@admin_bp.route('/jobs')
+def list_jobs():
+	"""Derniers jobs d'arrière-plan (JSON)."""
+	recent = Job.query.order_by(Job.created_at.desc()).limit(request.args.get('limit', 20, type=int)).all()
+	return jsonify([_job_json(job) for job in recent])
+
+
+@admin_bp.route('/jobs/<int:job_id>')
+def job_status(job_id: int):
+	"""Avancement et ETA d'un job, interrogé périodiquement par la page de chargement."""
+	return jsonify(_job_json(Job.query.get_or_404(job_id)))
+
+
+@admin_bp.route('/jobs/<int:job_id>/cancel', methods=['POST'])
+def cancel_job(job_id: int):
+	job = Job.query.get_or_404(job_id)
+	jobs.request_cancel(job)
+	return jsonify(_job_json(job))
+
+
+@admin_bp.route('/perf')
+def perf():
+	"""Points d'entrée les plus coûteux parmi les dernières requêtes (voir profiling.py)."""
+	profiler = profiling.current_profiler()
+	sort = request.args.get('sort', 'duration')
+	if sort not in profiling.SORT_KEYS:
+		sort = 'duration'
+	limit = request.args.get('limit', 20, type=int)
+	endpoints = profiler.worst_endpoints(limit, sort) if profiler else []
+	slowest = profiler.slowest_requests(limit) if profiler else []
+	if request.args.get('format') == 'json':
+		return jsonify({'enabled': profiler is not None,
+		                'endpoints': [stats.to_dict() for stats in endpoints],
+		                'slowest': [profile.to_dict() for profile in slowest]})
+	return render_template('perf.html', profiler=profiler, endpoints=endpoints, slowest=slowest, sort=sort,
+	                       sort_keys=list(profiling.SORT_KEYS), peak_memory=profiling.process_peak_memory())
+
+
+@admin_bp.route('/perf/clear', methods=['POST'])
+def clear_perf():
+	profiler = profiling.current_profiler()
+	if profiler:
+		profiler.clear()
+	return redirect(url_for('admin.perf'))
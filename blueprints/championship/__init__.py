@@ -7,4 +7,4 @@ from flask import Blueprint
 championship_management_bp = Blueprint('championship', __name__, template_folder='templates/championship')
 
 # Import views from the submodule to register routes
-from . import views
+from . import views, tasks
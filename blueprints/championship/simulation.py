@@ -0,0 +1,523 @@
+"""
+Moteur de simulation Monte Carlo vectorisé pour les poules de championnat.
+
+Les équipes, les compositions et les classements ELO d'une poule sont chargés
+une seule fois en base, puis figés dans des tableaux NumPy.  Les N saisons sont
+ensuite jouées entièrement en mémoire, par blocs d'itérations :
+  - chaque set de chaque rubber (simple ou double) est tiré en O(1) dans la
+    distribution exacte de `match_model` (tables d'alias empilées rubbers × scores),
+    le super tie-break par un tirage de Bernoulli ;
+  - points, différences de matchs, de sets et de jeux sont agrégés par équipe
+    avec les mêmes règles que le classement (standings.py) ;
+  - seul le résumé (PoolSimulation + TeamSimulationResult) est écrit en base.
+
+En mode « reste de la saison » (keep_played), les rencontres dont le score est
+déjà renseigné sont figées : leur apport (points, différences) est ajouté tel
+quel à chaque itération et seules les rencontres restantes sont tirées.
+
+Les itérations sont découpées en tranches de CHUNK_SIZE, chacune avec son propre
+flux aléatoire dérivé de la graine (SeedSequence.spawn).  Les tranches peuvent
+être réparties sur un ProcessPoolExecutor : le résultat ne dépend que de la
+graine, pas du nombre de workers.  Ses processus sont démarrés par « spawn » :
+les simulations tournent dans un thread de job du serveur, et un fork d'un
+processus multithread peut bloquer l'enfant sur un verrou (journalisation…)
+tenu par un autre thread.
+"""
+from __future__ import annotations
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+import simulation_lineups
+import standings
+from extensions import db
+from match_model import (SET_SCORES, alias_table, point_probability, set_score_probabilities,
+                         super_tie_break_probability)
+from models import Match, Matchday, PoolSimulation, TeamSimulationResult
+
+# Nombre d'itérations simulées par bloc (borne la mémoire utilisée)
+BLOCK_SIZE = 1000
+# Nombre d'itérations par tranche (unité de travail d'un worker, avec son propre flux aléatoire)
+CHUNK_SIZE = 10 * BLOCK_SIZE
+# Quantile de la loi normale pour les intervalles de confiance à 95 %
+CONFIDENCE_Z = 1.96
+# Jeux domicile / visiteur de chaque score de set de match_model.SET_SCORES
+SET_HOME_GAMES = np.array([home for home, _ in SET_SCORES])
+SET_VISITOR_GAMES = np.array([visitor for _, visitor in SET_SCORES])
+
+
+class PoolModel:
+    """Photographie en mémoire d'une poule : équipes, rencontres et rubbers.
+
+    Les rubbers sont indexés à plat ; `rubber_match` donne la rencontre de chaque
+    rubber et `rubber_p` la probabilité pour le camp domicile de gagner un point.
+    `fixed` contient l'apport par équipe des rencontres déjà jouées
+    ('points', 'diff_matchs', 'diff_sets', 'diff_games').
+    """
+
+    def __init__(self, team_ids, team_names, match_ids, match_home, match_visitor,
+                 rubber_match, rubber_p, num_matches: int, fixed: dict = None, fixed_matches: int = 0):
+        self.team_ids = list(team_ids)
+        self.team_names = list(team_names)
+        self.match_ids = list(match_ids)
+        self.match_home = np.asarray(match_home, dtype=np.intp)
+        self.match_visitor = np.asarray(match_visitor, dtype=np.intp)
+        self.rubber_match = np.asarray(rubber_match, dtype=np.intp)
+        self.rubber_p = np.asarray(rubber_p, dtype=float)
+        self.num_matches = num_matches
+        self.fixed = {key: np.asarray(value, dtype=int) for key, value in (fixed or {}).items()}
+        self.fixed_matches = fixed_matches
+
+        num_teams, num_fixtures = len(self.team_ids), len(self.match_ids)
+        # Matrices d'incidence rubber → rencontre et rencontre → équipe
+        self.rubber_to_match = np.zeros((len(self.rubber_p), num_fixtures))
+        self.rubber_to_match[np.arange(len(self.rubber_p)), self.rubber_match] = 1
+        self.home_to_team = np.zeros((num_fixtures, num_teams))
+        self.home_to_team[np.arange(num_fixtures), self.match_home] = 1
+        self.visitor_to_team = np.zeros((num_fixtures, num_teams))
+        self.visitor_to_team[np.arange(num_fixtures), self.match_visitor] = 1
+
+        # Tables d'alias (rubbers × scores de set) et probabilité de super tie-break, calculées une fois
+        tables = [alias_table(set_score_probabilities(float(p))) for p in self.rubber_p]
+        self.set_threshold = np.array([threshold for threshold, _ in tables]).reshape(-1, len(SET_SCORES))
+        self.set_alias = np.array([alias for _, alias in tables], dtype=np.intp).reshape(-1, len(SET_SCORES))
+        self.super_tie_break_p = np.array([super_tie_break_probability(float(p)) for p in self.rubber_p])
+
+    @property
+    def num_teams(self) -> int:
+        return len(self.team_ids)
+
+
+def _sort_by_elo(players, elos, index: int):
+    return sorted(players, key=lambda p: elos[p.id][index], reverse=True)
+
+
+def _played_contribution(pool, team_index: dict, num_matches: int) -> dict:
+    """Apport des rencontres jouées par équipe, lu dans pool_standing (voir standings.stored_totals)."""
+    fixed = {key: np.zeros(len(team_index), dtype=int) for key in ('points', 'diff_matchs', 'diff_sets', 'diff_games')}
+    for (_, team_id), totals in standings.stored_totals([pool.id]).items():
+        # Rencontre contre une équipe supprimée : conservée pour l'équipe restante
+        if team_id not in team_index:
+            continue
+        t = team_index[team_id]
+        fixed['points'][t] = 3 * totals['won'] + 2 * totals['draw'] + totals['lost']
+        fixed['diff_matchs'][t] = 2 * totals['matches_won'] - totals['played'] * num_matches
+        fixed['diff_sets'][t] = totals['sets_won'] - totals['sets_lost']
+        fixed['diff_games'][t] = totals['games_won'] - totals['games_lost']
+    return fixed
+
+
+def load_pool_model(pool, keep_played: bool = False) -> PoolModel:
+    """Charge une poule une seule fois : compositions par journée et ELO des joueurs.
+
+    Compositions préchargées pour toutes les équipes et journées (simulation_lineups),
+    rencontres lues en une requête.
+
+    Reprend la sélection de `common.simulate_score` : simples triés par ELO actuel,
+    doubles par ELO affiné, force du camp = somme des ELO affinés.
+    Un joueur manquant dans une composition donne le rubber perdu (6/0 6/0).
+    Avec `keep_played`, les rencontres dont homeScore/visitorScore sont renseignés
+    sont figées (scores réels et feuilles de match, agrégés en base) au lieu d'être rejouées.
+    """
+    championship = pool.championship
+    singles_count, doubles_count = championship.singlesCount, championship.doublesCount
+    num_matches = singles_count + doubles_count
+    teams = list(pool.teams)
+    team_index = {team.id: i for i, team in enumerate(teams)}
+    fixed = _played_contribution(pool, team_index, num_matches) if keep_played else None
+    fixed_matches = 0
+
+    matchdays = Matchday.query.filter_by(championshipId=championship.id).all()
+    elos = {}
+    lineups = {}
+    for key, (singles, doubles) in simulation_lineups.pool_lineups(pool, matchdays).items():
+        for player in (*singles, *doubles):
+            elos.setdefault(player.id, player.snapshot_elo)
+        lineups[key] = (_sort_by_elo(singles, elos, 0), _sort_by_elo(doubles, elos, 1))
+    matches = {}
+    for match in Match.query.filter(Match.poolId == pool.id).order_by(Match.id):
+        matches.setdefault(match.matchdayId, []).append(match)
+
+    def side_elo(players, start: int, size: int):
+        selected = players[start:start + size]
+        if len(selected) < size:
+            return None
+        return sum(elos[p.id][1] for p in selected)
+
+    match_ids, match_home, match_visitor = [], [], []
+    rubber_match, rubber_p = [], []
+    for matchday in matchdays:
+        for match in matches.get(matchday.id, []):
+            if keep_played and match.homeScore is not None and match.visitorScore is not None:
+                fixed_matches += 1
+                continue
+            if match.homeTeamId not in team_index or match.visitorTeamId not in team_index:
+                continue
+            home_singles, home_doubles = lineups[match.homeTeamId, matchday.id]
+            visitor_singles, visitor_doubles = lineups[match.visitorTeamId, matchday.id]
+            m = len(match_ids)
+            match_ids.append(match.id)
+            match_home.append(team_index[match.homeTeamId])
+            match_visitor.append(team_index[match.visitorTeamId])
+            rubbers = [(home_singles, visitor_singles, i, 1) for i in range(singles_count)]
+            rubbers += [(home_doubles, visitor_doubles, 2 * i, 2) for i in range(doubles_count)]
+            for home_players, visitor_players, start, size in rubbers:
+                home_elo = side_elo(home_players, start, size)
+                visitor_elo = side_elo(visitor_players, start, size)
+                if home_elo is None:
+                    p = 0.0
+                elif visitor_elo is None:
+                    p = 1.0
+                else:
+                    p = point_probability(home_elo, visitor_elo)
+                rubber_match.append(m)
+                rubber_p.append(p)
+
+    return PoolModel(team_ids=[t.id for t in teams], team_names=[t.name for t in teams],
+                     match_ids=match_ids, match_home=match_home, match_visitor=match_visitor,
+                     rubber_match=rubber_match, rubber_p=rubber_p, num_matches=num_matches,
+                     fixed=fixed, fixed_matches=fixed_matches)
+
+
+def _play_sets(rng, set_threshold: np.ndarray, set_alias: np.ndarray, n: int):
+    """Tire un set pour n itérations × R rubbers ; retourne (jeux domicile, jeux visiteur)."""
+    num_rubbers, num_scores = set_threshold.shape
+    u = rng.random((n, num_rubbers)) * num_scores
+    index = u.astype(np.intp)
+    rubbers = np.arange(num_rubbers)[None, :]
+    accept = (u - index) < set_threshold[rubbers, index]
+    score = np.where(accept, index, set_alias[rubbers, index])
+    return SET_HOME_GAMES[score], SET_VISITOR_GAMES[score]
+
+
+def simulate_block(model: PoolModel, n: int, rng) -> dict:
+    """Joue n saisons complètes de la poule et retourne les tableaux (n × équipes).
+
+    Clés : 'points', 'diff_matchs', 'diff_sets', 'diff_games', 'ranks' (0 = premier).
+    """
+    num_teams = model.num_teams
+    if not len(model.rubber_p):
+        zeros = np.zeros((n, num_teams), dtype=int)
+        keys = {key: zeros + model.fixed.get(key, 0) for key in ('points', 'diff_matchs', 'diff_sets', 'diff_games')}
+        return {**keys, 'ranks': rank_teams(keys['points'], keys['diff_matchs'], keys['diff_sets'], keys['diff_games'])}
+
+    h1, v1 = _play_sets(rng, model.set_threshold, model.set_alias, n)
+    h2, v2 = _play_sets(rng, model.set_threshold, model.set_alias, n)
+    split = (h1 > v1) != (h2 > v2)
+    super_home = split & (rng.random(h1.shape) < model.super_tie_break_p[None, :])
+    super_visitor = split & ~super_home
+
+    # Même décompte que Score.sets_count / Score.games_count (super TB = 1 set et 1 jeu)
+    home_sets = (h1 > v1).astype(int) + (h2 > v2) + super_home
+    visitor_sets = (v1 > h1).astype(int) + (v2 > h2) + super_visitor
+    home_games = h1 + h2 + super_home
+    visitor_games = v1 + v2 + super_visitor
+    home_wins = (home_sets > visitor_sets).astype(float)
+
+    to_match = model.rubber_to_match
+    match_home_score = home_wins @ to_match
+    match_visitor_score = (1 - home_wins) @ to_match
+    match_home_sets, match_visitor_sets = home_sets @ to_match, visitor_sets @ to_match
+    match_home_games, match_visitor_games = home_games @ to_match, visitor_games @ to_match
+
+    home_to_team, visitor_to_team = model.home_to_team, model.visitor_to_team
+    home_won = (match_home_score > match_visitor_score).astype(float)
+    visitor_won = (match_visitor_score > match_home_score).astype(float)
+    draw = (match_home_score == match_visitor_score).astype(float)
+
+    won = home_won @ home_to_team + visitor_won @ visitor_to_team
+    lost = visitor_won @ home_to_team + home_won @ visitor_to_team
+    drawn = draw @ home_to_team + draw @ visitor_to_team
+    played = (home_to_team.sum(axis=0) + visitor_to_team.sum(axis=0))[None, :]
+
+    won_rubbers = match_home_score @ home_to_team + match_visitor_score @ visitor_to_team
+    sets_won = match_home_sets @ home_to_team + match_visitor_sets @ visitor_to_team
+    sets_lost = match_visitor_sets @ home_to_team + match_home_sets @ visitor_to_team
+    games_won = match_home_games @ home_to_team + match_visitor_games @ visitor_to_team
+    games_lost = match_visitor_games @ home_to_team + match_home_games @ visitor_to_team
+
+    points = np.rint(3 * won + 2 * drawn + lost).astype(int) + model.fixed.get('points', 0)
+    diff_matchs = np.rint(2 * won_rubbers - played * model.num_matches).astype(int) + model.fixed.get('diff_matchs', 0)
+    diff_sets = np.rint(sets_won - sets_lost).astype(int) + model.fixed.get('diff_sets', 0)
+    diff_games = np.rint(games_won - games_lost).astype(int) + model.fixed.get('diff_games', 0)
+    return {'points': points, 'diff_matchs': diff_matchs, 'diff_sets': diff_sets,
+            'diff_games': diff_games, 'ranks': rank_teams(points, diff_matchs, diff_sets, diff_games)}
+
+
+def rank_teams(points, diff_matchs, diff_sets, diff_games) -> np.ndarray:
+    """Rang (0 = premier) de chaque équipe, même clé de tri que `calculer_classement`.
+
+    À égalité parfaite, l'ordre de `pool.teams` est conservé comme dans le tri stable d'origine.
+    """
+    order_index = np.broadcast_to(np.arange(points.shape[1]), points.shape)
+    order = np.lexsort((order_index, -diff_games, -diff_sets, -diff_matchs, -points), axis=-1)
+    return np.argsort(order, axis=-1)
+
+
+class SimulationSummary:
+    """Accumulateur des résultats par équipe (rangs, points) au fil des blocs."""
+
+    def __init__(self, num_teams: int):
+        self.count = 0
+        self.rank_histogram = np.zeros((num_teams, num_teams), dtype=np.int64)
+        self.rank_sum = np.zeros(num_teams)
+        self.points_sum = np.zeros(num_teams)
+        self.best_rank = np.full(num_teams, num_teams, dtype=int)
+        self.worst_rank = np.full(num_teams, -1, dtype=int)
+
+    def add(self, block: dict):
+        ranks, points = block['ranks'], block['points']
+        num_teams = ranks.shape[1]
+        self.count += len(ranks)
+        for team in range(num_teams):
+            self.rank_histogram[team] += np.bincount(ranks[:, team], minlength=num_teams)
+        self.rank_sum += ranks.sum(axis=0)
+        self.points_sum += points.sum(axis=0)
+        if len(ranks):
+            self.best_rank = np.minimum(self.best_rank, ranks.min(axis=0))
+            self.worst_rank = np.maximum(self.worst_rank, ranks.max(axis=0))
+
+    def top_probability(self, count: int) -> np.ndarray:
+        """Probabilité pour chaque équipe de finir dans les `count` premiers."""
+        return self.rank_histogram[:, :count].sum(axis=1) / self.count
+
+    def bottom_probability(self, count: int) -> np.ndarray:
+        """Probabilité pour chaque équipe de finir dans les `count` derniers."""
+        num_teams = self.rank_histogram.shape[1]
+        return self.rank_histogram[:, max(num_teams - count, 0):].sum(axis=1) / self.count
+
+    def avg_ranking_error(self) -> np.ndarray:
+        """Demi-largeur de l'intervalle de confiance à 95 % du rang moyen de chaque équipe."""
+        ranks = np.arange(self.rank_histogram.shape[1])
+        mean = self.rank_histogram @ ranks / self.count
+        variance = np.maximum(self.rank_histogram @ ranks ** 2 / self.count - mean ** 2, 0)
+        return CONFIDENCE_Z * np.sqrt(variance / max(self.count - 1, 1))
+
+    def _probability_error(self, successes: np.ndarray) -> np.ndarray:
+        # Intervalle d'Agresti-Coull : reste > 0 pour une équipe toujours (ou jamais) qualifiée
+        n = self.count + CONFIDENCE_Z ** 2
+        p = (successes + CONFIDENCE_Z ** 2 / 2) / n
+        return CONFIDENCE_Z * np.sqrt(p * (1 - p) / n)
+
+    def top_probability_error(self, count: int) -> np.ndarray:
+        return self._probability_error(self.rank_histogram[:, :count].sum(axis=1))
+
+    def bottom_probability_error(self, count: int) -> np.ndarray:
+        num_teams = self.rank_histogram.shape[1]
+        return self._probability_error(self.rank_histogram[:, max(num_teams - count, 0):].sum(axis=1))
+
+    def is_converged(self, rank_precision=None, probability_precision=None,
+                     qualified_count: int = 1, relegated_count: int = 1) -> bool:
+        """Vrai si toutes les équipes ont atteint les précisions demandées (demi-largeurs à 95 %)."""
+        if self.count < 2:
+            return False
+        if rank_precision is not None and (self.avg_ranking_error() > rank_precision).any():
+            return False
+        if probability_precision is not None:
+            if (self.top_probability_error(qualified_count) > probability_precision).any():
+                return False
+            if relegated_count and (self.bottom_probability_error(relegated_count) > probability_precision).any():
+                return False
+        return True
+
+    def merge(self, other: 'SimulationSummary'):
+        """Ajoute les résultats d'une autre tranche (histogrammes et sommes)."""
+        self.count += other.count
+        self.rank_histogram += other.rank_histogram
+        self.rank_sum += other.rank_sum
+        self.points_sum += other.points_sum
+        self.best_rank = np.minimum(self.best_rank, other.best_rank)
+        self.worst_rank = np.maximum(self.worst_rank, other.worst_rank)
+
+    @property
+    def avg_ranking(self) -> np.ndarray:
+        return self.rank_sum / self.count
+
+    @property
+    def avg_points(self) -> np.ndarray:
+        return self.points_sum / self.count
+
+
+def _chunks(num_simulations: int, seed_sequence: np.random.SeedSequence, chunk_size: int = CHUNK_SIZE) -> list:
+    """Découpe en tranches de `chunk_size`, chacune avec un flux aléatoire indépendant.
+
+    Chaque appel engendre de nouveaux flux (SeedSequence.spawn est incrémental).
+    """
+    sizes = [min(chunk_size, num_simulations - start) for start in range(0, num_simulations, chunk_size)]
+    return list(zip(sizes, seed_sequence.spawn(len(sizes))))
+
+
+def _simulate_chunk(model: PoolModel, n: int, seed_sequence, on_block=None) -> SimulationSummary:
+    """Joue une tranche de n saisons par blocs de BLOCK_SIZE (exécutée dans un worker)."""
+    rng = np.random.default_rng(seed_sequence)
+    summary = SimulationSummary(model.num_teams)
+    remaining = n
+    while remaining > 0:
+        size = min(BLOCK_SIZE, remaining)
+        summary.add(simulate_block(model, size, rng))
+        remaining -= size
+        if on_block:
+            on_block(size)
+    return summary
+
+
+def _run_tasks(tasks: list, executor=None, progress=None) -> list:
+    """Exécute les tranches (model, n, seed) en série ou sur le ProcessPoolExecutor fourni.
+
+    `progress(n)` est appelé après chaque bloc en série, après chaque tranche en
+    parallèle ; une exception levée par ce rappel (annulation) interrompt les
+    tranches restantes.
+    """
+    results = [None] * len(tasks)
+    if executor is None or len(tasks) <= 1:
+        for index, task in enumerate(tasks):
+            results[index] = _simulate_chunk(*task, on_block=progress)
+        return results
+    futures = {executor.submit(_simulate_chunk, *task): index for index, task in enumerate(tasks)}
+    try:
+        for future in as_completed(futures):
+            index = futures[future]
+            results[index] = future.result()
+            if progress:
+                progress(tasks[index][1])
+    finally:
+        for future in futures:
+            future.cancel()
+    return results
+
+
+def run_championship_simulations(models: list, num_simulations: int, seed=None, workers: int = 1, progress=None,
+                                 rank_precision: float = None, probability_precision: float = None,
+                                 qualified_count: int = 1, relegated_count: int = 1) -> list:
+    """Joue jusqu'à `num_simulations` saisons de chaque poule ; toutes les tranches partagent les workers.
+
+    Sans précision cible, exactement `num_simulations` saisons par poule.  Avec
+    `rank_precision` (rang moyen) et/ou `probability_precision` (probabilités de
+    qualification et de relégation), la simulation avance par tours de taille
+    doublée (BLOCK_SIZE, 2×BLOCK_SIZE, …) et chaque poule s'arrête dès que toutes
+    ses équipes ont atteint la demi-largeur d'intervalle de confiance demandée ;
+    `num_simulations` devient alors un plafond.  Le découpage ne dépend que de la
+    graine : le résultat est identique quel que soit le nombre de workers.
+    """
+    adaptive = rank_precision is not None or probability_precision is not None
+    pool_seeds = np.random.SeedSequence(seed).spawn(len(models))
+    summaries = [SimulationSummary(model.num_teams) for model in models]
+    total = num_simulations * len(models)
+    done = 0
+
+    def on_progress(n: int):
+        nonlocal done
+        done += n
+        if progress:
+            progress(done, total)
+
+    def converged(index: int) -> bool:
+        return adaptive and summaries[index].is_converged(rank_precision, probability_precision,
+                                                          qualified_count, relegated_count)
+
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) \
+        if workers > 1 else None
+    try:
+        round_size = BLOCK_SIZE if adaptive else num_simulations
+        chunk_size = BLOCK_SIZE if adaptive else CHUNK_SIZE
+        while True:
+            active = [i for i, summary in enumerate(summaries)
+                      if summary.count < num_simulations and not converged(i)]
+            if not active:
+                break
+            tasks, owners = [], []
+            for index in active:
+                n = min(round_size, num_simulations - summaries[index].count)
+                for size, chunk_seed in _chunks(n, pool_seeds[index], chunk_size):
+                    tasks.append((models[index], size, chunk_seed))
+                    owners.append(index)
+            for index, chunk in zip(owners, _run_tasks(tasks, executor, on_progress)):
+                summaries[index].merge(chunk)
+            round_size *= 2
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+    if progress and done < total:
+        # Arrêt anticipé : toutes les poules ont convergé avant le plafond
+        progress(total, total)
+    return summaries
+
+
+def run_simulations(model: PoolModel, num_simulations: int, seed=None, workers: int = 1, progress=None,
+                    **precision) -> SimulationSummary:
+    """Joue `num_simulations` saisons (plafond en mode précision cible), sur `workers` processus si > 1."""
+    return run_championship_simulations([model], num_simulations, seed=seed, workers=workers,
+                                        progress=progress, **precision)[0]
+
+
+def save_simulation(pool_id: int, model: PoolModel, summary: SimulationSummary,
+                    qualified_count: int = 1, relegated_count: int = 1,
+                    rank_precision: float = None, probability_precision: float = None) -> PoolSimulation:
+    """Enregistre uniquement le résumé agrégé et ses marges d'erreur, en une seule transaction."""
+    qualified_count = min(max(qualified_count, 0), model.num_teams)
+    relegated_count = min(max(relegated_count, 0), model.num_teams)
+    adaptive = rank_precision is not None or probability_precision is not None
+    simulation = PoolSimulation(pool_id=pool_id, num_simulations=summary.count, fixed_matches=model.fixed_matches,
+                                qualified_count=qualified_count, relegated_count=relegated_count,
+                                rank_precision=rank_precision, probability_precision=probability_precision,
+                                converged=summary.is_converged(rank_precision, probability_precision,
+                                                               qualified_count, relegated_count) if adaptive else None)
+    db.session.add(simulation)
+    qualification = summary.top_probability(qualified_count)
+    relegation = summary.bottom_probability(relegated_count)
+    ranking_error = summary.avg_ranking_error()
+    qualification_error = summary.top_probability_error(qualified_count)
+    relegation_error = summary.bottom_probability_error(relegated_count)
+    order = np.argsort(summary.avg_ranking, kind='stable')
+    for team in order:
+        simulation.team_results.append(TeamSimulationResult(
+            team_id=model.team_ids[team],
+            # Rang moyen 0-based, comme l'historique des simulations batch
+            avg_ranking=float(summary.avg_ranking[team]),
+            avg_points=float(summary.avg_points[team]),
+            best_ranking=int(summary.best_rank[team]) + 1,
+            worst_ranking=int(summary.worst_rank[team]) + 1,
+            qualification_probability=float(qualification[team]),
+            relegation_probability=float(relegation[team]),
+            avg_ranking_error=float(ranking_error[team]),
+            qualification_error=float(qualification_error[team]),
+            relegation_error=float(relegation_error[team]) if relegated_count else None,
+        ))
+    db.session.commit()
+    return simulation
+
+
+def simulate_pool_batch(pool, num_simulations: int, seed=None, workers: int = 1, progress=None,
+                        keep_played: bool = False, qualified_count: int = 1, relegated_count: int = 1,
+                        rank_precision: float = None, probability_precision: float = None) -> PoolSimulation:
+    """Charge la poule, joue `num_simulations` saisons en mémoire et enregistre le résumé.
+
+    Avec `keep_played`, seules les rencontres sans score sont simulées (projection de fin de saison).
+    Avec une précision cible, `num_simulations` est un plafond (voir run_championship_simulations).
+    """
+    model = load_pool_model(pool, keep_played=keep_played)
+    precision = dict(rank_precision=rank_precision, probability_precision=probability_precision,
+                     qualified_count=qualified_count, relegated_count=relegated_count)
+    summary = run_simulations(model, num_simulations, seed=seed, workers=workers, progress=progress, **precision)
+    return save_simulation(pool.id, model, summary, **precision)
+
+
+def simulate_championship_batch(championship, num_simulations: int, seed=None, workers: int = 1,
+                                progress=None, keep_played: bool = False,
+                                qualified_count: int = 1, relegated_count: int = 1,
+                                rank_precision: float = None, probability_precision: float = None) -> list:
+    """Simule toutes les poules (hors poule des exemptés) d'un championnat en parallèle.
+
+    Les poules sont chargées dans le processus principal ; seuls les tableaux NumPy
+    partent vers les workers.  Une PoolSimulation est enregistrée par poule.
+    """
+    pools = [pool for pool in championship.pools if pool.letter is not None and pool.teams]
+    models = [load_pool_model(pool, keep_played=keep_played) for pool in pools]
+    precision = dict(rank_precision=rank_precision, probability_precision=probability_precision,
+                     qualified_count=qualified_count, relegated_count=relegated_count)
+    summaries = run_championship_simulations(models, num_simulations, seed=seed, workers=workers,
+                                             progress=progress, **precision)
+    return [save_simulation(pool.id, model, summary, **precision)
+            for pool, model, summary in zip(pools, models, summaries)]
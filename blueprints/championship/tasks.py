@@ -0,0 +1,90 @@
+# championship/tasks.py
+"""Tâches longues du championnat exécutées en arrière-plan (voir jobs.py)."""
+from __future__ import annotations
+
+from flask import current_app
+
+import standings
+from extensions import db
+from jobs import task
+from models import Championship, Pool, Team
+from common import create_pools_and_assign_teams, schedule_matches, simulate_match_scores
+
+
+def _simulation_progress(job, label: str):
+    def progress(done: int, total: int):
+        job.progress(done / total, f'{label} : {done}/{total} saisons simulées')
+    return progress
+
+
+@task('simulate_pool_batch')
+def simulate_pool_batch(job, pool_id: int, num_simulations: int, keep_played: bool = False,
+                        qualified_count: int = 1, relegated_count: int = 1,
+                        rank_precision: float = None, probability_precision: float = None):
+    from blueprints.championship import simulation as simulation_engine  # numpy : chargé à la première simulation
+    pool = db.session.get(Pool, pool_id)
+    workers = current_app.config.get('SIMULATION_WORKERS', 1)
+    simulation = simulation_engine.simulate_pool_batch(pool, num_simulations, workers=workers,
+                                                       progress=_simulation_progress(job, f'Poule {pool.letter}'),
+                                                       keep_played=keep_played, qualified_count=qualified_count,
+                                                       relegated_count=relegated_count,
+                                                       rank_precision=rank_precision,
+                                                       probability_precision=probability_precision)
+    job.redirect_to('championship.show_simulation', sim_id=simulation.id)
+    return f'{pool.championship} - Poule {pool.letter}: {simulation.num_simulations} simulations terminées!'
+
+
+@task('simulate_championship_batch')
+def simulate_championship_batch(job, championship_id: int, num_simulations: int, keep_played: bool = False,
+                                qualified_count: int = 1, relegated_count: int = 1,
+                                rank_precision: float = None, probability_precision: float = None):
+    from blueprints.championship import simulation as simulation_engine
+    championship = db.session.get(Championship, championship_id)
+    workers = current_app.config.get('SIMULATION_WORKERS', 1)
+    simulations = simulation_engine.simulate_championship_batch(championship, num_simulations, workers=workers,
+                                                                progress=_simulation_progress(job, str(championship)),
+                                                                keep_played=keep_played, qualified_count=qualified_count,
+                                                                relegated_count=relegated_count,
+                                                                rank_precision=rank_precision,
+                                                                probability_precision=probability_precision)
+    job.redirect_to('championship.show_pools', id=championship.id)
+    played = max((simulation.num_simulations for simulation in simulations), default=0)
+    return f'{championship}: {played} simulations de {len(simulations)} poule(s) terminées!'
+
+
+@task('simulate_championship')
+def simulate_championship(job, championship_id: int):
+    championship = db.session.get(Championship, championship_id)
+    teams = Team.query.join(Pool).filter(Pool.championshipId == championship_id).all()
+
+    # Delete existing pools
+    job.progress(0, 'Suppression des poules existantes')
+    for pool in championship.pools:
+        db.session.delete(pool)
+    db.session.commit()
+
+    # Create pools and assign teams
+    job.progress(0, 'Constitution des poules')
+    _, _, assignment = create_pools_and_assign_teams(current_app, db, championship, teams)
+    job.progress(0, f'Poules constituées : {assignment.summary()}')
+
+    # Schedule and simulate matches for each pool
+    pools = [pool for pool in championship.pools if pool.letter is not None]
+    for i, pool in enumerate(pools):
+        job.progress(i / len(pools), f'Poule {pool.letter} ({i + 1}/{len(pools)})')
+        schedule_matches(current_app, db, pool)
+        simulate_match_scores(current_app, db, pool)
+
+    job.redirect_to('championship.show_championships')
+    return f'{championship} simulation completed!'
+
+
+@task('rebuild_pool_standings', nightly=True)
+def rebuild_pool_standings(job):
+    """Recalcule la table pool_standing et la compare au calcul complet des classements."""
+    job.progress(0, 'Recalcul des classements')
+    mismatches = standings.rebuild()
+    db.session.commit()
+    if mismatches:
+        current_app.logger.warning(f'pool_standing : {len(mismatches)} ligne(s) corrigée(s) {mismatches}')
+    return f'Classements recalculés : {len(mismatches)} ligne(s) corrigée(s)'
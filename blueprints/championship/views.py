@@ -7,11 +7,14 @@ from datetime import datetime, timedelta
 from flask import request, current_app, jsonify
 from sqlalchemy import desc, and_
 
+import jobs
+import roster
+
 from flask import render_template, redirect, url_for, flash
 
-from models import AgeCategory, Division, Championship, db, Pool, Team, Matchday, Match, PoolSimulation, TeamSimulationResult
+from models import AgeCategory, Division, Championship, db, Pool, Team, Matchday, Match, PoolSimulation, TeamSimulationResult, team_strengths
 from blueprints.championship import championship_management_bp
-from common import populate_championship, calculer_classement, simulate_match_scores, create_pools_and_assign_teams, schedule_matches, form_teams, get_players_order_by_ranking, remove_text_between_parentheses
+from common import populate_championship, calculer_classement, simulate_match_scores, create_pools_and_assign_teams, schedule_matches, form_teams, remove_text_between_parentheses
 
 
 # Define routes for championship management
@@ -100,60 +103,38 @@ def new_pool(championship_id):
         # Create teams for selected clubs
         teams = []
         current_app.logger.debug(f'Selected club_ids: {club_ids}')
-        
+
+        # Eligible players of every selected club in one query (see roster.py)
+        rosters = roster.eligible_rosters(championship, club_ids=club_ids, top_n=15)
+
+        # Existing team numbers per club in this championship
+        existing_numbers = {}
+        existing_teams = Team.query.filter(Team.clubId.in_(club_ids),
+                                           Team.poolId.in_([p.id for p in championship.pools])).all()
+        for team in existing_teams:
+            parts = team.name.split(' ')
+            if parts and parts[-1].isdigit():
+                existing_numbers.setdefault(team.clubId, []).append(int(parts[-1]))
+
         for club_id in club_ids:
-            current_app.logger.debug(f'Processing club_id: {club_id}')
-            
-            # Get existing teams for this club in championship using simple query
-            existing_teams = Team.query.filter_by(clubId=club_id).filter(
-                Team.poolId.in_([p.id for p in championship.pools])
-            ).all()
-            current_app.logger.debug(f'Existing teams for club {club_id}: {[t.name for t in existing_teams]}')
-            
-            # Extract existing numbers
-            existing_numbers = []
-            for team in existing_teams:
-                parts = team.name.split(' ')
-                current_app.logger.debug(f'Team name parts: {parts}')
-                if parts and parts[-1].isdigit():
-                    number = int(parts[-1])
-                    existing_numbers.append(number)
-                    current_app.logger.debug(f'Found existing number: {number}')
-            
-            current_app.logger.debug(f'All existing numbers for club {club_id}: {existing_numbers}')
-            
             # Find next available number
             team_number = 1
-            while team_number in existing_numbers:
+            while team_number in existing_numbers.get(club_id, []):
                 team_number += 1
             current_app.logger.debug(f'Next team number for club {club_id}: {team_number}')
-            
-            # Get club and create team directly
-            from models import Club
-            club = Club.query.get(club_id)
-            if club:
-                # Get eligible players for this club
-                players = get_players_order_by_ranking(
-                    gender=championship.division.gender,
-                    club_id=club_id,
-                    asc_param=True,
-                    age_category=championship.age_category,
-                    is_active=True
-                )
-                
-                if len(players) >= championship.singlesCount:
-                    captain = max(players, key=lambda p: p.best_elo)
-                    club_name = remove_text_between_parentheses(club.name)
-                    
-                    team = Team(name=f'{club_name} {team_number}', captainId=captain.id, clubId=club_id)
-                    team.players = players[:15]
-                    teams.append(team)
-                    current_app.logger.debug(f'Created team: {team.name} with {len(team.players)} players')
-                else:
-                    current_app.logger.debug(f'Club {club.name} has insufficient players: {len(players)}')
+
+            players = rosters.get(club_id, [])
+            if len(players) >= championship.singlesCount:
+                captain = max(players, key=lambda p: p.best_elo)
+                club_name = remove_text_between_parentheses(players[0].club.name)
+
+                team = Team(name=f'{club_name} {team_number}', captainId=captain.id, clubId=club_id)
+                team.players = players
+                teams.append(team)
+                current_app.logger.debug(f'Created team: {team.name} with {len(team.players)} players')
             else:
-                current_app.logger.debug(f'Club {club_id} not found')
-        
+                current_app.logger.debug(f'Club {club_id} has insufficient players: {len(players)}')
+
         current_app.logger.debug(f'Total teams created: {len(teams)}')
         
         # Create pool and assign teams
@@ -313,6 +294,7 @@ def delete_championship(championship_id):
                 db.text(f"DELETE FROM player_team_association WHERE team_id IN ({placeholders})"),
                 params
             )
+            team_strengths.invalidate()
         
         db.session.delete(championship)
         db.session.commit()
@@ -354,68 +336,35 @@ def purge_pool(pool_id: int):
         db.session.commit()
 
 
+def _simulation_options() -> dict:
+    """Options communes des formulaires de simulation batch."""
+    probability_precision = request.form.get('probability_precision', None, type=float)  # en points de %
+    return {
+        # Reste de la saison : les rencontres déjà jouées sont conservées
+        'keep_played': request.form.get('keep_played') == 'on',
+        'qualified_count': request.form.get('qualified_count', 1, type=int),
+        'relegated_count': request.form.get('relegated_count', 1, type=int),
+        # Précision cible facultative : le nombre de simulations devient un plafond
+        'rank_precision': request.form.get('rank_precision', None, type=float) or None,
+        'probability_precision': probability_precision / 100 if probability_precision else None,
+    }
+
+
 @championship_management_bp.route('/simulate_pool_batch/<int:pool_id>', methods=['GET', 'POST'])
 def simulate_pool_batch(pool_id):
     pool = Pool.query.get_or_404(pool_id)
     if request.method == 'POST':
         num_simulations = int(request.form.get('sim_count'))
 
-        # Run simulations and collect results
-        # time to run 10 simulations in development environment: 1 minute
-        # time to run 10 simulations in production environment: 10 minutes
-        simulation_results = {team.id: [] for team in pool.teams}
-        for i in range(num_simulations):
-            if not i % 5:
-                current_app.logger.debug(f'simulations to run: {num_simulations - i}')
-            purge_pool(pool_id)
-            # Simulate matches
-            simulate_match_scores(current_app, db, pool)
-            # Calcul du classement de la poule
-            for ranking, data in enumerate(calculer_classement(pool)):
-                team_id, result = data
-                points = result['points']
-                simulation_results[team_id].append((ranking, points))
-
-        # Calculate average rankings and points for each team
-        average_results = {}
-        for team in pool.teams:
-            team_results = simulation_results[team.id]
-            rankings = [result[0] for result in team_results]
-            points = [result[1] for result in team_results]
-
-            average_results[team.id] = {
-                'team_name': team.name,
-                'avg_ranking': sum(rankings) / num_simulations,
-                'avg_points': sum(points) / num_simulations,
-                'best_ranking': 1 + min(rankings),
-                'worst_ranking': 1 + max(rankings),
-                'rankings_distribution': {
-                    pos: rankings.count(pos) for pos in range(1, len(pool.teams) + 1)
-                }
-            }
-
-        # Sort teams by average ranking
-        sorted_results = dict(sorted(average_results.items(), key=lambda x: x[1]['avg_ranking']))
-
-        # Create results in PoolSimulation, TeamSimulationResult models
-        simulation = PoolSimulation(pool_id=pool_id, num_simulations=num_simulations)
-        db.session.add(simulation)
-        db.session.commit()
-        for team_id, result in sorted_results.items():
-            team_result = TeamSimulationResult(
-                simulation_id=simulation.id,
-                team_id=team_id,
-                avg_ranking=result['avg_ranking'],
-                avg_points=result['avg_points'],
-                best_ranking=result['best_ranking'],
-                worst_ranking=result['worst_ranking']
-            )
-            db.session.add(team_result)
-            db.session.commit()
+        # Saisons jouées en mémoire (moteur vectorisé) dans un job d'arrière-plan : seuls
+        # les résultats agrégés PoolSimulation / TeamSimulationResult sont écrits en base
+        current_app.logger.debug(f'simulations to run: {num_simulations}')
+        job = jobs.enqueue('simulate_pool_batch', f'{num_simulations} simulations poule {pool}',
+                           pool_id=pool.id, num_simulations=num_simulations, **_simulation_options())
 
-        return redirect(url_for('championship.show_simulation', sim_id=simulation.id))
+        return redirect(url_for('championship.loading', job_id=job.id))
 
-    return render_template('simulate_pool.html', pool=pool)
+    return render_template('simulate_pool.html', pool=pool, max_places=len(pool.teams))
 
 @championship_management_bp.route('/show_simulations/<int:pool_id>')
 def show_simulations(pool_id: int):
@@ -497,34 +446,28 @@ def simulate_pool(pool_id):
 @championship_management_bp.route('/simulate_championship/<int:championship_id>', methods=['POST'])
 def simulate_championship(championship_id):
     championship = Championship.query.get_or_404(championship_id)
-    teams = Team.query.join(Pool).filter(Pool.championshipId == championship_id).all()
-    
-    try:
-        # Delete existing pools
-        for pool in championship.pools:
-            db.session.delete(pool)
-        db.session.commit()
-        
-        # Create pools and assign teams
-        create_pools_and_assign_teams(current_app, db, championship, teams)
-        
-        # Schedule and simulate matches for each pool
-        for pool in championship.pools:
-            if pool.letter is not None:
-                schedule_matches(current_app, db, pool)
-                simulate_match_scores(current_app, db, pool)
-                
-        flash(f'{championship} simulation completed!', 'success')
-    except Exception as e:
-        db.session.rollback()
-        flash(f'Error simulating championship: {str(e)}', 'error')
+    job = jobs.enqueue('simulate_championship', f'Simulation du championnat {championship}',
+                       championship_id=championship.id)
+    return redirect(url_for('championship.loading', job_id=job.id))
 
-    return redirect(url_for('championship.show_championships'))
+@championship_management_bp.route('/simulate_championship_batch/<int:championship_id>', methods=['GET', 'POST'])
+def simulate_championship_batch(championship_id):
+    championship = Championship.query.get_or_404(championship_id)
+    if request.method == 'POST':
+        num_simulations = int(request.form.get('sim_count'))
+        current_app.logger.debug(f'simulations to run: {num_simulations} x {len(championship.pools)} pools')
+        job = jobs.enqueue('simulate_championship_batch', f'{num_simulations} simulations du championnat {championship}',
+                           championship_id=championship.id, num_simulations=num_simulations, **_simulation_options())
+        return redirect(url_for('championship.loading', job_id=job.id))
+
+    max_places = max((len(pool.teams) for pool in championship.pools if pool.letter is not None), default=0)
+    return render_template('simulate_championship.html', championship=championship, max_places=max_places)
 
 @championship_management_bp.route('/loading')
 def loading():
-    # Renvoyer la page de chargement
-    return render_template('loading.html')
+    # Renvoyer la page de chargement (suivi du job ?job_id=… par interrogation de l'API JSON)
+    job_id = request.args.get('job_id', type=int)
+    return render_template('loading.html', job_id=job_id)
 
 @championship_management_bp.route('/championships')
 def show_championships():
@@ -566,6 +509,8 @@ def show_pools(id: int):
     pools = Pool.query.filter(and_(Pool.championshipId == id, Pool.letter != None)).order_by(Pool.letter.asc()).all()
     championship = Championship.query.get(id)
     exempted_pool = Pool.query.filter(and_(Pool.championshipId == id, Pool.letter == None)).first()
+    # Poids de toutes les équipes en une requête (meilleure / moins bonne équipe de chaque poule)
+    team_strengths.for_teams(Team.query.join(Pool).filter(Pool.championshipId == id), championship.singlesCount)
     # current_app.logger.debug(f'championship: {championship} - pools: {pools} - exempted_teams: {exempted_teams}')
     return render_template('pools.html', pools=pools, championship=championship, exempted_pool=exempted_pool)
 
@@ -575,6 +520,7 @@ def show_pool(id: int):
     pool = Pool.query.get(id)
     # Calcul du classement de la poule
     resultat_classement = calculer_classement(pool)
+    team_strengths.for_teams(pool.teams, pool.championship.singlesCount)
     matchdays = Matchday.query.filter_by(championshipId=pool.championship.id).all() # pool.matchdays
     # current_app.logger.debug(f'matches: {pool.matches}')
     return render_template('show_pool.html', classement=resultat_classement, pool=pool, matches=pool.matches, matchdays=matchdays)
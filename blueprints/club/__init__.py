@@ -7,4 +7,4 @@ from flask import Blueprint
 club_management_bp = Blueprint('club', __name__, template_folder='templates/club', static_folder='static')
 
 # Import views from the submodule to register routes
-from . import views
+from . import views, tasks
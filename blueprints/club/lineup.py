@@ -0,0 +1,203 @@
+# club/lineup.py
+"""
+Composition optimale d'une équipe pour une journée (aide au capitaine).
+
+La composition adverse probable est celle retenue par la simulation
+(`Team.get_players_for_simulation`) ; chaque rubber est évalué par la probabilité
+exacte de victoire du modèle de Markov (match_model), avec la force de camp de la
+simulation (somme des ELO affinés).  On maximise le nombre de points attendus de la
+rencontre (somme des probabilités de victoire des rubbers).
+
+Règles respectées :
+  - joueurs disponibles pour la journée (`Team.get_available_players`) ;
+  - ordre des simples selon le classement (rankingId croissant, ex-aequo permutables),
+    ordre des doubles selon le poids de la paire (somme des rankingId) ;
+  - joker (`TeamMatchdayJoker`) : au plus un joueur hors liste nominative, jamais mieux
+    classé que le dernier joueur brûlé (N-ième de la liste nominative, N = nombre de simples).
+
+Simples et doubles sont indépendants (un joueur peut jouer les deux) : chacun est
+résolu par une recherche en profondeur avec séparation et évaluation (branch-and-bound),
+la borne étant la meilleure force encore disponible opposée à chaque position restante.
+"""
+from __future__ import annotations
+
+from itertools import combinations
+
+from match_model import match_probability, point_probability
+from extensions import db
+from models import Match
+
+# Joueur sans licence : traité comme le plus mal classé
+UNRANKED = 10 ** 6
+
+
+def _ranking_id(player) -> int:
+    return player.license.rankingId if player.license else UNRANKED
+
+
+def _win_probability(elo: float, opponent_elo: float | None) -> float:
+    if opponent_elo is None:
+        return 1.0  # rubber gagné par forfait
+    return match_probability(point_probability(elo, opponent_elo))
+
+
+class Lineup:
+    """Composition retenue et probabilités de victoire de chaque rubber."""
+
+    def __init__(self, team, opponent, singles, doubles, opponent_singles, opponent_doubles,
+                 singles_probabilities, doubles_probabilities, excluded_joker=None):
+        self.team = team
+        self.opponent = opponent
+        self.singles = singles  # joueurs par position (None : simple perdu par forfait)
+        self.doubles = doubles  # paires (a, b) par position (None : forfait)
+        self.opponent_singles = opponent_singles
+        self.opponent_doubles = opponent_doubles
+        self.singles_probabilities = singles_probabilities
+        self.doubles_probabilities = doubles_probabilities
+        self.excluded_joker = excluded_joker  # joker écarté car mieux classé que le dernier brûlé
+
+    @property
+    def probabilities(self) -> list:
+        return self.singles_probabilities + self.doubles_probabilities
+
+    @property
+    def expected_points(self) -> float:
+        return sum(self.probabilities)
+
+    def outcome_probabilities(self) -> tuple:
+        """(victoire, nul, défaite) de la rencontre : loi du nombre de rubbers gagnés."""
+        distribution = [1.0]
+        for p in self.probabilities:
+            distribution = [(distribution[k] if k < len(distribution) else 0) * (1 - p)
+                            + (distribution[k - 1] * p if k > 0 else 0)
+                            for k in range(len(distribution) + 1)]
+        num_matches = len(self.probabilities)
+        win = sum(prob for won, prob in enumerate(distribution) if 2 * won > num_matches)
+        draw = sum(prob for won, prob in enumerate(distribution) if 2 * won == num_matches)
+        return win, draw, 1 - win - draw
+
+    def to_dict(self) -> dict:
+        def player_json(player):
+            return {'id': player.id, 'name': player.name, 'ranking': str(player.ranking)} if player else None
+
+        win, draw, loss = self.outcome_probabilities()
+        return {
+            'team': {'id': self.team.id, 'name': self.team.name},
+            'opponent': {'id': self.opponent.id, 'name': self.opponent.name} if self.opponent else None,
+            'singles': [{'position': i + 1, 'player': player_json(player),
+                         'opponent': player_json(opponent), 'win_probability': p}
+                        for i, (player, opponent, p) in enumerate(zip(self.singles, self.opponent_singles,
+                                                                      self.singles_probabilities))],
+            'doubles': [{'position': i + 1, 'players': [player_json(player) for player in pair] if pair else None,
+                         'opponents': [player_json(player) for player in opponents] if opponents else None,
+                         'win_probability': p}
+                        for i, (pair, opponents, p) in enumerate(zip(self.doubles, self.opponent_doubles,
+                                                                     self.doubles_probabilities))],
+            'expected_points': self.expected_points,
+            'win_probability': win,
+            'draw_probability': draw,
+            'loss_probability': loss,
+            # Points de classement attendus (3 victoire / 2 nul / 1 défaite, cf. calculer_classement)
+            'expected_standing_points': 3 * win + 2 * draw + loss,
+            'excluded_joker': player_json(self.excluded_joker),
+        }
+
+
+def _best_ordered_assignment(candidates: list, opponent_elos: list) -> tuple:
+    """Meilleure affectation des candidats (clé d'ordre, force, composition, joueurs) aux positions.
+
+    Les clés d'ordre sont croissantes (au sens large) d'une position à la suivante et
+    un joueur ne figure qu'une fois.  Retourne ([candidat par position], [probabilité
+    de victoire par position]) ; faute de joueurs, les dernières positions restent vides.
+    """
+    # Par force décroissante : la probabilité de victoire est croissante avec la force,
+    # le premier candidat compatible donne donc la borne de chaque position restante
+    candidates = sorted(candidates, key=lambda candidate: candidate[1], reverse=True)
+    num_players = len({player_id for candidate in candidates for player_id in candidate[3]})
+    size = len(candidates[0][3]) if candidates else 1
+    positions = min(len(opponent_elos), num_players // size)
+    win = [[_win_probability(candidate[1], opponent_elo) for opponent_elo in opponent_elos[:positions]]
+           for candidate in candidates]
+    best = {'value': -1.0, 'choice': []}
+
+    def bound(position: int, used: frozenset, min_key: int) -> float:
+        for index, (key, _, _, members) in enumerate(candidates):
+            if key >= min_key and not used & members:
+                return sum(win[index][position:])
+        return 0.0
+
+    def search(position: int, used: frozenset, min_key: int, value: float, choice: list):
+        if position == positions:
+            if value > best['value']:
+                best['value'], best['choice'] = value, list(choice)
+            return
+        if value + bound(position, used, min_key) <= best['value']:
+            return
+        for index, (key, _, _, members) in enumerate(candidates):
+            if key < min_key or used & members:
+                continue
+            choice.append(index)
+            search(position + 1, used | members, key, value + win[index][position], choice)
+            choice.pop()
+
+    search(0, frozenset(), -1, 0.0, [])
+    return ([candidates[index] for index in best['choice']],
+            [win[index][position] for position, index in enumerate(best['choice'])])
+
+
+def _opponent_match(team, matchday):
+    return Match.query.filter(Match.matchdayId == matchday.id,
+                              db.or_(Match.homeTeamId == team.id, Match.visitorTeamId == team.id)).first()
+
+
+def optimize_lineup(team, matchday) -> Lineup:
+    """Composition maximisant les points attendus de `team` contre la composition adverse probable."""
+    championship = team.championship
+    singles_count, doubles_count = championship.singlesCount, championship.doublesCount
+
+    match = _opponent_match(team, matchday)
+    opponent = None
+    if match is not None:
+        opponent = match.visitorTeam if match.homeTeamId == team.id else match.homeTeam
+    if opponent is not None:
+        # Même composition que la simulation : simples par ELO actuel, doubles par ELO affiné
+        singles, doubles = opponent.get_players_for_simulation(matchday, singles_count, doubles_count)
+        opponent_singles = sorted(singles, key=lambda p: p.snapshot_elo[0], reverse=True)[:singles_count]
+        doubles = sorted(doubles, key=lambda p: p.snapshot_elo[1], reverse=True)
+        opponent_doubles = [tuple(doubles[2 * i:2 * i + 2]) for i in range(doubles_count)
+                            if len(doubles) >= 2 * i + 2]
+    else:
+        opponent_singles, opponent_doubles = [], []
+    opponent_singles += [None] * (singles_count - len(opponent_singles))
+    opponent_doubles += [None] * (doubles_count - len(opponent_doubles))
+
+    # Joker : refusé s'il est mieux classé que le dernier joueur brûlé
+    players = team.get_available_players(matchday)
+    joker = team.get_joker(matchday)
+    excluded_joker = None
+    nominative = sorted(team.players, key=_ranking_id)
+    if joker is not None and len(nominative) >= singles_count:
+        if _ranking_id(joker) < _ranking_id(nominative[singles_count - 1]):
+            players = [player for player in players if player.id != joker.id]
+            excluded_joker = joker
+
+    elos = {player.id: player.snapshot_elo[1] for player in players}
+    singles_candidates = [(_ranking_id(player), elos[player.id], player, frozenset([player.id]))
+                          for player in players]
+    doubles_candidates = [(_ranking_id(a) + _ranking_id(b), elos[a.id] + elos[b.id], (a, b),
+                           frozenset([a.id, b.id]))
+                          for a, b in combinations(players, 2)]
+
+    opponent_singles_elos = [player.snapshot_elo[1] if player else None for player in opponent_singles]
+    opponent_doubles_elos = [sum(player.snapshot_elo[1] for player in pair) if pair else None
+                             for pair in opponent_doubles]
+    singles_choice, singles_probabilities = _best_ordered_assignment(singles_candidates, opponent_singles_elos)
+    doubles_choice, doubles_probabilities = _best_ordered_assignment(doubles_candidates, opponent_doubles_elos)
+
+    # Positions non pourvues : rubbers perdus par forfait
+    singles = [candidate[2] for candidate in singles_choice] + [None] * (singles_count - len(singles_choice))
+    doubles = [candidate[2] for candidate in doubles_choice] + [None] * (doubles_count - len(doubles_choice))
+    singles_probabilities += [0.0] * (singles_count - len(singles_probabilities))
+    doubles_probabilities += [0.0] * (doubles_count - len(doubles_probabilities))
+    return Lineup(team, opponent, singles, doubles, opponent_singles, opponent_doubles,
+                  singles_probabilities, doubles_probabilities, excluded_joker=excluded_joker)
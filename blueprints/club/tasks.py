@@ -0,0 +1,21 @@
+# club/tasks.py
+"""Tâches longues de la gestion des clubs exécutées en arrière-plan (voir jobs.py)."""
+from __future__ import annotations
+
+from sqlalchemy import distinct, select
+
+from extensions import db
+from jobs import task
+from models import Player, PlayerRating
+
+
+@task('refresh_player_ratings', nightly=True)
+def refresh_player_ratings(job):
+    """Recalcule l'instantané player_rating de tous les joueurs, club par club (âges au jour près)."""
+    club_ids = db.session.execute(select(distinct(Player.clubId))).scalars().all()
+    count = 0
+    for i, club_id in enumerate(club_ids):
+        job.progress(i / max(len(club_ids), 1), f'Club {i + 1}/{len(club_ids)}')
+        count += PlayerRating.refresh_club(club_id)
+        db.session.commit()
+    return f'{count} joueurs recalculés dans {len(club_ids)} club(s)'
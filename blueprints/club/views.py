@@ -1,6 +1,8 @@
 # club/views.py
 from __future__ import annotations
 
+import time
+
 import itsdangerous
 from flask import jsonify
 from flask import current_app
@@ -8,7 +10,7 @@ from flask import current_app
 from functools import wraps
 
 from flask import request
-from sqlalchemy import desc, asc, Date
+from sqlalchemy import desc, asc, Date, select
 
 from flask import render_template, redirect, url_for, flash
 
@@ -17,6 +19,7 @@ from datetime import date as date_type
 from models import *
 from blueprints.club import club_management_bp
 from blueprints.shop.models import Racquet
+import tenup_sync
 
 from common import get_players_order_by_ranking, get_championships, Gender, check_license, keys_with_same_value, calculate_distance_and_duration, \
     CatType, update_players
@@ -310,14 +313,51 @@ def infos_club(id):
         return render_template('infos_club.html', club=club)
 
 
+@club_management_bp.route('/hosting_blackouts/<club_id>', methods=['GET', 'POST'])
+def hosting_blackouts(club_id):
+    """Journées où le club ne peut pas recevoir : respectées à la prochaine génération du calendrier des poules."""
+    club = Club.query.get_or_404(club_id)
+    # Journées des championnats où le club a une équipe en poule
+    championship_ids = select(Pool.championshipId).join(Team, Team.poolId == Pool.id).where(Team.clubId == club.id)
+    matchdays = Matchday.query.filter(Matchday.championshipId.in_(championship_ids)) \
+        .order_by(Matchday.date, Matchday.id).all()
+
+    if request.method == 'POST':
+        matchday = next((m for m in matchdays if str(m.id) == request.form.get('matchday_id')), None)
+        if matchday is None:
+            flash('Veuillez choisir une journée d\'un championnat du club, svp!', 'error')
+        elif ClubHostingBlackout.query.filter_by(club_id=club.id, matchday_id=matchday.id).first():
+            flash(f'{club.name} ne reçoit déjà pas le {matchday.date:%d/%m/%Y}.', 'warning')
+        else:
+            db.session.add(ClubHostingBlackout(club_id=club.id, matchday_id=matchday.id,
+                                               reason=request.form.get('reason') or None))
+            db.session.commit()
+            flash(f'{club.name} ne recevra pas le {matchday.date:%d/%m/%Y}.', 'success')
+        return redirect(url_for('club.hosting_blackouts', club_id=club.id))
+
+    blackouts = ClubHostingBlackout.query.filter_by(club_id=club.id).join(ClubHostingBlackout.matchday) \
+        .order_by(Matchday.date, Matchday.id).all()
+    blacked_out = {blackout.matchday_id for blackout in blackouts}
+    return render_template('hosting_blackouts.html', club=club, blackouts=blackouts,
+                           matchdays=[m for m in matchdays if m.id not in blacked_out])
+
+
+@club_management_bp.route('/hosting_blackouts/delete/<int:id>', methods=['POST'])
+def delete_hosting_blackout(id):
+    blackout = ClubHostingBlackout.query.get_or_404(id)
+    club_id = blackout.club_id
+    db.session.delete(blackout)
+    db.session.commit()
+    flash('Indisponibilité supprimée.', 'success')
+    return redirect(url_for('club.hosting_blackouts', club_id=club_id))
+
+
 # Définissez la route pour afficher les détails de l'équipe
 @club_management_bp.route('/show_team/<int:id>')
 def show_team(id: int):
     # Charger l'équipe avec les relations nécessaires en eager-loading pour éviter les N+1
+    # (durées, requêtes SQL et rendu relevés par profiling.py : voir /admin/perf)
     from sqlalchemy.orm import joinedload, subqueryload
-    import time
-    start_total = time.perf_counter()
-    current_app.logger.debug(f"show_team start for team={id}")
     # Use a consistent loader for Team.players (subqueryload) and apply nested loaders
     team = (
         Team.query
@@ -330,12 +370,8 @@ def show_team(id: int):
         )
         .get(id)
     )
-    t0 = time.perf_counter()
-    current_app.logger.debug(f"loaded team in {t0 - start_total:.3f}s")
     # Utiliser ranking via la licence déjà préchargée pour éviter des requêtes supplémentaires
     sorted_team_players = sorted(team.players, key=lambda p: p.license.rankingId if p.license and p.license.rankingId else 0)
-    t1 = time.perf_counter()
-    current_app.logger.debug(f"sorted players in {t1 - t0:.3f}s (players={len(team.players)})")
     # Info trajet
     signed_club_id = request.cookies.get('club_id')
     try:
@@ -388,8 +424,6 @@ def show_team(id: int):
     joker_candidates_all = joker_query.order_by(License.rankingId)
     joker_candidates = joker_candidates_all.limit(MAX_JOKER_CANDIDATES).all()
     joker_truncated = joker_candidates_all.count() > MAX_JOKER_CANDIDATES
-    t2 = time.perf_counter()
-    current_app.logger.debug(f"joker candidates query in {t2 - t1:.3f}s -> {len(joker_candidates)} candidates (truncated={joker_truncated})")
 
     # Jokers actuels par journée {matchday_id: {player, plays_single, plays_double}}
     current_jokers = {
@@ -443,11 +477,7 @@ def show_team(id: int):
             'racquet': racquet_label,
             'string': f'{string_label}{tension_label}' if string_label != 'Non renseigne' else '—',
         }
-    t3 = time.perf_counter()
-    current_app.logger.debug(f"built racquet tooltips in {t3 - t2:.3f}s")
-
-    t_render_start = time.perf_counter()
-    resp = render_template('show_team.html', team=team, sorted_team_players=sorted_team_players,
+    return render_template('show_team.html', team=team, sorted_team_players=sorted_team_players,
                            visitor_club=visitor_club, distance=distance,
                            duration=(int(elapsed_hours), round(elapsed_minutes)),
                            joker_candidates=joker_candidates,
@@ -458,10 +488,6 @@ def show_team(id: int):
                            avail_map=avail_map,
                            racquet_tooltips=racquet_tooltips,
                            current_racquets=current_racquets)
-    t_render_end = time.perf_counter()
-    total = t_render_end - start_total
-    current_app.logger.debug(f"render_template in {t_render_end - t_render_start:.3f}s, total show_team {total:.3f}s")
-    return resp
 
 
 @club_management_bp.route('/_joker_candidates')
@@ -709,6 +735,48 @@ def save_availability(team_id):
         return jsonify({'success': False, 'error': str(e)})
 
 
+@club_management_bp.route('/optimize_lineup/<int:team_id>/<int:matchday_id>')
+def optimize_lineup(team_id, matchday_id):
+    """API JSON : composition conseillée au capitaine pour une journée (points attendus maximaux)."""
+    from blueprints.club import lineup  # numpy (match_model) : chargé au premier appel
+    team = Team.query.get_or_404(team_id)
+    matchday = Matchday.query.get_or_404(matchday_id)
+    if team.championship is None or matchday.championshipId != team.championship.id:
+        return jsonify({'error': "Journée hors du championnat de l'équipe"}), 400
+    start = time.perf_counter()
+    result = lineup.optimize_lineup(team, matchday).to_dict()
+    current_app.logger.debug(f"optimize_lineup team={team_id} matchday={matchday_id} in {time.perf_counter() - start:.3f}s")
+    return jsonify(result)
+
+
+def _update_players_result(club, results: dict):
+    """Page de résultat d'une mise à jour ({genre: (success, conflicts, deleted_players, updated_count)})."""
+    all_conflicts = []
+    all_deleted = []
+    total_updated = 0
+    messages = []
+    for gender, (success, conflicts, deleted_players, updated_count) in results.items():
+        all_conflicts.extend(conflicts)
+        all_deleted.extend(deleted_players)
+        total_updated += updated_count
+        label = 'joueuses' if gender else 'joueurs'
+        messages.append(f"{updated_count} {label} mis à jour.")
+
+    msg = ' '.join(messages)
+    if all_conflicts:
+        msg += f" {len(all_conflicts)} conflit(s) détecté(s)."
+    if all_deleted:
+        msg += f" {len(all_deleted)} joueur(s) supprimé(s) (absents du CSV)."
+    flash(msg, 'success' if not all_conflicts else 'warning')
+    return render_template(
+        'update_players_result.html',
+        club=club,
+        conflicts=all_conflicts,
+        deleted_players=all_deleted,
+        total_updated=total_updated
+    )
+
+
 @club_management_bp.route('/update_players', methods=['GET', 'POST'])
 @check_club_cookie
 def update_players_route():
@@ -722,55 +790,60 @@ def update_players_route():
     if request.method == 'POST':
         import tempfile, os
 
-        # Sauvegarder les fichiers uploadés dans des fichiers temporaires
-        tmp_paths = {}
-        for gender, gender_label in enumerate(['men', 'women']):
-            file_key = f'csv_{gender_label}'
-            uploaded_file = request.files.get(file_key)
-            if uploaded_file and uploaded_file.filename != '':
-                with tempfile.NamedTemporaryFile(delete=False, suffix='.csv') as tmp:
-                    uploaded_file.save(tmp.name)
-                    tmp_paths[gender] = tmp.name
-
-        if not tmp_paths:
+        # Validation d'un aperçu : fichiers conservés depuis l'envoi
+        token = request.form.get('token')
+        if token:
+            staged = tenup_sync.staged_files(token, club.id)
+            if not staged:
+                flash("Aperçu expiré : renvoyez les fichiers CSV.", 'error')
+                return render_template('update_players.html', club=club)
+            try:
+                results = {gender: tenup_sync.apply_sync(
+                    tenup_sync.plan_sync(club, gender, path, current_app.logger), current_app)
+                    for gender, path in staged.items()}
+            finally:
+                tenup_sync.discard(token)
+            return _update_players_result(club, results)
+
+        uploads = {gender: request.files.get(f'csv_{gender_label}')
+                   for gender, gender_label in enumerate(['men', 'women'])}
+        uploads = {gender: upload for gender, upload in uploads.items() if upload and upload.filename != ''}
+        if not uploads:
             flash("Aucun fichier CSV fourni.", 'error')
             return render_template('update_players.html', club=club)
 
-        all_conflicts = []
-        all_deleted = []
-        total_updated = 0
-        messages = []
+        # Synchronisation incrémentale : aperçu des changements avant écriture
+        if not request.form.get('full'):
+            token = tenup_sync.stage_uploads(club.id, uploads)
+            plans = {gender: tenup_sync.plan_sync(club, gender, path, current_app.logger)
+                     for gender, path in tenup_sync.staged_files(token, club.id).items()}
+            if all(plan.is_empty for plan in plans.values()):
+                tenup_sync.discard(token)
+                results = {gender: tenup_sync.apply_sync(plan, current_app) for gender, plan in plans.items()}
+                return _update_players_result(club, results)
+            return render_template('update_players_preview.html', club=club, plans=plans, token=token)
+
+        # Resynchronisation complète : toutes les lignes réécrites
+        # Sauvegarder les fichiers uploadés dans des fichiers temporaires
+        tmp_paths = {}
+        for gender, uploaded_file in uploads.items():
+            with tempfile.NamedTemporaryFile(delete=False, suffix='.csv') as tmp:
+                uploaded_file.save(tmp.name)
+                tmp_paths[gender] = tmp.name
 
+        results = {}
         try:
             for gender, tmp_path in tmp_paths.items():
-                success, conflicts, deleted_players, updated_count = update_players(
+                results[gender] = update_players(
                     app=current_app, gender=gender, csvfile=tmp_path, club=club, db=db
                 )
-                all_conflicts.extend(conflicts)
-                all_deleted.extend(deleted_players)
-                total_updated += updated_count
-                label = 'joueuses' if gender else 'joueurs'
-                messages.append(f"{updated_count} {label} mis à jour.")
         finally:
             for tmp_path in tmp_paths.values():
                 try:
                     os.unlink(tmp_path)
                 except OSError:
                     pass
-
-        msg = ' '.join(messages)
-        if all_conflicts:
-            msg += f" {len(all_conflicts)} conflit(s) détecté(s)."
-        if all_deleted:
-            msg += f" {len(all_deleted)} joueur(s) supprimé(s) (absents du CSV)."
-        flash(msg, 'success' if not all_conflicts else 'warning')
-        return render_template(
-            'update_players_result.html',
-            club=club,
-            conflicts=all_conflicts,
-            deleted_players=all_deleted,
-            total_updated=total_updated
-        )
+        return _update_players_result(club, results)
 
     return render_template('update_players.html', club=club)
 
@@ -817,6 +890,7 @@ def transfer_player():
             lic.bestRankingId = best_ranking_id
         db.session.add(player)
         db.session.add(lic)
+        PlayerRating.refresh([player])
         done.append(f"{lic.firstName} {lic.lastName} ({old_club_name} → {new_club.name})")
 
     db.session.commit()
@@ -868,6 +942,8 @@ def new_player():
                 if racquet_id:
                     player.racquet_id = int(racquet_id)
                 db.session.add(player)
+                db.session.flush()
+                PlayerRating.refresh([player])
                 db.session.commit()
                 club = Club.query.get(player.clubId)
                 flash(f'{player.name} ajouté avec succès dans le club {club.name}!')
@@ -911,6 +987,7 @@ def update_player(id):
             injury = Injury.query.get(injury_id)
             if injury:  # Vérifiez si l'ID de la blessure est valide
                 player.injuries.append(injury)
+        PlayerRating.refresh([player])
         db.session.commit()
         flash(f'Infos {player.name} mises à jour avec succès!')
         back_url = request.form.get('back_url') or url_for('club.show_player', id=id)
@@ -2,4 +2,4 @@ from flask import Blueprint
 
 shop_bp = Blueprint('shop', __name__, template_folder='templates', static_folder='static')
 
-from . import views
+from . import views, tasks
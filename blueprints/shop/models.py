@@ -37,6 +37,13 @@ class Racquet(db.Model):
     swing_style = db.Column(db.String(20), nullable=True)    # ex: "full"
     play_style = db.Column(db.String(50), nullable=True)     # ex: "baseliner"
 
+    # Filtres du catalogue et des raquettes similaires (tête et poids encadrés), fiche par marque et nom
+    __table_args__ = (
+        db.Index('ix_racquet_head_size_weight', 'head_size', 'strung_weight'),
+        db.Index('ix_racquet_brand_name', 'brand', 'name'),
+        db.Index('ix_racquet_release_year', 'release_year'),
+    )
+
     def __repr__(self):
         return f'{self.brand} {self.name}'
 
@@ -0,0 +1,86 @@
+"""Tâches longues de la boutique exécutées en arrière-plan (voir jobs.py)."""
+import os
+import subprocess
+import sys
+import time
+
+from flask import current_app
+
+from blueprints.shop.views import _merge_payload, _normalize_legacy_ounce_weights, _upsert_racquet
+from extensions import db
+from jobs import task
+
+RACQIX_TIMEOUT = 120
+
+
+@task('shop_scrape')
+def scrape(job, manufacturer: str = '', current_only: bool = False, normalize_legacy: bool = False):
+    from blueprints.shop import scraper as shop_scraper  # requests / bs4 : chargés au premier import
+    created = 0
+    updated = 0
+    skipped = 0
+    parsed_with_head_size = 0
+
+    job.progress(0, 'Chargement de la liste des raquettes')
+    if manufacturer:
+        products = shop_scraper._collect_products_by_stiffness(
+            manufacturer=manufacturer,
+            current_only=current_only,
+        )
+        listing_rows = [shop_scraper.parse_product(p) for p in products]
+    else:
+        listing_rows = shop_scraper.scrape_all(current_only=current_only)
+
+    for i, listing in enumerate(listing_rows):
+        job.progress(i / max(len(listing_rows), 1), f'Raquette {i + 1}/{len(listing_rows)}')
+        pcode = str(listing.get('pcode') or '').strip()
+        details = shop_scraper.scrape_racquet_by_pcode(pcode) if pcode else {}
+        payload = _merge_payload(listing, details)
+
+        if payload.get('head_size') is not None:
+            parsed_with_head_size += 1
+
+        status = _upsert_racquet(payload, mark_current=current_only)
+        if status == 'created':
+            created += 1
+        elif status == 'updated':
+            updated += 1
+        else:
+            skipped += 1
+
+    converted = 0
+    if normalize_legacy:
+        converted = _normalize_legacy_ounce_weights()
+
+    db.session.commit()
+    job.redirect_to('shop.racquets')
+    return (f'Import terminé: {created} créé(es), {updated} mis(es) à jour, {skipped} ignoré(es), '
+            f'{parsed_with_head_size} avec head_size, {converted} poids converti(s) oz→g.')
+
+
+@task('shop_import_racqix')
+def import_racqix(job):
+    """Import/refresh des données racqix (raquettes + cordages) dans un sous-processus annulable."""
+    script = os.path.join(current_app.root_path, 'tools', 'import_racqix.py')
+    process = subprocess.Popen([sys.executable, script], stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                               text=True, cwd=current_app.root_path)
+    start = time.monotonic()
+    try:
+        while True:
+            try:
+                output, _ = process.communicate(timeout=0.5)
+                break
+            except subprocess.TimeoutExpired:
+                elapsed = time.monotonic() - start
+                if elapsed > RACQIX_TIMEOUT:
+                    raise TimeoutError(f'Import Racqix interrompu après {RACQIX_TIMEOUT} s')
+                # Durée inconnue : l'avancement suit le délai maximal autorisé
+                job.progress(elapsed / RACQIX_TIMEOUT, 'Import Racqix en cours')
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.communicate()
+    if process.returncode != 0:
+        raise RuntimeError(f'Erreur import Racqix : {output}')
+    job.redirect_to('shop.racquets')
+    return f'Import Racqix réussi : {output}'
@@ -1,8 +1,8 @@
 from flask import render_template, request, flash, redirect, url_for, current_app, jsonify
 from blueprints.shop import shop_bp
 from blueprints.shop.models import Racquet, RacqixString
-from blueprints.shop import scraper as shop_scraper
 from extensions import db
+import jobs
 from models import Player, PlayerRacquet, License
 from sqlalchemy.orm import selectinload
 
@@ -49,6 +49,7 @@ def _upsert_racquet(payload: dict, mark_current: bool = False) -> str:
 
 def _normalize_legacy_ounce_weights() -> int:
     """Convertit les poids historiques (oz) en grammes quand valeur manifestement en oz."""
+    from blueprints.shop import scraper as shop_scraper  # requests / bs4 : hors du démarrage
     converted = 0
     for r in Racquet.query.all():
         if r.strung_weight is not None and r.strung_weight <= 30:
@@ -316,6 +317,7 @@ def scrape():
     import_enabled = current_app.config.get('SHOP_IMPORT_ENABLED', True)
     manufacturers = []
     try:
+        from blueprints.shop import scraper as shop_scraper
         manufacturers = shop_scraper.fetch_manufacturers()
     except Exception as exc:
         current_app.logger.warning('Impossible de charger les fabricants racquetfinder: %s', exc)
@@ -329,53 +331,10 @@ def scrape():
         current_only = request.form.get('current_only') == 'on'
         normalize_legacy = request.form.get('normalize_legacy') == 'on'
 
-        created = 0
-        updated = 0
-        skipped = 0
-        parsed_with_head_size = 0
-
-        try:
-            if manufacturer:
-                products = shop_scraper._collect_products_by_stiffness(
-                    manufacturer=manufacturer,
-                    current_only=current_only,
-                )
-                listing_rows = [shop_scraper.parse_product(p) for p in products]
-            else:
-                listing_rows = shop_scraper.scrape_all(current_only=current_only)
-
-            for listing in listing_rows:
-                pcode = str(listing.get('pcode') or '').strip()
-                details = shop_scraper.scrape_racquet_by_pcode(pcode) if pcode else {}
-                payload = _merge_payload(listing, details)
-
-                if payload.get('head_size') is not None:
-                    parsed_with_head_size += 1
-
-                status = _upsert_racquet(payload, mark_current=current_only)
-                if status == 'created':
-                    created += 1
-                elif status == 'updated':
-                    updated += 1
-                else:
-                    skipped += 1
-
-            converted = 0
-            if normalize_legacy:
-                converted = _normalize_legacy_ounce_weights()
-
-            db.session.commit()
-            flash(
-                f'Import terminé: {created} créé(es), {updated} mis(es) à jour, {skipped} ignoré(es), '
-                f'{parsed_with_head_size} avec head_size, {converted} poids converti(s) oz→g.',
-                'success',
-            )
-            return redirect(url_for('shop.racquets'))
-        except Exception as exc:
-            db.session.rollback()
-            current_app.logger.exception('Erreur import shop')
-            flash(f'Erreur pendant le scraping: {exc}', 'error')
-            return redirect(url_for('shop.scrape'))
+        job = jobs.enqueue('shop_scrape', f"Import raquettes {manufacturer or 'tous fabricants'}",
+                           manufacturer=manufacturer, current_only=current_only,
+                           normalize_legacy=normalize_legacy)
+        return redirect(url_for('championship.loading', job_id=job.id))
 
     return render_template('shop/scrape.html', manufacturers=manufacturers, import_enabled=import_enabled)
 
@@ -642,6 +601,7 @@ def racquet_selector():
 def diagnose_pcode(pcode):
     """Route de diagnostic : vérifie ce que le scraper récupère pour un pcode donné."""
     try:
+        from blueprints.shop import scraper as shop_scraper
         result = shop_scraper.diagnose_head_size(pcode.upper())
     except Exception as exc:
         result = {'error': str(exc)}
@@ -770,21 +730,6 @@ def strings_api():
 
 @shop_bp.route('/racquets/import-racqix', methods=['POST'])
 def import_racqix():
-    """Import/refresh des données racqix (raquettes + cordages)."""
-    try:
-        import subprocess, sys, os
-        script = os.path.join(current_app.root_path, '..', 'tools', 'import_racqix.py')
-        result = subprocess.run(
-            [sys.executable, script],
-            capture_output=True, text=True, timeout=120,
-            cwd=current_app.root_path + '/..'
-        )
-        output = result.stdout + result.stderr
-        if result.returncode == 0:
-            flash(f'Import Racqix réussi : {output}', 'success')
-        else:
-            flash(f'Erreur import Racqix : {output}', 'error')
-    except Exception as exc:
-        flash(f'Erreur : {exc}', 'error')
-    return redirect(url_for('shop.racquets'))
-
+    """Import/refresh des données racqix (raquettes + cordages), exécuté en arrière-plan."""
+    job = jobs.enqueue('shop_import_racqix', 'Import Racqix (raquettes + cordages)')
+    return redirect(url_for('championship.loading', job_id=job.id))
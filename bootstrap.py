@@ -0,0 +1,152 @@
+"""
+Amorçage d'une base de saison : clubs de la configuration et leurs joueurs.
+
+`import_all_data` relisait `static/data/clubs.csv` (pandas) à chaque club puis
+importait un à un les CSV joueurs (hommes, femmes) de chaque club.  Ici :
+  - l'annuaire des clubs est lu et indexé une seule fois (`load_club_directory`) ;
+  - les CSV joueurs de tous les clubs sont lus et analysés dans un pool de
+    processus (`parse_club_files` : lecture seule, aucun accès à la base),
+    démarrés par « spawn » : l'amorçage tourne dans le serveur, dont les
+    threads (jobs, planificateur) pourraient tenir un verrou au moment d'un
+    fork et bloquer l'enfant ;
+  - un seul écrivain, le processus appelant, crée les clubs manquants en une
+    transaction puis applique en masse les lignes de chaque club
+    (`common.import_players`) au fil de leur lecture, en rapportant la
+    progression club par club (`ClubReport`).
+"""
+from __future__ import annotations
+
+import csv
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Iterator, Optional
+
+import common
+import tenup_import
+from extensions import db
+from models import Club
+
+CLUBS_CSV = 'static/data/clubs.csv'
+GENDER_LABELS = ('men', 'women')
+_INT_FIELDS = ('tennis_courts', 'padel_courts', 'beach_courts')
+_FLOAT_FIELDS = ('latitude', 'longitude')
+
+
+def load_club_directory(csv_file) -> dict:
+    """Annuaire Tenup des clubs : {identifiant (texte): {name, city, courts, latitude, longitude}}."""
+    directory = {}
+    with open(csv_file, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            info = {'name': row['name'], 'city': row['city']}
+            info.update((key, int(row[key]) if row.get(key) else None) for key in _INT_FIELDS)
+            info.update((key, float(row[key]) if row.get(key) else None) for key in _FLOAT_FIELDS)
+            directory[row['id'].strip()] = info
+    return directory
+
+
+def new_club(club_info: dict, directory: dict) -> Club:
+    """Club de la configuration, complété par l'annuaire (nom, ville, courts, coordonnées) s'il y figure."""
+    tenup = directory.get(str(club_info['id']))
+    if tenup is None:
+        return Club(id=club_info['id'], name=club_info['name'], city=club_info['city'])
+    return Club(id=club_info['id'], **tenup)
+
+
+def players_csv_path(base_path: str, club_info: dict, gender: int) -> str:
+    return os.path.join(base_path, f"static/data/players/{club_info['csvfile']}_{GENDER_LABELS[gender]}.csv")
+
+
+def _parse(path: str) -> Optional[list]:
+    """Lignes brutes d'un CSV joueurs (exécuté dans un worker), None si le fichier est absent."""
+    try:
+        return tenup_import.parse_file(path)
+    except FileNotFoundError:
+        return None
+
+
+def parse_club_files(paths: list, workers: int = 1) -> Iterator[tuple]:
+    """(chemin, [ParsedRow] ou None) dans l'ordre de `paths`, lus sur `workers` processus.
+
+    Les résultats sont rendus au fil de l'eau : l'écrivain traite le premier
+    club pendant que les suivants sont encore en lecture.
+    """
+    if workers <= 1 or len(paths) <= 1:
+        for path in paths:
+            yield path, _parse(path)
+        return
+    with ProcessPoolExecutor(max_workers=min(workers, len(paths)),
+                             mp_context=multiprocessing.get_context('spawn')) as executor:
+        yield from zip(paths, executor.map(_parse, paths))
+
+
+@dataclass
+class ClubReport:
+    """Résultat de l'amorçage d'un club."""
+    club: Club
+    created: bool                                  # club créé par cet amorçage
+    players: dict = field(default_factory=dict)    # {genre: joueurs du club après import}
+    conflicts: dict = field(default_factory=dict)  # {genre: [conflits]} – rien n'est écrit pour ce genre
+    missing: list = field(default_factory=list)    # genres sans fichier CSV
+    duration: float = 0.0                          # s, écriture du club
+
+    def messages(self) -> list:
+        messages = [f'Club {self.club} créé avec succès!' if self.created else f'Club {self.club} déjà présent.']
+        for gender in (0, 1):
+            if gender in self.missing:
+                messages.append(f"Aucun fichier {'joueuses' if gender else 'joueurs'} pour ce club.")
+            elif self.conflicts.get(gender):
+                messages.append(f"ERREUR: {len(self.conflicts[gender])} conflit(s) détecté(s) pour les "
+                                f"{'joueuses' if gender else 'joueurs'}!")
+            else:
+                messages.append(f"{self.players.get(gender, 0)} {'joueuses ajoutées' if gender else 'joueurs ajoutés'}!")
+        return messages
+
+
+def bootstrap_clubs(app, clubs: list, workers: int = 1,
+                    progress: Callable[[int, int, ClubReport], None] = None) -> list:
+    """Crée les clubs actifs de `clubs` (format `Config.CLUBS`) et importe leurs joueurs.
+
+    Les clubs déjà en base sont conservés (leurs joueurs déjà présents ne sont
+    pas dupliqués).  `progress(done, total, report)` est appelé après chaque club.
+    Retourne un `ClubReport` par club actif, dans l'ordre de `clubs`.
+    """
+    active = [club_info for club_info in clubs if club_info['active']]
+    if not active:
+        return []
+    base_path = app.config['BASE_PATH']
+    directory = load_club_directory(os.path.join(base_path, CLUBS_CSV))
+    existing = {club.id: club for club in Club.query.filter(Club.id.in_([c['id'] for c in active]))}
+    created = {club_info['id']: new_club(club_info, directory) for club_info in active
+               if club_info['id'] not in existing}
+    db.session.add_all(created.values())
+    db.session.commit()
+
+    paths = [players_csv_path(base_path, club_info, gender) for club_info in active for gender in (0, 1)]
+    parsed = parse_club_files(paths, workers)
+    reports = []
+    for index, club_info in enumerate(active):
+        club = existing.get(club_info['id']) or created[club_info['id']]
+        report = ClubReport(club=club, created=club_info['id'] in created)
+        start = time.perf_counter()
+        for gender in (0, 1):
+            path, rows = next(parsed)
+            if rows is None:
+                report.missing.append(gender)
+                app.logger.warning(f'Amorçage {club} : fichier {path} non trouvé.')
+                continue
+            success, conflicts, players_count = common.import_players(
+                app=app, gender=gender, csvfile=path, club=club, db=db,
+                rows=tenup_import.resolve_rows(rows, app.logger))
+            report.players[gender] = players_count
+            if conflicts:
+                report.conflicts[gender] = conflicts
+        report.duration = time.perf_counter() - start
+        app.logger.info(f'Amorçage {index + 1}/{len(active)} : {club} – {report.players.get(0, 0)} joueurs, '
+                        f'{report.players.get(1, 0)} joueuses ({report.duration:.2f}s)')
+        reports.append(report)
+        if progress:
+            progress(index + 1, len(active), report)
+    return reports
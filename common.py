@@ -11,17 +11,24 @@ from enum import Enum
 from random import shuffle, choice, random, sample, randint
 from typing import List, Optional
 
-import pandas as pd
-from sqlalchemy import desc, asc, and_
+from sqlalchemy import desc, asc, and_, insert, select
+from sqlalchemy.orm import contains_eager, selectinload
 
 from random import random
 from typing import List
 
-from models import Club, Player, AgeCategory, Division, Ranking, License, Championship, BestRanking, Team, Pool, Match, Matchday, Single, Score, Double, Injury, InjurySite
-from tools.import_csv import extract
+from models import ClubHostingBlackout, PlayerMatchdayAvailability, player_team_association, Club, Player, AgeCategory, Division, Ranking, License, Championship, BestRanking, Team, Pool, Match, Matchday, Single, Score, Double, Injury, InjurySite, ranking_ladder, team_strengths, PlayerRating
+import bootstrap
+import pool_builder
+import pool_schedule
+import roster
+import simulation_lineups
+import standings
+import tenup_import
+from tenup_import import _open_tenup_csv, parse_csv_license_ids, parse_ranking_field  # noqa: F401  (réexportés)
 
-from mapbox import Directions
-from geojson import Feature, Point
+# numpy (match_model), mapbox et geojson sont importés dans les fonctions qui s'en servent :
+# le démarrage de l'application et des scripts ne les charge pas.
 
 
 class CatType(Enum):
@@ -125,35 +132,10 @@ def import_all_data(app, db) -> str:
         load_injuries(app, db)
     message += [f"{Injury.query.count()} pathologies sportives insérés en bdd!<br>"]
 
-    for club_info in app.config['CLUBS']:
-        # récupération autres infos dans fichier csv du club
-        BASE_PATH = os.path.dirname(__file__)
-        csv_file = os.path.join(BASE_PATH, f'static/data/clubs.csv')
-        df = pd.read_csv(csv_file)
-        colonnes_a_recuperer = ['name', 'city', 'tennis_courts', 'padel_courts', 'beach_courts', 'latitude', 'longitude']
-        club_tenup = extract(df=df, field_criteria='id', field_value=club_info['id'], columns=colonnes_a_recuperer)
-        app.logger.debug(f'club_tenup: {club_tenup}')
-        if not club_info['active']:
-            continue
-        if club_tenup is None:
-            club = Club(id=club_info['id'], name=club_info['name'], city=club_info['city'])
-        else:
-            club = Club(id=club_info['id'], name=club_tenup['name'], city=club_tenup['city'], tennis_courts=club_tenup['tennis_courts'],
-                        padel_courts=club_tenup['padel_courts'], beach_courts=club_tenup['beach_courts'], latitude=club_tenup['latitude'], longitude=club_tenup['longitude'])
-        db.session.add(club)
-        app.logger.debug(f'default_club: {club}')
-        db.session.commit()
-        message += [f'Club {club} créé avec succès!']
-        # Chargement des joueurs du club
-        for gender, gender_label in enumerate(['men', 'women']):
-            players_csvfile = f"static/data/players/{club_info['csvfile']}_{gender_label}.csv"
-            file_path = os.path.join(app.config['BASE_PATH'], players_csvfile)
-            success, conflicts, players_count = import_players(app=app, gender=gender, csvfile=file_path, club=club, db=db)
-            if not success and conflicts:
-                message += [f"ERREUR: {len(conflicts)} conflit(s) détecté(s) pour les {'joueuses' if gender else 'joueurs'}!"]
-            else:
-                message += [f"{players_count} {'joueuses ajoutées' if gender else 'joueurs ajoutés'}!"]
-        message += ['<br>']
+    # Clubs et joueurs : CSV lus en parallèle, écrits par ce seul processus (voir bootstrap.py)
+    workers = app.config.get('BOOTSTRAP_WORKERS', 1)
+    for report in bootstrap.bootstrap_clubs(app, app.config['CLUBS'], workers=workers):
+        message += report.messages() + ['<br>']
     message += ['<br>']
     # app.logger.debug(message)
     return '<br>'.join(message)
@@ -229,6 +211,7 @@ def load_rankings(db, Model: Ranking | BestRanking):
     rankings += [Model(value=other, series=None)]
     db.session.add_all(rankings)
     db.session.commit()
+    ranking_ladder.invalidate()
 
 
 def load_injuries(app, db):
@@ -252,114 +235,6 @@ def load_injuries(app, db):
     db.session.commit()
 
 
-# Valeurs Tenup qui correspondent à "Non Classé" (NC)
-_NC_ALIASES = {
-    'nd', 'niveau non déterminé', 'niveau non determine', 'niveau non dtermin',
-    'niveau blanc', 'niveau orange', 'niveau rouge', 'niveau violet', 'niveau jaune',
-    'nc', '',
-}
-
-
-def parse_ranking_field(raw: str) -> tuple:
-    """
-    Analyse la colonne 'C. Tennis' d'un export Tenup et retourne
-    (current_ranking_value: str, best_ranking_value: str | None).
-
-    Cas gérés :
-      - vide / None                        → ('NC', None)
-      - 'ND' / 'Niveau Non Déterminé' / niveaux couleur  → ('NC', None)
-      - 'NC'                               → ('NC', None)
-      - 'NC (ex 30/4)'                     → ('NC', '30/4')
-      - '15/2 (ex 3/6)'                    → ('15/2', '3/6')
-      - '15/2'                             → ('15/2', None)
-    """
-    raw = (raw or '').strip()
-    normalized = raw.lower()
-
-    # Vérifier si la partie courante est un alias NC
-    # Le format peut être "Niveau Non Déterminé (ex 30/4)" ou juste "NC"
-    # On sépare d'abord la partie "(ex ...)" si présente
-    best_value = None
-    ex_match = re.search(r'\(ex\s+([^)]+)\)', raw, re.IGNORECASE)
-    if ex_match:
-        best_value = ex_match.group(1).strip()
-        current_part = raw[:ex_match.start()].strip()
-    else:
-        current_part = raw
-
-    current_normalized = current_part.lower().strip()
-    if current_normalized in _NC_ALIASES:
-        return 'NC', best_value
-
-    # Valeur de classement standard (ex: "15/2", "30", "-2/6", "40")
-    return current_part if current_part else 'NC', best_value
-
-
-def _open_tenup_csv(csvfile):
-    """
-    Ouvre un fichier CSV Tenup en gérant les variantes d'encodage du header.
-    Retourne une liste de dicts avec des clés normalisées :
-      'prenom', 'nom', 'naissance', 'licence', 'club', 'classement'
-    """
-    import unicodedata
-
-    def normalize(s):
-        """Supprime les accents et met en minuscules pour comparaison."""
-        return unicodedata.normalize('NFD', s).encode('ascii', 'ignore').decode().lower().strip()
-
-    COL_MAP = {
-        'prenom': 'prenom',
-        'nom':    'nom',
-        'ne en':  'naissance',
-        'licence':'licence',
-        'club':   'club',
-        'c. tennis': 'classement',
-    }
-
-    for encoding in ('utf-8', 'utf-8-sig', 'latin-1', 'cp1252'):
-        try:
-            with open(csvfile, 'r', newline='', encoding=encoding) as f:
-                reader = csv.DictReader(f, delimiter='\t')
-                raw_rows = list(reader)
-                if not raw_rows:
-                    return []
-                # Construire le mapping clé brute → clé normalisée
-                key_map = {}
-                for raw_key in raw_rows[0].keys():
-                    norm = normalize(raw_key)
-                    for pattern, canonical in COL_MAP.items():
-                        if pattern in norm:
-                            key_map[raw_key] = canonical
-                            break
-                # Convertir les lignes
-                result = []
-                for row in raw_rows:
-                    mapped = {canonical: row.get(raw_key, '')
-                              for raw_key, canonical in key_map.items()}
-                    result.append(mapped)
-                return result
-        except (UnicodeDecodeError, LookupError):
-            continue
-    return []
-
-
-def parse_csv_license_ids(csvfile) -> set:
-    """
-    Lit un fichier CSV Tenup et retourne l'ensemble des numéros de licence présents.
-    Utile pour un pré-scan avant traitement.
-    """
-    ids = set()
-    try:
-        for row in _open_tenup_csv(csvfile):
-            license_info = row.get('licence', '')
-            match = re.match(r'(\d+)\s*(\w)', license_info)
-            if match:
-                ids.add(int(match.group(1)))
-    except FileNotFoundError:
-        pass
-    return ids
-
-
 def update_players(app, gender, csvfile, club, db, all_csv_license_ids: set = None):
     """
     Met à jour les classements des joueurs d'un club depuis un fichier CSV Tenup.
@@ -369,111 +244,56 @@ def update_players(app, gender, csvfile, club, db, all_csv_license_ids: set = No
     - Retourne: (success: bool, conflicts: list, deleted_players: list, updated_count: int)
       conflicts       : joueurs du CSV de ce club déjà rattachés à un autre club en base
       deleted_players : joueurs supprimés car absents du CSV
+    Licences et joueurs existants préchargés, écritures groupées en une transaction (voir tenup_import).
     """
     conflicts = []
     deleted_players = []
-    updated_count = 0
     try:
-        csv_license_ids = set()
-        rows_to_process = []
-
-        for row in _open_tenup_csv(csvfile):
-            first_name    = row.get('prenom', '')
-            last_name     = row.get('nom', '')
-            birth_year    = row.get('naissance', '')
-            license_info  = row.get('licence', '')
-            ranking_value = row.get('classement', '')
-
-            match = re.match(r'(\d+)\s*(\w)', license_info)
-            if not match:
-                continue
-
-            current_ranking_value, best_ranking_value = parse_ranking_field(ranking_value)
-            current_ranking = Ranking.query.filter(Ranking.value == current_ranking_value).first()
-            best_ranking = BestRanking.query.filter(BestRanking.value == best_ranking_value).first() if best_ranking_value else None
-            if not current_ranking:
-                app.logger.warning(f'Classement inconnu "{current_ranking_value}" pour {first_name} {last_name} – ligne ignorée.')
-                continue
-            lic_number = int(match.group(1))
-            lic_letter = match.group(2)
-            csv_license_ids.add(lic_number)
-            rows_to_process.append({
-                'lic_number': lic_number,
-                'lic_letter': lic_letter,
-                'first_name': first_name,
-                'last_name': last_name,
-                'birth_year': birth_year,
-                'current_ranking': current_ranking,
-                'best_ranking': best_ranking,
-            })
-
-        # Traitement ligne par ligne : mise à jour ou création
-        for data in rows_to_process:
-            lic_number = data['lic_number']
-            existing_license = License.query.filter_by(id=lic_number).first()
-            if existing_license:
-                existing_player = Player.query.filter_by(licenseId=existing_license.id).first()
-                if existing_player and str(existing_player.clubId) != str(club.id):
-                    existing_club = Club.query.get(existing_player.clubId)
-                    conflicts.append({
-                        'license_id': lic_number,
-                        'license_number': f"{lic_number} {data['lic_letter']}",
-                        'name': f"{data['first_name']} {data['last_name']}",
-                        'ranking': data['current_ranking'].value if data['current_ranking'] else 'N/A',
-                        'ranking_id': data['current_ranking'].id if data['current_ranking'] else None,
-                        'best_ranking_id': data['best_ranking'].id if data['best_ranking'] else None,
-                        'current_club': existing_club.name if existing_club else 'Inconnu',
-                        'new_club': club.name,
-                        'new_club_id': club.id,
-                    })
-                    continue
-                # Mise à jour du classement
-                if data['current_ranking']:
-                    existing_license.rankingId = data['current_ranking'].id
-                if data['best_ranking']:
-                    existing_license.bestRankingId = data['best_ranking'].id
-                db.session.add(existing_license)
-                if existing_player:
-                    db.session.add(existing_player)
-                else:
-                    # Licence connue mais player absent → créer le player
-                    try:
-                        birth_year = datetime.strptime(data['birth_year'], '%Y').replace(month=1, day=1)
-                    except (ValueError, TypeError):
-                        birth_year = None
-                    new_player = Player(birthDate=birth_year, isActive=True, hiddenInTenup=False)
-                    new_player.clubId = club.id
-                    new_player.licenseId = existing_license.id
-                    db.session.add(new_player)
-                    app.logger.debug(f"Joueur créé (licence existante) : {data['first_name']} {data['last_name']}")
-                updated_count += 1
-            else:
+        rows = tenup_import.read_rows(csvfile, app.logger)
+        known = tenup_import.known_licenses(rows)
+        other_clubs = tenup_import.club_names({k.club_id for k in known.values()
+                                               if k.player_id is not None and str(k.club_id) != str(club.id)})
+
+        new_licenses, updated_licenses, new_players = [], [], {}
+        for data in rows.values():
+            existing = known.get(data.license_id)
+            if existing is None:
                 # Joueur inconnu en base → créer licence + joueur
-                try:
-                    birth_year = datetime.strptime(data['birth_year'], '%Y').replace(month=1, day=1)
-                except (ValueError, TypeError):
-                    app.logger.warning(f"Année de naissance invalide pour {data['first_name']} {data['last_name']} – ligne ignorée.")
+                if data.birth_date is None:
+                    app.logger.warning(f"Année de naissance invalide pour {data.first_name} {data.last_name} – ligne ignorée.")
                     continue
-                license = License(
-                    id=lic_number,
-                    firstName=data['first_name'],
-                    lastName=data['last_name'],
-                    letter=data['lic_letter'],
-                    year=birth_year.year,
-                    gender=gender,
-                    rankingId=data['current_ranking'].id,
-                    bestRankingId=data['best_ranking'].id if data['best_ranking'] else data['current_ranking'].id,
-                )
-                db.session.add(license)
-                db.session.flush()  # rendre l'id de la licence disponible pour le joueur
-                player = Player(birthDate=birth_year, isActive=True, hiddenInTenup=False)
-                player.clubId = club.id
-                player.licenseId = license.id
-                db.session.add(player)
-                updated_count += 1
+                new_licenses.append(data)
+                new_players[data.license_id] = data.birth_date
+            elif existing.player_id is not None and str(existing.club_id) != str(club.id):
+                conflicts.append({
+                    'license_id': data.license_id,
+                    'license_number': f"{data.license_id} {data.letter}",
+                    'name': f"{data.first_name} {data.last_name}",
+                    'ranking': data.ranking_value,
+                    'ranking_id': data.ranking_id,
+                    'best_ranking_id': data.best_ranking_id,
+                    'current_club': other_clubs.get(existing.club_id, 'Inconnu'),
+                    'new_club': club.name,
+                    'new_club_id': club.id,
+                })
+            else:
+                # Mise à jour du classement ; licence connue mais player absent → créer le player
+                updated_licenses.append(data)
+                if existing.player_id is None:
+                    new_players[data.license_id] = data.birth_date or datetime(existing.year, 1, 1)
+
+        tenup_import.insert_licenses(new_licenses, gender)
+        tenup_import.update_rankings(updated_licenses)
+        tenup_import.insert_players(club.id, new_players)
+        updated_count = len(new_licenses) + len(updated_licenses)
+        db.session.expire_all()
+        team_strengths.invalidate()
 
         # Supprimer les joueurs du club absents du CSV
-        club_players = Player.query.join(Player.license).filter(
+        csv_license_ids = set(rows)
+        club_players = Player.query.join(Player.license).options(
+            contains_eager(Player.license), selectinload(Player.teams)
+        ).filter(
             Player.clubId == club.id,
             License.gender == gender
         ).all()
@@ -488,6 +308,8 @@ def update_players(app, gender, csvfile, club, db, all_csv_license_ids: set = No
                 })
                 db.session.delete(player)
 
+        db.session.flush()
+        PlayerRating.refresh_club(club.id, gender)
         db.session.commit()
         app.logger.debug(
             f'UPDATE PLAYERS DONE: {updated_count} mis à jour, '
@@ -501,87 +323,71 @@ def update_players(app, gender, csvfile, club, db, all_csv_license_ids: set = No
         return False, [], [], 0
 
 
-def import_players(app, gender, csvfile, club, db):
+def import_players(app, gender, csvfile, club, db, rows: dict = None):
     """
     Import players from CSV file.
     Returns: (success: bool, conflicts: list, players_count: int)
+    Rien n'est écrit en cas de conflit ; sinon licences, joueurs et blessures
+    sont insérés en masse dans une seule transaction (voir tenup_import).
+    rows : lignes déjà lues (tenup_import.resolve_rows) ; csvfile n'est alors pas relu.
     """
     conflicts = []
     try:
-        for row in _open_tenup_csv(csvfile):
-            # Formatting player data
-            first_name    = row.get('prenom', '')
-            last_name     = row.get('nom', '')
-            birth_year    = row.get('naissance', '')
-            license_info  = row.get('licence', '')
-            ranking_value = row.get('classement', '')
-            match = re.match(r'(\d+)\s*(\w)', license_info)
-            if not match:
-                continue
-            # Parsing du classement via la fonction dédiée
-            current_ranking_value, best_ranking_value = parse_ranking_field(ranking_value)
-            current_ranking = Ranking.query.filter(Ranking.value == current_ranking_value).first()
-            best_ranking = BestRanking.query.filter(BestRanking.value == best_ranking_value).first() if best_ranking_value else None
-            if not current_ranking:
-                app.logger.warning(f'Classement inconnu "{current_ranking_value}" pour {first_name} {last_name} – ligne ignorée.')
-                continue
-            lic_number = int(match.group(1))
-            lic_letter = match.group(2)
-
-            # Vérifier si la licence existe déjà
-            existing_license = License.query.filter_by(id=lic_number).first()
-            if existing_license:
-                existing_player = Player.query.filter_by(licenseId=existing_license.id).first()
-                if existing_player and str(existing_player.clubId) != str(club.id):
-                    existing_club = Club.query.get(existing_player.clubId)
+        if rows is None:
+            rows = tenup_import.read_rows(csvfile, app.logger)
+        known = tenup_import.known_licenses(rows)
+        other_clubs = tenup_import.club_names({k.club_id for k in known.values()
+                                               if k.player_id is not None and str(k.club_id) != str(club.id)})
+        new_licenses, new_players = [], {}
+        for data in rows.values():
+            existing = known.get(data.license_id)
+            if existing is not None and existing.player_id is not None:
+                if str(existing.club_id) != str(club.id):
                     conflicts.append({
-                        'license_number': f'{lic_number} {lic_letter}',
-                        'name': f'{first_name} {last_name}',
-                        'ranking': current_ranking.value if current_ranking else 'N/A',
-                        'current_club': existing_club.name if existing_club else 'Inconnu',
+                        'license_number': f'{data.license_id} {data.letter}',
+                        'name': f'{data.first_name} {data.last_name}',
+                        'ranking': data.ranking_value,
+                        'current_club': other_clubs.get(existing.club_id, 'Inconnu'),
                         'new_club': club.name
                     })
-                    continue
-
-            # Convertir l'année en datetime
-            year_date = datetime.strptime(birth_year, '%Y')
-            year_start_date = year_date.replace(month=1, day=1)
+                continue  # joueur déjà présent dans le club
+            if data.birth_date is None:
+                app.logger.warning(f"Année de naissance invalide pour {data.first_name} {data.last_name} – ligne ignorée.")
+                continue
+            if existing is None:
+                new_licenses.append(data)
+            new_players[data.license_id] = data.birth_date
 
-            if existing_license:
-                license = existing_license
-            else:
-                license = License(id=lic_number, gender=gender, firstName=first_name, lastName=last_name,
-                                  letter=lic_letter, year=year_start_date.year,
-                                  rankingId=current_ranking.id,
-                                  bestRankingId=best_ranking.id if best_ranking else current_ranking.id)
-                db.session.add(license)
-                db.session.flush()
-
-            player = Player(birthDate=year_start_date, weight=None, height=None, isActive=True)
-            player.clubId, player.licenseId = club.id, license.id
-            db.session.add(player)
-            db.session.commit()
-            player = Player.query.get(player.id)
-            injuries = Injury.query.all()
-            injuries_id = [i.id for i in injuries]
-            if (player.age > 45 and randint(1, 10) == 1) or (player.age > 35 and randint(1, 20) == 1):
-                max_injuries_count = (player.age // 20)
-                selected_injuries = sample(injuries_id, randint(1, max_injuries_count))
-                for injury_id in selected_injuries:
-                    player.injuries.append(Injury.query.get(injury_id))
-            db.session.add(player)
-
-        # Si des conflits ont été détectés, faire un rollback
+        # Si des conflits ont été détectés, ne rien écrire
         if conflicts:
             db.session.rollback()
             app.logger.warning(f'{len(conflicts)} conflit(s) détecté(s) lors de l\'importation des joueurs.')
             return False, conflicts, 0
 
+        tenup_import.insert_licenses(new_licenses, gender)
+        created = tenup_import.insert_players(club.id, new_players)
+
+        # Blessures tirées au hasard pour les joueurs de plus de 35 ans
+        injuries_id = list(db.session.execute(select(Injury.id)).scalars())
+        today = datetime.now()
+        injured = []
+        for license_id, player_id in created.items():
+            birth_date = new_players[license_id]
+            age = today.year - birth_date.year - ((today.month, today.day) < (birth_date.month, birth_date.day))
+            if injuries_id and ((age > 45 and randint(1, 10) == 1) or (age > 35 and randint(1, 20) == 1)):
+                max_injuries_count = (age // 20)
+                selected_injuries = sample(injuries_id, min(randint(1, max_injuries_count), len(injuries_id)))
+                injured += [(player_id, injury_id) for injury_id in selected_injuries]
+        tenup_import.insert_injuries(injured)
+
+        db.session.expire_all()
+        PlayerRating.refresh_club(club.id, gender)
         db.session.commit()
         players_count = Player.query.join(Player.license).filter(Player.clubId == club.id, License.gender == gender).count()
         app.logger.debug(f'COMMIT PLAYERS DONE = {players_count}')
         return True, [], players_count
     except FileNotFoundError:
+        db.session.rollback()
         if hasattr(app, 'logger'):
             app.logger.warning("Aucun joueur importé : aucun fichier CSV défini.")
         else:
@@ -590,28 +396,8 @@ def import_players(app, gender, csvfile, club, db):
 
 
 def get_players_order_by_ranking(gender: int, club_id: str, asc_param=True, age_category=None, is_active=True) -> List[Player]:
-    order = asc if asc_param else desc
-    if gender in [Gender.Male.value, Gender.Female.value]:
-        players = Player.query \
-            .join(Player.license) \
-            .join(License.ranking) \
-            .filter(Player.isActive == is_active, License.gender == gender, Player.clubId == club_id) \
-            .order_by(Ranking.id) \
-            .all()
-        if age_category:
-            # Filter players based on age category using Python
-            players = [player for player in players if player.has_valid_age(age_category)]
-    else:
-        players = Player.query \
-            .join(Player.license) \
-            .join(License.ranking) \
-            .filter(Player.isActive == is_active, Player.clubId == club_id) \
-            .order_by(Ranking.id) \
-            .all()
-        if age_category:
-            # Filter players based on age category using Python
-            players = [player for player in players if player.has_valid_age(age_category)]
-    return players
+    """Joueurs du club triés par classement ; catégorie d'âge filtrée en SQL (voir roster.py)."""
+    return roster.eligible_players(gender, age_category=age_category, club_ids=[club_id], is_active=is_active)
 
 
 def get_championships(gender: int) -> List[Championship]:
@@ -659,60 +445,54 @@ def remove_text_between_parentheses(text):
 
 # Section 1.1: formation des équipes
 def form_teams(championship, club_ids_to_filter: list[int] = None):
+    """Une équipe par club ayant assez de joueurs éligibles (15 meilleurs), en une requête (voir roster.py)."""
     teams = []
-    for club in Club.query.all():
-        if club_ids_to_filter and club.id in club_ids_to_filter:
+    for club_id, players in roster.eligible_rosters(championship, top_n=15).items():
+        if club_ids_to_filter and club_id in club_ids_to_filter:
             continue
-        players = get_players_order_by_ranking(
-            gender=championship.division.gender,
-            club_id=club.id,
-            asc_param=True,
-            age_category=championship.age_category,
-            is_active=True
-        )
         if len(players) < championship.singlesCount:
             continue
         captain = max(players, key=lambda p: p.best_elo)
-        club_name = remove_text_between_parentheses(club.name)
-        team = Team(name=f'{club_name} 1', captainId=captain.id, clubId=club.id)
-        team.players = players[:15]
+        club_name = remove_text_between_parentheses(players[0].club.name)
+        team = Team(name=f'{club_name} 1', captainId=captain.id, clubId=club_id)
+        team.players = players
         teams.append(team)
     return teams
 
 # Section 1.2: Création des poules et assignation des équipes
 def create_pools_and_assign_teams(app, db, championship, teams):
+    """Crée les poules du championnat : forces équilibrées et déplacements minimaux (voir pool_builder).
+
+    Retourne (équipes par poule, équipes exemptées, PoolAssignment avec les indicateurs atteints).
+    """
     M = min(len(teams), len(championship.matchdays))
     num_teams_per_pool = M if M % 2 == 0 else M + 1
     num_pools = len(teams) // num_teams_per_pool
-    teams.sort(key=lambda t: t.weight(championship))
+    teams[:] = team_strengths.sort(teams, championship.singlesCount)
     selected_teams = teams[:num_pools * num_teams_per_pool]
     exempted_teams = teams[num_pools * num_teams_per_pool:]
 
-    for i in range(0, len(selected_teams), num_teams_per_pool):
-        pool = Pool(letter=chr(ord('A') + i // num_teams_per_pool), championshipId=championship.id)
-        db.session.add(pool)
-        db.session.commit()
-
     app.logger.debug(f'selected_teams = {selected_teams}')
-    team_candidates = [*selected_teams]
-    while team_candidates:
-        letters: list[str] = [p.letter for p in championship.pools]
-        shuffle(letters)
-        for letter in letters:
-            pool = Pool.query.filter(Pool.championshipId == championship.id, Pool.letter == letter).first()
-            team = team_candidates.pop()
-            team.poolId = pool.id
+    weights = [strength.weight for strength in team_strengths.for_teams(selected_teams, championship.singlesCount)]
+    distances = pool_builder.distance_matrix([team.clubId for team in selected_teams])
+    assignment = pool_builder.build_pools(weights, distances, num_pools, num_teams_per_pool,
+                                          time_limit=app.config.get('POOL_BUILDER_TIME_LIMIT', 5.0))
+    app.logger.info(f'{championship}: {assignment.summary()}')
+
+    for p, members in enumerate(assignment.pools):
+        pool = Pool(letter=chr(ord('A') + p), championshipId=championship.id)
+        db.session.add(pool)
+        for i in members:
+            selected_teams[i].pool = pool
 
     exempted_pool = Pool(championshipId=championship.id)
     db.session.add(exempted_pool)
-    db.session.commit()
     for team in exempted_teams:
-        team.poolId = exempted_pool.id
-    teams = selected_teams + exempted_teams
-    db.session.add_all(teams)
+        team.pool = exempted_pool
+    db.session.add_all(selected_teams + exempted_teams)
     db.session.commit()
 
-    return num_teams_per_pool, exempted_teams
+    return num_teams_per_pool, exempted_teams, assignment
 
 def populate_championship(app, db, championship: Championship):
     # Section I: Constitution des poules et journées de championnat
@@ -721,7 +501,7 @@ def populate_championship(app, db, championship: Championship):
         teams = form_teams(championship)
 
         # Section 1.2: Création des poules et assignation des équipes
-        num_teams_per_pool, exempted_teams = create_pools_and_assign_teams(app, db, championship, teams)
+        num_teams_per_pool, exempted_teams, _ = create_pools_and_assign_teams(app, db, championship, teams)
 
     except Exception as e:
         app.logger.debug(f"Erreur dans la fonction 'populate_championship'!")
@@ -762,7 +542,7 @@ def populate_championship_old(app, db, championship: Championship):
         M = min(len(teams) - 1, len(championship.matchdays))
         num_teams_per_pool = M + 1 if M % 2 == 0 else M
         num_pools = len(teams) // num_teams_per_pool
-        teams.sort(key=lambda t: t.weight(championship))
+        teams[:] = team_strengths.sort(teams, championship.singlesCount)
         selected_teams = teams[:num_pools * num_teams_per_pool]
         exempted_teams = teams[num_pools * num_teams_per_pool:]
         # shuffle(selected_teams)
@@ -832,64 +612,9 @@ def populate_championship_old(app, db, championship: Championship):
 
 
 def round_robin(n):
-    a = []
-    b = []
-    c = (n * (n - 1)) / 2
-    c = int(c)
-    e = []
-    f = []
-    result = []
-    result1 = []
-
-    # creating (0,1), (0,2) ··· (n-1, n)
-    f = [(i1, i2) for i1 in range(n) for i2 in range(n) if i1 < i2]
-
-    # creating list of waiting time a = [0,1,2, ··· , n-1] and b = [0,0, ··· , 0]
-    for i in range(n):
-        a.append(i)
-        b.append(0)
-
-    # main dish
-    for i1 in range(c):
-        d1 = b.copy()
-        d2 = a.copy()
-        e = []
-
-        # ordering from largest waiting time to smallest waiting time e = [largest to smallest] in index
-        # d1 is the waiting time list
-        # d2 is [0,1,···,n-1] but decreases gradually
-        for j in range(n):
-            m = max(d1)
-            for k in range(n):
-                if b[k] == m and k not in e:
-                    n1 = k
-                    e.append(n1)
-                    d1.remove(m)
-                    d2.remove(n1)
-                    break
-                else:
-                    continue
-
-        for (p, q) in f:
-            if (e[p], e[q]) not in result and (e[q], e[p]) not in result:
-                result.append((e[p], e[q]))
-                for i in range(n):
-                    if i != e[p] and i != e[q]:
-                        b[i] = b[i] + 1
-                    else:
-                        b[i] = 0
-                break
-            else:
-                continue
-
-    # making (2,0)s into (0,2)s
-    for (k1, k2) in result:
-        if k1 < k2:
-            result1.append((k1 + 1, k2 + 1))
-        else:
-            result1.append((k2 + 1, k1 + 1))
-
-    return result1
+    """Paires (i, j), i < j, de 1 à n, journée par journée (méthode du cercle, voir pool_schedule)."""
+    return [(min(home, visitor) + 1, max(home, visitor) + 1)
+            for home, visitor in pool_schedule.schedule_round_robin(n).pairs()]
 
 
 def paires_avec_somme_N(liste, N):
@@ -927,73 +652,10 @@ def calculate_strength(rank_difference: int) -> float:
     return 1 / (1 + 10 ** (rank_difference / 400))
 
 
-def game(player1_strength: float, player2_strength: float) -> str:
-    player1_score = 0
-    player2_score = 0
-
-    while max(player1_score, player2_score) < 4 or abs(player1_score - player2_score) < 2:
-        player1_point_probability = player1_strength / (player1_strength + player2_strength)
-        player2_point_probability = 1 - player1_point_probability
-
-        if random() < player1_point_probability:
-            player1_score += 1
-        else:
-            player2_score += 1
-
-    return 'player1' if player1_score > player2_score else 'player2'
-
-
-def tie_break(player1_strength: float, player2_strength: float, max_points: int):
-    player1_score = 0
-    player2_score = 0
-
-    while max(player1_score, player2_score) < max_points or abs(player1_score - player2_score) < 2:
-        player1_point_probability = player1_strength / (player1_strength + player2_strength)
-        player2_point_probability = 1 - player1_point_probability
-
-        if random() < player1_point_probability:
-            player1_score += 1
-        else:
-            player2_score += 1
-
-    return player1_score, player2_score
-
-
-def calculate_set_probability(player1_strength: float, player2_strength: float, is_third_set: bool = False):
-    # Si c'est le 3ème set (super tie-break), jouer un seul jeu
-    if is_third_set:
-        super_tie_break_score_p1, super_tie_break_score_p2 = tie_break(player1_strength, player2_strength, 10)
-        if super_tie_break_score_p1 > super_tie_break_score_p2:
-            return 1, 0, super_tie_break_score_p2
-        else:
-            return 0, 1, super_tie_break_score_p1
-    else:
-        # Initialiser les scores des joueurs
-        player1_score = 0
-        player2_score = 0
-
-        # Parcourir les jeux jusqu'à ce qu'un joueur atteigne 6 jeux avec un écart de 2 jeux OU que les deux joueurs soient à égalité à 6 jeux
-        while (max(player1_score, player2_score) < 6 or abs(player1_score - player2_score) < 2) and not (player1_score == player2_score == 6):
-            winning_player = game(player1_strength, player2_strength)
-            if winning_player == 'player1':
-                player1_score += 1
-            else:
-                player2_score += 1
-
-        # Si aucun joueur n'a un écart de 2 jeux après avoir atteint 6 jeux, jouer un jeu décisif
-        if player1_score == player2_score == 6:
-            tie_break_score_p1, tie_break_score_p2 = tie_break(player1_strength, player2_strength, 7)
-            if tie_break_score_p1 > tie_break_score_p2:
-                return 7, 6, tie_break_score_p2
-            else:
-                return 6, 7, tie_break_score_p1
-        else:
-            return player1_score, player2_score, None
-
-
 def play_game(app, home_players: List[Player], visitor_players: List[Player], home_team: Team, visitor_team: Team):
     """
         Simulate a game between two players.
+        Le score est tiré en O(1) dans la distribution exacte du modèle de Markov (match_model).
     :param app:
     :param home_players: selected players for the home team
     :param visitor_players: selected players for the visitor team
@@ -1001,38 +663,25 @@ def play_game(app, home_players: List[Player], visitor_players: List[Player], ho
     :param visitor_team:
     :return: winning team, final score
     """
+    import match_model
     home_team_rank = sum([player.refined_elo for player in home_players])
     visitor_team_rank = sum([player.refined_elo for player in visitor_players])
-    rank_difference = abs(home_team_rank - visitor_team_rank)  # Différence de classement ELO entre les joueurs
-    # app.logger.debug(f"Classement ELO : {player1_rank} - {player2_rank}")
-    strength_factor = calculate_strength(rank_difference)
-    # app.logger.debug(f"Facteur de force : {strength_factor}")
-    if home_team_rank < visitor_team_rank:
-        home_strength, visitor_strength = strength_factor, 1 - strength_factor
-    else:
-        home_strength, visitor_strength = 1 - strength_factor, strength_factor
-    winning_team = None
-    home_sets = []
-    visitor_sets = []
-    final_score = []
-    while not winning_team:
-        is_third_set: bool = True if len(home_sets) == len(visitor_sets) == 1 else False
-        result = calculate_set_probability(home_strength, visitor_strength, is_third_set)
-        # app.logger.debug(f"Score set : {result} - is_third_set: {is_third_set}")
-        home_set_score, visitor_set_score, tie_break_score = result
-        if home_set_score > visitor_set_score:
-            home_sets += [(home_set_score, visitor_set_score, tie_break_score)]
-        else:
-            visitor_sets += [(home_set_score, visitor_set_score, tie_break_score)]
-        final_score += [(home_set_score, visitor_set_score, tie_break_score)]
-        winning_team = home_team if len(home_sets) == 2 else visitor_team if len(visitor_sets) == 2 else None
+    p = match_model.point_probability(home_team_rank, visitor_team_rank)
+    final_score = match_model.match_sampler(p).sample()
+    home_sets = sum(1 for home_set_score, visitor_set_score, _ in final_score if home_set_score > visitor_set_score)
+    winning_team = home_team if home_sets == 2 else visitor_team
     return winning_team, final_score
 
 
 def simulate_score(app, db, home_players: List[Player], visitor_players: List[Player], match: Match,
-                   home_doubles_players: List[Player] = None, visitor_doubles_players: List[Player] = None):
+                   home_doubles_players: List[Player] = None, visitor_doubles_players: List[Player] = None,
+                   commit: bool = True):
     """Simulate the score of a match.
 
+    Les joueurs peuvent être des Player ou des `simulation_lineups.LineupPlayer` (id et ELO).
+    Scores et rubbers sont rattachés à la rencontre par les relations, sans écriture
+    intermédiaire : un seul commit en fin de rencontre (aucun si `commit` est faux).
+
     :param home_players:          joueurs domicile pour les simples (et doubles si non fournis séparément)
     :param visitor_players:       joueurs visiteurs pour les simples (et doubles si non fournis séparément)
     :param home_doubles_players:  joueurs domicile pour les doubles (None = utiliser home_players)
@@ -1059,15 +708,11 @@ def simulate_score(app, db, home_players: List[Player], visitor_players: List[Pl
                       secondSetP1=secondSetP1, secondSetP2=secondSetP2, secondTieBreak=secondTieBreak,
                       thirdSetP1=thirdSetP1, thirdSetP2=thirdSetP2, superTieBreak=superTieBreak)
         db.session.add(score)
-        db.session.commit()
         if winning_team == match.homeTeam:
             home_score += 1
         else:
             visitor_score += 1
-        single = Single(player1Id=player1.id, player2Id=player2.id, scoreId=score.id, matchId=match.id)
-        db.session.add(single)
-        db.session.commit()
-        match.singles += [single]
+        db.session.add(Single(player1Id=player1.id, player2Id=player2.id, score=score, match=match))
 
     # DOUBLES — utiliser les listes spécifiques si fournies, sinon home/visitor_players
     home_doublers_candidates    = sorted(home_doubles_players    or home_players,    key=lambda p: p.refined_elo, reverse=True)
@@ -1088,97 +733,92 @@ def simulate_score(app, db, home_players: List[Player], visitor_players: List[Pl
                       secondSetP1=secondSetP1, secondSetP2=secondSetP2, secondTieBreak=secondTieBreak,
                       thirdSetP1=thirdSetP1, thirdSetP2=thirdSetP2, superTieBreak=superTieBreak)
         db.session.add(score)
-        db.session.commit()
         if winning_team == match.homeTeam:
             home_score += 1
         else:
             visitor_score += 1
         player1, player2 = home_doublers
         player3, player4 = visitor_doublers
-        double = Double(player1Id=player1.id, player2Id=player2.id, player3Id=player3.id, player4Id=player4.id, scoreId=score.id, matchId=match.id)
-        db.session.add(double)
-        match.doubles += [double]
+        db.session.add(Double(player1Id=player1.id, player2Id=player2.id, player3Id=player3.id, player4Id=player4.id,
+                              score=score, match=match))
     match.homeScore, match.visitorScore = home_score, visitor_score
     # app.logger.debug(f'home_score: {home_score}, visitor_score: {visitor_score}')
     db.session.add(match)
-    db.session.commit()
-
+    if commit:
+        db.session.commit()
 
-def distribute_matches(matches, Q, num_match_per_pool):
-    # Répartition des matchs$
-    done = False
-    while not done:
-        # Initialiser le calendrier
-        schedule = {day: [] for day in range(1, Q + 1)}
-        teams_played_per_day = {day: set() for day in range(1, Q + 1)}
-        match_copy = matches[:]
-        is_duplicate = False
-        for day in range(1, Q + 1):
-            if is_duplicate:
-                continue
-            for _ in range(num_match_per_pool):
-                if is_duplicate:
-                    continue
-                team1, team2 = choice(match_copy)
-                match_copy.remove((team1, team2))
-                if team1 not in teams_played_per_day[day] and team2 not in teams_played_per_day[day]:
-                    schedule[day].append((team1, team2))
-                    teams_played_per_day[day].add(team1)
-                    teams_played_per_day[day].add(team2)
-                else:
-                    is_duplicate = True
-        if not is_duplicate:
-            done = True
-    return schedule
 
 def schedule_matches(app, db, pool: Pool):
+    """Crée les rencontres de la poule : calendrier par la méthode du cercle (voir pool_schedule).
+
+    Les journées où le club d'une équipe ne peut pas recevoir (ClubHostingBlackout)
+    sont respectées autant que possible ; les conflits restants sont journalisés.
+    Rencontres et disponibilités des joueurs sont construites en mémoire puis
+    écrites en un INSERT par table, dans une seule transaction.
+    """
     try:
-        teams = {i + 1: team for i, team in enumerate(pool.teams)}
-        for team in pool.teams:
-            team.initialize_player_availability()
+        teams = list(pool.teams)
         app.logger.debug(f'TEAMS = {teams}')
-        n = len(teams)
-        num_days = n - 1 if n % 2 == 0 else n
-        schedule = distribute_matches(round_robin(n), num_days, n // 2)
-        matchdays = Matchday.query.filter_by(championshipId=pool.championship.id).all()
-        for i in range(len(matchdays)):
-            matchdays = Matchday.query.filter_by(championshipId=pool.championship.id).all()
-            matchday = matchdays[i]
-            matches = schedule[i + 1]
-            matches = [Match(poolId=pool.id, matchdayId=matchday.id, homeTeamId=teams[j].id, visitorTeamId=teams[k].id, date=matchday.date) for j, k in matches]
-            db.session.add_all(matches)
-            db.session.commit()
+        matchdays = Matchday.query.filter_by(championshipId=pool.championship.id).order_by(Matchday.date, Matchday.id).all()
+        day_of = {matchday.id: d for d, matchday in enumerate(matchdays)}
+        teams_of_club = {}
+        for i, team in enumerate(teams):
+            teams_of_club.setdefault(team.clubId, []).append(i)
+        blackouts = ClubHostingBlackout.query.filter(ClubHostingBlackout.club_id.in_(teams_of_club),
+                                                     ClubHostingBlackout.matchday_id.in_(day_of)).all()
+        banned = [(i, day_of[blackout.matchday_id]) for blackout in blackouts for i in teams_of_club[blackout.club_id]]
+        schedule = pool_schedule.schedule_round_robin(len(teams), banned=banned, num_days=len(matchdays))
+        for day, home, visitor in schedule.conflicts:
+            app.logger.warning(f'Poule {pool.letter} - {matchdays[day].date}: {teams[home]} et {teams[visitor]} '
+                               f'ne peuvent pas recevoir, {teams[home]} reçoit quand même')
+
+        player_ids = db.session.execute(select(player_team_association.c.player_id).where(
+            player_team_association.c.team_id.in_([team.id for team in teams]))).scalars()
+        PlayerMatchdayAvailability.ensure(player_ids, day_of)
+        matches = [dict(poolId=pool.id, matchdayId=matchday.id, homeTeamId=teams[home].id,
+                        visitorTeamId=teams[visitor].id, date=matchday.date)
+                   for matchday, pairs in zip(matchdays, schedule.days) for home, visitor in pairs]
+        if matches:
+            db.session.execute(insert(Match.__table__), matches)
+        db.session.commit()
     except Exception as e:
+        db.session.rollback()
         app.logger.debug(f"Error in schedule_matches function!\n{e}")
 
 def simulate_match_scores(app, db, pool: Pool):
+    """Simule toutes les rencontres de la poule.
+
+    Les compositions de toutes les équipes pour toutes les journées sont préchargées
+    (simulation_lineups) et les rencontres lues en une requête : la boucle ne fait
+    plus d'accès à la base, les résultats sont écrits en un seul commit.
+    """
     try:
-        singles_count = pool.championship.singlesCount
-        doubles_count = pool.championship.doublesCount
         matchdays = Matchday.query.filter_by(championshipId=pool.championship.id).all()
+        lineups = simulation_lineups.pool_lineups(pool, matchdays)
+        teams = {team.id: team for team in pool.teams}
+        matches = {}
+        for match in Match.query.filter(Match.poolId == pool.id).order_by(Match.id):
+            matches.setdefault(match.matchdayId, []).append(match)
         for matchday in matchdays:
-            for match in matchday.matches:
-                if match.poolId != pool.id:
-                    continue
+            for match in matches.get(matchday.id, []):
                 # Ignorer les matchs dont une équipe est absente (supprimée)
-                if match.homeTeam is None or match.visitorTeam is None:
+                if match.homeTeamId not in teams or match.visitorTeamId not in teams:
                     app.logger.debug(f"Match {match.id} ignoré : homeTeam={match.homeTeamId} visitorTeam={match.visitorTeamId} (équipe manquante)")
                     continue
 
-                # Récupérer les joueurs selon la sélection du capitaine (ou tous si pas de sélection)
-                home_singles, home_doubles = match.homeTeam.get_players_for_simulation(
-                    matchday, singles_count, doubles_count)
-                visitor_singles, visitor_doubles = match.visitorTeam.get_players_for_simulation(
-                    matchday, singles_count, doubles_count)
+                # Joueurs selon la sélection du capitaine (ou tous si pas de sélection)
+                home_singles, home_doubles = lineups[match.homeTeamId, matchday.id]
+                visitor_singles, visitor_doubles = lineups[match.visitorTeamId, matchday.id]
 
                 simulate_score(
                     app=app, db=db,
                     home_players=home_singles, visitor_players=visitor_singles,
                     home_doubles_players=home_doubles, visitor_doubles_players=visitor_doubles,
-                    match=match
+                    match=match, commit=False
                 )
-                match = Match.query.get(match.id)
+        db.session.commit()
     except Exception as e:
+        db.session.rollback()
         app.logger.debug(f"Error in simulate_match_scores function!\n{e}")
 
 def play(app, db, pool: Pool):
@@ -1200,103 +840,11 @@ def extract_courts(club_json):
 
 
 def calculer_classement(pool):
-    classement = dict()  # Liste pour stocker les détails du classement de chaque équipe
-    num_matches = pool.championship.singlesCount + pool.championship.doublesCount
-    # Parcourir toutes les équipes de la poule
-    for team in pool.teams:
-        # Requête pour récupérer les matchs de l'équipe donnée dans la poule donnée
-        matches = Match.query \
-            .join(Match.pool) \
-            .filter(
-            (Match.homeTeamId == team.id) |
-            (Match.visitorTeamId == team.id)) \
-            .filter(Match.poolId == pool.id) \
-            .all()
-        # Ignorer uniquement les matchs où AUCUNE des deux équipes n'est connue
-        # (les matchs vs équipe supprimée sont conservés pour le classement)
-        matches = [m for m in matches if m.homeTeamId is not None or m.visitorTeamId is not None]
-        # matches = Match.query.filter(Match.poolId == pool.id, Match.homeTeamId == team.id).all()
-        # logging.info(f'{team} : {len(matches)} matches')
-
-        if all(m.homeScore is None and m.visitorScore is None for m in matches):
-            # If no matches have been played, initialize all values to 0
-            team_matches_played = 0
-            team_matches_won = 0
-            team_matches_lost = 0
-            team_matches_draw = 0
-            points = 0
-            won_matches = 0
-            lost_matches = 0
-            diff_matchs = 0
-            sets_won = 0
-            sets_lost = 0
-            games_won = 0
-            games_lost = 0
-            diff_sets = 0
-            diff_games = 0
-        else:
-            team_matches_played: int = len(matches)
-            # matches_played = len(pool.teams) - 1
-            team_matches_won: int = (sum(1 for m in matches if team.is_visitor(match=m) and m.homeScore < m.visitorScore)
-                                     + sum(1 for m in matches if not team.is_visitor(match=m) and m.homeScore > m.visitorScore))
-            team_matches_lost: int = (sum(1 for m in matches if team.is_visitor(match=m) and m.homeScore > m.visitorScore)
-                                      + sum(1 for m in matches if not team.is_visitor(match=m) and m.homeScore < m.visitorScore))
-            team_matches_draw: int = sum(1 for m in matches if m.homeScore == m.visitorScore)
-            points = 3 * team_matches_won + 2 * team_matches_draw + team_matches_lost
-
-            won_matches: int = 0
-            lost_matches: int = 0
-            for m in matches:
-                if m.visitorTeamId == team.id:
-                    team_is_visitor = True
-                    visitor_score = m.visitorScore
-                elif m.homeTeamId == team.id:
-                    team_is_visitor = False
-                    home_score = m.homeScore
-                won_matches += visitor_score if team_is_visitor else home_score
-                # lost_matches += home_score if team_is_visitor else visitor_score
-            lost_matches: int = team_matches_played * num_matches - won_matches
-            diff_matchs = won_matches - lost_matches  # Différence de matchs
-
-            sets_won = sets_lost = 0
-            games_won = games_lost = 0
-            for m in matches:
-                if not (m.visitorTeamId == team.id or m.homeTeamId == team.id):
-                    continue
-                home_sets, visitor_sets = m.sets_count
-                home_games, visitor_games = m.games_count
-                sets_won += visitor_sets if team.is_visitor(match=m) else home_sets
-                sets_lost += home_sets if team.is_visitor(match=m) else visitor_sets
-                games_won += visitor_games if team.is_visitor(match=m) else home_games
-                games_lost += home_games if team.is_visitor(match=m) else visitor_games
-            diff_sets = sets_won - sets_lost  # Différence de sets
-            diff_games = games_won - games_lost  # Différence de jeux
-
-        # Ajouter les détails de l'équipe au classement
-        # logging.info(classement)
-        matches_details: List[str] = []
-        if team_matches_won: matches_details += [f'{team_matches_won}V']
-        if team_matches_draw: matches_details += [f'{team_matches_draw}N']
-        if team_matches_lost: matches_details += [f'{team_matches_lost}D']
-        team_matches_played = f"{team_matches_played} ({'/'.join(matches_details)})"
-        matches_details = f'{diff_matchs} (+{won_matches}/-{lost_matches})'
-        sets_details = f'{diff_sets} (+{sets_won}/-{sets_lost})'
-        games_details = f'{diff_games} (+{games_won}/-{games_lost})'
-        classement.update({team.id: {
-            'team': team.name,
-            'points': points,
-            'matches_played': team_matches_played,
-            'diff_matchs_sort': diff_matchs,
-            'diff_matchs': matches_details,
-            'diff_sets_sort': diff_sets,
-            'diff_sets': sets_details,
-            'diff_games_sort': diff_games,
-            'diff_games': games_details
-        }})
-    # classement = sorted(classement.items(), key=lambda x: x[1]['points'], reverse=True)
-    classement = sorted(classement.items(), key=lambda x: (x[1]['points'], x[1]['diff_matchs_sort'], x[1]['diff_sets_sort'], x[1]['diff_games_sort']), reverse=True)
-
-    return classement
+    """Classement de la poule : [(team_id, détails)] trié par points puis différences de matchs, sets et jeux.
+
+    Calculé en base par une requête agrégée (voir standings.py).
+    """
+    return standings.pool_standings(pool)
 
 
 #
@@ -1312,6 +860,8 @@ def calculer_classement(pool):
 # Paramètres de sortie: JSON Object {'distance': 9176.91, 'duration': 1263.044} ou code d'erreur HTTP si pas d'objet JSON retourné par l'API Mapbox
 #
 def get_Directions_Mapbox(visitor: Club, home: Club, api_key):
+    from geojson import Feature, Point
+    from mapbox import Directions
     service = Directions(access_token=api_key)
     origin = Feature(geometry=Point((visitor.longitude, visitor.latitude)))
     destination = Feature(geometry=Point((home.longitude, home.latitude)))
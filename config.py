@@ -7,7 +7,20 @@ from pytz import timezone
 class Config:
     DEBUG = True
     # TESTING = True
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///tennis.sqlite3'
+    # Base de données : SQLite par défaut, PostgreSQL en production (postgresql://…) ; voir storage.py
+    SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', 'sqlite:///tennis.sqlite3')
+    # SQLite : journal WAL (lectures concurrentes d'une écriture), synchronisation aux points de contrôle
+    SQLITE_JOURNAL_MODE = os.getenv('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')
+    # SQLite : fichier projeté en mémoire (octets) et cache de pages (Kio) par connexion
+    SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+    SQLITE_CACHE_SIZE = int(os.getenv('SQLITE_CACHE_SIZE', 64 * 1024))
+    # SQLite : attente (ms) d'un verrou d'écriture avant « database is locked »
+    SQLITE_BUSY_TIMEOUT = int(os.getenv('SQLITE_BUSY_TIMEOUT', 5000))
+    # PostgreSQL : pool de connexions (taille, connexions supplémentaires, recyclage en s)
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 10))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 20))
+    DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', 1800))
     CLUBS = [{'id': '62060107', 'active': True, 'name': 'US CAGNES TENNIS', 'city': 'Cagnes-sur-Mer', 'csvfile': 'us_cagnes_tennis'},
              {'id': '62060207', 'active': True, 'name': 'TC MOUGINS', 'city': 'Mougins', 'csvfile': 'tc_mougins'},
              {'id': '62060137', 'active': True, 'name': 'ASLM TENNIS CANNES', 'city': 'Cannes', 'csvfile': 'aslm_tennis_cannes'},
@@ -47,6 +60,32 @@ class Config:
     PARIS = timezone('Europe/Paris')
     BASE_PATH = os.path.dirname(__file__)
     MAPBOX_API_KEY = os.getenv('MAPBOX_API_KEY', '')
+    # Nombre de processus pour les simulations batch (1 = exécution séquentielle)
+    SIMULATION_WORKERS = int(os.getenv('SIMULATION_WORKERS', os.cpu_count() or 1))
+    # Nombre de processus de lecture des CSV joueurs à l'amorçage d'une base (voir bootstrap.py)
+    BOOTSTRAP_WORKERS = int(os.getenv('BOOTSTRAP_WORKERS', os.cpu_count() or 1))
+    # Nombre de jobs d'arrière-plan exécutés simultanément (voir jobs.py)
+    JOB_WORKERS = int(os.getenv('JOB_WORKERS', 1))
+    # Signal de vie (et avancement recopié en base) des jobs en cours, et silence (s) au-delà duquel
+    # un job est tenu pour interrompu
+    JOB_HEARTBEAT_INTERVAL = float(os.getenv('JOB_HEARTBEAT_INTERVAL', 5))
+    JOB_STALE_AFTER = float(os.getenv('JOB_STALE_AFTER', 300))
+    # Heure (locale) des tâches nocturnes : instantané des ELO (passage d'âge)
+    NIGHTLY_JOBS_HOUR = int(os.getenv('NIGHTLY_JOBS_HOUR', 3))
+    # Durée maximale (s) de la recherche locale de constitution des poules (voir pool_builder.py)
+    POOL_BUILDER_TIME_LIMIT = float(os.getenv('POOL_BUILDER_TIME_LIMIT', 5))
+    # Instrumentation des requêtes et page /admin/perf (voir profiling.py) : coûteuse et exposant le SQL,
+    # activée par PROFILING_ENABLED=1 ; non renseignée, seulement en mode debug
+    _profiling = os.getenv('PROFILING_ENABLED', '').strip().lower()
+    PROFILING_ENABLED = _profiling in ('1', 'true', 'yes', 'on') if _profiling else None
+    # Nombre de requêtes gardées en mémoire pour /admin/perf
+    PROFILING_BUFFER_SIZE = int(os.getenv('PROFILING_BUFFER_SIZE', 1000))
+    # Durée (s) au-delà de laquelle une requête est journalisée (et profilée si PROFILING_CPROFILE_DIR)
+    PROFILING_SLOW_REQUEST = float(os.getenv('PROFILING_SLOW_REQUEST', 1.0))
+    # Répertoire des profils cProfile des requêtes lentes (désactivé si vide)
+    PROFILING_CPROFILE_DIR = os.getenv('PROFILING_CPROFILE_DIR') or None
+    # Pic de mémoire par requête (tracemalloc : ralentit sensiblement l'application)
+    PROFILING_TRACE_MEMORY = os.getenv('PROFILING_TRACE_MEMORY', '0').strip().lower() in ('1', 'true', 'yes', 'on')
     SHOP_IMPORT_ENABLED = os.getenv('SHOP_IMPORT_ENABLED', '1').strip().lower() in ('1', 'true', 'yes', 'on')
 
 
@@ -1,11 +1,53 @@
+import click
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
 from sqlalchemy import event
 from sqlalchemy.engine import Engine
 import sqlite3
 
+
+class LazyMigrate:
+    """Flask-Migrate chargé à la première commande `flask db`.
+
+    Flask-Migrate importe alembic (~150 ms) : les workers et les scripts qui
+    n'exécutent pas de migration ne le chargent pas.  `init_app` enregistre un
+    groupe de commandes `db` qui initialise le vrai Migrate à sa première
+    utilisation puis lui passe la main : le groupe de Flask-Migrate analyse
+    ses options (-d, -x) et exécute la sous-commande.
+    """
+
+    def init_app(self, app, db, **kwargs):
+        def load():
+            from flask_migrate import Migrate
+            Migrate(app, db, **kwargs)  # app.extensions['migrate'] et groupe `db` d'origine
+            return app.cli.commands['db']
+
+        app.cli.add_command(_LazyGroup('db', load, help='Perform database migrations.'))
+
+
+class _LazyGroup(click.Group):
+    def __init__(self, name, load, **kwargs):
+        super().__init__(name, **kwargs)
+        self._load = load
+        self._group = None
+
+    def _target(self):
+        if self._group is None:
+            self._group = self._load()
+        return self._group
+
+    def make_context(self, info_name, args, parent=None, **extra):
+        # Contexte du vrai groupe : son callback renseigne g.directory / g.x_arg avant la sous-commande
+        return self._target().make_context(info_name, args, parent=parent, **extra)
+
+    def list_commands(self, ctx):
+        return self._target().list_commands(ctx)
+
+    def get_command(self, ctx, name):
+        return self._target().get_command(ctx, name)
+
+
 db = SQLAlchemy()
-migrate = Migrate()
+migrate = LazyMigrate()
 
 
 @event.listens_for(Engine, "connect")
@@ -16,3 +58,20 @@ def set_sqlite_pragma(dbapi_connection, connection_record):
         cursor.execute("PRAGMA foreign_keys=ON")
         cursor.close()
 
+
+
+def insert_or_ignore(table):
+    """INSERT ... ON CONFLICT DO NOTHING (INSERT IGNORE sous MySQL) pour le dialecte de la session courante.
+
+    À exécuter avec une liste de dictionnaires (executemany) : les lignes déjà
+    présentes (clé primaire ou contrainte d'unicité) sont ignorées.
+    """
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+        return insert(table).on_conflict_do_nothing()
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+        return insert(table).on_conflict_do_nothing()
+    from sqlalchemy import insert
+    return insert(table).prefix_with('IGNORE', dialect='mysql')
@@ -0,0 +1,362 @@
+"""
+Exécution en arrière-plan des traitements longs (simulations, imports).
+
+Une route enregistre un Job (table `job`) avec ses paramètres JSON puis rend
+la main immédiatement ; un pool de threads du processus Flask l'exécute dans
+un contexte applicatif.  Les tâches sont déclarées par les blueprints avec
+le décorateur `@task('nom')` et reçoivent un `JobContext` pour publier leur
+avancement et détecter une demande d'annulation.
+
+L'état (file, en cours, terminé, échec, annulé) et les horodatages sont
+enregistrés en base à chaque transition.  L'avancement fin est tenu en mémoire
+par le processus qui exécute la tâche : une écriture en base à chaque étape
+entrerait en conflit avec la transaction de la tâche elle-même (SQLite).  Il
+est recopié en base avec le signal de vie (voir ci-dessous) : un autre
+processus qui sert la page du job lit cet avancement-là.
+
+Plusieurs processus (workers WSGI) partagent la table : un job en file est
+réservé par un UPDATE conditionnel (status='queued') avant exécution, un seul
+processus l'obtient.  Le processus qui exécute un job met à jour son
+`heartbeat_at`, son avancement et son message toutes les
+JOB_HEARTBEAT_INTERVAL secondes, sur sa propre connexion ; au démarrage d'un processus, les jobs en file lui sont proposés
+et seuls les jobs en cours sans signe de vie depuis JOB_STALE_AFTER secondes
+(processus arrêté) sont marqués en échec.
+
+Les tâches déclarées avec `@task('nom', nightly=True)` sont mises en file une
+fois par jour à l'heure `NIGHTLY_JOBS_HOUR` de la configuration (désactivé si
+absente) ; une tâche déjà créée dans la journée n'est pas relancée.  Chaque
+processus a son planificateur : la clé unique `tâche@jour` (`Job.run_key`)
+ne laisse créer le job du jour qu'à l'un d'eux.
+"""
+from __future__ import annotations
+
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import bindparam, func, select, update
+from sqlalchemy.exc import OperationalError
+
+from extensions import db, insert_or_ignore
+from models import Job, team_strengths
+
+# Tâches enregistrées : nom → fonction(job: JobContext, **params) -> message
+_tasks = {}
+# Tâches relancées chaque nuit (voir NightlyScheduler)
+_nightly = set()
+# Délai minimal entre deux lectures en base du drapeau d'annulation (secondes)
+CANCEL_POLL_INTERVAL = 2.0
+# Valeurs par défaut de JOB_HEARTBEAT_INTERVAL / JOB_STALE_AFTER (secondes)
+HEARTBEAT_INTERVAL = 5
+STALE_AFTER = 300
+
+
+class JobCancelled(Exception):
+    """Levée dans la tâche quand l'utilisateur a demandé l'annulation."""
+
+
+def task(kind: str, nightly: bool = False):
+    """Enregistre une fonction comme tâche exécutable en arrière-plan (et chaque nuit si `nightly`)."""
+    def decorator(func):
+        _tasks[kind] = func
+        if nightly:
+            _nightly.add(kind)
+        return func
+    return decorator
+
+
+class JobContext:
+    """Interface d'une tâche en cours avec le gestionnaire de jobs."""
+
+    def __init__(self, job_id: int):
+        self.job_id = job_id
+        self.progress_value = 0.0
+        self.message = None
+        self.result_endpoint = None
+        self.result_args = {}
+        self._cancel = threading.Event()
+        self._last_cancel_poll = time.monotonic()
+
+    def progress(self, fraction: float, message: str = None):
+        """Publie l'avancement (0 → 1) et lève JobCancelled si une annulation est demandée."""
+        self.progress_value = min(max(float(fraction), 0.0), 1.0)
+        if message is not None:
+            self.message = message
+        self.check_cancelled()
+
+    def check_cancelled(self):
+        if not self._cancel.is_set() and time.monotonic() - self._last_cancel_poll >= CANCEL_POLL_INTERVAL:
+            # Annulation demandée depuis un autre processus : seul le drapeau en base la porte
+            self._last_cancel_poll = time.monotonic()
+            if db.session.execute(select(Job.cancel_requested).where(Job.id == self.job_id)).scalar():
+                self._cancel.set()
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    def redirect_to(self, endpoint: str, **values):
+        """Page à afficher à la fin du job (construite par url_for côté requête)."""
+        self.result_endpoint = endpoint
+        self.result_args = values
+
+
+class JobRunner:
+    """Pool de threads exécutant les jobs du processus courant."""
+
+    def __init__(self, app, max_workers: int = 1, heartbeat_interval: float = HEARTBEAT_INTERVAL):
+        self.app = app
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self.heartbeat_interval = heartbeat_interval
+        self._running = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._heartbeat = threading.Thread(target=self._beat, name='job-heartbeat', daemon=True)
+        self._heartbeat.start()
+
+    def submit(self, job_id: int):
+        self.executor.submit(self._run, job_id)
+
+    def shutdown(self, wait: bool = True):
+        """Arrête le pool (après les jobs en cours et en file si `wait`) puis le signal de vie."""
+        self.executor.shutdown(wait=wait)
+        self._stop.set()
+
+    def context(self, job_id: int):
+        with self._lock:
+            return self._running.get(job_id)
+
+    def cancel(self, job_id: int):
+        context = self.context(job_id)
+        if context is not None:
+            context._cancel.set()
+
+    def _run(self, job_id: int):
+        with self.app.app_context():
+            try:
+                self._execute(job_id)
+            finally:
+                db.session.remove()
+
+    def _beat(self):
+        """Signal de vie et avancement des jobs du processus, lisibles par les autres processus."""
+        table = Job.__table__
+        beat = (update(table)
+                .where(table.c.id == bindparam('job_id'), table.c.status == Job.RUNNING)
+                .values(heartbeat_at=bindparam('now'), progress=bindparam('fraction'), message=bindparam('text')))
+        while not self._stop.wait(self.heartbeat_interval):
+            with self._lock:
+                running = [dict(job_id=job_id, fraction=context.progress_value, text=context.message)
+                           for job_id, context in self._running.items()]
+            if not running:
+                continue
+            now = datetime.utcnow()
+            with self.app.app_context():
+                try:
+                    db.session.execute(beat, [dict(values, now=now) for values in running])
+                    db.session.commit()
+                except OperationalError:
+                    # Base verrouillée par une tâche (SQLite) : signal au tour suivant
+                    db.session.rollback()
+                finally:
+                    db.session.remove()
+
+    def _claim(self, job_id: int) -> bool:
+        """Réserve un job en file pour ce processus ; False s'il est déjà pris, annulé ou inconnu."""
+        now = datetime.utcnow()
+        claimed = db.session.execute(update(Job).where(Job.id == job_id, Job.status == Job.QUEUED)
+                                     .values(status=Job.RUNNING, started_at=now, heartbeat_at=now)
+                                     .execution_options(synchronize_session=False)).rowcount == 1
+        db.session.commit()
+        return claimed
+
+    def _execute(self, job_id: int):
+        if not self._claim(job_id):
+            return
+        job = db.session.get(Job, job_id)
+        if job.cancel_requested:
+            _finish(job, Job.CANCELLED, 'Annulé avant le démarrage')
+            return
+        handler = _tasks.get(job.kind)
+        if handler is None:
+            _finish(job, Job.FAILED, f'Tâche inconnue : {job.kind}')
+            return
+
+        team_strengths.sync()  # invalidations publiées par d'autres processus
+        context = JobContext(job_id)
+        with self._lock:
+            self._running[job_id] = context
+        params = json.loads(job.params or '{}')
+        self.app.logger.info(f'{job} démarré')
+        try:
+            message = handler(context, **params)
+        except JobCancelled:
+            db.session.rollback()
+            _finish(db.session.get(Job, job_id), Job.CANCELLED, 'Annulé', context.progress_value)
+        except Exception as e:
+            db.session.rollback()
+            self.app.logger.exception(f'Job #{job_id} ({job.kind}) en échec')
+            _finish(db.session.get(Job, job_id), Job.FAILED, str(e), context.progress_value)
+        else:
+            job = db.session.get(Job, job_id)
+            job.result_endpoint = context.result_endpoint
+            job.result_args = json.dumps(context.result_args) if context.result_endpoint else None
+            _finish(job, Job.DONE, message or context.message, 1.0)
+        finally:
+            with self._lock:
+                self._running.pop(job_id, None)
+
+
+class NightlyScheduler:
+    """Thread démon qui met en file les tâches `nightly` une fois par jour à `hour` h."""
+
+    def __init__(self, app, hour: int):
+        self.app = app
+        self.hour = hour
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name='job-nightly', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def next_run(self, now: datetime) -> datetime:
+        run = now.replace(hour=self.hour, minute=0, second=0, microsecond=0)
+        return run if run > now else run + timedelta(days=1)
+
+    def _loop(self):
+        while not self._stop.wait((self.next_run(datetime.now()) - datetime.now()).total_seconds()):
+            with self.app.app_context():
+                try:
+                    self.run_pending()
+                finally:
+                    db.session.remove()
+
+    def run_pending(self) -> list:
+        """Met en file les tâches nocturnes pas encore lancées aujourd'hui (par ce processus ou un autre)."""
+        today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        queued = []
+        for kind in sorted(_nightly):
+            if Job.query.filter(Job.kind == kind, Job.created_at >= today).first() is not None:
+                continue
+            job = enqueue_once(kind, daily_key(kind, today), 'Tâche nocturne')
+            if job is not None:
+                queued.append(job)
+        return queued
+
+
+def _finish(job: Job, status: str, message: str = None, progress: float = None):
+    job.status, job.message, job.finished_at = status, message, datetime.utcnow()
+    if progress is not None:
+        job.progress = progress
+    db.session.commit()
+    current_app.logger.info(f'{job} : {message}')
+
+
+def reap_stale(stale_after: float = STALE_AFTER) -> int:
+    """Marque en échec les jobs en cours sans signe de vie depuis `stale_after` s ; retourne leur nombre."""
+    now = datetime.utcnow()
+    last_seen = func.coalesce(Job.heartbeat_at, Job.started_at, Job.created_at)
+    reaped = db.session.execute(update(Job)
+                                .where(Job.status == Job.RUNNING, last_seen < now - timedelta(seconds=stale_after))
+                                .values(status=Job.FAILED, message='Interrompu par un arrêt du serveur', finished_at=now)
+                                .execution_options(synchronize_session=False)).rowcount
+    db.session.commit()
+    return reaped
+
+
+def init_app(app):
+    """Crée le gestionnaire de jobs du processus et reprend les jobs laissés par un arrêt du serveur.
+
+    Les jobs en cours d'un autre processus vivant (heartbeat récent) ne sont pas touchés ;
+    les jobs en file sont proposés au pool, qui ne les exécute que s'il les réserve.
+    """
+    runner = JobRunner(app, max_workers=app.config.get('JOB_WORKERS', 1),
+                       heartbeat_interval=app.config.get('JOB_HEARTBEAT_INTERVAL', HEARTBEAT_INTERVAL))
+    app.extensions['jobs'] = runner
+    with app.app_context():
+        reap_stale(app.config.get('JOB_STALE_AFTER', STALE_AFTER))
+        for job_id in db.session.execute(select(Job.id).where(Job.status == Job.QUEUED)).scalars().all():
+            runner.submit(job_id)
+    hour = app.config.get('NIGHTLY_JOBS_HOUR')
+    if hour is not None:
+        scheduler = NightlyScheduler(app, hour)
+        app.extensions['jobs_nightly'] = scheduler
+        scheduler.start()
+    return runner
+
+
+def _runner() -> JobRunner:
+    runner = current_app.extensions.get('jobs')
+    if runner is None:
+        raise RuntimeError("Gestionnaire de jobs non initialisé (jobs.init_app)")
+    return runner
+
+
+def enqueue(kind: str, description: str = None, **params) -> Job:
+    """Enregistre un job et le confie au pool de threads ; retourne immédiatement."""
+    if kind not in _tasks:
+        raise ValueError(f'Tâche inconnue : {kind}')
+    job = Job(kind=kind, description=description, params=json.dumps(params))
+    db.session.add(job)
+    db.session.commit()
+    _runner().submit(job.id)
+    return job
+
+
+def daily_key(kind: str, day: datetime = None) -> str:
+    """Clé `tâche@jour` : un seul job de ce type par jour, tous processus confondus."""
+    return f'{kind}@{day or datetime.utcnow():%Y-%m-%d}'
+
+
+def enqueue_once(kind: str, run_key: str, description: str = None, **params):
+    """Comme `enqueue`, sauf si un job de même `run_key` existe déjà (créé par un autre processus) : None."""
+    if kind not in _tasks:
+        raise ValueError(f'Tâche inconnue : {kind}')
+    inserted = db.session.execute(insert_or_ignore(Job.__table__), [
+        dict(kind=kind, description=description, params=json.dumps(params), run_key=run_key)]).rowcount
+    db.session.commit()
+    if not inserted:
+        return None
+    job = db.session.execute(select(Job).where(Job.run_key == run_key)).scalar_one()
+    _runner().submit(job.id)
+    return job
+
+
+def request_cancel(job: Job):
+    """Demande l'annulation : immédiate en file, à la prochaine étape si en cours."""
+    if job.is_finished:
+        return
+    job.cancel_requested = True
+    if job.status == Job.QUEUED:
+        job.status, job.message, job.finished_at = Job.CANCELLED, 'Annulé avant le démarrage', datetime.utcnow()
+    db.session.commit()
+    _runner().cancel(job.id)
+
+
+def job_status(job: Job) -> dict:
+    """État du job et ETA : avancement en mémoire si ce processus l'exécute, sinon le dernier recopié en base."""
+    progress, message = job.progress, job.message
+    context = _runner().context(job.id)
+    if context is not None:
+        progress, message = context.progress_value, context.message
+    elapsed = eta = None
+    if job.started_at:
+        elapsed = ((job.finished_at or datetime.utcnow()) - job.started_at).total_seconds()
+        if job.status == Job.RUNNING and progress > 0:
+            eta = elapsed * (1 - progress) / progress
+    return {
+        'id': job.id,
+        'kind': job.kind,
+        'description': job.description,
+        'status': job.status,
+        'progress': progress,
+        'message': message,
+        'elapsed': elapsed,
+        'eta': eta,
+        'cancel_requested': job.cancel_requested,
+        'finished': job.is_finished,
+    }
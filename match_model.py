@@ -0,0 +1,227 @@
+"""
+Modèle de Markov exact d'une partie de championnat par équipes
+(2 sets à 6 jeux avec tie-break à 6/6, super tie-break à 10 points au 3ème set).
+
+Le camp domicile gagne chaque point avec la probabilité p.  Les probabilités
+sont obtenues par programmation dynamique mémoïsée sur les états de jeu,
+de tie-break, de set et de partie ; aucune balle n'est tirée au hasard.
+Les distributions précalculées servent ensuite à tirer un score complet
+en O(1) (méthode des alias de Walker).
+
+Formats des scores (identiques à `common.play_game` et au modèle Score) :
+  - set       : (jeux domicile, jeux visiteur, points du perdant au tie-break ou None)
+  - super TB  : (1, 0, points du perdant) ou (0, 1, points du perdant)
+"""
+from __future__ import annotations
+
+import random
+from functools import lru_cache
+from math import comb
+
+import numpy as np
+
+GAME_POINTS = 4
+TIE_BREAK_POINTS = 7
+SUPER_TIE_BREAK_POINTS = 10
+# Points joués après l'égalité au-delà desquels la queue (≤ 0.5^30) est regroupée
+MAX_EXTRA_POINTS = 30
+
+# Scores de set possibles (hors détail des points du tie-break), domicile puis visiteur
+SET_SCORES = ([(6, b) for b in range(5)] + [(7, 5), (7, 6)]
+              + [(a, 6) for a in range(5)] + [(5, 7), (6, 7)])
+
+
+def point_probability(home_elo: float, visitor_elo: float) -> float:
+    """Probabilité que le camp domicile gagne un point (écart ELO sur une échelle de 400)."""
+    return 1 / (1 + 10 ** ((visitor_elo - home_elo) / 400))
+
+
+# ── Jeu ────────────────────────────────────────────────────────────────────
+
+@lru_cache(maxsize=None)
+def game_probability(p: float, home: int = 0, visitor: int = 0) -> float:
+    """Probabilité que le camp domicile gagne le jeu depuis l'état (home, visitor)."""
+    if home >= GAME_POINTS and home - visitor >= 2:
+        return 1.0
+    if visitor >= GAME_POINTS and visitor - home >= 2:
+        return 0.0
+    if home == visitor >= GAME_POINTS - 1:
+        # Égalité : chaîne absorbante, solution fermée
+        return p * p / (p * p + (1 - p) * (1 - p))
+    return p * game_probability(p, home + 1, visitor) + (1 - p) * game_probability(p, home, visitor + 1)
+
+
+# ── Tie-break ──────────────────────────────────────────────────────────────
+
+@lru_cache(maxsize=None)
+def tie_break_outcomes(p: float, target: int) -> tuple:
+    """Distribution exacte des fins de tie-break : ((domicile gagne, points du perdant), proba).
+
+    Les scores au-delà de MAX_EXTRA_POINTS points après l'égalité sont regroupés
+    dans le dernier score pour que la distribution somme à 1.
+    """
+    q = 1 - p
+    outcomes = []
+    for loser in range(target - 1):
+        reach = comb(target - 1 + loser, loser)
+        outcomes.append(((True, loser), reach * p ** target * q ** loser))
+        outcomes.append(((False, loser), reach * q ** target * p ** loser))
+    deuce = comb(2 * (target - 1), target - 1) * (p * q) ** (target - 1)
+    for extra in range(MAX_EXTRA_POINTS):
+        mass = deuce * (2 * p * q) ** extra
+        outcomes.append(((True, target - 1 + extra), mass * p * p))
+        outcomes.append(((False, target - 1 + extra), mass * q * q))
+    tail = 1 - sum(prob for _, prob in outcomes)
+    last_home, last_visitor = outcomes[-2], outcomes[-1]
+    share = p * p / (p * p + q * q) if p * p + q * q else 0.5
+    outcomes[-2] = (last_home[0], last_home[1] + tail * share)
+    outcomes[-1] = (last_visitor[0], last_visitor[1] + tail * (1 - share))
+    return tuple(outcomes)
+
+
+def tie_break_probability(p: float, target: int = TIE_BREAK_POINTS) -> float:
+    """Probabilité que le camp domicile gagne un tie-break à `target` points."""
+    return sum(prob for (home_wins, _), prob in tie_break_outcomes(p, target) if home_wins)
+
+
+# ── Set ────────────────────────────────────────────────────────────────────
+
+@lru_cache(maxsize=None)
+def _set_reach(g: float, home: int, visitor: int) -> float:
+    """Probabilité d'atteindre le score de jeux (home, visitor) dans un set non terminé."""
+    if home == visitor == 0:
+        return 1.0
+    reach = 0.0
+    if home > 0 and not _set_finished(home - 1, visitor):
+        reach += _set_reach(g, home - 1, visitor) * g
+    if visitor > 0 and not _set_finished(home, visitor - 1):
+        reach += _set_reach(g, home, visitor - 1) * (1 - g)
+    return reach
+
+
+def _set_finished(home: int, visitor: int) -> bool:
+    return (max(home, visitor) >= 6 and abs(home - visitor) >= 2) or home == visitor == 6
+
+
+@lru_cache(maxsize=None)
+def set_score_probabilities(p: float) -> tuple:
+    """Probabilité de chaque score de SET_SCORES (le 7/6 inclut tous les tie-breaks)."""
+    g = game_probability(p)
+    tie_break = _set_reach(g, 6, 6)
+    home_tie_break = tie_break_probability(p)
+    probabilities = []
+    for home, visitor in SET_SCORES:
+        if (home, visitor) == (7, 6):
+            probabilities.append(tie_break * home_tie_break)
+        elif (home, visitor) == (6, 7):
+            probabilities.append(tie_break * (1 - home_tie_break))
+        elif home > visitor:
+            probabilities.append(_set_reach(g, home - 1, visitor) * g)
+        else:
+            probabilities.append(_set_reach(g, home, visitor - 1) * (1 - g))
+    return tuple(probabilities)
+
+
+@lru_cache(maxsize=None)
+def set_outcomes(p: float) -> tuple:
+    """Distribution exacte des sets : ((jeux domicile, jeux visiteur, points perdant TB), proba)."""
+    tie_break = _set_reach(game_probability(p), 6, 6)
+    outcomes = []
+    for (home, visitor), prob in zip(SET_SCORES, set_score_probabilities(p)):
+        if (home, visitor) in ((7, 6), (6, 7)):
+            for (home_wins, loser), tb_prob in tie_break_outcomes(p, TIE_BREAK_POINTS):
+                if home_wins == (home > visitor):
+                    outcomes.append(((home, visitor, loser), tie_break * tb_prob))
+        else:
+            outcomes.append(((home, visitor, None), prob))
+    return tuple(outcomes)
+
+
+def set_probability(p: float) -> float:
+    """Probabilité que le camp domicile gagne un set."""
+    return sum(prob for (home, visitor), prob in zip(SET_SCORES, set_score_probabilities(p)) if home > visitor)
+
+
+# ── Partie ─────────────────────────────────────────────────────────────────
+
+def super_tie_break_probability(p: float) -> float:
+    return tie_break_probability(p, SUPER_TIE_BREAK_POINTS)
+
+
+@lru_cache(maxsize=None)
+def match_distribution(p: float) -> dict:
+    """Probabilité exacte de chaque scoreline au niveau des sets.
+
+    Clés : ((jeux set 1), (jeux set 2), vainqueur du super TB : 'home', 'visitor' ou None).
+    """
+    scores = list(zip(SET_SCORES, set_score_probabilities(p)))
+    super_home = super_tie_break_probability(p)
+    distribution = {}
+    for first, p_first in scores:
+        for second, p_second in scores:
+            prob = p_first * p_second
+            if (first[0] > first[1]) == (second[0] > second[1]):
+                distribution[(first, second, None)] = prob
+            else:
+                distribution[(first, second, 'home')] = prob * super_home
+                distribution[(first, second, 'visitor')] = prob * (1 - super_home)
+    return distribution
+
+
+def match_probability(p: float) -> float:
+    """Probabilité que le camp domicile gagne la partie."""
+    s = set_probability(p)
+    return s * s + 2 * s * (1 - s) * super_tie_break_probability(p)
+
+
+# ── Tirage en O(1) ─────────────────────────────────────────────────────────
+
+def alias_table(probabilities):
+    """Table d'alias de Walker : (seuils, alias) pour un tirage en O(1)."""
+    probabilities = np.asarray(probabilities, dtype=float)
+    n = len(probabilities)
+    scaled = probabilities * n / probabilities.sum()
+    threshold = np.ones(n)
+    alias = np.arange(n)
+    small = [i for i in range(n) if scaled[i] < 1]
+    large = [i for i in range(n) if scaled[i] >= 1]
+    while small and large:
+        s, l = small.pop(), large.pop()
+        threshold[s], alias[s] = scaled[s], l
+        scaled[l] -= 1 - scaled[s]
+        (small if scaled[l] < 1 else large).append(l)
+    return threshold, alias
+
+
+class MatchSampler:
+    """Tire des scores complets depuis les distributions exactes d'une probabilité de point."""
+
+    def __init__(self, p: float):
+        self.p = p
+        outcomes = set_outcomes(p)
+        self.sets = [outcome for outcome, _ in outcomes]
+        self.set_threshold, self.set_alias = alias_table([prob for _, prob in outcomes])
+        super_outcomes = tie_break_outcomes(p, SUPER_TIE_BREAK_POINTS)
+        self.super_tie_breaks = [outcome for outcome, _ in super_outcomes]
+        self.super_threshold, self.super_alias = alias_table([prob for _, prob in super_outcomes])
+
+    @staticmethod
+    def _draw(threshold, alias, rng) -> int:
+        u = rng.random() * len(threshold)
+        i = int(u)
+        return i if u - i < threshold[i] else int(alias[i])
+
+    def sample(self, rng=random) -> list:
+        """Retourne le score final [(set 1), (set 2), (super TB éventuel)]."""
+        first = self.sets[self._draw(self.set_threshold, self.set_alias, rng)]
+        second = self.sets[self._draw(self.set_threshold, self.set_alias, rng)]
+        final_score = [first, second]
+        if (first[0] > first[1]) != (second[0] > second[1]):
+            home_wins, loser = self.super_tie_breaks[self._draw(self.super_threshold, self.super_alias, rng)]
+            final_score.append((1, 0, loser) if home_wins else (0, 1, loser))
+        return final_score
+
+
+@lru_cache(maxsize=4096)
+def match_sampler(p: float) -> MatchSampler:
+    return MatchSampler(p)
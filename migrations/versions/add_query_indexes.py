@@ -0,0 +1,66 @@
+"""Add composite indexes for hot queries
+
+Revision ID: e5f6a7b8c9d0
+Revises: d4e5f6a7b8c9
+Create Date: 2026-10-18 00:00:00.000000
+
+Index déclarés dans les modèles : une base déjà à jour (créée par db.create_all,
+ou complétée au démarrage par storage.create_missing_indexes) est laissée telle
+quelle, de même que les tables absentes.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'e5f6a7b8c9d0'
+down_revision = 'd4e5f6a7b8c9'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('license', 'ix_license_gender_ranking', ['gender', 'rankingId']),
+    ('player', 'ix_player_club_license', ['clubId', 'licenseId']),
+    ('player', 'ix_player_license', ['licenseId']),
+    ('player_team_association', 'ix_player_team_association_team_player', ['team_id', 'player_id']),
+    ('player_team_association', 'ix_player_team_association_player_team', ['player_id', 'team_id']),
+    ('player_injury_association', 'ix_player_injury_association_player_injury', ['player_id', 'injury_id']),
+    ('player_matchday_availability', 'ix_player_matchday_availability_matchday_player',
+     ['matchday_id', 'player_id', 'is_available']),
+    ('team', 'ix_team_pool', ['poolId']),
+    ('team', 'ix_team_club', ['clubId']),
+    ('match', 'ix_match_pool_teams', ['poolId', 'homeTeamId', 'visitorTeamId']),
+    ('match', 'ix_match_home_team_matchday', ['homeTeamId', 'matchdayId']),
+    ('match', 'ix_match_visitor_team_matchday', ['visitorTeamId', 'matchdayId']),
+    ('singles', 'ix_singles_match', ['matchId']),
+    ('doubles', 'ix_doubles_match', ['matchId']),
+    ('tournament_category', 'ix_tournament_category_tournament', ['tournament_id']),
+    ('tournament_registration', 'ix_tournament_registration_category_player', ['category_id', 'player_id']),
+    ('tournament_draw', 'ix_tournament_draw_category', ['category_id']),
+    ('tournament_match', 'ix_tournament_match_draw_round_position', ['draw_id', 'round_number', 'position']),
+    ('racquet', 'ix_racquet_head_size_weight', ['head_size', 'strung_weight']),
+    ('racquet', 'ix_racquet_brand_name', ['brand', 'name']),
+    ('racquet', 'ix_racquet_release_year', ['release_year']),
+]
+
+
+def _existing_indexes(inspector, table):
+    if not inspector.has_table(table):
+        return None
+    return {index['name'] for index in inspector.get_indexes(table)}
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    for table, name, columns in INDEXES:
+        existing = _existing_indexes(inspector, table)
+        if existing is not None and name not in existing:
+            op.create_index(name, table, columns)
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    for table, name, columns in reversed(INDEXES):
+        existing = _existing_indexes(inspector, table)
+        if existing is not None and name in existing:
+            op.drop_index(name, table_name=table)
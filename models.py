@@ -2,13 +2,15 @@ from __future__ import annotations
 
 import logging
 import re
+import uuid
 from datetime import datetime, timedelta, date
-from typing import Optional, List, Iterable
+from typing import Optional, List, Iterable, NamedTuple
 
-from sqlalchemy import ForeignKey, Table, Integer, String, Float, Boolean, and_
-from sqlalchemy.orm import relationship, backref, DeclarativeBase, mapped_column
+from flask import has_app_context
+from sqlalchemy import ForeignKey, Table, Integer, String, Float, Boolean, and_, event, select, update
+from sqlalchemy.orm import Session, relationship, backref, DeclarativeBase, mapped_column, selectinload, contains_eager
 
-from extensions import db
+from extensions import db, insert_or_ignore
 
 
 class BestRanking(db.Model):
@@ -61,6 +63,62 @@ class Ranking(db.Model):
         return self.value
 
 
+class RankingLadder:
+    """Échelles de classement (Ranking, BestRanking) chargées une fois par processus.
+
+    Les tables sont statiques (créées par `common.load_rankings`, qui invalide le
+    registre) : id → valeur / série et valeur → id, puis ELO d'un classement, sans
+    requête après le premier chargement.
+    """
+    ELO_WEIGHT = 15  # to better fit with ELO rating system (10 is better)
+
+    def __init__(self):
+        self._ladders = {}
+
+    def invalidate(self):
+        self._ladders = {}
+
+    def _ladder(self, model) -> dict:
+        ladder = self._ladders.get(model.__tablename__)
+        if ladder is None:
+            rows = db.session.execute(select(model.id, model.value, model.series)).all()
+            ladder = {'values': {row.id: row.value for row in rows},
+                      'series': {row.id: row.series for row in rows},
+                      'ids': {row.value: row.id for row in rows}}
+            if rows:  # table pas encore peuplée : ne rien figer
+                self._ladders[model.__tablename__] = ladder
+        return ladder
+
+    def value(self, ranking_id: int, model=None) -> str | None:
+        return self._ladder(model or Ranking)['values'].get(ranking_id)
+
+    def series(self, ranking_id: int, model=None) -> int | None:
+        return self._ladder(model or Ranking)['series'].get(ranking_id)
+
+    def id_of(self, value: str, model=None) -> int | None:
+        return self._ladder(model or Ranking)['ids'].get(value)
+
+    def count(self, model=None) -> int:
+        return len(self._ladder(model or Ranking)['values'])
+
+    def elo_delta(self, ranking_id: int, reference_id: int = None) -> int:
+        """Écart au classement NC ; la 1ère série (au-dessus de -15) est compressée d'un facteur 10.
+
+        `reference_id` choisit la formule (classement actuel pour le meilleur classement).
+        """
+        nc_id, second_series_threshold = self.id_of('NC'), self.id_of('-15')
+        if (ranking_id if reference_id is None else reference_id) < second_series_threshold:
+            return (second_series_threshold - ranking_id) // 10 + nc_id - second_series_threshold
+        return nc_id - ranking_id
+
+    def elo(self, ranking_id: int) -> int:
+        return self.elo_delta(ranking_id) * self.ELO_WEIGHT
+
+
+# Registre du processus (voir RankingLadder)
+ranking_ladder = RankingLadder()
+
+
 class Distance(db.Model):
     __tablename__ = 'distance'
     id = db.Column(db.Integer, primary_key=True)
@@ -76,8 +134,8 @@ class Distance(db.Model):
 class Club(db.Model):
     __tablename__ = 'club'
     id = db.Column(db.String(8), primary_key=True)
-    name = db.Column(db.String(20), unique=True, nullable=False)
-    city = db.Column(db.String(20), nullable=False)
+    name = db.Column(db.String(50), unique=True, nullable=False)  # noms Tenup jusqu'à 42 caractères
+    city = db.Column(db.String(40), nullable=False)
     tennis_courts = db.Column(db.Integer, nullable=True)
     padel_courts = db.Column(db.Integer, nullable=True)
     beach_courts = db.Column(db.Integer, nullable=True)
@@ -110,8 +168,8 @@ class Club(db.Model):
 class License(db.Model):
     __tablename__ = 'license'
     id = db.Column(db.Integer, primary_key=True)
-    firstName = db.Column(db.String(20), nullable=False)
-    lastName = db.Column(db.String(20), nullable=False)
+    firstName = db.Column(db.String(40), nullable=False)
+    lastName = db.Column(db.String(40), nullable=False)
     letter = db.Column(db.String(1), nullable=False)
     year = db.Column(db.Integer, nullable=False)  # Année de la licence
     gender = db.Column(db.Integer, nullable=False)  # Champ masculin/féminin (0 pour masculin, 1 pour féminin, 2 pour mixte)
@@ -124,6 +182,13 @@ class License(db.Model):
     bestRankingId = db.Column(Integer, ForeignKey('best_ranking.id'), nullable=True)
     bestRanking = relationship('BestRanking', foreign_keys=[bestRankingId], back_populates='license')
 
+    # Empreinte de la dernière ligne Tenup importée pour cette licence (voir tenup_sync.py)
+    tenupHash = db.Column(db.String(16), nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_license_gender_ranking', 'gender', 'rankingId'),
+    )
+
     # # Define the back reference to rankings
     rankings = relationship('Ranking', back_populates='license', foreign_keys=[rankingId], overlaps="ranking")
     best_rankings = relationship('BestRanking', back_populates='license', foreign_keys=[bestRankingId], overlaps="bestRanking")
@@ -139,19 +204,35 @@ class License(db.Model):
         return f'{self.id} - {self.name}'
 
 
+class TenupSync(db.Model):
+    """Dernier export Tenup appliqué à un club, par genre (voir tenup_sync.py)."""
+    __tablename__ = 'tenup_sync'
+
+    club_id = db.Column(db.String(8), db.ForeignKey('club.id', ondelete='CASCADE'), primary_key=True)
+    gender = db.Column(db.Integer, primary_key=True)
+    fingerprint = db.Column(db.String(64), nullable=False)  # SHA-256 du fichier
+    row_count = db.Column(db.Integer, nullable=False, default=0)
+    synced_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
 # Table d'association entre Player et Team
 player_team_association = Table(
     'player_team_association',
     db.Model.metadata,
     db.Column('player_id', db.Integer, db.ForeignKey('player.id', ondelete='CASCADE')),
-    db.Column('team_id', db.Integer, db.ForeignKey('team.id', ondelete='CASCADE'))
+    db.Column('team_id', db.Integer, db.ForeignKey('team.id', ondelete='CASCADE')),
+    # Effectif d'une équipe et équipes d'un joueur, sans lire la table
+    db.Index('ix_player_team_association_team_player', 'team_id', 'player_id'),
+    db.Index('ix_player_team_association_player_team', 'player_id', 'team_id'),
 )
 
 player_injury_association = Table(
     'player_injury_association',
     db.Model.metadata,
     db.Column('player_id', db.Integer, db.ForeignKey('player.id', ondelete='CASCADE')),
-    db.Column('injury_id', db.Integer, db.ForeignKey('injury.id', ondelete='CASCADE'))
+    db.Column('injury_id', db.Integer, db.ForeignKey('injury.id', ondelete='CASCADE')),
+    # Blessures des joueurs chargés (selectinload(Player.injuries))
+    db.Index('ix_player_injury_association_player_injury', 'player_id', 'injury_id'),
 )
 
 
@@ -217,9 +298,28 @@ class PlayerMatchdayAvailability(db.Model):
     is_substitute = db.Column(db.Boolean, default=False, nullable=False, server_default='0')
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    # La clé primaire (player_id, matchday_id) sert les recherches par joueur ; celui-ci les journées
+    __table_args__ = (
+        db.Index('ix_player_matchday_availability_matchday_player', 'matchday_id', 'player_id', 'is_available'),
+    )
+
     player = relationship('Player', back_populates='matchday_availabilities')
     matchday = relationship('Matchday', back_populates='player_availabilities')
 
+    @classmethod
+    def ensure(cls, player_ids: Iterable[int], matchday_ids: Iterable[int]):
+        """Crée les disponibilités manquantes (disponible par défaut) en un seul INSERT, sans commit.
+
+        Les couples (joueur, journée) existants sont conservés tels quels (clé primaire, ON CONFLICT DO NOTHING).
+        """
+        matchday_ids = list(matchday_ids)
+        now = datetime.utcnow()
+        rows = [dict(player_id=player_id, matchday_id=matchday_id, is_available=True, plays_single=False,
+                     plays_double=False, is_substitute=False, updated_at=now)
+                for player_id in set(player_ids) for matchday_id in matchday_ids]
+        if rows:
+            db.session.execute(insert_or_ignore(cls.__table__), rows)
+
 
 class TeamMatchdayJoker(db.Model):
     """Joueur joker : 1 seul par équipe par journée, hors liste nominative des 15."""
@@ -244,6 +344,26 @@ class TeamMatchdayJoker(db.Model):
     def __repr__(self):
         return f'Joker {self.player} ({self.team} - J{self.matchday_id})'
 
+
+class ClubHostingBlackout(db.Model):
+    """Journée où un club ne peut pas recevoir (terrains indisponibles) : respectée par le calendrier des poules."""
+    __tablename__ = 'club_hosting_blackout'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    club_id = db.Column(db.String(8), db.ForeignKey('club.id', ondelete='CASCADE'), nullable=False)
+    matchday_id = db.Column(db.Integer, db.ForeignKey('matchday.id', ondelete='CASCADE'), nullable=False)
+    reason = db.Column(db.String(100), nullable=True)
+
+    __table_args__ = (
+        db.UniqueConstraint('club_id', 'matchday_id', name='uq_club_hosting_blackout'),
+    )
+
+    club = relationship('Club')
+    matchday = relationship('Matchday')
+
+    def __repr__(self):
+        return f'{self.club} ne reçoit pas (J{self.matchday_id})'
+
 class Player(db.Model):
     __tablename__ = 'player'
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
@@ -273,9 +393,17 @@ class Player(db.Model):
     licenseId = db.Column(db.Integer, db.ForeignKey('license.id', ondelete='CASCADE'), nullable=False)
     license = relationship('License', back_populates='players')  # Removed cascade and single_parent to avoid license deletion
 
+    __table_args__ = (
+        db.Index('ix_player_club_license', 'clubId', 'licenseId'),
+        db.Index('ix_player_license', 'licenseId'),
+    )
+
     # Define the relationship with Team using many-to-many association
     teams = relationship('Team', secondary=player_team_association, back_populates='players', single_parent=True, cascade="all, delete-orphan")
 
+    # Instantané des ELO (table player_rating, voir PlayerRating.refresh)
+    rating = relationship('PlayerRating', uselist=False, back_populates='player', cascade='all, delete-orphan')
+
     def is_available(self, matchday) -> bool:
         """Check if player is available for a specific matchday"""
         availability = PlayerMatchdayAvailability.query.filter_by(
@@ -286,35 +414,17 @@ class Player(db.Model):
 
     def initialize_matchday_availability(self, championship):
         """Initialize availability for all matchdays in a championship for this player"""
-        # Get all matchdays for the championship
-        matchdays = Matchday.query.filter_by(championshipId=championship.id).all()
-
-        # Create availability records for each matchday
-        for matchday in matchdays:
-            # Check if availability record already exists
-            existing = PlayerMatchdayAvailability.query.filter_by(
-                player_id=self.id,
-                matchday_id=matchday.id
-            ).first()
-
-            if not existing:
-                availability = PlayerMatchdayAvailability(
-                    player_id=self.id,
-                    matchday_id=matchday.id,
-                    is_available=True,
-                    updated_at=datetime.utcnow()
-                )
-                db.session.add(availability)
-
+        matchday_ids = db.session.execute(select(Matchday.id).where(Matchday.championshipId == championship.id)).scalars()
+        PlayerMatchdayAvailability.ensure([self.id], matchday_ids)
         db.session.commit()
+
     @property
     def gender(self):
         return self.license.gender
 
     @property
     def double_rating(self):
-        zero_ranking = Ranking.query.filter_by(value="0").first()
-        return self.ranking.id - zero_ranking.id
+        return self.license.rankingId - ranking_ladder.id_of('0')
 
     @property
     def double_info(self):
@@ -322,9 +432,7 @@ class Player(db.Model):
 
     @property
     def ranking_id(self):
-        license = License.query.get(self.licenseId)
-        ranking = Ranking.query.get(license.rankingId)
-        return ranking.id
+        return self.license.rankingId
 
     @property
     def best_ranking_id(self):
@@ -343,13 +451,11 @@ class Player(db.Model):
 
     @property
     def ranking(self):
-        license = License.query.get(self.licenseId)
-        return Ranking.query.get(license.rankingId)
+        return self.license.ranking
 
     @property
     def best_ranking(self):
-        license = License.query.get(self.licenseId)
-        return BestRanking.query.get(license.bestRankingId) if license.bestRankingId else None
+        return self.license.bestRanking
 
     @property
     def last_name(self):
@@ -370,11 +476,11 @@ class Player(db.Model):
 
     @property
     def full_info(self):
-        nd_ranking = Ranking.query.filter_by(value="ND").first()
-        if self.best_ranking.id == nd_ranking.id:
+        license = self.license
+        if license.bestRankingId == ranking_ladder.id_of('ND', BestRanking):
             best_ranking = ', ex. ???'
         else:
-            best_ranking = f', ex. {self.best_ranking}' if self.best_ranking.id < self.ranking.id else ''
+            best_ranking = f', ex. {self.best_ranking}' if license.bestRankingId < license.rankingId else ''
         age_and_ranking = f'({self.age} ans{best_ranking})'
         return f'{self.name} {self.ranking} {age_and_ranking}'
 
@@ -397,29 +503,17 @@ class Player(db.Model):
         """
             Classement ELO du joueur
         """
-        elo_weight = 15  # to better fit with ELO rating system (10 is better)
-        nc_ranking = Ranking.query.filter_by(value="NC").first()
-        second_series_threshold = Ranking.query.filter_by(value="-15").first()
-        if self.ranking.id < second_series_threshold.id:
-            ranking_delta = (second_series_threshold.id - self.ranking.id) // 10 + nc_ranking.id - second_series_threshold.id
-        else:
-            ranking_delta = nc_ranking.id - self.ranking.id
-        return ranking_delta * elo_weight # Classement ELO actuel du joueur
+        return ranking_ladder.elo(self.license.rankingId)  # Classement ELO actuel du joueur
 
     @property
     def best_elo(self) -> int:
         """
             Classement ELO du joueur
         """
-        elo_weight = 15  # to better fit with ELO rating system (10 is better)
-        nc_ranking = Ranking.query.filter_by(value="NC").first()
-        second_series_threshold = Ranking.query.filter_by(value="-15").first()
-        if self.best_ranking:
-            if self.ranking.id < second_series_threshold.id:
-                ranking_delta = (second_series_threshold.id - self.best_ranking.id) // 10 + nc_ranking.id - second_series_threshold.id
-            else:
-                ranking_delta = nc_ranking.id - self.best_ranking.id
-            return ranking_delta * elo_weight if ranking_delta != -1 else self.current_elo # Meilleur classement ELO du joueur
+        license = self.license
+        if license.bestRankingId:
+            ranking_delta = ranking_ladder.elo_delta(license.bestRankingId, reference_id=license.rankingId)
+            return ranking_delta * RankingLadder.ELO_WEIGHT if ranking_delta != -1 else self.current_elo # Meilleur classement ELO du joueur
         else:
             return self.current_elo
 
@@ -462,19 +556,122 @@ class Player(db.Model):
         senior = AC.query.filter(AC.type == 1).first()
         return senior
 
+    @property
+    def snapshot_elo(self) -> tuple:
+        """(ELO actuel, ELO affiné) de l'instantané player_rating, recalculés s'il manque."""
+        if self.rating is not None:
+            return self.rating.current_elo, self.rating.refined_elo
+        return self.current_elo, self.refined_elo
+
     def __repr__(self):
         return f'{self.name}'
 
 
+class PlayerRating(db.Model):
+    """Instantané persistant des ELO d'un joueur, pour trier et filtrer en SQL.
+
+    Rafraîchi à l'import et à la mise à jour des joueurs, à la modification des
+    blessures et chaque nuit (passage d'âge) : voir `PlayerRating.refresh`.
+    """
+    __tablename__ = 'player_rating'
+
+    player_id = db.Column(db.Integer, db.ForeignKey('player.id', ondelete='CASCADE'), primary_key=True)
+    club_id = db.Column(db.String(8), db.ForeignKey('club.id', ondelete='CASCADE'), nullable=False)
+    gender = db.Column(db.Integer, nullable=False)
+    ranking_id = db.Column(db.Integer, nullable=False)
+    best_ranking_id = db.Column(db.Integer, nullable=True)
+    current_elo = db.Column(db.Integer, nullable=False)
+    best_elo = db.Column(db.Integer, nullable=False)
+    refined_elo = db.Column(db.Integer, nullable=False)
+    age = db.Column(db.Integer, nullable=False)
+    age_category_id = db.Column(db.Integer, db.ForeignKey('age_category.id', ondelete='SET NULL'), nullable=True)
+    injury_count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_player_rating_club_gender_elo', 'club_id', 'gender', 'refined_elo'),
+    )
+
+    player = relationship('Player', back_populates='rating')
+
+    @staticmethod
+    def _age_category(age: int, categories: list):
+        """Même règle que Player.age_category, sur les catégories déjà chargées."""
+        youth = sorted((c for c in categories if c.type == 0 and c.minAge <= age <= c.maxAge), key=lambda c: c.maxAge)
+        if youth:
+            return youth[0]
+        veteran = sorted((c for c in categories if c.type == 2 and c.minAge <= age <= c.maxAge), key=lambda c: c.minAge)
+        if veteran:
+            return veteran[0]
+        return next((c for c in categories if c.type == 1), None)
+
+    @classmethod
+    def refresh(cls, players: Iterable[Player]) -> int:
+        """Recalcule l'instantané des joueurs donnés (sans commit) ; retourne leur nombre."""
+        categories = AgeCategory.query.order_by(AgeCategory.id).all()
+        count = 0
+        for player in players:
+            if player.license is None:
+                continue
+            rating = player.rating or cls(player_id=player.id)
+            age = player.age
+            category = cls._age_category(age, categories)
+            rating.club_id = player.clubId
+            rating.gender = player.license.gender
+            rating.ranking_id = player.license.rankingId
+            rating.best_ranking_id = player.license.bestRankingId
+            rating.current_elo = player.current_elo
+            rating.best_elo = player.best_elo
+            rating.refined_elo = player.refined_elo
+            rating.age = age
+            rating.age_category_id = category.id if category else None
+            rating.injury_count = len(player.injuries)
+            player.rating = rating
+            count += 1
+        return count
+
+    @classmethod
+    def refined_elos(cls, players: Iterable[Player]) -> dict:
+        """ELO affiné des joueurs (id -> ELO) lu en une requête ; recalculé pour les joueurs sans instantané."""
+        players = list(players)
+        ids = [player.id for player in players if player.id is not None]
+        elos = dict(db.session.execute(select(cls.player_id, cls.refined_elo).where(cls.player_id.in_(ids))).all()) \
+            if ids else {}
+        return {player.id: elos[player.id] if player.id in elos else player.refined_elo for player in players}
+
+    @classmethod
+    def refresh_club(cls, club_id: str, gender: int = None) -> int:
+        """Recalcule l'instantané de tous les joueurs d'un club (d'un genre si précisé)."""
+        query = Player.query.join(Player.license).filter(Player.clubId == club_id)
+        if gender is not None:
+            query = query.filter(License.gender == gender)
+        return cls.refresh(query.options(contains_eager(Player.license), selectinload(Player.injuries),
+                                         selectinload(Player.rating)).all())
+
+    @classmethod
+    def refresh_players(cls, player_ids: Iterable[int]) -> int:
+        """Recalcule l'instantané des joueurs d'identifiants donnés (liste IN : à découper si très longue)."""
+        player_ids = list(player_ids)
+        if not player_ids:
+            return 0
+        return cls.refresh(Player.query.join(Player.license).filter(Player.id.in_(player_ids)).options(
+            contains_eager(Player.license), selectinload(Player.injuries), selectinload(Player.rating)).all())
+
+
 class Team(db.Model):
     __tablename__ = 'team'
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    name = db.Column(db.String(20), unique=False, nullable=False)
+    name = db.Column(db.String(60), unique=False, nullable=False)
     captainId = db.Column(db.Integer, db.ForeignKey('player.id', ondelete='SET NULL'), nullable=True)
     poolId = db.Column(db.Integer, db.ForeignKey('pool.id'), nullable=True)
     ranking = db.Column(db.Integer, nullable=True)
     clubId = db.Column(db.String(8), db.ForeignKey('club.id', ondelete='CASCADE'), nullable=False)
 
+    __table_args__ = (
+        db.Index('ix_team_pool', 'poolId'),
+        db.Index('ix_team_club', 'clubId'),
+    )
+
     # Define the foreign key relationship with Pool
     pool = relationship('Pool', back_populates='teams')
 
@@ -533,48 +730,51 @@ class Team(db.Model):
     def get_players_for_simulation(self, matchday, singles_count: int, doubles_count: int):
         """Retourne (singles_players, doubles_players) pour la simulation.
         Détecte si une sélection capitaine existe via la présence de rôles cochés.
+        Pour toutes les équipes et journées d'une poule, voir `simulation_lineups.prefetch_lineups`.
         """
         player_ids = [p.id for p in self.players]
+        availabilities = {
+            a.player_id: a
+            for a in PlayerMatchdayAvailability.query.filter(
+                PlayerMatchdayAvailability.matchday_id == matchday.id,
+                PlayerMatchdayAvailability.player_id.in_(player_ids)
+            ).all()
+        }
+        # Joueurs actifs triés en SQL sur l'instantané ELO ; sans instantané : en dernier, quelle
+        # que soit la base (PostgreSQL place les NULL en tête d'un DESC), comme prefetch_lineups
+        ranked_players = Player.query.outerjoin(Player.rating).options(contains_eager(Player.rating)).filter(
+            Player.id.in_(player_ids), Player.isActive.is_(True)
+        ).order_by(PlayerRating.refined_elo.desc().nullslast()).all()
+        joker_entry = TeamMatchdayJoker.query.filter_by(team_id=self.id, matchday_id=matchday.id).first()
+        joker = joker_entry.player if joker_entry and joker_entry.player else None
+        return self.pick_simulation_players(ranked_players, availabilities, joker, joker_entry,
+                                            singles_count, doubles_count)
+
+    @staticmethod
+    def pick_simulation_players(ranked_players: list, availabilities: dict, joker, joker_entry,
+                                singles_count: int, doubles_count: int):
+        """Sélection de `get_players_for_simulation`, sans accès à la base.
 
+        :param ranked_players: joueurs actifs de l'équipe, du meilleur au moins bon ELO affiné
+        :param availabilities: {player_id: disponibilité de la journée} pour tous les joueurs de l'équipe
+        :param joker:          joueur joker de la journée (ou None), `joker_entry` son inscription
+        """
         # Sélection = au moins un joueur avec un rôle coché
-        role_selection_count = PlayerMatchdayAvailability.query.filter(
-            PlayerMatchdayAvailability.matchday_id == matchday.id,
-            PlayerMatchdayAvailability.player_id.in_(player_ids),
-            db.or_(
-                PlayerMatchdayAvailability.plays_single == True,
-                PlayerMatchdayAvailability.plays_double == True,
-                PlayerMatchdayAvailability.is_substitute == True,
-            )
-        ).count()
+        role_selection = any(a.plays_single or a.plays_double or a.is_substitute for a in availabilities.values())
 
-        if role_selection_count == 0:
+        if not role_selection:
             # Pas de sélection → algo existant : tous joueurs actifs
-            all_active = Player.query.filter(
-                Player.id.in_(player_ids),
-                Player.isActive.is_(True)
-            ).all()
-            sorted_all = sorted(all_active, key=lambda p: p.refined_elo, reverse=True)
-            joker = self.get_joker(matchday)
+            sorted_all = list(ranked_players)
             if joker and joker not in sorted_all:
                 sorted_all.append(joker)
             return list(sorted_all), list(sorted_all)
 
         # Sélection effectuée → respecter les rôles
-        availabilities = {
-            a.player_id: a
-            for a in PlayerMatchdayAvailability.query.filter(
-                PlayerMatchdayAvailability.matchday_id == matchday.id,
-                PlayerMatchdayAvailability.player_id.in_(player_ids)
-            ).all()
-        }
-
         singles_players = []
         doubles_players = []
         substitutes     = []
 
-        for player in Player.query.filter(
-            Player.id.in_(player_ids), Player.isActive.is_(True)
-        ).all():
+        for player in ranked_players:
             a = availabilities.get(player.id)
             if a is None:
                 continue
@@ -586,25 +786,21 @@ class Team(db.Model):
                 substitutes.append(player)
 
         # Joker
-        joker = self.get_joker(matchday)
-        joker_entry = TeamMatchdayJoker.query.filter_by(
-            team_id=self.id, matchday_id=matchday.id
-        ).first()
         if joker:
             if joker_entry and joker_entry.plays_single and joker not in singles_players:
                 singles_players.append(joker)
             if joker_entry and joker_entry.plays_double and joker not in doubles_players:
                 doubles_players.append(joker)
 
-        # Compléter avec les remplaçants si insuffisance
-        sub_pool = sorted(substitutes, key=lambda p: p.refined_elo, reverse=True)
+        # Compléter avec les remplaçants si insuffisance (déjà triés par ELO affiné)
+        sub_pool = list(substitutes)
         while len(singles_players) < singles_count and sub_pool:
             singles_players.append(sub_pool.pop(0))
         while len(doubles_players) < doubles_count * 2 and sub_pool:
             doubles_players.append(sub_pool.pop(0))
 
-        singles_players = sorted(singles_players, key=lambda p: p.refined_elo, reverse=True)
-        doubles_players = sorted(doubles_players, key=lambda p: p.refined_elo, reverse=True)
+        singles_players = sorted(singles_players, key=lambda p: p.snapshot_elo[1], reverse=True)
+        doubles_players = sorted(doubles_players, key=lambda p: p.snapshot_elo[1], reverse=True)
 
         return singles_players, doubles_players
 
@@ -617,28 +813,9 @@ class Team(db.Model):
 
     def initialize_player_availability(self):
         """Initialize availability for all players in the team"""
-        matchdays = Matchday.query.filter_by(championshipId=self.championship.id).all()
-
-        availabilities = []
-        for player in self.players:
-            for matchday in matchdays:
-                existing = PlayerMatchdayAvailability.query.filter_by(
-                    player_id=player.id,
-                    matchday_id=matchday.id
-                ).first()
-
-                if not existing:
-                    availability = PlayerMatchdayAvailability(
-                        player_id=player.id,
-                        matchday_id=matchday.id,
-                        is_available=True,
-                        updated_at=datetime.utcnow()
-                    )
-                    availabilities.append(availability)
-
-        if availabilities:
-            db.session.add_all(availabilities)
-            db.session.commit()
+        matchday_ids = db.session.execute(select(Matchday.id).where(Matchday.championshipId == self.championship.id)).scalars()
+        PlayerMatchdayAvailability.ensure([player.id for player in self.players], matchday_ids)
+        db.session.commit()
 
     def matches_played(self) -> int:
         return len(self.pool.teams) - 1
@@ -662,7 +839,10 @@ class Team(db.Model):
         return visitor_team is not None and visitor_team.id == self.id
 
     def weight(self, championship) -> int:
-        return (Ranking.query.count() * championship.singlesCount) - sum([p.license.rankingId for i, p in enumerate(self.players) if i < championship.singlesCount])
+        return team_strengths.get(self, championship.singlesCount).weight
+
+    def strength(self, championship) -> TeamStrength:
+        return team_strengths.get(self, championship.singlesCount)
 
     @property
     def gender(self) -> int:
@@ -701,6 +881,150 @@ class Team(db.Model):
         return f'{self.name}'
 
 
+class TeamStrength(NamedTuple):
+    """Indicateurs de force d'une équipe pour `singles_count` simples."""
+    weight: int               # nb de classements × N - somme des rangs des N meilleurs joueurs
+    average_elo: float        # ELO actuel moyen de tout l'effectif
+    top_singles_elo: int      # somme des ELO actuels des N meilleurs joueurs
+
+
+class TeamStrengthCache:
+    """Force des équipes calculée une fois par processus, à partir des classements de l'effectif.
+
+    `for_teams` charge en une requête les classements de toutes les équipes
+    absentes du cache (tri des équipes, meilleure / moins bonne équipe d'une
+    poule, pages de poules) ; les équipes non encore enregistrées sont
+    calculées sur leurs joueurs en mémoire, sans mise en cache. Invalidation :
+    modification de l'effectif (Team.players / Player.teams), suppression
+    d'une équipe, changement de classement d'une licence (tout le cache).
+
+    Plusieurs processus (workers du serveur) : une transaction qui invalide
+    le cache écrit une nouvelle génération dans app_settings à son commit ;
+    `sync`, appelée au début de chaque requête et de chaque job, vide le
+    cache du processus quand la génération enregistrée a changé.
+    """
+
+    def __init__(self):
+        self._strengths = {}  # (team_id, singles_count) -> TeamStrength
+        self._generation = None  # génération lue ou écrite en dernier par ce processus
+
+    def invalidate(self, team_id: int = None):
+        if team_id is None:
+            self._strengths = {}
+        else:
+            for key in [key for key in self._strengths if key[0] == team_id]:
+                del self._strengths[key]
+        if has_app_context():
+            db.session.info[_STRENGTHS_CHANGED_KEY] = True  # publiée au commit
+
+    def publish(self, session):
+        """Écrit une nouvelle génération (sans commit) : les autres processus videront leur cache."""
+        settings = AppSettings.__table__
+        generation = uuid.uuid4().hex
+        session.execute(insert_or_ignore(settings), [dict(key=TEAM_STRENGTH_GENERATION_KEY, value=generation)])
+        session.execute(update(settings).where(settings.c.key == TEAM_STRENGTH_GENERATION_KEY)
+                        .values(value=generation))
+        self._generation = generation
+
+    def sync(self):
+        """Vide le cache si un autre processus a publié une invalidation depuis la dernière lecture (une requête)."""
+        settings = AppSettings.__table__
+        generation = db.session.execute(
+            select(settings.c.value).where(settings.c.key == TEAM_STRENGTH_GENERATION_KEY)).scalar()
+        if generation != self._generation:
+            self._strengths = {}
+            self._generation = generation
+
+    @staticmethod
+    def _compute(ranking_ids: list, singles_count: int) -> TeamStrength:
+        ranking_ids = sorted(ranking_ids)  # meilleur classement d'abord
+        best = ranking_ids[:singles_count]
+        elos = [ranking_ladder.elo(ranking_id) for ranking_id in ranking_ids]
+        return TeamStrength(weight=ranking_ladder.count() * singles_count - sum(best),
+                            average_elo=sum(elos) / len(elos) if elos else 0.0,
+                            top_singles_elo=sum(elos[:singles_count]))
+
+    def for_teams(self, teams: Iterable[Team], singles_count: int) -> list:
+        """Forces de plusieurs équipes, dans l'ordre de `teams` (une requête pour les absentes du cache)."""
+        teams = list(teams)
+        missing = {team.id for team in teams
+                   if team.id is not None and (team.id, singles_count) not in self._strengths}
+        if missing:
+            ranking_ids = {team_id: [] for team_id in missing}
+            rows = db.session.execute(
+                select(player_team_association.c.team_id, License.rankingId)
+                .join(Player, Player.id == player_team_association.c.player_id)
+                .join(License, License.id == Player.licenseId)
+                .where(player_team_association.c.team_id.in_(missing)))
+            for team_id, ranking_id in rows:
+                ranking_ids[team_id].append(ranking_id)
+            for team_id, ids in ranking_ids.items():
+                self._strengths[(team_id, singles_count)] = self._compute(ids, singles_count)
+        return [self._compute([p.license.rankingId for p in team.players], singles_count) if team.id is None
+                else self._strengths[(team.id, singles_count)] for team in teams]
+
+    def get(self, team: Team, singles_count: int) -> TeamStrength:
+        return self.for_teams([team], singles_count)[0]
+
+    def sort(self, teams: Iterable[Team], singles_count: int) -> list:
+        """Équipes triées par poids croissant (tri stable)."""
+        teams = list(teams)
+        weights = [strength.weight for strength in self.for_teams(teams, singles_count)]
+        return [teams[i] for i in sorted(range(len(teams)), key=weights.__getitem__)]
+
+
+# Registre du processus (voir TeamStrengthCache)
+TEAM_STRENGTH_GENERATION_KEY = 'team_strength_generation'
+_STRENGTHS_CHANGED_KEY = 'team_strengths_changed'
+team_strengths = TeamStrengthCache()
+
+
+@event.listens_for(Session, 'before_commit')
+def _publish_team_strength_generation(session):
+    session.flush()  # invalidations déclenchées par le flush (suppressions d'équipes)
+    if session.info.pop(_STRENGTHS_CHANGED_KEY, False):
+        team_strengths.publish(session)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_team_strength_generation(session):
+    session.info.pop(_STRENGTHS_CHANGED_KEY, None)
+
+
+@event.listens_for(Team.players, 'append')
+@event.listens_for(Team.players, 'remove')
+def _invalidate_team_strength(team, player, initiator):
+    if team.id is not None:
+        team_strengths.invalidate(team.id)
+
+
+@event.listens_for(Player.teams, 'append')
+@event.listens_for(Player.teams, 'remove')
+def _invalidate_player_team_strength(player, team, initiator):
+    if team.id is not None:
+        team_strengths.invalidate(team.id)
+
+
+@event.listens_for(Team, 'after_delete')
+def _invalidate_deleted_team_strength(mapper, connection, team):
+    team_strengths.invalidate(team.id)
+
+
+@event.listens_for(License.rankingId, 'set')
+def _invalidate_strengths_on_ranking(license, value, old_value, initiator):
+    if value != old_value:
+        team_strengths.invalidate()
+
+
+@event.listens_for(License.rankingId, 'set')
+@event.listens_for(License.bestRankingId, 'set')
+def _forget_tenup_row(license, value, old_value, initiator):
+    # Classement saisi hors import Tenup (écritures en masse, sans événement) : la ligne
+    # du prochain export sera relue par la synchronisation (voir tenup_sync.py)
+    if value != old_value and db.inspect(license).has_identity:
+        license.tenupHash = None
+
+
 class AgeCategory(db.Model):
     __tablename__ = 'age_category'
 
@@ -842,6 +1166,12 @@ class PoolSimulation(db.Model):
     pool_id = db.Column(db.Integer, ForeignKey('pool.id'), nullable=False)
     num_simulations = db.Column(db.Integer, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    fixed_matches = db.Column(db.Integer, nullable=False, default=0)  # rencontres jouées conservées (reste de la saison)
+    qualified_count = db.Column(db.Integer, nullable=False, default=1)  # places qualificatives
+    relegated_count = db.Column(db.Integer, nullable=False, default=1)  # places de relégation
+    rank_precision = db.Column(db.Float, nullable=True)  # précision cible du rang moyen (demi-largeur IC 95 %)
+    probability_precision = db.Column(db.Float, nullable=True)  # précision cible des probabilités
+    converged = db.Column(db.Boolean, nullable=True)  # None : nombre d'itérations fixe
 
     # Relationships
     pool = relationship('Pool', back_populates='simulations')
@@ -859,6 +1189,12 @@ class TeamSimulationResult(db.Model):
     avg_points = db.Column(db.Float, nullable=False)
     best_ranking = db.Column(db.Integer, nullable=False)
     worst_ranking = db.Column(db.Integer, nullable=False)
+    qualification_probability = db.Column(db.Float, nullable=True)
+    relegation_probability = db.Column(db.Float, nullable=True)
+    # Demi-largeurs des intervalles de confiance à 95 %
+    avg_ranking_error = db.Column(db.Float, nullable=True)
+    qualification_error = db.Column(db.Float, nullable=True)
+    relegation_error = db.Column(db.Float, nullable=True)
 
     # Relationships
     simulation = relationship('PoolSimulation', back_populates='team_results')
@@ -908,7 +1244,8 @@ class Pool(db.Model):
         # return max(self.teams, key=lambda team: team.weight(self.championship)) if self.teams else None
         teams: Iterable[Team] = self.teams
         if teams:
-            return max(teams, key=lambda team: team.weight(self.championship))
+            strengths = team_strengths.for_teams(teams, self.championship.singlesCount)
+            return max(zip(teams, strengths), key=lambda item: item[1].weight)[0]
         else:
             return None
 
@@ -917,7 +1254,8 @@ class Pool(db.Model):
         # return min(self.teams, key=lambda team: team.weight(self.championship)) if self.teams else None
         teams: Iterable[Team] = self.teams
         if teams:
-            return min(teams, key=lambda team: team.weight(self.championship))
+            strengths = team_strengths.for_teams(teams, self.championship.singlesCount)
+            return min(zip(teams, strengths), key=lambda item: item[1].weight)[0]
         else:
             return None
 
@@ -931,6 +1269,30 @@ class Pool(db.Model):
         return self.letter
 
 
+class PoolStanding(db.Model):
+    """Totaux persistants d'une équipe dans une poule (rencontres jouées uniquement).
+
+    Tenus à jour par delta à chaque écriture de rencontre, simple, double ou
+    score (voir standings.py) ; `standings.rebuild` les recalcule entièrement.
+    Table dérivée, sans clé étrangère : une poule ou une équipe supprimée
+    laisse au pire des lignes orphelines, nettoyées par la reconstruction.
+    """
+    __tablename__ = 'pool_standing'
+
+    pool_id = db.Column(db.Integer, primary_key=True)
+    team_id = db.Column(db.Integer, primary_key=True)
+    played = db.Column(db.Integer, nullable=False, default=0)
+    won = db.Column(db.Integer, nullable=False, default=0)
+    draw = db.Column(db.Integer, nullable=False, default=0)
+    lost = db.Column(db.Integer, nullable=False, default=0)
+    matches_won = db.Column(db.Integer, nullable=False, default=0)
+    sets_won = db.Column(db.Integer, nullable=False, default=0)
+    sets_lost = db.Column(db.Integer, nullable=False, default=0)
+    games_won = db.Column(db.Integer, nullable=False, default=0)
+    games_lost = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
 class Matchday(db.Model):
     __tablename__ = 'matchday'
 
@@ -1017,6 +1379,13 @@ class Match(db.Model):
     visitorTeamId = db.Column(db.Integer, ForeignKey('team.id', ondelete='SET NULL'), nullable=True)
     visitorTeam = relationship('Team', foreign_keys=[visitorTeamId])
 
+    # Rencontres d'une poule, et d'une équipe (à domicile ou à l'extérieur) par journée
+    __table_args__ = (
+        db.Index('ix_match_pool_teams', 'poolId', 'homeTeamId', 'visitorTeamId'),
+        db.Index('ix_match_home_team_matchday', 'homeTeamId', 'matchdayId'),
+        db.Index('ix_match_visitor_team_matchday', 'visitorTeamId', 'matchdayId'),
+    )
+
     singles = relationship('Single', back_populates='match', cascade="all, delete-orphan")
     doubles = relationship('Double', back_populates='match', cascade="all, delete-orphan")
 
@@ -1068,6 +1437,10 @@ class Single(db.Model):
     player1Id = db.Column(db.Integer, ForeignKey('player.id', ondelete='SET NULL'), nullable=True)
     player2Id = db.Column(db.Integer, ForeignKey('player.id', ondelete='SET NULL'), nullable=True)
 
+    __table_args__ = (
+        db.Index('ix_singles_match', 'matchId'),
+    )
+
     match = relationship('Match', back_populates='singles')
     score = relationship('Score', back_populates='singles')
 
@@ -1086,6 +1459,10 @@ class Double(db.Model):
     player3Id = db.Column(db.Integer, ForeignKey('player.id', ondelete='SET NULL'), nullable=True)
     player4Id = db.Column(db.Integer, ForeignKey('player.id', ondelete='SET NULL'), nullable=True)
 
+    __table_args__ = (
+        db.Index('ix_doubles_match', 'matchId'),
+    )
+
     match = relationship('Match', back_populates='doubles')
     score = relationship('Score', back_populates='doubles')
 
@@ -1150,6 +1527,41 @@ class AppSettings(db.Model):
             # Table doesn't exist yet, will be created by migration
             pass
 
+
+class Job(db.Model):
+    """Traitement long exécuté en arrière-plan (voir jobs.py)."""
+    __tablename__ = 'job'
+
+    QUEUED, RUNNING, DONE, FAILED, CANCELLED = 'queued', 'running', 'done', 'failed', 'cancelled'
+    FINISHED = (DONE, FAILED, CANCELLED)
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)  # nom de la tâche enregistrée (ex. 'simulate_pool_batch')
+    description = db.Column(db.String(255), nullable=True)
+    params = db.Column(db.Text, nullable=False, default='{}')  # arguments JSON de la tâche
+    status = db.Column(db.String(20), nullable=False, default=QUEUED)
+    progress = db.Column(db.Float, nullable=False, default=0.0)  # 0.0 → 1.0
+    message = db.Column(db.Text, nullable=True)
+    result_endpoint = db.Column(db.String(100), nullable=True)  # page à afficher une fois terminé
+    result_args = db.Column(db.Text, nullable=True)  # arguments JSON de url_for
+    cancel_requested = db.Column(db.Boolean, nullable=False, default=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    heartbeat_at = db.Column(db.DateTime, nullable=True)  # dernier signe de vie du processus qui l'exécute
+    run_key = db.Column(db.String(80), nullable=True)  # exécution planifiée unique (ex. 'tâche@2026-01-31')
+
+    __table_args__ = (
+        db.Index('ix_job_run_key', 'run_key', unique=True),
+    )
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in self.FINISHED
+
+    def __repr__(self):
+        return f'Job #{self.id} {self.kind} ({self.status})'
+
 # ─────────────────────────────────────────────────────────────────────────────
 #  MODULE TOURNOI INTERNE
 # ─────────────────────────────────────────────────────────────────────────────
@@ -1198,6 +1610,10 @@ class TournamentCategory(db.Model):
     max_ranking_id = db.Column(db.Integer, db.ForeignKey('ranking.id'), nullable=True)  # plafond : joueurs trop forts exclus
     allowed_series  = db.Column(db.String(20), nullable=True)  # séries autorisées ex: "3,4" ; null = toutes
 
+    __table_args__ = (
+        db.Index('ix_tournament_category_tournament', 'tournament_id'),
+    )
+
     tournament = relationship('Tournament', back_populates='categories')
     age_category = relationship('AgeCategory')
     min_ranking = relationship('Ranking', foreign_keys=[min_ranking_id])
@@ -1282,6 +1698,10 @@ class TournamentRegistration(db.Model):
     seed_number = db.Column(db.Integer, nullable=True)
     status = db.Column(db.String(20), nullable=False, default='REGISTERED')  # REGISTERED, WITHDRAWN, QUALIFIED
 
+    __table_args__ = (
+        db.Index('ix_tournament_registration_category_player', 'category_id', 'player_id'),
+    )
+
     category = relationship('TournamentCategory', back_populates='registrations')
     player = relationship('Player')
     availabilities = relationship('TournamentAvailability', back_populates='registration', cascade='all, delete-orphan')
@@ -1322,6 +1742,10 @@ class TournamentDraw(db.Model):
     main_draw_slot = db.Column(db.String(2), nullable=True)     # 'p1' ou 'p2'
     qualif_number = db.Column(db.Integer, nullable=True)        # numéro du qualifié (Q1, Q2…)
 
+    __table_args__ = (
+        db.Index('ix_tournament_draw_category', 'category_id'),
+    )
+
     category = relationship('TournamentCategory', back_populates='draws')
     matches = relationship('TournamentMatch', back_populates='draw', cascade='all, delete-orphan')
 
@@ -1353,6 +1777,10 @@ class TournamentMatch(db.Model):
     score_text = db.Column(db.String(50), nullable=True)
     next_match_date_options = db.Column(db.String(200), nullable=True)  # Dates proposées pour la convocation
 
+    __table_args__ = (
+        db.Index('ix_tournament_match_draw_round_position', 'draw_id', 'round_number', 'position'),
+    )
+
     draw = relationship('TournamentDraw', back_populates='matches')
     player1 = relationship('Player', foreign_keys=[player1_id])
     player2 = relationship('Player', foreign_keys=[player2_id])
@@ -0,0 +1,196 @@
+"""
+Constitution des poules : force équilibrée entre poules et déplacements minimaux.
+
+Remplace la distribution des équipes triées par poids dans des lettres de
+poule mélangées (une requête par équipe, géographie ignorée) :
+  - matrice des distances entre clubs (`distance_matrix`) : table Distance
+    (itinéraires déjà calculés, dans un sens ou dans l'autre), sinon distance
+    orthodromique depuis les coordonnées des clubs, sinon distance moyenne ;
+  - coût d'une répartition (`PoolCost`) : déplacements (somme des distances
+    entre équipes d'une même poule, chaque paire se rencontrant une fois) et
+    déséquilibre de force (écart des poids cumulés des poules à la moyenne),
+    chacun normalisé par sa valeur attendue pour une répartition au hasard ;
+  - amorce gloutonne : équipes prises de la plus forte à la plus faible, chacune
+    placée dans la poule non pleine où son coût marginal est le plus faible ;
+  - recherche locale : échanges de deux équipes de poules différentes tant
+    qu'ils font baisser le coût. Les sommes de distances équipe → poule sont
+    tenues à jour, chaque échange est évalué en O(1) et appliqué en O(n).
+
+Quelques centaines d'équipes sont réparties en quelques secondes au plus
+(`time_limit` borne la recherche locale).
+"""
+from __future__ import annotations
+
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Optional, Sequence
+
+from sqlalchemy import select
+
+from extensions import db
+from models import Club, Distance
+
+EARTH_RADIUS = 6_371_000  # m
+
+
+def _haversine(lat1, lon1, lat2, lon2) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi, d_lambda = phi2 - phi1, math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS * math.asin(math.sqrt(a))
+
+
+def distance_matrix(club_ids: Sequence[str]) -> list:
+    """Distances (m) entre les clubs donnés, matrice symétrique dans l'ordre de `club_ids`.
+
+    Deux requêtes : itinéraires connus (Distance) et coordonnées des clubs.
+    """
+    index = {}
+    for club_id in club_ids:
+        index.setdefault(club_id, len(index))
+    unique = list(index)
+    size = len(unique)
+    known = [[None] * size for _ in range(size)]
+    rows = db.session.execute(select(Distance.from_club_id, Distance.to_club_id, Distance.distance)
+                              .where(Distance.from_club_id.in_(unique), Distance.to_club_id.in_(unique),
+                                     Distance.distance.isnot(None)))
+    for from_id, to_id, distance in rows:
+        i, j = index[from_id], index[to_id]
+        known[i][j] = known[j][i] = distance
+    coordinates = {club_id: (lat, lng) for club_id, lat, lng in db.session.execute(
+        select(Club.id, Club.latitude, Club.longitude).where(Club.id.in_(unique), Club.latitude.isnot(None),
+                                                             Club.longitude.isnot(None)))}
+    for i, a in enumerate(unique):
+        for j in range(i + 1, size):
+            b = unique[j]
+            if known[i][j] is None and a in coordinates and b in coordinates:
+                known[i][j] = known[j][i] = _haversine(*coordinates[a], *coordinates[b])
+    values = [known[i][j] for i in range(size) for j in range(i + 1, size) if known[i][j] is not None]
+    default = sum(values) / len(values) if values else 0.0
+    clubs = [[0.0 if i == j else (known[i][j] if known[i][j] is not None else default) for j in range(size)]
+             for i in range(size)]
+    return [[clubs[index[a]][index[b]] for b in club_ids] for a in club_ids]
+
+
+@dataclass
+class PoolAssignment:
+    """Répartition obtenue et indicateurs atteints."""
+    pools: list                       # pools[p] = indices des équipes
+    travel: float                     # somme des distances intra-poule (m)
+    initial_travel: float             # après l'amorce gloutonne
+    weight_spread: float              # poids cumulé max - min entre poules
+    initial_weight_spread: float
+    swaps: int = 0
+    elapsed: float = 0.0
+    pool_weights: list = field(default_factory=list)
+
+    def summary(self) -> str:
+        return (f'{len(self.pools)} poule(s), déplacements {self.travel / 1000:.0f} km '
+                f'(amorce {self.initial_travel / 1000:.0f} km), écart de poids {self.weight_spread:.0f} '
+                f'(amorce {self.initial_weight_spread:.0f}), {self.swaps} échange(s) en {self.elapsed:.2f}s')
+
+
+class PoolCost:
+    """Coût normalisé d'une répartition : déplacements + `balance` × déséquilibre de force."""
+
+    def __init__(self, weights: Sequence[float], distances: Sequence[Sequence[float]], num_pools: int,
+                 pool_size: int, balance: float = 1.0):
+        n = len(weights)
+        self.balance = balance
+        self.target = sum(weights) / num_pools if num_pools else 0.0
+        mean = sum(weights) / n if n else 0.0
+        variance = sum((w - mean) ** 2 for w in weights) / n if n else 0.0
+        pairs = [distances[i][j] for i in range(n) for j in range(i + 1, n)]
+        mean_distance = sum(pairs) / len(pairs) if pairs else 0.0
+        # Valeurs attendues pour une répartition au hasard (échelles de normalisation)
+        self.travel_scale = mean_distance * num_pools * pool_size * (pool_size - 1) / 2 or 1.0
+        self.balance_scale = variance * pool_size * num_pools or 1.0
+
+    def travel_term(self, travel: float) -> float:
+        return travel / self.travel_scale
+
+
+def _travel(pools, distances) -> float:
+    return sum(distances[a][b] for members in pools for i, a in enumerate(members) for b in members[i + 1:])
+
+
+def _spread(pool_weights) -> float:
+    return max(pool_weights) - min(pool_weights) if pool_weights else 0.0
+
+
+def build_pools(weights: Sequence[float], distances: Sequence[Sequence[float]], num_pools: int,
+                pool_size: int, balance: float = 1.0, time_limit: Optional[float] = 5.0) -> PoolAssignment:
+    """Répartit `num_pools` × `pool_size` équipes (indices de `weights`) en poules.
+
+    :param weights:    poids (force) de chaque équipe, plus élevé = plus forte
+    :param distances:  distances entre équipes (voir `distance_matrix`)
+    :param balance:    importance relative de l'équilibre des forces face aux déplacements
+    :param time_limit: durée maximale de la recherche locale (s), None = jusqu'à l'optimum local
+    """
+    start = time.perf_counter()
+    n = len(weights)
+    if num_pools * pool_size != n:
+        raise ValueError(f'{n} équipes pour {num_pools} poule(s) de {pool_size}')
+    cost = PoolCost(weights, distances, num_pools, pool_size, balance)
+    pools = [[] for _ in range(num_pools)]
+    pool_of = [0] * n
+    pool_weights = [0.0] * num_pools
+    # to_pool[t][p] : somme des distances de l'équipe t aux membres de la poule p
+    to_pool = [[0.0] * num_pools for _ in range(n)]
+
+    def place(team: int, p: int):
+        pools[p].append(team)
+        pool_of[team] = p
+        pool_weights[p] += weights[team]
+        for other in range(n):
+            to_pool[other][p] += distances[other][team]
+
+    # Amorce gloutonne : plus fortes d'abord, coût marginal minimal
+    for team in sorted(range(n), key=lambda t: -weights[t]):
+        def marginal(p):
+            before = (pool_weights[p] - cost.target) ** 2
+            after = (pool_weights[p] + weights[team] - cost.target) ** 2
+            return (cost.travel_term(to_pool[team][p])
+                    + cost.balance * (after - before) / cost.balance_scale)
+        place(team, min((p for p in range(num_pools) if len(pools[p]) < pool_size), key=marginal))
+    initial_travel, initial_spread = _travel(pools, distances), _spread(pool_weights)
+
+    # Recherche locale : échanges améliorants entre poules
+    swaps = 0
+    deadline = None if time_limit is None else start + time_limit
+    improved = True
+    while improved and (deadline is None or time.perf_counter() < deadline):
+        improved = False
+        for i in range(n):
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            p = pool_of[i]
+            for j in range(i + 1, n):
+                q = pool_of[j]
+                if p == q:
+                    continue
+                d_ij = distances[i][j]
+                travel_delta = (to_pool[i][q] - d_ij + to_pool[j][p] - d_ij) - (to_pool[i][p] + to_pool[j][q])
+                shift = weights[j] - weights[i]
+                wp, wq = pool_weights[p] - cost.target, pool_weights[q] - cost.target
+                balance_delta = ((wp + shift) ** 2 + (wq - shift) ** 2 - wp ** 2 - wq ** 2)
+                delta = cost.travel_term(travel_delta) + cost.balance * balance_delta / cost.balance_scale
+                if delta < -1e-12:
+                    pools[p][pools[p].index(i)] = j
+                    pools[q][pools[q].index(j)] = i
+                    pool_of[i], pool_of[j] = q, p
+                    pool_weights[p] += shift
+                    pool_weights[q] -= shift
+                    for other in range(n):
+                        d_i, d_j = distances[other][i], distances[other][j]
+                        to_pool[other][p] += d_j - d_i
+                        to_pool[other][q] += d_i - d_j
+                    swaps += 1
+                    improved = True
+                    p = q
+
+    return PoolAssignment(pools=[sorted(members) for members in pools], travel=_travel(pools, distances),
+                          initial_travel=initial_travel, weight_spread=_spread(pool_weights),
+                          initial_weight_spread=initial_spread, swaps=swaps,
+                          elapsed=time.perf_counter() - start, pool_weights=list(pool_weights))
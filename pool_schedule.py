@@ -0,0 +1,147 @@
+"""
+Calendrier aller simple d'une poule par la méthode du cercle (polygone).
+
+Remplace `round_robin` + `distribute_matches` (recherche quadratique des paires
+puis tirages aléatoires recommencés à chaque collision, sans borne) :
+  - ronde r (0 ≤ r < m, m impair = nombre de places tournantes) : les équipes
+    i et j se rencontrent si i + j ≡ r (mod m) ; l'équipe i telle que 2i ≡ r
+    affronte la place fixe (équipe n-1, ou exempt si la poule est impaire) ;
+  - chaque équipe joue une fois par ronde, chaque paire une seule fois : le
+    calendrier est valide par construction, en O(n²), sans aucun tirage ;
+  - domicile / extérieur : i reçoit j si (j - i) mod m ≤ m // 2 (tournoi
+    circulant régulier), la place fixe reçoit une ronde sur deux ; chaque
+    équipe reçoit ⌊(n-1)/2⌋ ou ⌈(n-1)/2⌉ fois.
+
+Contraintes « le club X ne peut pas recevoir la journée D » (`banned`) :
+  1. les rondes, interchangeables, sont affectées aux journées en évitant les
+     rencontres dont les deux équipes sont interdites de réception ce jour-là ;
+  2. une rencontre dont l'équipe qui reçoit est interdite est inversée ;
+  3. les rencontres non contraintes sont ensuite inversées tant que cela
+     rapproche les équipes de l'équilibre domicile / extérieur.
+Une contrainte impossible à respecter (les deux équipes interdites) ne bloque
+jamais le calendrier : la rencontre est gardée et signalée dans `conflicts`.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Iterable, Optional
+
+
+@dataclass
+class RoundRobinSchedule:
+    """Calendrier d'une poule de `num_teams` équipes, indices 0..n-1."""
+    num_teams: int
+    days: list = field(default_factory=list)       # days[d] = [(home, visitor)]
+    byes: list = field(default_factory=list)       # byes[d] = équipe exempte (poule impaire) ou None
+    conflicts: list = field(default_factory=list)  # [(day, home, visitor)] : réception impossible pour les deux
+
+    def home_counts(self) -> list:
+        counts = [0] * self.num_teams
+        for pairs in self.days:
+            for home, _ in pairs:
+                counts[home] += 1
+        return counts
+
+    def pairs(self) -> list:
+        """Rencontres à plat, journée par journée."""
+        return [pair for pairs in self.days for pair in pairs]
+
+
+def _rounds(num_teams: int) -> tuple[list, list]:
+    """Rondes orientées de la méthode du cercle et exempt de chaque ronde."""
+    size = num_teams + num_teams % 2
+    m = size - 1
+    fixed = m if num_teams % 2 == 0 else None
+    rounds, byes = [], []
+    for r in range(m):
+        pairs, bye = [], None
+        for i in range(m):
+            j = (r - i) % m
+            if i == j:
+                if fixed is None:
+                    bye = i
+                else:
+                    pairs.append((fixed, i) if r % 2 == 0 else (i, fixed))
+            elif i < j:
+                pairs.append((i, j) if (j - i) % m <= m // 2 else (j, i))
+        rounds.append(pairs)
+        byes.append(bye)
+    return rounds, byes
+
+
+def _assign_rounds(rounds: list, num_days: int, banned_by_day: list) -> list:
+    """Ordre des rondes par journée : à chaque journée, la ronde restante la moins conflictuelle."""
+    if not any(banned_by_day):
+        return list(range(len(rounds)))
+    opponents = []
+    for pairs in rounds:
+        opponent = {}
+        for home, visitor in pairs:
+            opponent[home], opponent[visitor] = visitor, home
+        opponents.append(opponent)
+    remaining = list(range(len(rounds)))
+    order = []
+    for day in range(num_days):
+        banned = banned_by_day[day]
+
+        def cost(r):
+            return sum(1 for team in banned if opponents[r].get(team) in banned)
+
+        best = min(remaining, key=cost)
+        remaining.remove(best)
+        order.append(best)
+    return order
+
+
+def _rebalance(days: list, locked: set, num_teams: int):
+    """Inverse les rencontres libres tant que l'écart domicile / extérieur diminue."""
+    balance = [0] * num_teams  # réceptions - déplacements
+    for pairs in days:
+        for home, visitor in pairs:
+            balance[home] += 1
+            balance[visitor] -= 1
+    improved = True
+    while improved:
+        improved = False
+        for d, pairs in enumerate(days):
+            for k, (home, visitor) in enumerate(pairs):
+                if (d, k) not in locked and balance[home] - balance[visitor] > 2:
+                    pairs[k] = (visitor, home)
+                    balance[home] -= 2
+                    balance[visitor] += 2
+                    improved = True
+
+
+def schedule_round_robin(num_teams: int, banned: Optional[Iterable[tuple[int, int]]] = None,
+                         num_days: Optional[int] = None) -> RoundRobinSchedule:
+    """Calendrier aller simple de `num_teams` équipes.
+
+    :param banned:   couples (équipe, journée) où l'équipe ne peut pas recevoir (indices à partir de 0)
+    :param num_days: journées disponibles (par défaut une par ronde) ; les rondes au-delà ne sont pas jouées
+    """
+    schedule = RoundRobinSchedule(num_teams)
+    if num_teams < 2:
+        return schedule
+    rounds, byes = _rounds(num_teams)
+    num_days = len(rounds) if num_days is None else min(num_days, len(rounds))
+    banned_by_day = [set() for _ in range(num_days)]
+    for team, day in banned or ():
+        if 0 <= day < num_days:
+            banned_by_day[day].add(team)
+
+    order = _assign_rounds(rounds, num_days, banned_by_day)
+    locked = set()
+    for day, r in enumerate(order[:num_days]):
+        pairs, banned_today = list(rounds[r]), banned_by_day[day]
+        for k, (home, visitor) in enumerate(pairs):
+            if home in banned_today or visitor in banned_today:
+                locked.add((day, k))
+                if home in banned_today and visitor in banned_today:
+                    schedule.conflicts.append((day, home, visitor))
+                elif home in banned_today:
+                    pairs[k] = (visitor, home)
+        schedule.days.append(pairs)
+        schedule.byes.append(byes[r])
+    if locked:
+        _rebalance(schedule.days, locked, num_teams)
+    return schedule
@@ -0,0 +1,296 @@
+"""
+Instrumentation des requêtes HTTP : SQL, rendu des gabarits, mémoire, cProfile.
+
+Pour chaque requête (hors fichiers statiques), le profileur relève :
+  - le nombre de requêtes SQL et leur durée cumulée (événements
+    `before_cursor_execute` / `after_cursor_execute` des moteurs SQLAlchemy) ;
+  - les requêtes répétées à l'identique, paramètres mis à part : signature
+    d'un N+1 (une requête par ligne d'une liste) ;
+  - la durée de rendu des gabarits (signaux `before_render_template` /
+    `template_rendered`) ;
+  - le pic de mémoire allouée (tracemalloc, sur option : coûteux, et approché
+    quand plusieurs requêtes s'exécutent en parallèle).
+
+Les profils des dernières requêtes sont gardés dans un tampon circulaire borné
+(`PROFILING_BUFFER_SIZE`) ; `/admin/perf` en présente les points d'entrée les
+plus coûteux.  Une requête plus lente que `PROFILING_SLOW_REQUEST` est
+journalisée et, si `PROFILING_CPROFILE_DIR` est renseigné, son profil cProfile
+y est écrit (à lire avec pstats ou snakeviz).
+"""
+from __future__ import annotations
+
+import cProfile
+import os
+import re
+import threading
+import time
+import tracemalloc
+from collections import Counter, deque
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional
+
+from flask import before_render_template, current_app, request, template_rendered
+from sqlalchemy import event
+
+from extensions import db
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Nombre de requêtes SQL répétées conservées par profil (les plus fréquentes)
+DUPLICATES_KEPT = 5
+# Longueur maximale d'une requête SQL conservée dans un profil
+STATEMENT_MAX_LENGTH = 400
+
+# Profil de la requête HTTP en cours dans ce contexte (None hors requête : jobs, CLI)
+_current: ContextVar[Optional['RequestProfile']] = ContextVar('request_profile', default=None)
+
+
+@dataclass
+class RequestProfile:
+    """Mesures d'une requête HTTP."""
+    endpoint: str
+    method: str
+    path: str
+    started_at: datetime
+    status: int = 0
+    duration: float = 0.0                  # s
+    query_count: int = 0
+    sql_time: float = 0.0                  # s
+    template_time: float = 0.0             # s
+    duplicated_queries: int = 0            # exécutions en trop des requêtes répétées
+    duplicates: list = field(default_factory=list)  # [(nombre, requête)] les plus répétées
+    peak_memory: Optional[int] = None      # octets alloués au-delà du début de la requête
+    profile_path: Optional[str] = None     # fichier cProfile écrit
+    # Suivi en cours de requête (libéré à la fin)
+    _start: float = field(default=0.0, repr=False)
+    _statements: Counter = field(default_factory=Counter, repr=False)
+    _template_starts: list = field(default_factory=list, repr=False)
+    _profiler: Optional[cProfile.Profile] = field(default=None, repr=False)
+    _memory_base: int = field(default=0, repr=False)
+
+    def to_dict(self) -> dict:
+        return {'endpoint': self.endpoint, 'method': self.method, 'path': self.path,
+                'started_at': self.started_at.isoformat(), 'status': self.status,
+                'duration': self.duration, 'query_count': self.query_count, 'sql_time': self.sql_time,
+                'template_time': self.template_time, 'duplicated_queries': self.duplicated_queries,
+                'duplicates': [{'count': count, 'statement': statement} for count, statement in self.duplicates],
+                'peak_memory': self.peak_memory, 'profile_path': self.profile_path}
+
+
+@dataclass
+class EndpointStats:
+    """Agrégat des profils d'un point d'entrée présents dans le tampon."""
+    endpoint: str
+    requests: int = 0
+    total_duration: float = 0.0
+    max_duration: float = 0.0
+    total_queries: int = 0
+    max_queries: int = 0
+    sql_time: float = 0.0
+    template_time: float = 0.0
+    duplicated_queries: int = 0
+    peak_memory: Optional[int] = None
+    worst: Optional[RequestProfile] = None  # requête la plus lente
+
+    @property
+    def mean_duration(self) -> float:
+        return self.total_duration / self.requests if self.requests else 0.0
+
+    @property
+    def mean_queries(self) -> float:
+        return self.total_queries / self.requests if self.requests else 0.0
+
+    def add(self, profile: RequestProfile):
+        self.requests += 1
+        self.total_duration += profile.duration
+        self.total_queries += profile.query_count
+        self.max_queries = max(self.max_queries, profile.query_count)
+        self.sql_time += profile.sql_time
+        self.template_time += profile.template_time
+        self.duplicated_queries += profile.duplicated_queries
+        if profile.peak_memory is not None:
+            self.peak_memory = max(self.peak_memory or 0, profile.peak_memory)
+        if self.worst is None or profile.duration > self.max_duration:
+            self.max_duration, self.worst = profile.duration, profile
+
+    def to_dict(self) -> dict:
+        return {'endpoint': self.endpoint, 'requests': self.requests, 'mean_duration': self.mean_duration,
+                'max_duration': self.max_duration, 'mean_queries': self.mean_queries,
+                'max_queries': self.max_queries, 'sql_time': self.sql_time, 'template_time': self.template_time,
+                'duplicated_queries': self.duplicated_queries, 'peak_memory': self.peak_memory,
+                'worst': self.worst.to_dict() if self.worst else None}
+
+
+# Critères de tri de `RequestProfiler.worst_endpoints`
+SORT_KEYS = {
+    'duration': lambda stats: stats.mean_duration,
+    'max_duration': lambda stats: stats.max_duration,
+    'queries': lambda stats: stats.mean_queries,
+    'sql_time': lambda stats: stats.sql_time / stats.requests,
+    'duplicates': lambda stats: stats.duplicated_queries / stats.requests,
+}
+
+
+class RequestProfiler:
+    """Profileur des requêtes d'une application Flask (voir `init_app`)."""
+
+    def __init__(self, app, buffer_size: int = 1000, slow_threshold: float = 1.0,
+                 cprofile_dir: Optional[str] = None, trace_memory: bool = False):
+        self.app = app
+        self.slow_threshold = slow_threshold
+        self.cprofile_dir = cprofile_dir
+        self.trace_memory = trace_memory
+        self.records = deque(maxlen=buffer_size)
+        self._lock = threading.Lock()
+
+    def install(self):
+        """Branche les écouteurs SQLAlchemy, les signaux de rendu et le cycle de vie des requêtes."""
+        with self.app.app_context():
+            for engine in db.engines.values():
+                if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+                    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+                    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+        before_render_template.connect(_template_started, self.app)
+        template_rendered.connect(_template_finished, self.app)
+        self.app.before_request(self._start)
+        self.app.after_request(self._record_status)
+        self.app.teardown_request(self._finish)
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    # ── Cycle de vie d'une requête ────────────────────────────────────────
+    def _start(self):
+        endpoint = request.endpoint
+        if endpoint is None or endpoint == 'static' or endpoint.endswith('.static'):
+            return
+        profile = RequestProfile(endpoint=endpoint, method=request.method, path=request.full_path.rstrip('?'),
+                                 started_at=datetime.utcnow())
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+            profile._memory_base = tracemalloc.get_traced_memory()[0]
+        if self.cprofile_dir:
+            profile._profiler = cProfile.Profile()
+            profile._profiler.enable()
+        profile._start = time.perf_counter()
+        _current.set(profile)
+
+    def _record_status(self, response):
+        profile = _current.get()
+        if profile is not None:
+            profile.status = response.status_code
+        return response
+
+    def _finish(self, exc=None):
+        profile = _current.get()
+        if profile is None:
+            return
+        _current.set(None)
+        profile.duration = time.perf_counter() - profile._start
+        if profile._profiler is not None:
+            profile._profiler.disable()
+        if exc is not None and not profile.status:
+            profile.status = 500
+        if self.trace_memory and tracemalloc.is_tracing():
+            profile.peak_memory = max(0, tracemalloc.get_traced_memory()[1] - profile._memory_base)
+        repeated = [(count, statement) for statement, count in profile._statements.items() if count > 1]
+        profile.duplicated_queries = sum(count - 1 for count, _ in repeated)
+        profile.duplicates = [(count, statement[:STATEMENT_MAX_LENGTH])
+                              for count, statement in sorted(repeated, key=lambda item: -item[0])[:DUPLICATES_KEPT]]
+        if profile.duration >= self.slow_threshold:
+            if profile._profiler is not None:
+                profile.profile_path = self._dump(profile)
+            self.app.logger.warning(f'Requête lente {profile.method} {profile.path} ({profile.endpoint}) : '
+                                    f'{profile.duration:.3f}s, {profile.query_count} requête(s) SQL '
+                                    f'({profile.sql_time:.3f}s, {profile.duplicated_queries} répétée(s)), '
+                                    f'rendu {profile.template_time:.3f}s')
+        profile._statements, profile._template_starts, profile._profiler = Counter(), [], None
+        with self._lock:
+            self.records.append(profile)
+
+    def _dump(self, profile: RequestProfile) -> str:
+        os.makedirs(self.cprofile_dir, exist_ok=True)
+        name = re.sub(r'[^\w.-]', '_', profile.endpoint)
+        path = os.path.join(self.cprofile_dir, f'{profile.started_at:%Y%m%d-%H%M%S}-{name}-'
+                                               f'{round(profile.duration * 1000)}ms.prof')
+        profile._profiler.dump_stats(path)
+        return path
+
+    # ── Consultation ──────────────────────────────────────────────────────
+    def profiles(self) -> list:
+        with self._lock:
+            return list(self.records)
+
+    def worst_endpoints(self, limit: int = 20, sort: str = 'duration') -> list:
+        """Points d'entrée du tampon, du plus coûteux au moins coûteux selon `sort` (voir SORT_KEYS)."""
+        stats = {}
+        for profile in self.profiles():
+            stats.setdefault(profile.endpoint, EndpointStats(profile.endpoint)).add(profile)
+        return sorted(stats.values(), key=SORT_KEYS[sort], reverse=True)[:limit]
+
+    def slowest_requests(self, limit: int = 20) -> list:
+        return sorted(self.profiles(), key=lambda profile: profile.duration, reverse=True)[:limit]
+
+    def clear(self):
+        with self._lock:
+            self.records.clear()
+
+
+def process_peak_memory() -> Optional[int]:
+    """Pic de mémoire résidente du processus (octets), None si indisponible."""
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024  # Ko sous Linux
+
+
+# ── Écouteurs ─────────────────────────────────────────────────────────────
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault('profiling_query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current.get()
+    starts = conn.info.get('profiling_query_start')
+    if profile is None or not starts:
+        return
+    profile.query_count += 1
+    profile.sql_time += time.perf_counter() - starts.pop()
+    profile._statements[statement] += 1
+
+
+def _template_started(sender, template, context, **extra):
+    profile = _current.get()
+    if profile is not None:
+        profile._template_starts.append(time.perf_counter())
+
+
+def _template_finished(sender, template, context, **extra):
+    profile = _current.get()
+    if profile is not None and profile._template_starts:
+        profile.template_time += time.perf_counter() - profile._template_starts.pop()
+
+
+def init_app(app) -> Optional[RequestProfiler]:
+    """Installe le profileur si `PROFILING_ENABLED` (app.extensions['profiling']).
+
+    Désactivé par défaut en production : non renseigné, le réglage suit le mode debug.
+    """
+    enabled = app.config.get('PROFILING_ENABLED')
+    if not (app.debug if enabled is None else enabled):
+        return None
+    profiler = RequestProfiler(app, buffer_size=app.config.get('PROFILING_BUFFER_SIZE', 1000),
+                               slow_threshold=app.config.get('PROFILING_SLOW_REQUEST', 1.0),
+                               cprofile_dir=app.config.get('PROFILING_CPROFILE_DIR'),
+                               trace_memory=app.config.get('PROFILING_TRACE_MEMORY', False))
+    profiler.install()
+    app.extensions['profiling'] = profiler
+    return profiler
+
+
+def current_profiler() -> Optional[RequestProfiler]:
+    return current_app.extensions.get('profiling')
@@ -0,0 +1,90 @@
+"""
+Joueurs éligibles d'un championnat, pour tous les clubs en une seule requête.
+
+Remplace la boucle « un appel à `get_players_order_by_ranking` par club » puis
+le filtre Python `Player.has_valid_age` (âge recalculé joueur par joueur) :
+  - la catégorie d'âge devient un intervalle de dates de naissance, comparé
+    en SQL (`birth_date_bounds`) ;
+  - genre, joueur actif et clubs sont filtrés dans la même requête, licence et
+    club chargés par jointure ;
+  - `row_number() OVER (PARTITION BY club ORDER BY classement)` numérote les
+    joueurs de chaque club : les N meilleurs par club sont gardés en base.
+"""
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+from typing import Iterable, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import contains_eager
+
+from extensions import db
+from models import License, Player
+
+
+def _years_before(day: date, years: int) -> date:
+    try:
+        return day.replace(year=day.year - years)
+    except ValueError:  # 29 février
+        return day.replace(year=day.year - years, day=28)
+
+
+def birth_date_bounds(age_category, today: Optional[date] = None) -> tuple[datetime, datetime]:
+    """Dates de naissance [début, fin) équivalentes à `Player.has_valid_age(age_category)`.
+
+    minAge - 1 <= âge < maxAge : né au plus tard il y a minAge - 1 ans (jour
+    compris) et strictement après la date d'il y a maxAge ans.
+    """
+    today = today or date.today()
+    latest = _years_before(today, age_category.minAge - 1) + timedelta(days=1)
+    earliest = _years_before(today, age_category.maxAge) + timedelta(days=1)
+    return datetime.combine(earliest, datetime.min.time()), datetime.combine(latest, datetime.min.time())
+
+
+def eligible_players_query(gender: int, age_category=None, club_ids: Optional[Iterable[str]] = None,
+                           is_active: bool = True, top_n: Optional[int] = None):
+    """Requête des joueurs éligibles, triés par club puis par classement (meilleur d'abord).
+
+    :param gender:   0 / 1 (Gender.Male / Gender.Female) ; toute autre valeur : pas de filtre
+    :param club_ids: clubs retenus (tous si None)
+    :param top_n:    nombre maximal de joueurs par club (tous si None)
+    """
+    conditions = [Player.isActive == is_active]
+    if gender in (0, 1):
+        conditions.append(License.gender == gender)
+    if age_category:
+        earliest, latest = birth_date_bounds(age_category)
+        conditions += [Player.birthDate >= earliest, Player.birthDate < latest]
+    if club_ids is not None:
+        conditions.append(Player.clubId.in_(list(club_ids)))
+
+    club_rank = func.row_number().over(partition_by=Player.clubId,
+                                       order_by=(License.rankingId, Player.id)).label('club_rank')
+    ranked = (select(Player.id.label('player_id'), club_rank)
+              .join(License, License.id == Player.licenseId)
+              .where(*conditions)
+              .subquery())
+    query = (select(Player)
+             .join(ranked, ranked.c.player_id == Player.id)
+             .join(Player.license)
+             .join(Player.club)
+             .options(contains_eager(Player.license), contains_eager(Player.club))
+             .order_by(Player.clubId, ranked.c.club_rank))
+    if top_n is not None:
+        query = query.where(ranked.c.club_rank <= top_n)
+    return query
+
+
+def eligible_players(gender: int, age_category=None, club_ids: Optional[Iterable[str]] = None,
+                     is_active: bool = True, top_n: Optional[int] = None) -> list:
+    """Joueurs de `eligible_players_query`, en une requête."""
+    return list(db.session.execute(eligible_players_query(gender, age_category, club_ids, is_active, top_n)).scalars())
+
+
+def eligible_rosters(championship, club_ids: Optional[Iterable[str]] = None, top_n: Optional[int] = 15) -> dict:
+    """Effectifs éligibles au championnat : {club_id: [joueurs triés par classement]} (clubs par id)."""
+    rosters = {}
+    for player in eligible_players(championship.division.gender, age_category=championship.age_category,
+                                   club_ids=club_ids, is_active=True, top_n=top_n):
+        rosters.setdefault(player.clubId, []).append(player)
+    return rosters
@@ -0,0 +1,109 @@
+"""
+Compositions de simulation préchargées pour toutes les équipes et journées d'une poule.
+
+`Team.get_players_for_simulation` coûte, par équipe et par journée, une requête
+de disponibilités, une requête de joueurs, une recherche du joker puis le calcul
+paresseux des ELO (licence, blessures) joueur par joueur ; la simulation d'une
+rencontre l'appelait deux fois.  Ici tout est chargé en un nombre fixe de
+requêtes, quelle que soit la taille de la poule :
+  - effectifs des équipes (table d'association joueur / équipe) ;
+  - jokers des journées ;
+  - disponibilités des joueurs pour les journées ;
+  - joueurs (licence et instantané ELO par jointure, blessures par selectinload).
+
+Chaque joueur devient un `LineupPlayer` figé (identifiant, nom, ELO) et la
+sélection est celle de `Team.pick_simulation_players` : la boucle de simulation
+des rencontres ne fait plus aucun accès à la base pour composer les équipes.
+"""
+from __future__ import annotations
+
+from typing import Iterable, NamedTuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import contains_eager, selectinload
+
+from extensions import db
+from models import (Matchday, Player, PlayerMatchdayAvailability, Team, TeamMatchdayJoker,
+                    player_team_association)
+
+
+class LineupPlayer(NamedTuple):
+    """Joueur d'une composition : mêmes attributs que Player pour la simulation."""
+    id: int
+    name: str
+    current_elo: int
+    refined_elo: int
+    snapshot_elo: tuple  # (ELO actuel, ELO affiné) de l'instantané player_rating
+
+
+class SimulationLineup(NamedTuple):
+    """Joueurs retenus d'une équipe pour une journée (voir Team.get_players_for_simulation)."""
+    singles: list
+    doubles: list
+
+
+def _lineup_player(player: Player) -> LineupPlayer:
+    return LineupPlayer(id=player.id, name=player.name, current_elo=player.current_elo,
+                        refined_elo=player.refined_elo, snapshot_elo=player.snapshot_elo)
+
+
+def prefetch_lineups(team_ids: Iterable[int], matchday_ids: Iterable[int], singles_count: int,
+                     doubles_count: int) -> dict:
+    """Compositions de simulation {(team_id, matchday_id): SimulationLineup}, en cinq requêtes."""
+    team_ids, matchday_ids = list(team_ids), list(matchday_ids)
+    members = {team_id: [] for team_id in team_ids}
+    for team_id, player_id in db.session.execute(
+            select(player_team_association.c.team_id, player_team_association.c.player_id)
+            .where(player_team_association.c.team_id.in_(team_ids))):
+        members[team_id].append(player_id)
+    member_ids = {player_id for ids in members.values() for player_id in ids}
+
+    jokers = {(entry.team_id, entry.matchday_id): entry for entry in db.session.execute(
+        select(TeamMatchdayJoker.team_id, TeamMatchdayJoker.matchday_id, TeamMatchdayJoker.player_id,
+               TeamMatchdayJoker.plays_single, TeamMatchdayJoker.plays_double)
+        .where(TeamMatchdayJoker.team_id.in_(team_ids), TeamMatchdayJoker.matchday_id.in_(matchday_ids)))}
+
+    availabilities = {matchday_id: {} for matchday_id in matchday_ids}
+    for a in db.session.execute(
+            select(PlayerMatchdayAvailability.player_id, PlayerMatchdayAvailability.matchday_id,
+                   PlayerMatchdayAvailability.plays_single, PlayerMatchdayAvailability.plays_double,
+                   PlayerMatchdayAvailability.is_substitute)
+            .where(PlayerMatchdayAvailability.matchday_id.in_(matchday_ids),
+                   PlayerMatchdayAvailability.player_id.in_(member_ids))):
+        availabilities[a.matchday_id][a.player_id] = a
+
+    player_ids = member_ids | {entry.player_id for entry in jokers.values() if entry.player_id is not None}
+    players = (db.session.execute(
+        select(Player)
+        .join(Player.license)
+        .outerjoin(Player.rating)
+        .options(contains_eager(Player.license), contains_eager(Player.rating), selectinload(Player.injuries))
+        .where(Player.id.in_(player_ids))
+        .order_by(Player.id)).scalars().all())
+    # Même ordre que la requête de Team.get_players_for_simulation : ELO affiné de l'instantané décroissant
+    ranked = sorted(players, key=lambda p: (p.rating is None, -p.rating.refined_elo if p.rating else 0))
+    active = [player.id for player in ranked if player.isActive]
+    frozen = {player.id: _lineup_player(player) for player in players}
+
+    lineups = {}
+    for team_id in team_ids:
+        team_members = set(members[team_id])
+        ranked_players = [frozen[player_id] for player_id in active if player_id in team_members]
+        for matchday_id in matchday_ids:
+            team_availabilities = {player_id: a for player_id, a in availabilities[matchday_id].items()
+                                   if player_id in team_members}
+            joker_entry = jokers.get((team_id, matchday_id))
+            joker = frozen.get(joker_entry.player_id) if joker_entry else None
+            singles, doubles = Team.pick_simulation_players(ranked_players, team_availabilities, joker,
+                                                            joker_entry, singles_count, doubles_count)
+            lineups[team_id, matchday_id] = SimulationLineup(singles, doubles)
+    return lineups
+
+
+def pool_lineups(pool, matchdays=None) -> dict:
+    """Compositions de simulation de toutes les équipes de la poule pour les journées du championnat."""
+    championship = pool.championship
+    if matchdays is None:
+        matchdays = Matchday.query.filter_by(championshipId=championship.id).all()
+    return prefetch_lineups([team.id for team in pool.teams], [matchday.id for matchday in matchdays],
+                            championship.singlesCount, championship.doublesCount)
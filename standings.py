@@ -0,0 +1,287 @@
+"""
+Classement des poules, pour une poule ou tout un championnat.
+
+Les totaux par équipe (rencontres jouées, victoires, matchs, sets, jeux) sont
+persistés dans la table `pool_standing` (models.PoolStanding) : les pages de
+classement en font une lecture indexée par poule.
+
+Calcul de référence, en une seule requête agrégée (`played_totals`) :
+  - les rubbers (simples et doubles) sont sommés par rencontre : sets et jeux
+    de chaque camp, avec les règles de `Score.sets_count` / `Score.games_count`
+    (le super tie-break compte pour un set et un jeu) ;
+  - chaque rencontre jouée donne une ligne par camp (domicile, visiteur), puis
+    les lignes sont agrégées par équipe.
+
+Maintenance incrémentale : à chaque flush touchant une rencontre, un simple,
+un double ou un score, l'apport des seules rencontres concernées est calculé
+avant (état en base) et après l'écriture, et la différence est appliquée aux
+lignes de `pool_standing`. `rebuild` recalcule toute la table et signale les
+écarts avec le calcul complet.
+
+Seules les rencontres dont les deux scores sont renseignés comptent ; une
+rencontre contre une équipe supprimée reste comptée pour l'équipe restante.
+Le tri est celui de `calculer_classement` : points (3 V / 2 N / 1 D), puis
+différences de matchs, de sets et de jeux.
+"""
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import case, event, func, insert, literal, select, union_all, update
+from sqlalchemy.orm import Session
+
+from extensions import db
+from models import Double, Match, PoolStanding, Score, Single, Team
+
+TOTAL_KEYS = ('played', 'won', 'draw', 'lost', 'matches_won', 'sets_won', 'sets_lost', 'games_won', 'games_lost')
+_ZERO = dict.fromkeys(TOTAL_KEYS, 0)
+
+
+def _rubber_totals(match_ids=None):
+    """Sous-requête : sets et jeux de chaque camp, par rencontre (restreinte à `match_ids` si fourni)."""
+    singles, doubles = select(Single.matchId.label('match_id'), Single.scoreId.label('score_id')), \
+        select(Double.matchId.label('match_id'), Double.scoreId.label('score_id'))
+    if match_ids is not None:
+        singles, doubles = singles.where(Single.matchId.in_(match_ids)), doubles.where(Double.matchId.in_(match_ids))
+    rubbers = union_all(singles, doubles).subquery()
+
+    def sets(first_own, first_other, second_own, second_other, third_own):
+        return (case((first_own > first_other, 1), else_=0) + case((second_own > second_other, 1), else_=0)
+                + func.coalesce(third_own, 0))
+
+    def games(first_own, second_own, third_own):
+        return first_own + second_own + func.coalesce(third_own, 0)
+
+    return (select(rubbers.c.match_id,
+                   func.sum(sets(Score.firstSetP1, Score.firstSetP2, Score.secondSetP1, Score.secondSetP2,
+                                 Score.thirdSetP1)).label('home_sets'),
+                   func.sum(sets(Score.firstSetP2, Score.firstSetP1, Score.secondSetP2, Score.secondSetP1,
+                                 Score.thirdSetP2)).label('visitor_sets'),
+                   func.sum(games(Score.firstSetP1, Score.secondSetP1, Score.thirdSetP1)).label('home_games'),
+                   func.sum(games(Score.firstSetP2, Score.secondSetP2, Score.thirdSetP2)).label('visitor_games'))
+            .join(Score, Score.id == rubbers.c.score_id)
+            .group_by(rubbers.c.match_id)
+            .subquery())
+
+
+def _totals_query(condition, match_ids=None):
+    """Requête agrégée des rencontres jouées vérifiant `condition`, une ligne par (poule, équipe)."""
+    rubbers = _rubber_totals(match_ids)
+    played = (condition, Match.homeScore.isnot(None), Match.visitorScore.isnot(None))
+
+    def side(team_id, score, opponent_score, sets_won, sets_lost, games_won, games_lost):
+        return (select(Match.poolId.label('pool_id'), team_id.label('team_id'),
+                       score.label('score'), opponent_score.label('opponent_score'),
+                       func.coalesce(sets_won, 0).label('sets_won'), func.coalesce(sets_lost, 0).label('sets_lost'),
+                       func.coalesce(games_won, 0).label('games_won'), func.coalesce(games_lost, 0).label('games_lost'))
+                .outerjoin(rubbers, rubbers.c.match_id == Match.id)
+                .where(team_id.isnot(None), *played))
+
+    sides = union_all(
+        side(Match.homeTeamId, Match.homeScore, Match.visitorScore, rubbers.c.home_sets, rubbers.c.visitor_sets,
+             rubbers.c.home_games, rubbers.c.visitor_games),
+        side(Match.visitorTeamId, Match.visitorScore, Match.homeScore, rubbers.c.visitor_sets, rubbers.c.home_sets,
+             rubbers.c.visitor_games, rubbers.c.home_games),
+    ).subquery()
+
+    def count_if(condition):
+        return func.sum(case((condition, 1), else_=0))
+
+    return (select(sides.c.pool_id, sides.c.team_id,
+                   func.count(literal(1)).label('played'),
+                   count_if(sides.c.score > sides.c.opponent_score).label('won'),
+                   count_if(sides.c.score == sides.c.opponent_score).label('draw'),
+                   count_if(sides.c.score < sides.c.opponent_score).label('lost'),
+                   func.sum(sides.c.score).label('matches_won'),
+                   func.sum(sides.c.sets_won).label('sets_won'),
+                   func.sum(sides.c.sets_lost).label('sets_lost'),
+                   func.sum(sides.c.games_won).label('games_won'),
+                   func.sum(sides.c.games_lost).label('games_lost'))
+            .group_by(sides.c.pool_id, sides.c.team_id))
+
+
+def _totals(rows) -> dict:
+    return {(row.pool_id, row.team_id): {key: int(getattr(row, key) or 0) for key in TOTAL_KEYS} for row in rows}
+
+
+def played_totals(pool_ids=None) -> dict:
+    """Totaux recalculés depuis les rencontres : {(pool_id, team_id): {clé de TOTAL_KEYS: valeur}}.
+
+    `pool_ids` à None : toutes les poules (reconstruction de `pool_standing`).
+    """
+    if pool_ids is None:
+        return _totals(db.session.execute(_totals_query(Match.poolId.isnot(None))))
+    pool_ids = list(pool_ids)
+    if not pool_ids:
+        return {}
+    return _totals(db.session.execute(_totals_query(Match.poolId.in_(pool_ids))))
+
+
+def stored_totals(pool_ids) -> dict:
+    """Totaux persistés dans `pool_standing`, même format que `played_totals`."""
+    pool_ids = list(pool_ids)
+    if not pool_ids:
+        return {}
+    table = PoolStanding.__table__
+    return _totals(db.session.execute(select(table).where(table.c.pool_id.in_(pool_ids))))
+
+
+def _match_totals(connection, match_ids) -> dict:
+    """Apport des rencontres `match_ids` seules, lu sur `connection` (sans autoflush)."""
+    if not match_ids:
+        return {}
+    match_ids = sorted(match_ids)
+    return _totals(connection.execute(_totals_query(Match.id.in_(match_ids), match_ids)))
+
+
+# ---------------------------------------------------------------------------
+# Maintenance incrémentale
+# ---------------------------------------------------------------------------
+
+_PENDING_KEY = 'pool_standing_pending'
+
+
+def _history_ids(obj, attribute: str) -> set:
+    history = db.inspect(obj).attrs[attribute].history
+    return {value for value in (*history.added, *history.unchanged, *history.deleted) if value is not None}
+
+
+def _related_match_ids(obj) -> set:
+    """Rencontres auxquelles un simple / double est (ou était) rattaché."""
+    ids = _history_ids(obj, 'matchId')
+    ids.update(match.id for match in _history_ids(obj, 'match') if match.id is not None)
+    return ids
+
+
+@event.listens_for(Session, 'before_flush')
+def _collect_affected_matches(session, flush_context, instances):
+    """Avant écriture : rencontres touchées et leur apport actuel (état en base)."""
+    match_ids, created = set(), []
+    score_ids = set()
+    with session.no_autoflush:
+        for obj in session.new:
+            if isinstance(obj, Match):
+                created.append(obj)
+            elif isinstance(obj, (Single, Double)):
+                created.append(obj)
+                match_ids.update(_related_match_ids(obj))
+        dirty = session.dirty
+        for obj in (*dirty, *session.deleted):
+            if obj in dirty and not session.is_modified(obj):
+                continue
+            if isinstance(obj, Match):
+                match_ids.add(obj.id)
+            elif isinstance(obj, (Single, Double)):
+                match_ids.update(_related_match_ids(obj))
+            elif isinstance(obj, Score):
+                score_ids.add(obj.id)
+        if not (match_ids or created or score_ids):
+            return
+        connection = session.connection()
+        if score_ids:
+            for model in (Single, Double):
+                match_ids.update(connection.execute(
+                    select(model.matchId).where(model.scoreId.in_(score_ids), model.matchId.isnot(None))).scalars())
+        match_ids.discard(None)
+        session.info[_PENDING_KEY] = (match_ids, created, _match_totals(connection, match_ids))
+
+
+@event.listens_for(Session, 'after_flush')
+def _apply_standing_deltas(session, flush_context):
+    """Après écriture : nouvel apport des mêmes rencontres, différence appliquée à `pool_standing`."""
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending is None:
+        return
+    match_ids, created, before = pending
+    match_ids = set(match_ids)
+    for obj in created:
+        match_ids.add(obj.id if isinstance(obj, Match) else obj.matchId)
+    match_ids.discard(None)
+    connection = session.connection()
+    _apply_deltas(connection, before, _match_totals(connection, match_ids))
+
+
+def _apply_deltas(connection, before: dict, after: dict):
+    table = PoolStanding.__table__
+    now = datetime.utcnow()
+    for pool_id, team_id in before.keys() | after.keys():
+        old, new = before.get((pool_id, team_id), _ZERO), after.get((pool_id, team_id), _ZERO)
+        delta = {key: new[key] - old[key] for key in TOTAL_KEYS}
+        if not any(delta.values()):
+            continue
+        where = (table.c.pool_id == pool_id) & (table.c.team_id == team_id)
+        result = connection.execute(update(table).where(where).values(
+            updated_at=now, **{key: table.c[key] + value for key, value in delta.items()}))
+        if result.rowcount == 0:
+            connection.execute(insert(table).values(pool_id=pool_id, team_id=team_id, updated_at=now, **delta))
+
+
+def rebuild() -> list:
+    """Recalcule toute la table `pool_standing` (sans commit).
+
+    Retourne les clés (pool_id, team_id) dont les totaux persistés différaient
+    du calcul complet : une liste vide confirme la maintenance incrémentale.
+    """
+    computed = played_totals()
+    table = PoolStanding.__table__
+    stored = _totals(db.session.execute(select(table)))
+    mismatches = sorted(key for key in computed.keys() | stored.keys()
+                        if computed.get(key, _ZERO) != stored.get(key, _ZERO))
+    db.session.execute(table.delete())
+    now = datetime.utcnow()
+    rows = [dict(pool_id=pool_id, team_id=team_id, updated_at=now, **totals)
+            for (pool_id, team_id), totals in computed.items()]
+    if rows:
+        db.session.execute(insert(table), rows)
+    return mismatches
+
+
+def standing_row(team, totals: dict, num_matches: int) -> dict:
+    """Ligne de classement d'une équipe, au format de `calculer_classement`."""
+    totals = totals or dict.fromkeys(TOTAL_KEYS, 0)
+    played, won, draw, lost = totals['played'], totals['won'], totals['draw'], totals['lost']
+    matches_won = totals['matches_won']
+    matches_lost = played * num_matches - matches_won
+    diff_matchs = matches_won - matches_lost
+    diff_sets = totals['sets_won'] - totals['sets_lost']
+    diff_games = totals['games_won'] - totals['games_lost']
+    details = [f'{count}{label}' for count, label in ((won, 'V'), (draw, 'N'), (lost, 'D')) if count]
+    return {
+        'team': team.name,
+        'points': 3 * won + 2 * draw + lost,
+        'matches_played': f"{played} ({'/'.join(details)})",
+        'diff_matchs_sort': diff_matchs,
+        'diff_matchs': f'{diff_matchs} (+{matches_won}/-{matches_lost})',
+        'diff_sets_sort': diff_sets,
+        'diff_sets': f"{diff_sets} (+{totals['sets_won']}/-{totals['sets_lost']})",
+        'diff_games_sort': diff_games,
+        'diff_games': f"{diff_games} (+{totals['games_won']}/-{totals['games_lost']})",
+    }
+
+
+def standing_key(item) -> tuple:
+    _, row = item
+    return row['points'], row['diff_matchs_sort'], row['diff_sets_sort'], row['diff_games_sort']
+
+
+def _sorted_standings(pool, teams, totals: dict, num_matches: int) -> list:
+    rows = [(team.id, standing_row(team, totals.get((pool.id, team.id)), num_matches)) for team in teams]
+    return sorted(rows, key=standing_key, reverse=True)
+
+
+def pool_standings(pool) -> list:
+    """Classement d'une poule : [(team_id, ligne)] trié comme `calculer_classement`."""
+    championship = pool.championship
+    num_matches = championship.singlesCount + championship.doublesCount
+    return _sorted_standings(pool, pool.teams, stored_totals([pool.id]), num_matches)
+
+
+def championship_standings(championship) -> dict:
+    """Classements de toutes les poules d'un championnat : {pool_id: [(team_id, ligne)]}."""
+    num_matches = championship.singlesCount + championship.doublesCount
+    pools = list(championship.pools)
+    totals = stored_totals(pool.id for pool in pools)
+    teams_by_pool = {pool.id: [] for pool in pools}
+    for team in Team.query.filter(Team.poolId.in_(teams_by_pool)).order_by(Team.id):
+        teams_by_pool[team.poolId].append(team)
+    return {pool.id: _sorted_standings(pool, teams_by_pool[pool.id], totals, num_matches) for pool in pools}
@@ -0,0 +1,233 @@
+"""
+Profil de stockage : SQLite réglé pour les écritures concurrentes, ou PostgreSQL.
+
+La base est désignée par DATABASE_URL (défaut : sqlite:///tennis.sqlite3).
+  - SQLite : chaque connexion reçoit les PRAGMA du profil.  Le journal WAL
+    laisse les lectures avancer pendant une écriture (une simulation et des
+    capitaines qui saisissent leurs disponibilités ne s'attendent plus) ;
+    synchronous=NORMAL, sûr en WAL, ne synchronise le disque qu'aux points de
+    contrôle ; mmap_size et cache_size gardent les pages chaudes en mémoire ;
+    busy_timeout fait attendre un écrivain plutôt qu'échouer sur « database is
+    locked ».
+  - PostgreSQL : pool de connexions (taille, débordement, recyclage, test de
+    la connexion avant emprunt).
+
+`configure(app)` complète SQLALCHEMY_DATABASE_URI / SQLALCHEMY_ENGINE_OPTIONS
+avant `db.init_app` ; `init_app(app)` branche les PRAGMA sur les moteurs SQLite.
+Au démarrage, `schema_fingerprint` / `stored_schema_stamp` évitent l'inspection
+du schéma : création des tables et migrations ne tournent que si les modèles
+ont changé depuis le dernier démarrage (empreinte enregistrée dans app_settings).
+Les migrations du démarrage (`app._run_column_migrations`) passent par
+`add_missing_columns` / `widen_columns`, dont le DDL est compilé pour le
+dialecte de la base, et `create_missing_indexes` (index déclarés dans les
+modèles, absents d'une base créée avant eux).  `tools/storage_benchmark.py` compare le débit
+lectures / écritures des profils.
+"""
+from __future__ import annotations
+
+import hashlib
+import weakref
+from typing import Optional
+
+from sqlalchemy import String, event, literal, select, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError, ProgrammingError
+
+from extensions import db
+
+# Valeurs par défaut des réglages (voir config.Config)
+DEFAULTS = {
+    'SQLITE_JOURNAL_MODE': 'WAL',
+    'SQLITE_SYNCHRONOUS': 'NORMAL',
+    'SQLITE_MMAP_SIZE': 256 * 1024 * 1024,   # octets
+    'SQLITE_CACHE_SIZE': 64 * 1024,          # Kio
+    'SQLITE_BUSY_TIMEOUT': 5000,             # ms
+    'DB_POOL_SIZE': 10,
+    'DB_MAX_OVERFLOW': 20,
+    'DB_POOL_RECYCLE': 1800,                 # s
+}
+
+# Moteurs déjà équipés des PRAGMA (un même moteur peut être revu par plusieurs init_app)
+_installed = weakref.WeakKeyDictionary()
+
+
+def _setting(config, key: str):
+    value = config.get(key)
+    return DEFAULTS[key] if value is None else value
+
+
+def database_uri(uri: str) -> str:
+    """URI SQLAlchemy : le préfixe historique postgres:// (hébergeurs) devient postgresql://."""
+    if uri.startswith('postgres://'):
+        return 'postgresql://' + uri[len('postgres://'):]
+    return uri
+
+
+def backend(uri: str) -> str:
+    return make_url(uri).get_backend_name()
+
+
+def sqlite_pragmas(config) -> list:
+    """PRAGMA appliqués à chaque connexion SQLite, dans l'ordre."""
+    return [
+        f"PRAGMA journal_mode={_setting(config, 'SQLITE_JOURNAL_MODE')}",
+        f"PRAGMA synchronous={_setting(config, 'SQLITE_SYNCHRONOUS')}",
+        f"PRAGMA mmap_size={int(_setting(config, 'SQLITE_MMAP_SIZE'))}",
+        f"PRAGMA cache_size={-int(_setting(config, 'SQLITE_CACHE_SIZE'))}",  # négatif : en Kio
+        f"PRAGMA busy_timeout={int(_setting(config, 'SQLITE_BUSY_TIMEOUT'))}",
+    ]
+
+
+def engine_options(uri: str, config) -> dict:
+    """Options de create_engine du profil (SQLALCHEMY_ENGINE_OPTIONS)."""
+    name = backend(uri)
+    if name == 'postgresql':
+        return {'pool_size': int(_setting(config, 'DB_POOL_SIZE')),
+                'max_overflow': int(_setting(config, 'DB_MAX_OVERFLOW')),
+                'pool_recycle': int(_setting(config, 'DB_POOL_RECYCLE')),
+                'pool_pre_ping': True}
+    if name == 'sqlite':
+        # Attente du verrou côté pilote alignée sur busy_timeout
+        return {'connect_args': {'timeout': int(_setting(config, 'SQLITE_BUSY_TIMEOUT')) / 1000}}
+    return {}
+
+
+def install(engine, config):
+    """Branche les PRAGMA du profil sur un moteur SQLite (sans effet sur les autres bases)."""
+    if engine.dialect.name != 'sqlite' or engine in _installed:
+        return
+    pragmas = sqlite_pragmas(config)
+
+    def apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+    event.listen(engine, 'connect', apply_pragmas)
+    _installed[engine] = apply_pragmas
+
+
+def configure(app):
+    """Avant db.init_app : URI normalisée et options du moteur (celles déjà configurées priment)."""
+    uri = database_uri(app.config['SQLALCHEMY_DATABASE_URI'])
+    app.config['SQLALCHEMY_DATABASE_URI'] = uri
+    options = engine_options(uri, app.config)
+    options.update(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+
+def init_app(app):
+    """Après db.init_app : PRAGMA des moteurs SQLite de l'application."""
+    with app.app_context():
+        for engine in db.engines.values():
+            install(engine, app.config)
+
+
+# ── Migrations de colonnes portables ──────────────────────────────────────
+def add_column_ddl(column, default, dialect) -> str:
+    """ALTER TABLE … ADD COLUMN pour le dialecte ; `default` non nul : colonne NOT NULL DEFAULT."""
+    preparer = dialect.identifier_preparer
+    ddl = (f'ALTER TABLE {preparer.format_table(column.table)} '
+           f'ADD COLUMN {preparer.format_column(column)} {column.type.compile(dialect=dialect)}')
+    if default is not None:
+        value = literal(default, column.type).compile(dialect=dialect, compile_kwargs={'literal_binds': True})
+        ddl += f' NOT NULL DEFAULT {value}'
+    return ddl
+
+
+def add_missing_columns(session, inspector, model, defaults: dict) -> list:
+    """Ajoute les colonnes de `defaults` ({nom: défaut ou None}) absentes de la table ; retourne leurs noms."""
+    table = model.__table__
+    if not inspector.has_table(table.name):
+        return []
+    existing = {c['name'] for c in inspector.get_columns(table.name)}
+    dialect = session.get_bind().dialect
+    added = [name for name in defaults if name not in existing]
+    for name in added:
+        session.execute(text(add_column_ddl(table.c[name], defaults[name], dialect)))
+    return added
+
+
+def widen_columns(session, inspector, model) -> list:
+    """Élargit les VARCHAR plus courts en base que dans le modèle (PostgreSQL : SQLite n'impose pas
+    de longueur) ; retourne les noms des colonnes élargies."""
+    table = model.__table__
+    dialect = session.get_bind().dialect
+    if dialect.name != 'postgresql' or not inspector.has_table(table.name):
+        return []
+    widened = []
+    preparer = dialect.identifier_preparer
+    for db_column in inspector.get_columns(table.name):
+        column = table.c.get(db_column['name'])
+        length = getattr(db_column['type'], 'length', None)
+        if column is None or not isinstance(column.type, String) or not column.type.length or length is None:
+            continue
+        if length < column.type.length:
+            session.execute(text(f'ALTER TABLE {preparer.format_table(table)} ALTER COLUMN '
+                                 f'{preparer.format_column(column)} TYPE {column.type.compile(dialect=dialect)}'))
+            widened.append(column.name)
+    return widened
+
+
+def create_missing_indexes(session, inspector, metadata) -> list:
+    """Crée les index déclarés dans les modèles et absents des tables existantes ; retourne leurs noms.
+
+    db.create_all ne crée les index qu'avec leur table.  Les bases suivies par
+    Alembic reçoivent les index par leur révision (`flask db upgrade`, voir
+    migrations/versions/add_query_indexes.py) ; cette migration du démarrage
+    reste le filet de sécurité des bases qui ne passent pas par Alembic.
+    """
+    created = []
+    connection = session.connection()
+    for table in metadata.sorted_tables:
+        if not table.indexes or not inspector.has_table(table.name):
+            continue
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            if index.name not in existing:
+                index.create(connection)
+                created.append(index.name)
+    return created
+
+
+# ── Empreinte du schéma ────────────────────────────────────────────────────
+SCHEMA_STAMP_KEY = 'schema_version'
+
+
+def schema_fingerprint(metadata) -> str:
+    """Empreinte des tables, colonnes et index déclarés : change dès qu'un modèle change."""
+    digest = hashlib.sha256()
+    for table in metadata.sorted_tables:
+        digest.update(f'\n{table.name}'.encode())
+        for column in table.columns:
+            digest.update(f'|{column.name}:{column.type!r}:{column.nullable}'.encode())
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            digest.update(f'|{index.name}:{",".join(column.name for column in index.columns)}'.encode())
+    return digest.hexdigest()[:32]
+
+
+def stored_schema_stamp(session) -> Optional[str]:
+    """Empreinte enregistrée au dernier démarrage, None pour une base neuve ou antérieure à l'empreinte.
+
+    Requête sur la table (Core) : la configuration des mappers reste à la première requête ORM.
+    """
+    from models import AppSettings
+
+    settings = AppSettings.__table__
+    try:
+        return session.execute(select(settings.c.value).where(settings.c.key == SCHEMA_STAMP_KEY)).scalar()
+    except (OperationalError, ProgrammingError):  # table app_settings absente
+        session.rollback()
+        return None
+
+
+def stamp_schema(session, fingerprint: str):
+    """Enregistre l'empreinte du schéma (sans commit)."""
+    from models import AppSettings
+
+    setting = session.execute(select(AppSettings).where(AppSettings.key == SCHEMA_STAMP_KEY)).scalar()
+    if setting is None:
+        session.add(AppSettings(key=SCHEMA_STAMP_KEY, value=fingerprint))
+    else:
+        setting.value = fingerprint
@@ -0,0 +1,344 @@
+"""
+Lecture des exports Tenup (joueurs d'un club) et écriture en masse des licences et joueurs.
+
+Remplace le traitement ligne à ligne de `update_players` / `import_players`
+(requêtes Ranking / BestRanking / License / Player / Club pour chaque ligne,
+un commit par joueur) :
+  - le fichier est lu en un seul passage, encodage et colonnes détectés sur
+    ses premiers octets (`iter_tenup_csv`) ; chaque ligne est réduite au fil
+    de l'eau à un `ParsedRow` (`iter_rows`, sans accès à la base), puis à un
+    `TenupRow` dont les classements sont résolus par l'échelle en mémoire
+    (`resolve_rows`) ;
+  - licences connues et joueurs rattachés préchargés pour tout l'ensemble des
+    numéros de licence, en une requête `IN` (par tranches de CHUNK_SIZE) ;
+  - créations et mises à jour écrites par des INSERT / UPDATE groupés
+    (executemany), dans la transaction de l'appelant.
+
+Les écritures groupées ne passent pas par les événements ORM : l'appelant
+invalide le cache de force des équipes et rafraîchit l'instantané des ELO.
+"""
+from __future__ import annotations
+
+import codecs
+import csv
+import hashlib
+import io
+import re
+import unicodedata
+from datetime import datetime
+from typing import Iterable, Iterator, NamedTuple, Optional
+
+from sqlalchemy import bindparam, func, insert, select, update
+
+from extensions import db
+from models import BestRanking, Club, License, Player, Ranking, player_injury_association, ranking_ladder
+
+# Taille maximale d'une liste IN (limite de variables des anciennes versions de SQLite : 999)
+CHUNK_SIZE = 900
+LICENSE_PATTERN = re.compile(r'(\d+)\s*(\w)')
+
+# Valeurs Tenup qui correspondent à "Non Classé" (NC)
+_NC_ALIASES = {
+    'nd', 'niveau non déterminé', 'niveau non determine', 'niveau non dtermin',
+    'niveau blanc', 'niveau orange', 'niveau rouge', 'niveau violet', 'niveau jaune',
+    'nc', '',
+}
+
+
+def parse_ranking_field(raw: str) -> tuple:
+    """
+    Analyse la colonne 'C. Tennis' d'un export Tenup et retourne
+    (current_ranking_value: str, best_ranking_value: str | None).
+
+    Cas gérés :
+      - vide / None                        → ('NC', None)
+      - 'ND' / 'Niveau Non Déterminé' / niveaux couleur  → ('NC', None)
+      - 'NC'                               → ('NC', None)
+      - 'NC (ex 30/4)'                     → ('NC', '30/4')
+      - '15/2 (ex 3/6)'                    → ('15/2', '3/6')
+      - '15/2'                             → ('15/2', None)
+    """
+    raw = (raw or '').strip()
+    normalized = raw.lower()
+
+    # Vérifier si la partie courante est un alias NC
+    # Le format peut être "Niveau Non Déterminé (ex 30/4)" ou juste "NC"
+    # On sépare d'abord la partie "(ex ...)" si présente
+    best_value = None
+    ex_match = re.search(r'\(ex\s+([^)]+)\)', raw, re.IGNORECASE)
+    if ex_match:
+        best_value = ex_match.group(1).strip()
+        current_part = raw[:ex_match.start()].strip()
+    else:
+        current_part = raw
+
+    current_normalized = current_part.lower().strip()
+    if current_normalized in _NC_ALIASES:
+        return 'NC', best_value
+
+    # Valeur de classement standard (ex: "15/2", "30", "-2/6", "40")
+    return current_part if current_part else 'NC', best_value
+
+
+# Colonnes d'un export Tenup : motif cherché dans l'en-tête normalisé → clé canonique
+# (ordre significatif : 'prenom' avant 'nom', qu'il contient)
+_COLUMNS = (
+    ('prenom', 'prenom'),
+    ('nom', 'nom'),
+    ('ne en', 'naissance'),
+    ('licence', 'licence'),
+    ('club', 'club'),
+    ('c. tennis', 'classement'),
+)
+# Octets examinés pour détecter l'encodage et le séparateur
+SNIFF_SIZE = 64 * 1024
+_DELIMITERS = ('\t', ';', ',')
+
+
+def _latin1_fallback(error: UnicodeDecodeError):
+    """Octet invalide pour l'encodage détecté (fichier mixte) : lu en latin-1 plutôt que d'échouer."""
+    return error.object[error.start:error.end].decode('latin-1'), error.end
+
+
+codecs.register_error('tenup_latin1', _latin1_fallback)
+
+
+def _normalize(s: str) -> str:
+    """Supprime les accents et met en minuscules pour comparaison."""
+    return unicodedata.normalize('NFD', s).encode('ascii', 'ignore').decode().lower().strip()
+
+
+def sniff_encoding(sample: bytes) -> str:
+    """Encodage d'un export d'après ses premiers octets : UTF-8 (avec ou sans BOM), sinon cp1252."""
+    if sample.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)  # séquence coupée en fin d'échantillon
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return 'cp1252'
+
+
+class _HashingRaw(io.RawIOBase):
+    """Flux binaire qui met à jour `digest` avec les octets lus (empreinte calculée pendant la lecture)."""
+
+    def __init__(self, raw, digest):
+        self.raw, self.digest = raw, digest
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        count = self.raw.readinto(buffer)
+        if count:
+            self.digest.update(memoryview(buffer)[:count])
+        return count
+
+    def close(self):
+        self.raw.close()
+        super().close()
+
+
+def iter_tenup_csv(csvfile, digest=None) -> Iterator[dict]:
+    """
+    Lignes d'un fichier CSV Tenup, lues en un seul passage et rendues au fil de l'eau.
+    Encodage et séparateur détectés sur les SNIFF_SIZE premiers octets, colonnes
+    reconnues sur l'en-tête ; chaque ligne est un dict de clés normalisées :
+      'prenom', 'nom', 'naissance', 'licence', 'club', 'classement'
+    digest : objet hashlib mis à jour avec le contenu brut du fichier (optionnel).
+    """
+    raw = open(csvfile, 'rb', buffering=0)
+    if digest is not None:
+        raw = _HashingRaw(raw, digest)
+    with io.BufferedReader(raw, buffer_size=SNIFF_SIZE) as buffered:
+        encoding = sniff_encoding(buffered.peek(SNIFF_SIZE)[:SNIFF_SIZE])
+        text = io.TextIOWrapper(buffered, encoding=encoding, errors='tenup_latin1', newline='')
+        header = text.readline()
+        delimiter = max(_DELIMITERS, key=header.count)
+        fields = next(csv.reader([header], delimiter=delimiter), [])
+        key_map = {}
+        for index, raw_key in enumerate(fields):
+            norm = _normalize(raw_key)
+            canonical = next((canonical for pattern, canonical in _COLUMNS if pattern in norm), None)
+            if canonical is not None:
+                key_map[index] = canonical
+        for values in csv.reader(text, delimiter=delimiter):
+            if values:
+                yield {canonical: values[index] if index < len(values) else ''
+                       for index, canonical in key_map.items()}
+        if digest is not None:
+            buffered.read()  # fin de fichier non analysée (lignes vides) : comptée dans l'empreinte
+
+
+def _open_tenup_csv(csvfile) -> list:
+    """Toutes les lignes d'un fichier CSV Tenup (voir iter_tenup_csv)."""
+    return list(iter_tenup_csv(csvfile))
+
+
+def parse_csv_license_ids(csvfile) -> set:
+    """
+    Lit un fichier CSV Tenup et retourne l'ensemble des numéros de licence présents.
+    Utile pour un pré-scan avant traitement.
+    """
+    try:
+        return {row.license_id for row in iter_rows(csvfile)}
+    except FileNotFoundError:
+        return set()
+
+
+class ParsedRow(NamedTuple):
+    """Ligne brute d'un export Tenup (sans accès à la base : lisible dans un worker)."""
+    license_id: int
+    letter: str
+    first_name: str
+    last_name: str
+    birth_date: Optional[datetime]  # 1er janvier de l'année de naissance, None si illisible
+    ranking_value: str
+    best_value: Optional[str]
+    hash: str  # empreinte de la ligne (voir row_hash)
+
+
+class TenupRow(NamedTuple):
+    """Ligne utile d'un export Tenup, classements résolus en identifiants."""
+    license_id: int
+    letter: str
+    first_name: str
+    last_name: str
+    birth_date: Optional[datetime]  # 1er janvier de l'année de naissance, None si illisible
+    ranking_id: int
+    ranking_value: str
+    best_ranking_id: Optional[int]
+    hash: str
+
+
+def row_hash(letter: str, first_name: str, last_name: str, birth_date: Optional[datetime],
+             ranking_value: str, best_value: Optional[str]) -> str:
+    """Empreinte courte (16 caractères hexadécimaux) des champs utiles d'une ligne Tenup."""
+    fields = (letter, first_name, last_name, str(birth_date.year) if birth_date else '', ranking_value, best_value or '')
+    return hashlib.blake2b('\x1f'.join(fields).encode(), digest_size=8).hexdigest()
+
+
+def iter_rows(csvfile, digest=None) -> Iterator[ParsedRow]:
+    """Lignes du CSV ayant un numéro de licence, en `ParsedRow`, au fil de la lecture (aucune requête)."""
+    for row in iter_tenup_csv(csvfile, digest):
+        match = LICENSE_PATTERN.match(row.get('licence', ''))
+        if not match:
+            continue
+        current_value, best_value = parse_ranking_field(row.get('classement', ''))
+        try:
+            birth_date = datetime.strptime(row.get('naissance', ''), '%Y').replace(month=1, day=1)
+        except (ValueError, TypeError):
+            birth_date = None
+        letter, first_name, last_name = match.group(2), row.get('prenom', ''), row.get('nom', '')
+        yield ParsedRow(license_id=int(match.group(1)), letter=letter, first_name=first_name,
+                        last_name=last_name, birth_date=birth_date, ranking_value=current_value,
+                        best_value=best_value,
+                        hash=row_hash(letter, first_name, last_name, birth_date, current_value, best_value))
+
+
+def parse_file(csvfile) -> list:
+    """Toutes les `ParsedRow` du CSV (voir iter_rows)."""
+    return list(iter_rows(csvfile))
+
+
+def resolve_rows(parsed: Iterable[ParsedRow], logger) -> dict:
+    """{numéro de licence: TenupRow}, classements résolus par l'échelle en mémoire.
+
+    Classement inconnu signalé puis ignoré ; une licence présente deux fois
+    garde sa dernière ligne.
+    """
+    rows = {}
+    for row in parsed:
+        ranking_id = ranking_ladder.id_of(row.ranking_value, Ranking)
+        if ranking_id is None:
+            logger.warning(f'Classement inconnu "{row.ranking_value}" pour {row.first_name} {row.last_name} '
+                           f'– ligne ignorée.')
+            continue
+        rows[row.license_id] = TenupRow(
+            license_id=row.license_id, letter=row.letter, first_name=row.first_name, last_name=row.last_name,
+            birth_date=row.birth_date, ranking_id=ranking_id, ranking_value=row.ranking_value,
+            best_ranking_id=ranking_ladder.id_of(row.best_value, BestRanking) if row.best_value else None,
+            hash=row.hash)
+    return rows
+
+
+def read_rows(csvfile, logger) -> dict:
+    """Lignes valides du CSV : {numéro de licence: TenupRow}, dans l'ordre du fichier."""
+    return resolve_rows(iter_rows(csvfile), logger)
+
+
+def chunked(values: Iterable, size: int = CHUNK_SIZE) -> Iterator[list]:
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+class KnownLicense(NamedTuple):
+    """Licence déjà en base et joueur rattaché (player_id / club_id à None si aucun)."""
+    year: int
+    player_id: Optional[int]
+    club_id: Optional[str]
+
+
+def known_licenses(license_ids: Iterable[int]) -> dict:
+    """{numéro de licence: KnownLicense} des licences déjà en base, joueur rattaché par jointure."""
+    known = {}
+    for chunk in chunked(license_ids):
+        for license_id, year, player_id, club_id in db.session.execute(
+                select(License.id, License.year, Player.id, Player.clubId)
+                .outerjoin(Player, Player.licenseId == License.id)
+                .where(License.id.in_(chunk))
+                .order_by(License.id, Player.id)):
+            known.setdefault(license_id, KnownLicense(year, player_id, club_id))
+    return known
+
+
+def club_names(club_ids: Iterable[str]) -> dict:
+    club_ids = list(club_ids)
+    if not club_ids:
+        return {}
+    return dict(db.session.execute(select(Club.id, Club.name).where(Club.id.in_(club_ids))).all())
+
+
+def insert_licenses(rows: Iterable[TenupRow], gender: int):
+    """Crée les licences des lignes données (meilleur classement = actuel à défaut)."""
+    values = [dict(id=row.license_id, firstName=row.first_name, lastName=row.last_name, letter=row.letter,
+                   year=row.birth_date.year, gender=gender, rankingId=row.ranking_id,
+                   bestRankingId=row.best_ranking_id or row.ranking_id, tenupHash=row.hash) for row in rows]
+    if values:
+        db.session.execute(insert(License.__table__), values)
+
+
+def update_rankings(rows: Iterable[TenupRow]):
+    """Met à jour classement, meilleur classement (conservé s'il est absent du CSV) et empreinte."""
+    table = License.__table__
+    values = [dict(license_id=row.license_id, ranking_id=row.ranking_id, best_ranking_id=row.best_ranking_id,
+                   row_hash=row.hash) for row in rows]
+    if values:
+        db.session.execute(update(table)
+                           .where(table.c.id == bindparam('license_id'))
+                           .values(rankingId=bindparam('ranking_id'),
+                                   bestRankingId=func.coalesce(bindparam('best_ranking_id'), table.c.bestRankingId),
+                                   tenupHash=bindparam('row_hash')),
+                           values)
+
+
+def insert_players(club_id: str, birth_dates: dict) -> dict:
+    """Crée un joueur actif par licence ({numéro de licence: date de naissance}) ; retourne {licence: player_id}."""
+    values = [dict(birthDate=birth_date, isActive=True, hiddenInTenup=False, clubId=club_id, licenseId=license_id,
+                   weight=None, height=None) for license_id, birth_date in birth_dates.items()]
+    if not values:
+        return {}
+    db.session.execute(insert(Player.__table__), values)
+    created = {}
+    for chunk in chunked(birth_dates):
+        created.update((license_id, player_id) for player_id, license_id in db.session.execute(
+            select(Player.id, Player.licenseId).where(Player.clubId == club_id, Player.licenseId.in_(chunk))))
+    return created
+
+
+def insert_injuries(pairs: Iterable[tuple]):
+    """Rattache les blessures données [(player_id, injury_id)]."""
+    values = [dict(player_id=player_id, injury_id=injury_id) for player_id, injury_id in pairs]
+    if values:
+        db.session.execute(insert(player_injury_association), values)
@@ -0,0 +1,244 @@
+"""
+Resynchronisation incrémentale d'un club avec un nouvel export Tenup.
+
+D'un export mensuel à l'autre, seuls quelques classements, arrivées et départs
+changent.  Plutôt que de réécrire toutes les licences du club
+(`common.update_players`), la synchronisation compare le fichier à ce qui a
+déjà été appliqué :
+  - empreinte de chaque ligne (`License.tenupHash`, voir `tenup_import.row_hash`) :
+    seules les lignes nouvelles ou modifiées sont résolues et écrites.  Les
+    imports complets (`common.update_players`) écrivent la même empreinte ;
+    une saisie manuelle du classement l'efface (voir models.py) ;
+  - les joueurs du club absents du fichier sont les départs.
+L'empreinte SHA-256 du fichier appliqué est conservée par club et par genre
+(`TenupSync`) pour le suivi, sans dispenser de la comparaison ligne à ligne :
+la base a pu changer depuis (import complet, saisies, transferts).
+
+`plan_sync` calcule l'écart sans rien écrire (aperçu, quelques requêtes) ;
+`apply_sync` l'applique en une transaction.  Les licences importées avant
+l'empreinte de ligne sont vues une fois comme modifiées, puis suivies.
+
+Entre l'aperçu et la validation, les fichiers envoyés sont conservés dans un
+répertoire temporaire désigné par un jeton (`stage_uploads` / `staged_files`).
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import secrets
+import shutil
+import tempfile
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+from sqlalchemy import select
+
+import tenup_import
+from extensions import db
+from models import License, Player, PlayerRating, TenupSync, player_team_association, ranking_ladder, team_strengths
+
+STAGING_PREFIX = 'tenup-sync-'
+# Durée de conservation (s) des fichiers d'un aperçu non validé
+STAGING_MAX_AGE = 24 * 3600
+_TOKEN_PATTERN = re.compile(r'[0-9a-f]{32}')
+
+
+class SyncChange(NamedTuple):
+    """Ligne modifiée d'un joueur du club : nouvelle ligne et classement en base."""
+    row: tenup_import.TenupRow
+    player_id: int
+    old_ranking_id: int
+
+    @property
+    def old_ranking(self) -> Optional[str]:
+        return ranking_ladder.value(self.old_ranking_id)
+
+
+@dataclass
+class SyncPlan:
+    """Écart entre un export Tenup et la base pour un club et un genre."""
+    club_id: str
+    gender: int
+    fingerprint: str
+    row_count: int = 0
+    added: list = field(default_factory=list)      # TenupRow : licence inconnue → licence + joueur
+    joined: list = field(default_factory=list)     # TenupRow : licence connue sans joueur → joueur
+    changed: list = field(default_factory=list)    # SyncChange : joueur du club, ligne modifiée
+    departed: list = field(default_factory=list)   # dicts (format update_players) : absents du fichier
+    conflicts: list = field(default_factory=list)  # dicts (format update_players) : joueur d'un autre club
+    unchanged: int = 0                             # lignes identiques, non relues
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.added or self.joined or self.changed or self.departed)
+
+    @property
+    def updated_count(self) -> int:
+        return len(self.added) + len(self.joined) + len(self.changed)
+
+
+class _Member(NamedTuple):
+    player_id: int
+    first_name: str
+    last_name: str
+    ranking_id: int
+    tenup_hash: Optional[str]
+
+
+def _club_members(club_id: str, gender: int) -> dict:
+    """{numéro de licence: _Member} des joueurs du club pour ce genre, en une requête."""
+    return {license_id: _Member(*values) for license_id, *values in db.session.execute(
+        select(License.id, Player.id, License.firstName, License.lastName, License.rankingId, License.tenupHash)
+        .join(Player, Player.licenseId == License.id)
+        .where(Player.clubId == club_id, License.gender == gender))}
+
+
+def plan_sync(club, gender: int, csvfile, logger) -> SyncPlan:
+    """Écart entre le fichier et la base, sans rien écrire."""
+    digest = hashlib.sha256()
+    parsed = {row.license_id: row for row in tenup_import.iter_rows(csvfile, digest)}
+    plan = SyncPlan(club_id=club.id, gender=gender, fingerprint=digest.hexdigest(), row_count=len(parsed))
+    members = _club_members(club.id, gender)
+    pending = []
+    for license_id, row in parsed.items():
+        member = members.get(license_id)
+        if member is not None and member.tenup_hash == row.hash:
+            plan.unchanged += 1
+        else:
+            pending.append(row)
+
+    rows = tenup_import.resolve_rows(pending, logger)
+    known = tenup_import.known_licenses(license_id for license_id in rows if license_id not in members)
+    other_clubs = tenup_import.club_names({k.club_id for k in known.values()
+                                           if k.player_id is not None and str(k.club_id) != str(club.id)})
+    for data in rows.values():
+        member = members.get(data.license_id)
+        existing = known.get(data.license_id)
+        if member is not None:
+            plan.changed.append(SyncChange(data, member.player_id, member.ranking_id))
+        elif existing is None:
+            if data.birth_date is None:
+                logger.warning(f"Année de naissance invalide pour {data.first_name} {data.last_name} – ligne ignorée.")
+                continue
+            plan.added.append(data)
+        elif existing.player_id is None:
+            plan.joined.append(data._replace(birth_date=data.birth_date or datetime(existing.year, 1, 1)))
+        elif str(existing.club_id) != str(club.id):
+            plan.conflicts.append({
+                'license_id': data.license_id,
+                'license_number': f"{data.license_id} {data.letter}",
+                'name': f"{data.first_name} {data.last_name}",
+                'ranking': data.ranking_value,
+                'ranking_id': data.ranking_id,
+                'best_ranking_id': data.best_ranking_id,
+                'current_club': other_clubs.get(existing.club_id, 'Inconnu'),
+                'new_club': club.name,
+                'new_club_id': club.id,
+            })
+
+    departed = {license_id: member for license_id, member in members.items() if license_id not in parsed}
+    in_team = set()
+    for chunk in tenup_import.chunked(member.player_id for member in departed.values()):
+        in_team.update(db.session.execute(
+            select(player_team_association.c.player_id).where(player_team_association.c.player_id.in_(chunk))).scalars())
+    plan.departed = [{
+        'license_number': license_id,
+        'player_id': member.player_id,
+        'name': f'{member.first_name} {member.last_name}',
+        'ranking': ranking_ladder.value(member.ranking_id) or 'N/A',
+        'club': club.name,
+        'in_team': member.player_id in in_team,
+    } for license_id, member in departed.items()]
+    return plan
+
+
+def apply_sync(plan: SyncPlan, app) -> tuple:
+    """Applique l'écart en une transaction ; même retour que `common.update_players`.
+
+    Retourne (success, conflicts, deleted_players, updated_count).  Seuls les
+    joueurs ajoutés ou modifiés ont leur instantané d'ELO recalculé.
+    """
+    try:
+        tenup_import.insert_licenses(plan.added, plan.gender)
+        tenup_import.update_rankings([change.row for change in plan.changed] + plan.joined)
+        created = tenup_import.insert_players(plan.club_id, {row.license_id: row.birth_date
+                                                             for row in plan.added + plan.joined})
+        db.session.expire_all()
+        team_strengths.invalidate()
+
+        for chunk in tenup_import.chunked(departed['player_id'] for departed in plan.departed):
+            for player in Player.query.filter(Player.id.in_(chunk)):
+                db.session.delete(player)
+        db.session.flush()
+        touched = list(created.values()) + [change.player_id for change in plan.changed]
+        for chunk in tenup_import.chunked(touched):
+            PlayerRating.refresh_players(chunk)
+
+        state = db.session.get(TenupSync, (plan.club_id, plan.gender)) \
+            or TenupSync(club_id=plan.club_id, gender=plan.gender)
+        state.fingerprint, state.row_count = plan.fingerprint, plan.row_count
+        db.session.add(state)
+        db.session.commit()
+        app.logger.debug(f'SYNC PLAYERS DONE: {len(plan.added) + len(plan.joined)} ajoutés, '
+                         f'{len(plan.changed)} modifiés, {len(plan.departed)} supprimés, {plan.unchanged} inchangés')
+        return True, plan.conflicts, plan.departed, plan.updated_count
+    except Exception as e:
+        db.session.rollback()
+        app.logger.error(f'apply_sync ERREUR: {e}', exc_info=True)
+        return False, [], [], 0
+
+
+# ── Fichiers conservés entre l'aperçu et la validation ─────────────────────
+def _staging_dir(token: str) -> str:
+    return os.path.join(tempfile.gettempdir(), f'{STAGING_PREFIX}{token}')
+
+
+def stage_uploads(club_id: str, uploads: dict) -> str:
+    """Enregistre les fichiers envoyés ({genre: FileStorage}) ; retourne le jeton de l'aperçu.
+
+    Les aperçus abandonnés depuis plus de STAGING_MAX_AGE sont supprimés au passage.
+    """
+    _prune_staging()
+    token = secrets.token_hex(16)
+    directory = _staging_dir(token)
+    os.makedirs(directory)
+    with open(os.path.join(directory, 'club'), 'w') as f:
+        f.write(str(club_id))
+    for gender, upload in uploads.items():
+        upload.save(os.path.join(directory, f'{gender}.csv'))
+    return token
+
+
+def staged_files(token: str, club_id: str) -> dict:
+    """{genre: chemin} des fichiers d'un aperçu du club, {} si le jeton est inconnu ou d'un autre club."""
+    if not _TOKEN_PATTERN.fullmatch(token or ''):
+        return {}
+    directory = _staging_dir(token)
+    try:
+        with open(os.path.join(directory, 'club')) as f:
+            if f.read() != str(club_id):
+                return {}
+    except FileNotFoundError:
+        return {}
+    return {gender: os.path.join(directory, f'{gender}.csv') for gender in (0, 1)
+            if os.path.exists(os.path.join(directory, f'{gender}.csv'))}
+
+
+def _prune_staging():
+    root, limit = tempfile.gettempdir(), time.time() - STAGING_MAX_AGE
+    for name in os.listdir(root):
+        path = os.path.join(root, name)
+        if name.startswith(STAGING_PREFIX) and _TOKEN_PATTERN.fullmatch(name[len(STAGING_PREFIX):]):
+            try:
+                if os.path.getmtime(path) < limit:
+                    shutil.rmtree(path, ignore_errors=True)
+            except OSError:
+                pass
+
+
+def discard(token: str):
+    if _TOKEN_PATTERN.fullmatch(token or ''):
+        shutil.rmtree(_staging_dir(token), ignore_errors=True)
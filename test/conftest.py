@@ -0,0 +1,118 @@
+"""
+Fixtures partagées : application Flask minimale sur une base SQLite en mémoire
+et fabrique de poules de championnat prêtes à simuler.
+"""
+from __future__ import annotations
+
+import os
+import sys
+from datetime import date, datetime, timedelta
+
+import pytest
+
+# ── Ajouter la racine du projet au path ────────────────────────────────────
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+@pytest.fixture(scope='module')
+def memory_app(request, tmp_path_factory):
+    """Application Flask de test (sans create_app) avec SQLite en mémoire.
+
+    Un module qui exécute des jobs dans des threads déclare `SQLITE_FILE = True` :
+    la base est alors un fichier temporaire, une connexion par thread.
+    """
+    from flask import Flask
+
+    from extensions import db as _db
+    import models  # noqa: F401  (enregistre les tables)
+    from blueprints.shop import models as shop_models  # noqa: F401
+    from common import load_rankings
+    from models import BestRanking, Ranking
+
+    uri = 'sqlite:///:memory:'
+    if getattr(request.module, 'SQLITE_FILE', False):
+        uri = f"sqlite:///{tmp_path_factory.mktemp('db') / 'test.db'}"
+    application = Flask(__name__)
+    application.config.update(TESTING=True,
+                              SQLALCHEMY_DATABASE_URI=uri,
+                              SQLALCHEMY_TRACK_MODIFICATIONS=False)
+    _db.init_app(application)
+    with application.app_context():
+        _db.create_all()
+        load_rankings(_db, Ranking)
+        load_rankings(_db, BestRanking)
+        yield application
+        _db.session.remove()
+        _db.drop_all()
+
+
+@pytest.fixture(scope='module')
+def make_pool(memory_app):
+    """Fabrique une poule de `num_teams` équipes (une par club) avec ses rencontres aller.
+
+    `ranking_values[i]` donne le classement des joueurs de l'équipe i.
+    """
+    from extensions import db
+    from models import (AgeCategory, Championship, Club, Division, License,
+                        Match, Matchday, Player, Pool, Ranking, Team)
+
+    counter = {'pool': 0, 'license': 0}
+
+    def _make_pool(ranking_values, singles_count=2, doubles_count=1, players_per_team=6):
+        counter['pool'] += 1
+        num_teams = len(ranking_values)
+        age_category = AgeCategory(type=1, minAge=18, maxAge=99)
+        db.session.add(age_category)
+        db.session.flush()
+        division = Division(type=3, number=1, gender=0, ageCategoryId=age_category.id)
+        db.session.add(division)
+        db.session.flush()
+        championship = Championship(singlesCount=singles_count, doublesCount=doubles_count,
+                                    divisionId=division.id, season='2025/2026')
+        db.session.add(championship)
+        db.session.flush()
+        num_days = num_teams - 1 if num_teams % 2 == 0 else num_teams
+        matchdays = [Matchday(date=date(2025, 10, 5) + timedelta(weeks=d), championshipId=championship.id)
+                     for d in range(num_days)]
+        db.session.add_all(matchdays)
+        pool = Pool(letter='A', championshipId=championship.id)
+        db.session.add(pool)
+        db.session.flush()
+
+        teams = []
+        for i, value in enumerate(ranking_values):
+            club_id = f'P{counter["pool"]:03d}{i:03d}'
+            db.session.add(Club(id=club_id, name=f'Club {club_id}', city='Testville'))
+            ranking = Ranking.query.filter_by(value=value).first()
+            players = []
+            for j in range(players_per_team):
+                counter['license'] += 1
+                license = License(id=counter['license'], firstName='Joueur', lastName=f'{club_id}-{j}',
+                                  letter='A', year=1990, gender=0, rankingId=ranking.id,
+                                  bestRankingId=ranking.id)
+                db.session.add(license)
+                players.append(Player(birthDate=datetime(1990, 1, 1), isActive=True,
+                                      clubId=club_id, licenseId=license.id))
+            db.session.add_all(players)
+            db.session.flush()
+            team = Team(name=f'Equipe {i + 1}', clubId=club_id, poolId=pool.id, captainId=players[0].id)
+            team.players = players
+            teams.append(team)
+        db.session.add_all(teams)
+        db.session.flush()
+
+        # Calendrier par la méthode du cercle (une rencontre par équipe et par journée)
+        slots = teams + ([None] if num_teams % 2 else [])
+        for d, matchday in enumerate(matchdays):
+            half = len(slots) // 2
+            for k in range(half):
+                home, visitor = slots[k], slots[-1 - k]
+                if home is None or visitor is None:
+                    continue
+                db.session.add(Match(poolId=pool.id, matchdayId=matchday.id, date=matchday.date,
+                                     homeTeamId=home.id, visitorTeamId=visitor.id))
+            slots = [slots[0], slots[-1]] + slots[1:-1]
+        db.session.commit()
+        return pool
+
+    return _make_pool
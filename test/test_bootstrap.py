@@ -0,0 +1,76 @@
+"""
+Tests de l'amorçage des clubs et de leurs joueurs (bootstrap.py).
+
+Couvre :
+  1. load_club_directory() – identifiants en texte, champs numériques convertis
+  2. parse_club_files()    – même résultat en série et sur un pool de processus
+  3. bootstrap_clubs()     – clubs créés depuis l'annuaire, joueurs importés, fichier absent, relance sans doublon
+"""
+from __future__ import annotations
+
+import pytest
+
+import bootstrap
+
+HEADER = 'Nom\tPrénom\tNé en\tLicence\tClub\tC. Tennis\n'
+CLUBS = [{'id': '99000001', 'active': True, 'name': 'CLUB UN', 'city': 'Ville', 'csvfile': 'club_un'},
+         {'id': '99000002', 'active': True, 'name': 'CLUB DEUX', 'city': 'Ville', 'csvfile': 'club_deux'},
+         {'id': '99000003', 'active': False, 'name': 'CLUB INACTIF', 'city': 'Ville', 'csvfile': 'club_inactif'}]
+
+
+def _write_players(path, first_id, count):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(HEADER)
+        for i in range(count):
+            f.write(f'NOM{i}\tPrénom\t{1970 + i}\t{first_id + i} A - 2025\tCLUB\t{("30/1", "15/2 (ex 5/6)", "NC")[i % 3]}\n')
+
+
+@pytest.fixture
+def data_dir(tmp_path, memory_app, monkeypatch):
+    players = tmp_path / 'static' / 'data' / 'players'
+    players.mkdir(parents=True)
+    (tmp_path / 'static' / 'data' / 'clubs.csv').write_text(
+        'id,name,city,tennis_courts,padel_courts,beach_courts,latitude,longitude\n'
+        '99000001,TENNIS CLUB UN,VILLE UN,8,2,,43.5,7.1\n', encoding='utf-8')
+    _write_players(players / 'club_un_men.csv', 880_000, 12)
+    _write_players(players / 'club_un_women.csv', 881_000, 5)
+    _write_players(players / 'club_deux_men.csv', 882_000, 7)  # pas de fichier femmes
+    monkeypatch.setitem(memory_app.config, 'BASE_PATH', str(tmp_path))
+    return tmp_path
+
+
+def test_club_directory(data_dir):
+    directory = bootstrap.load_club_directory(data_dir / 'static' / 'data' / 'clubs.csv')
+    assert directory == {'99000001': {'name': 'TENNIS CLUB UN', 'city': 'VILLE UN', 'tennis_courts': 8,
+                                      'padel_courts': 2, 'beach_courts': None, 'latitude': 43.5, 'longitude': 7.1}}
+
+
+def test_parallel_parse_matches_serial(data_dir):
+    paths = [bootstrap.players_csv_path(str(data_dir), club_info, gender) for club_info in CLUBS[:2] for gender in (0, 1)]
+    serial = list(bootstrap.parse_club_files(paths, workers=1))
+    assert list(bootstrap.parse_club_files(paths, workers=2)) == serial
+    assert [path for path, _ in serial] == paths
+    assert [len(rows) if rows is not None else None for _, rows in serial] == [12, 5, 7, None]
+
+
+def test_bootstrap_clubs(memory_app, data_dir):
+    from extensions import db
+    from models import Club, Player
+
+    progress = []
+    reports = bootstrap.bootstrap_clubs(memory_app, CLUBS, workers=2,
+                                        progress=lambda done, total, report: progress.append((done, total)))
+    assert progress == [(1, 2), (2, 2)]
+    first, second = reports
+    assert first.created and first.players == {0: 12, 1: 5} and not first.conflicts
+    assert second.players == {0: 7} and second.missing == [1]
+    club = db.session.get(Club, '99000001')
+    assert (club.name, club.tennis_courts, club.latitude) == ('TENNIS CLUB UN', 8, 43.5)
+    assert db.session.get(Club, '99000002').name == 'CLUB DEUX'  # absent de l'annuaire : configuration
+    assert db.session.get(Club, '99000003') is None
+    assert 'Aucun fichier joueuses pour ce club.' in second.messages()
+
+    # Relance : clubs conservés, aucun joueur dupliqué
+    again = bootstrap.bootstrap_clubs(memory_app, CLUBS)
+    assert not again[0].created and again[0].players == {0: 12, 1: 5}
+    assert Player.query.filter_by(clubId='99000001').count() == 17
@@ -0,0 +1,275 @@
+"""
+Tests du gestionnaire de jobs d'arrière-plan (jobs.py).
+
+Couvre :
+  1. enqueue()         – exécution dans un thread, message et page de résultat
+  2. request_cancel()  – annulation d'un job en cours et d'un job en file
+  3. init_app()        – reprise des jobs après un redémarrage, sans toucher aux jobs d'un autre processus ;
+                         réservation d'un job par un seul processus, signal de vie et avancement en base
+  4. NightlyScheduler  – tâches nocturnes créées une fois par jour, quel que soit le nombre de processus ;
+                         calculs initiaux du démarrage mis en file par un seul worker
+  5. tâche 'simulate_pool_batch' de bout en bout
+"""
+from __future__ import annotations
+
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+import jobs
+
+# Jobs exécutés dans des threads : une connexion SQLite par thread
+SQLITE_FILE = True
+
+
+@pytest.fixture(scope='module')
+def runner(memory_app):
+    runner = jobs.init_app(memory_app)
+    yield runner
+    runner.shutdown()
+
+
+def wait_for(job_id: int, timeout: float = 20.0):
+    from extensions import db
+    from models import Job
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        db.session.expire_all()
+        job = db.session.get(Job, job_id)
+        if job.is_finished:
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f'job {job_id} non terminé')
+
+
+@jobs.task('test_add')
+def _add(job, a: int, b: int):
+    job.progress(0.5, 'moitié')
+    job.redirect_to('championship.show_pool', id=a + b)
+    return f'{a + b}'
+
+
+_release = threading.Event()
+
+
+@jobs.task('test_wait')
+def _wait(job):
+    while not _release.wait(0.02):
+        job.progress(0.1, 'en attente')
+    return 'libéré'
+
+
+@jobs.task('test_fail')
+def _fail(job):
+    raise ValueError('boom')
+
+
+class TestJobRunner:
+    def test_enqueue_runs_in_background(self, runner):
+        job = jobs.enqueue('test_add', 'addition', a=2, b=3)
+        job = wait_for(job.id)
+        assert job.status == 'done' and job.message == '5' and job.progress == 1.0
+        assert job.result_endpoint == 'championship.show_pool'
+        assert json.loads(job.result_args) == {'id': 5}
+        assert job.started_at and job.finished_at
+
+    def test_failure_is_recorded(self, runner):
+        job = wait_for(jobs.enqueue('test_fail').id)
+        assert job.status == 'failed' and job.message == 'boom'
+
+    def test_unknown_task(self, runner):
+        with pytest.raises(ValueError):
+            jobs.enqueue('does_not_exist')
+
+    def test_cancel_running_job(self, runner):
+        from extensions import db
+        from models import Job
+
+        _release.clear()
+        job = jobs.enqueue('test_wait')
+        deadline = time.monotonic() + 5
+        while getattr(runner.context(job.id), 'message', None) is None and time.monotonic() < deadline:
+            time.sleep(0.02)
+        db.session.expire_all()
+        status = jobs.job_status(db.session.get(Job, job.id))
+        assert status['status'] == 'running' and status['message'] == 'en attente'
+        jobs.request_cancel(db.session.get(Job, job.id))
+        assert wait_for(job.id).status == 'cancelled'
+
+    def test_cancel_queued_job(self, runner):
+        from extensions import db
+        from models import Job
+
+        _release.clear()
+        blocker = jobs.enqueue('test_wait')
+        queued = jobs.enqueue('test_add', a=1, b=1)
+        jobs.request_cancel(db.session.get(Job, queued.id))
+        _release.set()
+        assert wait_for(blocker.id).status == 'done'
+        assert wait_for(queued.id).status == 'cancelled'
+
+    def test_restart_recovery(self, memory_app, runner):
+        from extensions import db
+        from models import Job
+
+        now = datetime.utcnow()
+        interrupted = Job(kind='test_add', params='{"a": 1, "b": 2}', status='running',
+                          heartbeat_at=now - timedelta(hours=1))
+        sibling = Job(kind='test_add', params='{"a": 2, "b": 2}', status='running', heartbeat_at=now)
+        pending = Job(kind='test_add', params='{"a": 4, "b": 4}')
+        db.session.add_all([interrupted, sibling, pending])
+        db.session.commit()
+        restarted = jobs.init_app(memory_app)
+        try:
+            assert wait_for(pending.id).message == '8'
+        finally:
+            restarted.shutdown()
+            memory_app.extensions['jobs'] = runner
+        db.session.expire_all()
+        assert db.session.get(Job, interrupted.id).status == 'failed'
+        assert db.session.get(Job, sibling.id).status == 'running'  # job d'un autre processus vivant
+
+    def test_job_claimed_once(self, memory_app, runner):
+        from extensions import db
+        from models import Job
+
+        job = Job(kind='test_add', params='{"a": 1, "b": 1}')
+        db.session.add(job)
+        db.session.commit()
+        other = jobs.JobRunner(memory_app)
+        try:
+            assert other._claim(job.id) and not runner._claim(job.id)
+        finally:
+            other.shutdown()
+        db.session.expire_all()
+        job = db.session.get(Job, job.id)
+        assert job.status == 'running' and job.started_at and job.heartbeat_at
+
+    def test_heartbeat(self, memory_app, runner):
+        from extensions import db
+        from models import Job
+
+        _release.clear()
+        beating = jobs.JobRunner(memory_app, heartbeat_interval=0.05)
+        job = Job(kind='test_wait')
+        db.session.add(job)
+        db.session.commit()
+        beating.submit(job.id)
+        try:
+            deadline = time.monotonic() + 5
+            while beating.context(job.id) is None and time.monotonic() < deadline:
+                time.sleep(0.02)
+            db.session.expire_all()
+            started = db.session.get(Job, job.id).heartbeat_at
+            time.sleep(0.3)
+            db.session.expire_all()
+            job = db.session.get(Job, job.id)
+            assert job.heartbeat_at > started
+            # Job exécuté par un autre pool (un autre processus) : avancement lu en base
+            assert beating.context(job.id) is not None and jobs._runner().context(job.id) is None
+            status = jobs.job_status(job)
+            assert status['progress'] == pytest.approx(0.1) and status['message'] == 'en attente'
+            assert status['eta'] is not None
+        finally:
+            _release.set()
+            beating.shutdown()
+        db.session.expire_all()
+        assert db.session.get(Job, job.id).status == 'done'
+
+
+@pytest.fixture
+def nightly_app(tmp_path):
+    """Application et base propres au test : ses jobs s'exécutent dans le pool, arrêté en fin de test."""
+    from flask import Flask
+
+    from common import load_rankings
+    from extensions import db
+    from models import BestRanking, Ranking
+
+    application = Flask(__name__)
+    application.config.update(TESTING=True, SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'nightly.db'}",
+                              SQLALCHEMY_TRACK_MODIFICATIONS=False)
+    db.init_app(application)
+    with application.app_context():
+        db.create_all()
+        load_rankings(db, Ranking)
+        load_rankings(db, BestRanking)
+        runner = jobs.init_app(application)
+        yield application
+        runner.shutdown()
+        db.session.remove()
+        db.engine.dispose()
+
+
+class TestNightlyScheduler:
+    def test_refresh_player_ratings(self, nightly_app, make_pool):
+        from blueprints.club import tasks  # noqa: F401  (enregistre les tâches)
+        from extensions import db
+        from models import Job, Player, PlayerRating
+
+        make_pool(['30/2', '40'])
+        PlayerRating.query.delete()
+        db.session.commit()
+
+        scheduler = jobs.NightlyScheduler(nightly_app, hour=3)
+        queued = scheduler.run_pending()
+        assert 'refresh_player_ratings' in [job.kind for job in queued]
+        assert scheduler.run_pending() == []  # une seule fois par jour
+        refresh = next(job for job in queued if job.kind == 'refresh_player_ratings')
+
+        nightly_app.extensions['jobs'].shutdown()  # jobs du jour terminés
+        db.session.expire_all()
+        job = db.session.get(Job, refresh.id)
+        assert job.status == 'done', job.message
+        assert PlayerRating.query.count() == Player.query.count()
+
+    def test_one_job_per_day_across_processes(self, nightly_app, monkeypatch):
+        monkeypatch.setattr(jobs, '_nightly', {'test_add'})
+        job = jobs.NightlyScheduler(nightly_app, hour=3).run_pending()[0]
+        assert job.run_key == f"test_add@{datetime.utcnow():%Y-%m-%d}"
+        # Planificateur d'un autre processus passé entre la vérification et l'insertion
+        assert jobs.enqueue_once('test_add', job.run_key, 'Tâche nocturne') is None
+
+    def test_initial_jobs_once_across_workers(self, nightly_app, make_pool):
+        from app import _enqueue_initial_jobs
+        from blueprints.championship import tasks as championship_tasks  # noqa: F401  (enregistre les tâches)
+        from blueprints.club import tasks  # noqa: F401
+        from extensions import db
+        from models import PlayerRating, PoolStanding
+
+        pool = make_pool(['30/2', '40'])
+        pool.matches[0].homeScore, pool.matches[0].visitorScore = 2, 1
+        db.session.commit()
+        PlayerRating.query.delete()
+        PoolStanding.query.delete()
+        db.session.commit()
+
+        # create_app de chaque worker : un seul calcul initial par tâche, qui vaut tâche nocturne du jour
+        kinds = ['refresh_player_ratings', 'rebuild_pool_standings']
+        queued = _enqueue_initial_jobs()
+        assert [job.run_key for job in queued] == [jobs.daily_key(kind) for kind in kinds]
+        assert _enqueue_initial_jobs() == []
+        scheduler = jobs.NightlyScheduler(nightly_app, hour=3)
+        assert not set(kinds) & {job.kind for job in scheduler.run_pending()}
+
+    @pytest.mark.parametrize('now, expected', [((2026, 1, 1, 2, 59), (2026, 1, 1, 3, 0)),
+                                               ((2026, 1, 1, 3, 0), (2026, 1, 2, 3, 0))])
+    def test_next_run(self, memory_app, now, expected):
+        assert jobs.NightlyScheduler(memory_app, hour=3).next_run(datetime(*now)) == datetime(*expected)
+
+
+class TestSimulationTask:
+    def test_simulate_pool_batch(self, memory_app, runner, make_pool):
+        from blueprints.championship import tasks  # noqa: F401  (enregistre les tâches)
+        from models import PoolSimulation
+
+        memory_app.config['SIMULATION_WORKERS'] = 1
+        pool = make_pool(['15/2', '30', '40'])
+        job = wait_for(jobs.enqueue('simulate_pool_batch', pool_id=pool.id, num_simulations=2500).id)
+        assert job.status == 'done', job.message
+        simulation = PoolSimulation.query.get(json.loads(job.result_args)['sim_id'])
+        assert simulation.pool_id == pool.id and simulation.num_simulations == 2500
@@ -0,0 +1,111 @@
+"""
+Tests de l'optimiseur de composition (blueprints/club/lineup.py).
+
+Couvre :
+  1. _best_ordered_assignment() – optimum identique à l'énumération exhaustive
+  2. _best_ordered_assignment() – 15 joueurs en bien moins d'une seconde
+  3. optimize_lineup()          – ordre des simples, points attendus, règle du joker
+  4. /club/optimize_lineup      – API JSON de la page équipe
+"""
+from __future__ import annotations
+
+import random
+import time
+from itertools import combinations, permutations
+
+import pytest
+
+from blueprints.club import lineup
+
+
+def _singles(players):
+    return [(key, elo, name, frozenset([name])) for name, (key, elo) in players.items()]
+
+
+def _doubles(players):
+    return [(players[a][0] + players[b][0], players[a][1] + players[b][1], (a, b), frozenset([a, b]))
+            for a, b in combinations(players, 2)]
+
+
+def _brute_force(candidates, opponent_elos):
+    best = 0.0
+    for choice in permutations(candidates, len(opponent_elos)):
+        if any(choice[i][0] > choice[i + 1][0] for i in range(len(choice) - 1)):
+            continue
+        if len(frozenset().union(*(c[3] for c in choice))) != sum(len(c[3]) for c in choice):
+            continue
+        best = max(best, sum(lineup._win_probability(c[1], e) for c, e in zip(choice, opponent_elos)))
+    return best
+
+
+class TestBestOrderedAssignment:
+    @pytest.mark.parametrize('seed', range(5))
+    def test_matches_brute_force(self, seed):
+        rng = random.Random(seed)
+        players = {f'J{i}': (rng.randint(30, 36), rng.uniform(1200, 1600)) for i in range(6)}
+        opponents = sorted((rng.uniform(1200, 1600) for _ in range(3)), reverse=True)
+        for candidates, opponent_elos in [(_singles(players), opponents),
+                                          (_doubles(players), [2 * e for e in opponents[:2]])]:
+            choice, probabilities = lineup._best_ordered_assignment(candidates, opponent_elos)
+            assert sum(probabilities) == pytest.approx(_brute_force(candidates, opponent_elos))
+            assert [c[0] for c in choice] == sorted(c[0] for c in choice)
+
+    def test_fifteen_players_under_a_second(self):
+        rng = random.Random(0)
+        players = {f'J{i}': (rng.randint(25, 40), rng.uniform(1100, 1700)) for i in range(15)}
+        start = time.perf_counter()
+        singles, _ = lineup._best_ordered_assignment(_singles(players), [1500, 1450, 1400, 1350])
+        doubles, _ = lineup._best_ordered_assignment(_doubles(players), [3000, 2900])
+        assert time.perf_counter() - start < 1.0
+        assert len(singles) == 4 and len(doubles) == 2
+
+    def test_missing_players_forfeit_last_positions(self):
+        choice, probabilities = lineup._best_ordered_assignment(_singles({'A': (30, 1400)}), [1400, 1400])
+        assert len(choice) == 1 and probabilities == [pytest.approx(0.5)]
+
+
+class TestOptimizeLineup:
+    def test_end_to_end(self, memory_app, make_pool):
+        from extensions import db
+        from models import Match, Matchday, Player, Ranking, TeamMatchdayJoker
+
+        pool = make_pool(['30', '30'], singles_count=2, doubles_count=1)
+        team, opponent = pool.teams
+        ranks = ['15/3', '15/4', '30', '30/1', '30/2', '30/3']
+        for player, value in zip(team.players, ranks):
+            player.license.rankingId = Ranking.query.filter_by(value=value).first().id
+        matchday = Matchday.query.get(Match.query.filter_by(poolId=pool.id).first().matchdayId)
+
+        # Joker mieux classé que le 2e joueur brûlé (15/4) : écarté
+        joker = Player.query.filter(Player.clubId == opponent.clubId).first()
+        db.session.add(TeamMatchdayJoker(team_id=team.id, matchday_id=matchday.id, player_id=joker.id))
+        joker.license.rankingId = Ranking.query.filter_by(value='15/1').first().id
+        db.session.commit()
+
+        result = lineup.optimize_lineup(team, matchday)
+        assert result.opponent.id == opponent.id
+        assert result.excluded_joker.id == joker.id
+        assert [p.license.rankingId for p in result.singles] == sorted(p.license.rankingId for p in result.singles)
+        assert result.singles[0].ranking.value == '15/3'
+        win, draw, loss = result.outcome_probabilities()
+        assert win + draw + loss == pytest.approx(1.0)
+        assert result.expected_points == pytest.approx(sum(result.singles_probabilities + result.doubles_probabilities))
+        data = result.to_dict()
+        assert len(data['singles']) == 2 and len(data['doubles']) == 1
+
+    def test_route(self, memory_app, make_pool):
+        from blueprints.club import club_management_bp
+        from models import Match
+
+        memory_app.register_blueprint(club_management_bp, url_prefix='/club')
+        pool = make_pool(['30', '40'], singles_count=2, doubles_count=1)
+        team = pool.teams[0]
+        matchday_id = Match.query.filter_by(poolId=pool.id).first().matchdayId
+        client = memory_app.test_client()
+        response = client.get(f'/club/optimize_lineup/{team.id}/{matchday_id}')
+        assert response.status_code == 200, response.get_data(as_text=True)
+        data = response.get_json()
+        assert len(data['singles']) == 2 and len(data['doubles']) == 1
+        other = make_pool(['30', '40'])
+        other_matchday = Match.query.filter_by(poolId=other.id).first().matchdayId
+        assert client.get(f'/club/optimize_lineup/{team.id}/{other_matchday}').status_code == 400
@@ -0,0 +1,101 @@
+"""
+Tests du modèle de Markov exact d'une partie (match_model.py).
+
+Couvre :
+  1. game_probability()      – solution fermée d'un jeu avec avantage
+  2. tie_break_outcomes()    – distribution complète des tie-breaks
+  3. set_score_probabilities() / set_outcomes() – distribution des scores de set
+  4. match_distribution()    – cohérence avec match_probability()
+  5. MatchSampler            – fréquences empiriques et format des scores
+"""
+from __future__ import annotations
+
+import random
+from collections import Counter
+
+import pytest
+
+import match_model
+
+
+class TestGameProbability:
+    def test_even_players(self):
+        assert match_model.game_probability(0.5) == pytest.approx(0.5)
+
+    def test_closed_form(self):
+        p, q = 0.6, 0.4
+        expected = p ** 4 * (1 + 4 * q + 10 * q ** 2) + 20 * p ** 3 * q ** 3 * p ** 2 / (p ** 2 + q ** 2)
+        assert match_model.game_probability(p) == pytest.approx(expected)
+
+    def test_forfeit_bounds(self):
+        assert match_model.game_probability(0.0) == 0.0
+        assert match_model.game_probability(1.0) == 1.0
+
+
+class TestTieBreak:
+    @pytest.mark.parametrize('p', [0.0, 0.3, 0.5, 0.62, 1.0])
+    @pytest.mark.parametrize('target', [7, 10])
+    def test_distribution_sums_to_one(self, p, target):
+        assert sum(prob for _, prob in match_model.tie_break_outcomes(p, target)) == pytest.approx(1.0)
+
+    def test_symmetry(self):
+        assert match_model.tie_break_probability(0.5) == pytest.approx(0.5)
+        assert match_model.tie_break_probability(0.4) == pytest.approx(1 - match_model.tie_break_probability(0.6))
+
+    def test_seven_love(self):
+        outcomes = dict(match_model.tie_break_outcomes(0.6, 7))
+        assert outcomes[(True, 0)] == pytest.approx(0.6 ** 7)
+
+
+class TestSet:
+    @pytest.mark.parametrize('p', [0.0, 0.35, 0.5, 0.55, 1.0])
+    def test_distribution_sums_to_one(self, p):
+        assert sum(match_model.set_score_probabilities(p)) == pytest.approx(1.0)
+        assert sum(prob for _, prob in match_model.set_outcomes(p)) == pytest.approx(1.0)
+
+    def test_six_love(self):
+        g = match_model.game_probability(0.55)
+        probabilities = dict(zip(match_model.SET_SCORES, match_model.set_score_probabilities(0.55)))
+        assert probabilities[(6, 0)] == pytest.approx(g ** 6)
+
+    def test_symmetry(self):
+        assert match_model.set_probability(0.5) == pytest.approx(0.5)
+
+
+class TestMatch:
+    @pytest.mark.parametrize('p', [0.3, 0.5, 0.52, 0.7])
+    def test_distribution_consistent(self, p):
+        distribution = match_model.match_distribution(p)
+        assert sum(distribution.values()) == pytest.approx(1.0)
+        home = sum(prob for (first, second, super_tb), prob in distribution.items()
+                   if super_tb == 'home' or (super_tb is None and first[0] > first[1]))
+        assert home == pytest.approx(match_model.match_probability(p))
+
+    def test_monotonic(self):
+        values = [match_model.match_probability(p / 20) for p in range(21)]
+        assert values == sorted(values)
+
+
+class TestMatchSampler:
+    def test_empirical_frequencies(self):
+        p, n = 0.52, 100000
+        sampler = match_model.MatchSampler(p)
+        rng = random.Random(11)
+        scores = [sampler.sample(rng) for _ in range(n)]
+        home_wins = sum(1 for score in scores if sum(h > v for h, v, _ in score) == 2)
+        assert home_wins / n == pytest.approx(match_model.match_probability(p), abs=0.01)
+        first_sets = Counter(score[0][:2] for score in scores)
+        for set_score, expected in zip(match_model.SET_SCORES, match_model.set_score_probabilities(p)):
+            assert first_sets[set_score] / n == pytest.approx(expected, abs=0.01)
+
+    def test_score_format(self):
+        sampler = match_model.MatchSampler(0.5)
+        rng = random.Random(5)
+        for _ in range(2000):
+            score = sampler.sample(rng)
+            for home, visitor, tie_break in score[:2]:
+                assert (tie_break is not None) == ((home, visitor) in ((7, 6), (6, 7)))
+            if len(score) == 3:
+                home, visitor, loser = score[2]
+                assert (home, visitor) in ((1, 0), (0, 1)) and loser >= 0
+                assert (score[0][0] > score[0][1]) != (score[1][0] > score[1][1])
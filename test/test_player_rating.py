@@ -0,0 +1,123 @@
+"""
+Tests de l'instantané des ELO (models.PlayerRating).
+
+Couvre :
+  1. PlayerRating.refresh()       – mêmes valeurs que les propriétés de Player
+  2. PlayerRating.refresh_club()  – tous les joueurs d'un club, mise à jour en place
+  3. get_players_for_simulation() – tri SQL sur l'ELO affiné de l'instantané, joueurs sans instantané en
+                                    dernier (comme simulation_lineups.prefetch_lineups)
+  4. filtre sort_players_by_elo   – instantanés de la liste lus en une requête
+(tâche nocturne 'refresh_player_ratings' : voir test_jobs.py)
+"""
+from __future__ import annotations
+
+
+def _refresh_pool(pool):
+    from extensions import db
+    from models import PlayerRating
+
+    for team in pool.teams:
+        PlayerRating.refresh_club(team.clubId)
+    db.session.commit()
+
+
+class TestPlayerRating:
+    def test_refresh_matches_properties(self, memory_app, make_pool):
+        from models import PlayerRating
+
+        pool = make_pool(['15/2', '30/1'])
+        _refresh_pool(pool)
+        for team in pool.teams:
+            for player in team.players:
+                rating = PlayerRating.query.get(player.id)
+                assert (rating.current_elo, rating.best_elo, rating.refined_elo) == player.elo_tuple
+                assert rating.club_id == team.clubId and rating.gender == player.gender
+                assert rating.age == player.age and rating.age_category_id == player.age_category.id
+                assert player.snapshot_elo == (player.current_elo, player.refined_elo)
+
+    def test_refresh_updates_in_place(self, memory_app, make_pool):
+        from extensions import db
+        from models import PlayerRating, Ranking
+
+        pool = make_pool(['30', '30'])
+        _refresh_pool(pool)
+        player = pool.teams[0].players[0]
+        player.license.rankingId = Ranking.query.filter_by(value='15').first().id
+        assert PlayerRating.refresh_club(player.clubId) == len(pool.teams[0].players)
+        db.session.commit()
+        assert PlayerRating.query.get(player.id).current_elo == player.current_elo
+        assert PlayerRating.query.filter_by(club_id=player.clubId).count() == len(pool.teams[0].players)
+
+    def test_simulation_order_uses_snapshot(self, memory_app, make_pool):
+        from extensions import db
+        from models import Matchday, PlayerRating
+
+        pool = make_pool(['30', '30'])
+        _refresh_pool(pool)
+        team = pool.teams[0]
+        # Instantané modifié : l'ordre suit la table, pas le calcul en Python
+        favourite = team.players[-1]
+        PlayerRating.query.get(favourite.id).refined_elo = 5000
+        db.session.commit()
+        matchday = Matchday.query.filter_by(championshipId=pool.championshipId).first()
+        singles, doubles = team.get_players_for_simulation(matchday, 2, 1)
+        assert singles[0].id == favourite.id and doubles[0].id == favourite.id
+
+    def test_players_without_snapshot_last(self, memory_app, make_pool):
+        from sqlalchemy import event
+
+        import simulation_lineups
+        from extensions import db
+        from models import Matchday, PlayerRating
+
+        pool = make_pool(['30', '30'])
+        _refresh_pool(pool)
+        team = pool.teams[0]
+        newcomer = team.players[0]
+        db.session.delete(PlayerRating.query.get(newcomer.id))
+        db.session.commit()
+        db.session.expire_all()
+        matchday = Matchday.query.filter_by(championshipId=pool.championshipId).first()
+
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)  # noqa: E731
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            singles, _ = team.get_players_for_simulation(matchday, 2, 1)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+        assert any('NULLS LAST' in statement for statement in statements)  # ordre identique sous PostgreSQL
+        assert singles[-1].id == newcomer.id
+        prefetched = simulation_lineups.prefetch_lineups([team.id], [matchday.id], 2, 1)[(team.id, matchday.id)]
+        assert [p.id for p in prefetched[0]] == [p.id for p in singles]
+
+    def test_sort_filter_single_query(self, memory_app, make_pool):
+        from sqlalchemy import event
+
+        from app import sort_players_by_elo
+        from extensions import db
+        from models import PlayerRating
+
+        pool = make_pool(['30', '30'])
+        _refresh_pool(pool)
+        team = pool.teams[0]
+        favourite, newcomer = team.players[-1], team.players[0]
+        PlayerRating.query.get(favourite.id).refined_elo = 5000
+        db.session.delete(PlayerRating.query.get(newcomer.id))
+        db.session.commit()
+        db.session.expire_all()
+        players = list(team.players)
+        expected = sorted(p.refined_elo for p in players if p.id != favourite.id)
+
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)  # noqa: E731
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            ordered = sort_players_by_elo(p for p in players if p.id != newcomer.id)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+        assert len(statements) == 1  # instantanés de toute la liste, sans chargement par joueur
+        assert ordered[0].id == favourite.id
+        ordered = sort_players_by_elo(players)  # joueur sans instantané : ELO recalculé
+        assert ordered[0].id == favourite.id
+        assert sorted(p.refined_elo for p in ordered[1:]) == expected
@@ -0,0 +1,126 @@
+"""
+Tests de la constitution des poules (pool_builder.py).
+
+Couvre :
+  1. build_pools()       – partition valide, optimum local (aucun échange améliorant)
+  2. géographie          – clubs regroupés par secteur, déplacements minimaux
+  3. équilibre           – écart de poids réduit face à une répartition au hasard
+  4. passage à l'échelle – 400 équipes en quelques secondes
+  5. distance_matrix()   – table Distance, coordonnées, valeur par défaut
+  6. create_pools_and_assign_teams() – poules créées, indicateurs retournés
+"""
+from __future__ import annotations
+
+import random
+import time
+
+import pytest
+
+import pool_builder
+
+
+def _points(rng, n, centers=((43.7, 7.2),), spread=0.05):
+    return [(lat + rng.uniform(-spread, spread), lng + rng.uniform(-spread, spread))
+            for lat, lng in (centers[i % len(centers)] for i in range(n))]
+
+
+def _distances(points):
+    return [[pool_builder._haversine(*a, *b) for b in points] for a in points]
+
+
+def _cost(assignment, weights, distances, num_pools, pool_size):
+    cost = pool_builder.PoolCost(weights, distances, num_pools, pool_size)
+    return (cost.travel_term(assignment.travel)
+            + cost.balance * sum((w - cost.target) ** 2 for w in assignment.pool_weights) / cost.balance_scale)
+
+
+class TestBuildPools:
+    @pytest.mark.parametrize('seed', range(3))
+    def test_valid_local_optimum(self, seed):
+        rng = random.Random(seed)
+        points = _points(rng, 24, centers=((43.7, 7.2), (43.3, 5.4), (43.1, 5.9)), spread=0.3)
+        weights = [rng.uniform(100, 400) for _ in points]
+        distances = _distances(points)
+        result = pool_builder.build_pools(weights, distances, 4, 6, time_limit=None)
+        assert sorted(t for members in result.pools for t in members) == list(range(24))
+        assert all(len(members) == 6 for members in result.pools)
+        assert result.travel <= result.initial_travel + 1e-6
+
+        best = _cost(result, weights, distances, 4, 6)
+        for p, q in [(p, q) for p in range(4) for q in range(p + 1, 4)]:
+            for i in result.pools[p]:
+                for j in result.pools[q]:
+                    pools = [list(members) for members in result.pools]
+                    pools[p][pools[p].index(i)], pools[q][pools[q].index(j)] = j, i
+                    swapped = pool_builder.PoolAssignment(
+                        pools=pools, travel=pool_builder._travel(pools, distances), initial_travel=0,
+                        weight_spread=0, initial_weight_spread=0,
+                        pool_weights=[sum(weights[t] for t in members) for members in pools])
+                    assert _cost(swapped, weights, distances, 4, 6) >= best - 1e-9
+
+    def test_geographic_clusters(self):
+        rng = random.Random(1)
+        centers = ((43.7, 7.2), (45.7, 4.8), (48.8, 2.3), (43.6, 1.4))
+        points = _points(rng, 24, centers=centers, spread=0.02)
+        result = pool_builder.build_pools([200.0] * 24, _distances(points), 4, 6)
+        assert sorted(sorted(i % 4 for i in members) for members in result.pools) == \
+            [[k] * 6 for k in range(4)]
+
+    def test_balanced_strength(self):
+        rng = random.Random(2)
+        points = _points(rng, 32, spread=0.01)
+        weights = [rng.uniform(0, 1000) for _ in points]
+        result = pool_builder.build_pools(weights, _distances(points), 4, 8)
+        shuffled = list(range(32))
+        rng.shuffle(shuffled)
+        random_sums = [sum(weights[t] for t in shuffled[k:k + 8]) for k in range(0, 32, 8)]
+        assert result.weight_spread < (max(random_sums) - min(random_sums)) / 5
+
+    def test_hundreds_of_teams(self):
+        rng = random.Random(3)
+        points = _points(rng, 400, centers=((43.7, 7.2), (43.3, 5.4), (44.9, 6.6)), spread=0.5)
+        weights = [rng.uniform(100, 400) for _ in points]
+        distances = _distances(points)
+        start = time.perf_counter()
+        result = pool_builder.build_pools(weights, distances, 50, 8, time_limit=5.0)
+        assert time.perf_counter() - start < 8.0
+        assert result.travel < result.initial_travel
+        assert 'poule(s)' in result.summary()
+
+    def test_size_mismatch(self):
+        with pytest.raises(ValueError):
+            pool_builder.build_pools([1.0] * 5, [[0.0] * 5] * 5, 2, 2)
+
+
+class TestDistanceMatrix:
+    def test_sources(self, memory_app):
+        from extensions import db
+        from models import Club, Distance
+
+        db.session.add_all([Club(id='DM000001', name='DM 1', city='Nice', latitude=43.70, longitude=7.27),
+                            Club(id='DM000002', name='DM 2', city='Cannes', latitude=43.55, longitude=7.01),
+                            Club(id='DM000003', name='DM 3', city='Inconnue')])
+        db.session.add(Distance(from_club_id='DM000002', to_club_id='DM000001', distance=33000.0, duration=1800.0))
+        db.session.commit()
+
+        matrix = pool_builder.distance_matrix(['DM000001', 'DM000002', 'DM000003', 'DM000001'])
+        assert matrix[0][1] == matrix[1][0] == 33000.0  # itinéraire connu, sens inverse
+        assert matrix[0][2] == matrix[1][2] == 33000.0  # sans coordonnées : distance moyenne
+        assert matrix[0][3] == 0.0  # même club
+        assert pool_builder._haversine(43.70, 7.27, 43.55, 7.01) == pytest.approx(26_500, rel=0.05)
+
+
+class TestCreatePools:
+    def test_end_to_end(self, memory_app, make_pool):
+        from common import create_pools_and_assign_teams, form_teams
+        from extensions import db
+        from models import Pool
+
+        championship = make_pool(['30', '30/1', '30/2', '15/4']).championship
+        teams = form_teams(championship)
+        per_pool, exempted, assignment = create_pools_and_assign_teams(memory_app, db, championship, teams)
+        assert per_pool == 4 and exempted == []
+        pools = Pool.query.filter_by(championshipId=championship.id).filter(Pool.letter == 'A').all()
+        new_pool = max(pools, key=lambda pool: pool.id)
+        assert sorted(team.clubId for team in new_pool.teams) == sorted(team.clubId for team in teams)
+        assert assignment.pools == [[0, 1, 2, 3]]
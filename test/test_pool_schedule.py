@@ -0,0 +1,161 @@
+"""
+Tests du calendrier des poules par la méthode du cercle (pool_schedule.py).
+
+Couvre :
+  1. schedule_round_robin()  – chaque paire une fois, une rencontre par équipe et par journée, exempts
+  2. domicile / extérieur    – équilibre à une réception près, avec ou sans contraintes
+  3. contraintes de réception – respectées, conflits impossibles signalés sans bloquer
+  4. schedule_matches()      – rencontres créées en base, ClubHostingBlackout respecté ; journées sans
+                               réception saisies sur la page du club (/club/hosting_blackouts)
+  5. écriture groupée        – un INSERT par table, disponibilités idempotentes
+"""
+from __future__ import annotations
+
+import random
+import time
+
+import pytest
+from sqlalchemy import event
+
+import pool_schedule
+
+
+def _check_valid(schedule, num_teams):
+    pairs = schedule.pairs()
+    assert len(pairs) == num_teams * (num_teams - 1) // 2
+    assert len({frozenset(pair) for pair in pairs}) == len(pairs)
+    for pairs_of_day, bye in zip(schedule.days, schedule.byes):
+        teams = [team for pair in pairs_of_day for team in pair]
+        assert len(teams) == len(set(teams))
+        assert (bye is None) == (num_teams % 2 == 0)
+        assert bye not in teams
+
+
+class TestScheduleRoundRobin:
+    @pytest.mark.parametrize('num_teams', range(2, 17))
+    def test_valid_and_balanced(self, num_teams):
+        schedule = pool_schedule.schedule_round_robin(num_teams)
+        _check_valid(schedule, num_teams)
+        assert len(schedule.days) == num_teams - 1 + num_teams % 2
+        homes = schedule.home_counts()
+        assert max(homes) - min(homes) <= 1
+
+    @pytest.mark.parametrize('seed', range(5))
+    def test_hosting_bans_respected(self, seed):
+        rng = random.Random(seed)
+        num_teams = rng.choice([6, 7, 8, 9])
+        num_days = num_teams - 1 + num_teams % 2
+        banned = {(rng.randrange(num_teams), rng.randrange(num_days)) for _ in range(num_teams)}
+        schedule = pool_schedule.schedule_round_robin(num_teams, banned=banned)
+        _check_valid(schedule, num_teams)
+        assert not schedule.conflicts
+        assert not [(home, day) for day, pairs in enumerate(schedule.days) for home, _ in pairs
+                    if (home, day) in banned]
+        homes = schedule.home_counts()
+        assert max(homes) - min(homes) <= 2
+
+    def test_impossible_ban_is_reported(self):
+        # Toutes les équipes interdites de réception la 1re journée
+        schedule = pool_schedule.schedule_round_robin(4, banned=[(team, 0) for team in range(4)])
+        _check_valid(schedule, 4)
+        assert len(schedule.conflicts) == 2 and {day for day, _, _ in schedule.conflicts} == {0}
+
+    def test_large_pool_in_milliseconds(self):
+        rng = random.Random(0)
+        banned = [(rng.randrange(60), rng.randrange(59)) for _ in range(120)]
+        start = time.perf_counter()
+        schedule = pool_schedule.schedule_round_robin(60, banned=banned)
+        assert time.perf_counter() - start < 0.5
+        _check_valid(schedule, 60)
+
+
+class TestScheduleMatches:
+    def test_creates_matches_with_blackouts(self, memory_app, make_pool):
+        from common import schedule_matches
+        from extensions import db
+        from models import ClubHostingBlackout, Match, Matchday
+
+        pool = make_pool(['30', '30/1', '30/2', '30/3', '40'])
+        Match.query.filter_by(poolId=pool.id).delete()
+        matchdays = Matchday.query.filter_by(championshipId=pool.championshipId).order_by(Matchday.date).all()
+        host = pool.teams[0]
+        db.session.add_all([ClubHostingBlackout(club_id=host.clubId, matchday_id=matchday.id)
+                            for matchday in matchdays[:3]])
+        db.session.commit()
+
+        schedule_matches(memory_app, db, pool)
+        matches = Match.query.filter_by(poolId=pool.id).all()
+        assert len(matches) == 10
+        assert len({frozenset((m.homeTeamId, m.visitorTeamId)) for m in matches}) == 10
+        blocked = {matchday.id for matchday in matchdays[:3]}
+        assert not [m for m in matches if m.homeTeamId == host.id and m.matchdayId in blocked]
+        for matchday in matchdays:
+            teams = [t for m in matches if m.matchdayId == matchday.id for t in (m.homeTeamId, m.visitorTeamId)]
+            assert len(teams) == len(set(teams)) == 4
+
+    def test_blackouts_managed_from_club_page(self, memory_app, make_pool):
+        from blueprints.club import club_management_bp
+        from common import schedule_matches
+        from extensions import db
+        from models import ClubHostingBlackout, Match, Matchday
+
+        memory_app.register_blueprint(club_management_bp, url_prefix='/club')
+        memory_app.secret_key = 'test'  # messages flash
+        pool = make_pool(['30', '30/1', '30/2', '30/3'])
+        matchdays = Matchday.query.filter_by(championshipId=pool.championshipId).order_by(Matchday.date).all()
+        host = pool.teams[0]
+        other_matchday = Matchday.query.filter_by(championshipId=make_pool(['30', '40']).championshipId).first()
+        client = memory_app.test_client()
+        url = f'/club/hosting_blackouts/{host.clubId}'
+
+        response = client.post(url, data={'matchday_id': matchdays[0].id, 'reason': 'Courts en travaux'})
+        assert response.status_code == 302
+        client.post(url, data={'matchday_id': matchdays[0].id})  # déjà enregistrée
+        client.post(url, data={'matchday_id': other_matchday.id})  # championnat sans équipe du club
+        blackout = ClubHostingBlackout.query.filter_by(club_id=host.clubId).one()
+        assert (blackout.matchday_id, blackout.reason) == (matchdays[0].id, 'Courts en travaux')
+
+        # Calendrier généré ensuite : le club ne reçoit pas ce jour-là
+        Match.query.filter_by(poolId=pool.id).delete()
+        db.session.commit()
+        schedule_matches(memory_app, db, pool)
+        assert Match.query.filter_by(poolId=pool.id).count() == 6
+        assert Match.query.filter_by(matchdayId=matchdays[0].id, homeTeamId=host.id).count() == 0
+
+        assert client.post(f'/club/hosting_blackouts/delete/{blackout.id}').status_code == 302
+        assert ClubHostingBlackout.query.filter_by(club_id=host.clubId).count() == 0
+
+    def test_bulk_insert_and_availabilities(self, memory_app, make_pool):
+        from common import schedule_matches
+        from extensions import db
+        from models import Match, Matchday, PlayerMatchdayAvailability
+
+        pool = make_pool(['30', '30/1', '30/2', '30/3', '40', '40'])
+        Match.query.filter_by(poolId=pool.id).delete()
+        player = pool.teams[0].players[0]
+        matchday = Matchday.query.filter_by(championshipId=pool.championshipId).first()
+        db.session.add(PlayerMatchdayAvailability(player_id=player.id, matchday_id=matchday.id, is_available=False))
+        db.session.commit()
+
+        statements = []
+
+        def count(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', count)
+        try:
+            schedule_matches(memory_app, db, pool)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', count)
+        assert len([s for s in statements if s.lstrip().upper().startswith('INSERT')]) == 2
+        assert Match.query.filter_by(poolId=pool.id).count() == 15
+
+        num_players = sum(len(team.players) for team in pool.teams)
+        matchday_ids = [m.id for m in Matchday.query.filter_by(championshipId=pool.championshipId)]
+        availabilities = PlayerMatchdayAvailability.query.filter(
+            PlayerMatchdayAvailability.matchday_id.in_(matchday_ids))
+        assert availabilities.count() == num_players * len(matchday_ids)
+        # Disponibilité existante conservée, second appel sans doublon
+        assert db.session.get(PlayerMatchdayAvailability, (player.id, matchday.id)).is_available is False
+        pool.teams[0].initialize_player_availability()
+        assert availabilities.count() == num_players * len(matchday_ids)
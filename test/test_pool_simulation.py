@@ -0,0 +1,216 @@
+"""
+Tests du moteur de simulation Monte Carlo vectorisé (blueprints/championship/simulation.py).
+
+Couvre :
+  1. _play_sets()         – tirage vectorisé des sets dans la distribution exacte
+  2. rank_teams()         – même clé de tri que calculer_classement (ordre stable)
+  3. simulate_block()     – cohérence des agrégats d'une saison simulée
+  4. simulate_pool_batch() – bout en bout sur une poule en mémoire, sans écriture de rubbers
+  5. run_simulations()     – mode parallèle (ProcessPoolExecutor) identique au mode séquentiel
+  6. keep_played           – reste de la saison : rencontres jouées figées, probabilités de qualification
+"""
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from blueprints.championship import simulation as engine
+
+
+class TestPlaySets:
+    def test_matches_exact_distribution(self):
+        from match_model import SET_SCORES, set_score_probabilities
+
+        model = engine.PoolModel(team_ids=[1, 2], team_names=list('AB'), match_ids=[10],
+                                 match_home=[0], match_visitor=[1], rubber_match=[0, 0],
+                                 rubber_p=[0.5, 0.56], num_matches=2)
+        home, visitor = engine._play_sets(np.random.default_rng(3), model.set_threshold, model.set_alias, 200000)
+        for r, p in enumerate((0.5, 0.56)):
+            for (h, v), expected in zip(SET_SCORES, set_score_probabilities(p)):
+                observed = ((home[:, r] == h) & (visitor[:, r] == v)).mean()
+                assert observed == pytest.approx(expected, abs=0.005)
+
+
+class TestRankTeams:
+    def test_same_order_as_python_sort(self):
+        rng = np.random.default_rng(0)
+        for _ in range(50):
+            keys = [rng.integers(0, 3, size=(1, 5)) for _ in range(4)]
+            ranks = engine.rank_teams(*keys)[0]
+            rows = {t: tuple(int(k[0, t]) for k in keys) for t in range(5)}
+            expected = [t for t, _ in sorted(rows.items(), key=lambda x: x[1], reverse=True)]
+            assert [int(t) for t in np.argsort(ranks)] == expected
+
+
+class TestSimulateBlock:
+    def test_zero_sum_differences(self):
+        model = engine.PoolModel(team_ids=[1, 2, 3, 4], team_names=list('ABCD'),
+                                 match_ids=[10, 11], match_home=[0, 2], match_visitor=[1, 3],
+                                 rubber_match=[0, 0, 0, 1, 1, 1], rubber_p=[0.5, 0.6, 0.4, 0.55, 0.5, 0.45],
+                                 num_matches=3)
+        block = engine.simulate_block(model, 500, np.random.default_rng(1))
+        for key in ('diff_matchs', 'diff_sets', 'diff_games'):
+            assert (block[key].sum(axis=1) == 0).all()
+        # 1 rencontre par équipe : 3 (victoire) + 1 (défaite) par rencontre
+        assert (block['points'].sum(axis=1) == 8).all()
+        assert sorted(block['ranks'][0].tolist()) == [0, 1, 2, 3]
+
+    def test_forfeit_rubbers(self):
+        model = engine.PoolModel(team_ids=[1, 2], team_names=list('AB'), match_ids=[10],
+                                 match_home=[0], match_visitor=[1], rubber_match=[0, 0],
+                                 rubber_p=[0.0, 0.0], num_matches=2)
+        block = engine.simulate_block(model, 10, np.random.default_rng(2))
+        assert (block['diff_matchs'][:, 1] == 2).all()
+        assert (block['diff_sets'][:, 1] == 4).all()
+        assert (block['diff_games'][:, 1] == 24).all()
+
+
+class TestSimulatePoolBatch:
+    def test_end_to_end(self, memory_app, make_pool):
+        from models import Score, Single, TeamSimulationResult
+
+        pool = make_pool(['15', '30', '30/4', '40'])
+        simulation = engine.simulate_pool_batch(pool, 3000, seed=42)
+
+        assert simulation.num_simulations == 3000
+        results = TeamSimulationResult.query.filter_by(simulation_id=simulation.id).all()
+        assert len(results) == 4
+        by_team = {r.team.name: r for r in results}
+        assert by_team['Equipe 1'].avg_ranking < by_team['Equipe 4'].avg_ranking
+        assert by_team['Equipe 1'].best_ranking == 1
+        # Aucun rubber n'est écrit en base pendant la simulation batch
+        assert Single.query.count() == 0 and Score.query.count() == 0
+
+    def test_reproducible_with_seed(self, memory_app, make_pool):
+        pool = make_pool(['15/2', '15/3', '15/4'])
+        model = engine.load_pool_model(pool)
+        first = engine.run_simulations(model, 1500, seed=7)
+        second = engine.run_simulations(model, 1500, seed=7)
+        assert np.array_equal(first.rank_histogram, second.rank_histogram)
+        assert first.rank_histogram.sum() == 1500 * 3
+
+
+class TestParallelSimulation:
+    def test_merge_matches_single_run(self, memory_app, make_pool):
+        pool = make_pool(['15/1', '30', '30/2', '30/5'])
+        model = engine.load_pool_model(pool)
+        n = 2 * engine.CHUNK_SIZE + 500
+        serial = engine.run_simulations(model, n, seed=123)
+        parallel = engine.run_simulations(model, n, seed=123, workers=2)
+        assert serial.count == parallel.count == n
+        assert np.array_equal(serial.rank_histogram, parallel.rank_histogram)
+        assert np.array_equal(serial.best_rank, parallel.best_rank)
+        assert serial.points_sum == pytest.approx(parallel.points_sum)
+
+    def test_championship_batch(self, memory_app, make_pool):
+        from models import PoolSimulation
+
+        pool = make_pool(['15', '30/1', '40'])
+        simulations = engine.simulate_championship_batch(pool.championship, 1200, seed=5, workers=2)
+        assert [s.pool_id for s in simulations] == [pool.id]
+        assert PoolSimulation.query.get(simulations[0].id).num_simulations == 1200
+
+
+class TestRestOfSeason:
+    @staticmethod
+    def _play(pool, matches, scores):
+        """Renseigne un score réel (simple 6/3 6/4 pour chaque rubber gagné) sur les rencontres données."""
+        from extensions import db
+        from models import Score, Single
+
+        for match, (home_score, visitor_score) in zip(matches, scores):
+            match.homeScore, match.visitorScore = home_score, visitor_score
+            for won in [True] * home_score + [False] * visitor_score:
+                score = Score(firstSetP1=6 if won else 3, firstSetP2=3 if won else 6,
+                              secondSetP1=6 if won else 4, secondSetP2=4 if won else 6)
+                db.session.add(score)
+                db.session.flush()
+                db.session.add(Single(scoreId=score.id, matchId=match.id))
+        db.session.commit()
+
+    def test_all_played_matches_calculer_classement(self, memory_app, make_pool):
+        from common import calculer_classement
+        from models import Match
+
+        pool = make_pool(['30', '30', '30', '30'])
+        matches = Match.query.filter_by(poolId=pool.id).order_by(Match.id).all()
+        self._play(pool, matches, [(3, 0), (1, 2), (2, 1), (0, 3), (2, 1), (1, 2)])
+
+        model = engine.load_pool_model(pool, keep_played=True)
+        assert model.fixed_matches == len(matches) and len(model.rubber_p) == 0
+        block = engine.simulate_block(model, 3, np.random.default_rng(0))
+        classement = calculer_classement(pool)
+        for team_id, row in classement:
+            t = model.team_ids.index(team_id)
+            assert block['points'][0, t] == row['points']
+            assert block['diff_matchs'][0, t] == row['diff_matchs_sort']
+            assert block['diff_sets'][0, t] == row['diff_sets_sort']
+            assert block['diff_games'][0, t] == row['diff_games_sort']
+        expected_order = [model.team_ids.index(team_id) for team_id, _ in classement]
+        assert [int(t) for t in np.argsort(block['ranks'][0])] == expected_order
+
+    def test_only_remaining_fixtures_are_sampled(self, memory_app, make_pool):
+        from models import Match, Single, TeamSimulationResult
+
+        pool = make_pool(['30', '30/1', '30/2', '30/3'])
+        matches = Match.query.filter_by(poolId=pool.id).order_by(Match.id).all()
+        self._play(pool, matches[:2], [(3, 0), (0, 3)])
+        singles_before = Single.query.count()
+
+        model = engine.load_pool_model(pool, keep_played=True)
+        assert model.fixed_matches == 2
+        assert len(model.rubber_p) == (len(matches) - 2) * model.num_matches
+
+        simulation = engine.simulate_pool_batch(pool, 2000, seed=3, keep_played=True,
+                                                qualified_count=1, relegated_count=2)
+        assert simulation.fixed_matches == 2
+        results = TeamSimulationResult.query.filter_by(simulation_id=simulation.id).all()
+        assert sum(r.qualification_probability for r in results) == pytest.approx(1.0)
+        assert sum(r.relegation_probability for r in results) == pytest.approx(2.0)
+        # Les résultats réels ne sont ni effacés ni réécrits
+        assert Single.query.count() == singles_before
+
+
+class TestAdaptivePrecision:
+    def test_is_converged(self):
+        summary = engine.SimulationSummary(3)
+        assert not summary.is_converged(rank_precision=0.1)
+        histogram = np.array([[900, 100, 0], [100, 800, 100], [0, 100, 900]])
+        summary.count, summary.rank_histogram = 1000, histogram
+        summary.rank_sum = histogram @ np.arange(3)
+        # σ(rang) ≈ 0,3 à 0,45 : demi-largeur ≈ 0,02 à 0,03 pour 1000 saisons
+        assert summary.is_converged(rank_precision=0.05)
+        assert not summary.is_converged(rank_precision=0.01)
+        # p = 0,9 : demi-largeur ≈ 1,9 point
+        assert summary.is_converged(probability_precision=0.02)
+        assert not summary.is_converged(probability_precision=0.01)
+        assert summary.is_converged()
+
+    def test_stops_before_cap_on_decided_pool(self, memory_app, make_pool):
+        from models import TeamSimulationResult
+
+        pool = make_pool(['15', '40', 'NC'])
+        simulation = engine.simulate_pool_batch(pool, 100_000, seed=5, probability_precision=0.01)
+        assert simulation.converged and simulation.num_simulations < 100_000
+        assert simulation.probability_precision == 0.01 and simulation.rank_precision is None
+        results = TeamSimulationResult.query.filter_by(simulation_id=simulation.id).all()
+        assert all(r.qualification_error <= 0.01 and r.relegation_error <= 0.01 for r in results)
+        assert all(r.avg_ranking_error is not None for r in results)
+
+    def test_cap_reached(self, memory_app, make_pool):
+        pool = make_pool(['30', '30', '30', '30'])
+        simulation = engine.simulate_pool_batch(pool, 2000, seed=5, rank_precision=0.001)
+        assert simulation.num_simulations == 2000 and simulation.converged is False
+
+    def test_fixed_run_has_no_target(self, memory_app, make_pool):
+        pool = make_pool(['30', '30/1', '30/2'])
+        simulation = engine.simulate_pool_batch(pool, 1500, seed=5)
+        assert simulation.num_simulations == 1500 and simulation.converged is None
+
+    def test_parallel_matches_serial(self, memory_app, make_pool):
+        pool = make_pool(['15/2', '30', '30/1', '40'])
+        model = engine.load_pool_model(pool)
+        serial = engine.run_simulations(model, 50_000, seed=11, rank_precision=0.03)
+        parallel = engine.run_simulations(model, 50_000, seed=11, workers=2, rank_precision=0.03)
+        assert serial.count == parallel.count < 50_000
+        assert np.array_equal(serial.rank_histogram, parallel.rank_histogram)
@@ -0,0 +1,105 @@
+"""
+Tests de l'instrumentation des requêtes (profiling.py).
+
+Couvre :
+  1. requêtes SQL      – nombre, durée, requêtes répétées (N+1) par point d'entrée
+  2. rendu             – durée de rendu des gabarits
+  3. tampon circulaire – borné à PROFILING_BUFFER_SIZE
+  4. cProfile          – profil écrit pour une requête plus lente que le seuil
+  5. /admin/perf       – points d'entrée les plus coûteux (JSON)
+  6. init_app()        – désactivé sauf PROFILING_ENABLED ou mode debug
+"""
+from __future__ import annotations
+
+import os
+
+import pytest
+from flask import render_template_string
+
+import profiling
+
+
+@pytest.fixture(scope='module')
+def profiled_app(memory_app):
+    from blueprints.admin import admin_bp
+    from extensions import db
+    from models import License
+
+    memory_app.config.update(PROFILING_ENABLED=True, PROFILING_BUFFER_SIZE=5, PROFILING_SLOW_REQUEST=10.0)
+
+    @memory_app.route('/n_plus_one')
+    def n_plus_one():
+        ids = [license_id for (license_id,) in db.session.query(License.id).limit(4)]
+        for license_id in ids:
+            db.session.query(License.lastName).filter(License.id == license_id).all()
+        return 'ok'
+
+    @memory_app.route('/rendered')
+    def rendered():
+        return render_template_string('{% for i in range(1000) %}{{ i }}{% endfor %}')
+
+    memory_app.register_blueprint(admin_bp, url_prefix='/admin')
+    profiler = profiling.init_app(memory_app)
+    return memory_app, profiler
+
+
+@pytest.fixture
+def client(profiled_app):
+    app, profiler = profiled_app
+    profiler.clear()
+    return app.test_client(), profiler
+
+
+class TestRequestProfiler:
+    def test_sql_and_duplicates(self, client, make_pool):
+        make_pool(['30', '40'])
+        test_client, profiler = client
+        assert test_client.get('/n_plus_one').status_code == 200
+        profile, = profiler.profiles()
+        assert profile.endpoint == 'n_plus_one' and profile.status == 200
+        assert profile.query_count == 5 and profile.sql_time > 0
+        assert profile.duplicated_queries == 3
+        assert profile.duplicates[0][0] == 4 and 'license' in profile.duplicates[0][1].lower()
+
+    def test_template_time(self, client):
+        test_client, profiler = client
+        test_client.get('/rendered')
+        profile, = profiler.profiles()
+        assert profile.query_count == 0 and 0 < profile.template_time <= profile.duration
+
+    def test_ring_buffer_is_bounded(self, client):
+        test_client, profiler = client
+        for _ in range(8):
+            test_client.get('/rendered')
+        assert len(profiler.profiles()) == 5
+
+    def test_cprofile_dump_for_slow_requests(self, client, tmp_path, monkeypatch):
+        test_client, profiler = client
+        monkeypatch.setattr(profiler, 'cprofile_dir', str(tmp_path))
+        monkeypatch.setattr(profiler, 'slow_threshold', 0.0)
+        test_client.get('/rendered')
+        profile, = profiler.profiles()
+        assert profile.profile_path and os.path.dirname(profile.profile_path) == str(tmp_path)
+        assert os.path.getsize(profile.profile_path) > 0
+
+    def test_perf_page(self, client):
+        test_client, profiler = client
+        test_client.get('/n_plus_one')
+        test_client.get('/rendered')
+        test_client.get('/rendered')
+        data = test_client.get('/admin/perf?format=json&sort=queries').get_json()
+        assert data['enabled']
+        assert [stats['endpoint'] for stats in data['endpoints']] == ['n_plus_one', 'rendered']
+        assert data['endpoints'][1]['requests'] == 2
+        assert data['endpoints'][0]['worst']['duplicates'][0]['count'] == 4
+        # La page /admin/perf est elle-même profilée
+        assert profiler.profiles()[-1].endpoint == 'admin.perf'
+
+
+@pytest.mark.parametrize('enabled, debug', [(None, False), (False, True)])
+def test_disabled(enabled, debug):
+    from flask import Flask
+
+    app = Flask(__name__)
+    app.config.update(PROFILING_ENABLED=enabled, DEBUG=debug)
+    assert profiling.init_app(app) is None and 'profiling' not in app.extensions
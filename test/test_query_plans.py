@@ -0,0 +1,207 @@
+"""
+Plans d'exécution des requêtes critiques (index composites des modèles).
+
+Chaque chemin critique est exécuté tel quel sur une base peuplée : ses
+requêtes SQL sont capturées puis passées à EXPLAIN QUERY PLAN.  Le test
+échoue si l'une d'elles lit une table entière (« SCAN table ») au lieu de
+passer par un index — une requête modifiée ou un index supprimé est signalé.
+Un nouveau chemin critique s'ajoute à CRITICAL_PATHS.
+
+Couvre aussi la migration : une base créée sans les index les reçoit au démarrage.
+"""
+from __future__ import annotations
+
+import re
+from datetime import date
+
+import pytest
+from sqlalchemy import event, inspect, text
+
+from extensions import db
+
+# Tables de référence (classements, catégories, clubs utilisateurs) de quelques dizaines de lignes
+SMALL_TABLES = {'ranking', 'best_ranking', 'age_category', 'club'}
+_SCAN = re.compile(r'SCAN (\w+)')
+
+
+def _scanned_tables(statement: str, parameters) -> list:
+    """Tables lues entièrement par la requête (alias SQLAlchemy table_1 ramenés à la table)."""
+    plan = db.session.connection().exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters).all()
+    tables = []
+    for *_, detail in plan:
+        match = _SCAN.fullmatch(detail)
+        if match is None:
+            continue  # SEARCH …, SCAN … USING [COVERING] INDEX, B-TREE temporaire…
+        name = re.sub(r'_\d+$', '', match.group(1))
+        if not name.startswith('anon') and name not in SMALL_TABLES:
+            tables.append(name)
+    return tables
+
+
+@pytest.fixture(scope='module')
+def seeded(memory_app, make_pool):
+    """Deux poules, des disponibilités, un tournoi avec inscriptions et tableau, des raquettes."""
+    from blueprints.shop.models import Racquet
+    from models import (PlayerMatchdayAvailability, PlayerRating, Tournament, TournamentCategory, TournamentDraw,
+                        TournamentMatch, TournamentRegistration)
+
+    make_pool(['30/1', '30', '15/5', '40'])
+    pool = make_pool(['15/4', '30/2', '30/5', '15'])
+    team = pool.teams[0]
+    for match in pool.matches:
+        match.homeScore, match.visitorScore = 2, 1
+    PlayerMatchdayAvailability.ensure([p.id for p in team.players], [m.matchdayId for m in pool.matches])
+    tournament = Tournament(name='Open', club_id=team.clubId, start_date=date(2025, 6, 1), end_date=date(2025, 6, 15))
+    category = TournamentCategory(tournament=tournament)
+    draw = TournamentDraw(category=category)
+    players = team.players
+    db.session.add_all([tournament, category, draw])
+    db.session.flush()
+    db.session.add_all(TournamentRegistration(tournament_id=tournament.id, category=category, player_id=p.id) for p in players)
+    db.session.add_all(TournamentMatch(draw=draw, round_number=1, position=i + 1,
+                                       player1_id=players[2 * i].id, player2_id=players[2 * i + 1].id)
+                       for i in range(len(players) // 2))
+    db.session.add_all(Racquet(name=f'Modèle {i}', brand=('Babolat', 'Head', 'Wilson')[i % 3], head_size=95 + i % 10,
+                               strung_weight=290 + i % 30, swingweight=310 + i % 20, release_year=2015 + i % 10)
+                       for i in range(60))
+    PlayerRating.refresh_club(team.clubId)
+    db.session.commit()
+    return {'pool': pool, 'team': team, 'matchday': pool.matches[0].matchday, 'tournament': tournament,
+            'category': category, 'draw': draw, 'player': players[0], 'racquet': Racquet.query.first()}
+
+
+def _standings(s):
+    import standings
+    standings.pool_standings(s['pool'])
+
+
+def _pool_matches(s):
+    from models import Match
+    Match.query.filter(Match.poolId == s['pool'].id).order_by(Match.id).all()
+
+
+def _team_matches(s):
+    s['team'].matches_won
+
+
+def _opponent_match(s):
+    from blueprints.club.lineup import _opponent_match
+    _opponent_match(s['team'], s['matchday'])
+
+
+def _team_players(s):
+    db.session.expire(s['team'], ['players'])
+    s['team'].players
+
+
+def _available_players(s):
+    s['team'].get_available_players(s['matchday'])
+
+
+def _simulation_players(s):
+    s['team'].get_players_for_simulation(s['matchday'], 2, 1)
+
+
+def _prefetch_lineups(s):
+    import simulation_lineups
+    simulation_lineups.prefetch_lineups([t.id for t in s['pool'].teams], [s['matchday'].id], 2, 1)
+
+
+def _club_roster(s):
+    import roster
+    roster.eligible_players(0, club_ids=[s['team'].clubId])
+
+
+def _ranked_licenses(s):
+    import roster
+    roster.eligible_players(0, top_n=4)
+
+
+def _club_members(s):
+    import tenup_sync
+    tenup_sync._club_members(s['team'].clubId, 0)
+
+
+def _refresh_club(s):
+    from models import PlayerRating
+    PlayerRating.refresh_club(s['team'].clubId, 0)
+
+
+def _registration(s):
+    from models import TournamentRegistration
+    TournamentRegistration.query.filter_by(category_id=s['category'].id, player_id=s['player'].id).first()
+
+
+def _tournament_pages(s):
+    db.session.expire(s['tournament'], ['categories'])
+    db.session.expire(s['category'], ['registrations', 'draws'])
+    for category in s['tournament'].categories:
+        category.registrations, category.draws
+
+
+def _draw_matches(s):
+    from models import TournamentMatch
+    TournamentMatch.query.filter_by(draw_id=s['draw'].id).filter(
+        TournamentMatch.status.in_(['PENDING', 'SCHEDULED'])).all()
+    TournamentMatch.query.filter_by(draw_id=s['draw'].id, round_number=1, position=2).first()
+
+
+def _similar_racquets(s):
+    from blueprints.shop.views import _find_similar
+    _find_similar(s['racquet'])
+
+
+def _racquet_by_name(s):
+    from blueprints.shop.models import Racquet
+    Racquet.query.filter_by(brand=s['racquet'].brand, name=s['racquet'].name).first()
+
+
+CRITICAL_PATHS = {
+    'standings': _standings,
+    'pool_matches': _pool_matches,
+    'team_matches': _team_matches,
+    'opponent_match': _opponent_match,
+    'team_players': _team_players,
+    'available_players': _available_players,
+    'simulation_players': _simulation_players,
+    'prefetch_lineups': _prefetch_lineups,
+    'club_roster': _club_roster,
+    'ranked_licenses': _ranked_licenses,
+    'club_members': _club_members,
+    'refresh_club': _refresh_club,
+    'registration': _registration,
+    'tournament_pages': _tournament_pages,
+    'draw_matches': _draw_matches,
+    'similar_racquets': _similar_racquets,
+    'racquet_by_name': _racquet_by_name,
+}
+
+
+@pytest.mark.parametrize('name', CRITICAL_PATHS)
+def test_no_full_table_scan(seeded, name):
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(('SELECT', 'UPDATE', 'DELETE', 'WITH')):
+            captured.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', capture)
+    try:
+        CRITICAL_PATHS[name](seeded)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', capture)
+    assert captured, f'{name} : aucune requête exécutée'
+    scans = [(tables, statement) for statement, parameters in captured
+             if (tables := _scanned_tables(statement, parameters))]
+    assert not scans, '\n\n'.join(f'SCAN {", ".join(tables)} :\n{statement}' for tables, statement in scans)
+
+
+def test_missing_indexes_created(memory_app, seeded):
+    import storage
+
+    index = 'ix_player_matchday_availability_matchday_player'
+    db.session.execute(text(f'DROP INDEX {index}'))
+    db.session.commit()
+    assert storage.create_missing_indexes(db.session, inspect(db.engine), db.metadata) == [index]
+    db.session.commit()
+    assert storage.create_missing_indexes(db.session, inspect(db.engine), db.metadata) == []
@@ -0,0 +1,72 @@
+"""
+Tests du registre des classements (models.RankingLadder).
+
+Couvre :
+  1. elo()        – mêmes valeurs que la formule d'origine (requêtes Ranking)
+  2. propriétés   – current_elo / refined_elo sans requête sur les classements
+  3. invalidate() – appelé par load_rankings
+"""
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import event
+
+
+def _reference_elo(ranking_id: int) -> int:
+    from models import Ranking
+
+    nc_ranking = Ranking.query.filter_by(value="NC").first()
+    second_series_threshold = Ranking.query.filter_by(value="-15").first()
+    if ranking_id < second_series_threshold.id:
+        ranking_delta = (second_series_threshold.id - ranking_id) // 10 + nc_ranking.id - second_series_threshold.id
+    else:
+        ranking_delta = nc_ranking.id - ranking_id
+    return ranking_delta * 15
+
+
+@pytest.fixture
+def statements(memory_app):
+    from extensions import db
+
+    captured = []
+
+    def before_execute(conn, cursor, statement, *args):
+        captured.append(statement)
+
+    engine = db.engine
+    event.listen(engine, 'before_cursor_execute', before_execute)
+    yield captured
+    event.remove(engine, 'before_cursor_execute', before_execute)
+
+
+class TestRankingLadder:
+    def test_elo_matches_reference(self, memory_app):
+        from models import Ranking, ranking_ladder
+
+        for ranking in Ranking.query.all():
+            assert ranking_ladder.elo(ranking.id) == _reference_elo(ranking.id)
+            assert ranking_ladder.value(ranking.id) == ranking.value
+            assert ranking_ladder.series(ranking.id) == ranking.series
+
+    def test_no_ranking_queries(self, memory_app, make_pool, statements):
+        pool = make_pool(['15/2', '30'])
+        players = [player for team in pool.teams for player in team.players]
+        for player in players:
+            player.refined_elo  # chargement des licences / blessures
+        statements.clear()
+        assert [player.current_elo for player in players] == [_reference_elo(p.license.rankingId) for p in players]
+        statements.clear()
+        for player in players:
+            player.refined_elo, player.best_elo, player.double_rating
+        assert not [s for s in statements if 'ranking' in s]
+
+    def test_invalidated_by_load_rankings(self, memory_app):
+        from common import load_rankings
+        from extensions import db
+        from models import Ranking, ranking_ladder
+
+        count = ranking_ladder.count()
+        load_rankings(db, Ranking)
+        assert ranking_ladder.count() == 2 * count
+        # Valeurs dupliquées : le registre reflète la nouvelle table (dernier id)
+        assert ranking_ladder.id_of('NC') == Ranking.query.filter_by(value='NC').order_by(Ranking.id.desc()).first().id
@@ -0,0 +1,106 @@
+"""
+Tests des effectifs éligibles (roster.py).
+
+Couvre :
+  1. birth_date_bounds()  – même résultat que Player.has_valid_age, 29 février compris
+  2. eligible_rosters()   – identique au filtre Python club par club (genre, actif, âge, top N)
+  3. form_teams()         – une seule requête pour tous les clubs
+"""
+from __future__ import annotations
+
+import random
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+import roster
+
+
+class _Category:
+    def __init__(self, min_age, max_age):
+        self.minAge, self.maxAge = min_age, max_age
+
+
+def _reference(championship, top_n):
+    from models import License, Player
+
+    rosters = {}
+    players = Player.query.join(Player.license).filter(Player.isActive.is_(True),
+                                                       License.gender == championship.division.gender)
+    for player in sorted(players, key=lambda p: (p.license.rankingId, p.id)):
+        if player.has_valid_age(championship.age_category):
+            rosters.setdefault(player.clubId, []).append(player.id)
+    return {club_id: ids[:top_n] for club_id, ids in sorted(rosters.items())}
+
+
+class TestBirthDateBounds:
+    @pytest.mark.parametrize('min_age, max_age', [(11, 12), (18, 99), (35, 45)])
+    def test_matches_has_valid_age(self, memory_app, min_age, max_age):
+        from models import Player
+
+        category = _Category(min_age, max_age)
+        earliest, latest = roster.birth_date_bounds(category)
+        today = date.today()
+        for years in (min_age - 2, min_age - 1, min_age, max_age - 1, max_age, max_age + 1):
+            for offset in (-1, 0, 1):
+                try:
+                    birth = today.replace(year=today.year - years)
+                except ValueError:
+                    birth = today.replace(year=today.year - years, day=28)
+                birth = datetime.combine(birth + timedelta(days=offset), datetime.min.time())
+                player = Player(birthDate=birth)
+                assert (earliest <= birth < latest) == player.has_valid_age(category), (years, offset)
+
+    def test_leap_day(self):
+        earliest, latest = roster.birth_date_bounds(_Category(18, 40), today=date(2028, 2, 29))
+        assert latest == datetime(2011, 3, 1) and earliest == datetime(1988, 3, 1)
+
+
+class TestEligibleRosters:
+    @pytest.fixture(scope='class')
+    def championship(self, memory_app, make_pool):
+        from extensions import db
+        from models import Ranking
+
+        pool = make_pool(['30', '30/1', '15/4'], players_per_team=18)
+        rng = random.Random(5)
+        rankings = [r.id for r in Ranking.query.filter(Ranking.value.in_(['15/2', '30', '30/5', '40']))]
+        for team in pool.teams:
+            for player in team.players:
+                player.license.rankingId = rng.choice(rankings)
+                player.birthDate = datetime(rng.choice([1930, 1960, 2000, 2012]), rng.randint(1, 12), 1)
+                player.isActive = rng.random() < 0.9
+                player.license.gender = 0 if rng.random() < 0.9 else 1
+        db.session.commit()
+        return pool.championship
+
+    @pytest.mark.parametrize('top_n', [4, 15, None])
+    def test_matches_reference(self, championship, top_n):
+        rosters = roster.eligible_rosters(championship, top_n=top_n)
+        assert {club_id: [p.id for p in players] for club_id, players in rosters.items()} == \
+            _reference(championship, top_n)
+
+    def test_form_teams_single_query(self, memory_app, championship):
+        from common import form_teams
+        from extensions import db
+        from models import ranking_ladder
+
+        championship.division, championship.age_category, ranking_ladder.count()  # déjà chargés
+        statements = []
+
+        def count(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', count)
+        try:
+            teams = form_teams(championship)
+            for team in teams:
+                [player.best_elo for player in team.players]
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', count)
+        assert len(statements) == 1
+        expected = _reference(championship, 15)
+        assert {team.clubId: [p.id for p in team.players] for team in teams} == \
+            {club_id: ids for club_id, ids in expected.items() if len(ids) >= championship.singlesCount}
+        db.session.rollback()
@@ -0,0 +1,105 @@
+"""
+Tests des compositions de simulation préchargées (simulation_lineups.py).
+
+Couvre :
+  1. prefetch_lineups()       – même sélection que Team.get_players_for_simulation
+                                (rôles, remplaçants, joker, joueur inactif)
+  2. requêtes                 – nombre fixe, quelle que soit la taille de la poule
+  3. simulate_match_scores()  – rencontres et rubbers écrits, lectures indépendantes du nombre de rencontres
+"""
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import event
+
+import simulation_lineups
+
+
+@pytest.fixture
+def statements(memory_app):
+    from extensions import db
+
+    captured = []
+
+    def count(conn, cursor, statement, *args):
+        captured.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', count)
+    yield captured
+    event.remove(db.engine, 'before_cursor_execute', count)
+
+
+def _ids(lineup):
+    singles, doubles = lineup
+    return [p.id for p in singles], [p.id for p in doubles]
+
+
+class TestPrefetchLineups:
+    def test_matches_per_team_selection(self, memory_app, make_pool):
+        from extensions import db
+        from models import Matchday, PlayerMatchdayAvailability, PlayerRating, TeamMatchdayJoker
+
+        pool = make_pool(['15/4', '30', '30/2', '40'])
+        PlayerRating.refresh([p for team in pool.teams for p in team.players])
+        matchdays = Matchday.query.filter_by(championshipId=pool.championshipId).all()
+        home, other = pool.teams[0], pool.teams[1]
+        first, second = matchdays[0], matchdays[1]
+        PlayerMatchdayAvailability.ensure([p.id for team in pool.teams for p in team.players],
+                                          [m.id for m in matchdays])
+        db.session.flush()
+        # Journée 1 : sélection du capitaine (simples, double, remplaçant) et joker en double
+        roles = {0: dict(plays_single=True), 2: dict(plays_double=True), 3: dict(is_substitute=True),
+                 4: dict(is_substitute=True)}
+        for index, values in roles.items():
+            availability = PlayerMatchdayAvailability.query.get((home.players[index].id, first.id))
+            for key, value in values.items():
+                setattr(availability, key, value)
+        db.session.add(TeamMatchdayJoker(team_id=home.id, matchday_id=first.id,
+                                         player_id=other.players[0].id, plays_double=True))
+        # Journée 2 : pas de sélection, joker et joueur inactif
+        db.session.add(TeamMatchdayJoker(team_id=home.id, matchday_id=second.id, player_id=other.players[1].id))
+        home.players[5].isActive = False
+        db.session.commit()
+
+        lineups = simulation_lineups.pool_lineups(pool, matchdays)
+        assert len(lineups) == len(pool.teams) * len(matchdays)
+        for team in pool.teams:
+            for matchday in matchdays:
+                expected = team.get_players_for_simulation(matchday, 2, 1)
+                assert _ids(lineups[team.id, matchday.id]) == _ids(expected), (team.name, matchday.id)
+        singles, doubles = lineups[home.id, first.id]
+        assert other.players[0].id in [p.id for p in doubles]
+        assert all(isinstance(p, simulation_lineups.LineupPlayer) for p in singles + doubles)
+
+    def test_fixed_query_count(self, memory_app, make_pool, statements):
+        from models import ranking_ladder
+
+        ranking_ladder.count()
+        counts = []
+        for size in (2, 6):
+            pool = make_pool(['30'] * size)
+            pool.championship, list(pool.teams)
+            statements.clear()
+            simulation_lineups.pool_lineups(pool)
+            counts.append(len(statements))
+        assert counts[0] == counts[1] <= 6
+
+
+class TestSimulateMatchScores:
+    def test_reads_independent_of_match_count(self, memory_app, make_pool, statements):
+        from common import simulate_match_scores
+        from extensions import db
+        from models import Double, Match, Single, ranking_ladder
+
+        ranking_ladder.count()
+        selects = []
+        for size in (2, 6):
+            pool = make_pool(['15/4', '30/2'] * (size // 2))
+            statements.clear()
+            simulate_match_scores(memory_app, db, pool)
+            selects.append(sum(1 for s in statements if s.lstrip().upper().startswith('SELECT')))
+            matches = Match.query.filter_by(poolId=pool.id).all()
+            assert matches and all(m.homeScore + m.visitorScore == 3 for m in matches)
+            assert Single.query.filter(Single.matchId.in_([m.id for m in matches])).count() == 2 * len(matches)
+            assert Double.query.filter(Double.matchId.in_([m.id for m in matches])).count() == len(matches)
+        assert selects[0] == selects[1]
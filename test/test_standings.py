@@ -0,0 +1,174 @@
+"""
+Tests du classement ensembliste (standings.py).
+
+Couvre :
+  1. pool_standings()          – identique au calcul Python d'origine (ORM, rencontre par rencontre)
+  2. championship_standings()  – toutes les poules d'un coup, mêmes lignes
+  3. nombre de requêtes        – constant, indépendant du nombre de rencontres
+  4. table pool_standing       – deltas à chaque écriture identiques au calcul complet, rebuild()
+"""
+from __future__ import annotations
+
+import random
+
+import pytest
+from sqlalchemy import event
+
+import standings
+
+
+def _reference(pool):
+    """Algorithme d'origine de common.calculer_classement (rencontres jouées uniquement)."""
+    num_matches = pool.championship.singlesCount + pool.championship.doublesCount
+    rows = {}
+    for team in pool.teams:
+        matches = [m for m in pool.matches if team.id in (m.homeTeamId, m.visitorTeamId)
+                   and m.homeScore is not None and m.visitorScore is not None]
+        won = draw = lost = matches_won = sets_won = sets_lost = games_won = games_lost = 0
+        for m in matches:
+            visitor = m.visitorTeamId == team.id
+            score, opponent = (m.visitorScore, m.homeScore) if visitor else (m.homeScore, m.visitorScore)
+            won += score > opponent
+            draw += score == opponent
+            lost += score < opponent
+            matches_won += score
+            home_sets, visitor_sets = m.sets_count
+            home_games, visitor_games = m.games_count
+            sets_won += visitor_sets if visitor else home_sets
+            sets_lost += home_sets if visitor else visitor_sets
+            games_won += visitor_games if visitor else home_games
+            games_lost += home_games if visitor else visitor_games
+        matches_lost = len(matches) * num_matches - matches_won
+        rows[team.id] = (3 * won + 2 * draw + lost, matches_won - matches_lost,
+                         sets_won - sets_lost, games_won - games_lost)
+    return sorted(rows.items(), key=lambda item: item[1], reverse=True)
+
+
+def _play(pool, matches, rng):
+    """Scores aléatoires : simples et doubles, avec des super tie-breaks."""
+    from extensions import db
+    from models import Double, Score, Single
+
+    num_singles, num_doubles = pool.championship.singlesCount, pool.championship.doublesCount
+    for match in matches:
+        home = 0
+        for kind in [Single] * num_singles + [Double] * num_doubles:
+            first = (6, rng.randint(0, 4)) if rng.random() < 0.5 else (rng.randint(0, 4), 6)
+            second = (7, 6) if rng.random() < 0.5 else (3, 6)
+            third = (None, None)
+            if (first[0] > first[1]) != (second[0] > second[1]):
+                third = (1, 0) if rng.random() < 0.5 else (0, 1)
+            score = Score(firstSetP1=first[0], firstSetP2=first[1], secondSetP1=second[0], secondSetP2=second[1],
+                          thirdSetP1=third[0], thirdSetP2=third[1])
+            db.session.add(score)
+            db.session.flush()
+            db.session.add(kind(scoreId=score.id, matchId=match.id))
+            home += score.sets_count[0] > score.sets_count[1]
+        match.homeScore, match.visitorScore = home, num_singles + num_doubles - home
+    db.session.commit()
+
+
+@pytest.fixture(scope='module')
+def played_pool(memory_app, make_pool):
+    from models import Match
+
+    pool = make_pool(['30', '30/1', '30/2', '30/3', '40'], singles_count=3, doubles_count=1)
+    matches = Match.query.filter_by(poolId=pool.id).order_by(Match.id).all()
+    _play(pool, matches[:-3], random.Random(7))
+    return pool
+
+
+def _sort_keys(classement):
+    return [(team_id, (row['points'], row['diff_matchs_sort'], row['diff_sets_sort'], row['diff_games_sort']))
+            for team_id, row in classement]
+
+
+class TestStandings:
+    def test_matches_reference(self, played_pool):
+        assert _sort_keys(standings.pool_standings(played_pool)) == _reference(played_pool)
+
+    def test_deleted_opponent_is_kept(self, memory_app, make_pool):
+        from extensions import db
+        from models import Match
+
+        pool = make_pool(['30', '30/1', '30/2'], singles_count=2, doubles_count=1)
+        _play(pool, Match.query.filter_by(poolId=pool.id).all(), random.Random(3))
+        removed = pool.teams[-1]
+        for match in Match.query.filter_by(poolId=pool.id):
+            if match.homeTeamId == removed.id:
+                match.homeTeamId = None
+            if match.visitorTeamId == removed.id:
+                match.visitorTeamId = None
+        removed.poolId = None
+        db.session.commit()
+        db.session.expire_all()
+        assert _sort_keys(standings.pool_standings(pool)) == _reference(pool)
+
+    def test_unplayed_pool(self, memory_app, make_pool):
+        pool = make_pool(['30', '30'])
+        for _, row in standings.pool_standings(pool):
+            assert row['points'] == 0 and row['matches_played'] == '0 ()'
+            assert row['diff_matchs'] == '0 (+0/-0)'
+
+    def test_championship_standings(self, played_pool):
+        by_pool = standings.championship_standings(played_pool.championship)
+        assert by_pool[played_pool.id] == standings.pool_standings(played_pool)
+
+    def test_constant_query_count(self, memory_app, played_pool):
+        from extensions import db
+
+        statements = []
+
+        def count(*args):
+            statements.append(args[2])
+
+        played_pool.championship, played_pool.teams  # relations déjà chargées
+        event.listen(db.engine, 'before_cursor_execute', count)
+        try:
+            standings.pool_standings(played_pool)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', count)
+        assert len(statements) == 1
+
+
+class TestIncrementalStandings:
+    def test_writes_keep_table_in_sync(self, memory_app, make_pool):
+        from extensions import db
+        from models import Match, Single
+
+        pool = make_pool(['30', '30/1', '30/2', '30/3'], singles_count=2, doubles_count=1)
+        matches = Match.query.filter_by(poolId=pool.id).order_by(Match.id).all()
+        _play(pool, matches, random.Random(11))
+        assert standings.rebuild() == []
+
+        # Score d'un rubber corrigé, rubber supprimé, rencontre remise à zéro, rencontre supprimée
+        single = Single.query.filter_by(matchId=matches[0].id).first()
+        single.score.firstSetP1, single.score.firstSetP2 = 0, 6
+        db.session.commit()
+        db.session.delete(Single.query.filter_by(matchId=matches[1].id).first())
+        db.session.commit()
+        matches[2].homeScore = matches[2].visitorScore = None
+        db.session.commit()
+        db.session.delete(matches[3])
+        db.session.commit()
+        # Rencontre rejouée via la relation (rubber sans matchId explicite)
+        matches[4].homeScore, matches[4].visitorScore = 3, 0
+        matches[4].singles.append(Single(score=single.score))
+        db.session.commit()
+
+        db.session.expire_all()
+        assert standings.stored_totals([pool.id]) == standings.played_totals([pool.id])
+        assert _sort_keys(standings.pool_standings(pool)) == _reference(pool)
+        assert standings.rebuild() == []
+
+    def test_rebuild_repairs_table(self, memory_app, played_pool):
+        from extensions import db
+        from models import PoolStanding
+
+        expected = standings.pool_standings(played_pool)
+        row = PoolStanding.query.filter_by(pool_id=played_pool.id).first()
+        row.won += 1
+        db.session.commit()
+        assert standings.rebuild() == [(row.pool_id, row.team_id)]
+        db.session.commit()
+        assert standings.pool_standings(played_pool) == expected
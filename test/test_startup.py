@@ -0,0 +1,126 @@
+"""
+Tests du démarrage de l'application.
+
+Couvre :
+  1. imports       – numpy, mapbox, geojson, alembic, requests, bs4 absents après l'import de l'app et
+                     des blueprints ; durée d'import sous STARTUP_IMPORT_BUDGET secondes (variable
+                     d'environnement, test ignoré sans elle : le temps mesuré dépend de la machine)
+  2. _ensure_schema – tables et migrations au premier démarrage, une seule requête ensuite,
+                     reprise quand les modèles changent
+  3. LazyMigrate   – `flask db` charge Flask-Migrate à la première utilisation ; `flask db heads` aboutit
+  4. create_app()  – sans jobs d'arrière-plan dans un processus de calcul (pool « spawn »)
+"""
+from __future__ import annotations
+
+import multiprocessing
+import os
+import re
+import subprocess
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+from flask import Flask
+from sqlalchemy import event, inspect, text
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+HEAVY_MODULES = ('numpy', 'pandas', 'mapbox', 'geojson', 'alembic', 'flask_migrate', 'requests', 'bs4')
+# Import de app (modules du projet, Flask, SQLAlchemy) : ~0,6 s mesurées, ~1,0 s avant le chargement différé
+STARTUP_IMPORT_BUDGET = os.getenv('STARTUP_IMPORT_BUDGET')
+_BLUEPRINTS = 'blueprints.admin, blueprints.club, blueprints.championship, blueprints.medical, ' \
+              'blueprints.tournament, blueprints.shop'
+
+
+def _python(code: str, *options) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *options, '-c', code], cwd=ROOT, capture_output=True, text=True,
+                          check=True)
+
+
+class TestImports:
+    def test_heavy_libraries_not_loaded(self):
+        out = _python(f'import sys, app, {_BLUEPRINTS}; print(",".join(sorted(m for m in {HEAVY_MODULES!r} '
+                      'if m in sys.modules)))').stdout
+        assert out.strip() == ''
+
+    @pytest.mark.skipif(not STARTUP_IMPORT_BUDGET, reason='STARTUP_IMPORT_BUDGET non défini')
+    def test_import_time_budget(self):
+        stderr = _python('import app', '-X', 'importtime').stderr
+        cumulative = int(re.search(r'\|\s*(\d+) \| app$', stderr, re.MULTILINE).group(1))
+        assert cumulative / 1e6 < float(STARTUP_IMPORT_BUDGET)
+
+
+@pytest.fixture
+def file_app(tmp_path):
+    from blueprints.shop import models as shop_models  # noqa: F401  (tables référencées par player)
+    from extensions import db
+
+    application = Flask(__name__)
+    application.config.update(SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'startup.sqlite3'}",
+                              SQLALCHEMY_TRACK_MODIFICATIONS=False)
+    db.init_app(application)
+    with application.app_context():
+        yield application
+        db.session.remove()
+        db.engine.dispose()
+
+
+class TestSchemaStamp:
+    def test_schema_checked_once(self, file_app, monkeypatch):
+        import storage
+        from app import _ensure_schema
+        from extensions import db
+        from models import AgeCategory
+
+        _ensure_schema(file_app, db)
+        assert inspect(db.engine).has_table('player_matchday_availability')
+        assert AgeCategory.query.count() > 0
+        assert storage.stored_schema_stamp(db.session) == storage.schema_fingerprint(db.metadata)
+
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)  # noqa: E731
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            _ensure_schema(file_app, db)
+            assert len(statements) == 1 and statements[0].lstrip().startswith('SELECT')
+
+            # Modèles modifiés (index ajouté) : migrations rejouées, index créé, nouvelle empreinte
+            db.session.execute(text('DROP INDEX ix_license_gender_ranking'))
+            db.session.commit()
+            monkeypatch.setattr(storage, 'schema_fingerprint', lambda metadata: 'changed')
+            _ensure_schema(file_app, db)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+        assert 'ix_license_gender_ranking' in {index['name'] for index in inspect(db.engine).get_indexes('license')}
+        assert storage.stored_schema_stamp(db.session) == 'changed'
+
+
+def test_lazy_migrate(file_app, tmp_path):
+    from extensions import db, migrate
+
+    migrate.init_app(file_app, db)
+    assert 'migrate' not in file_app.extensions
+
+    # Commandes exécutées de bout en bout par le groupe paresseux : options du groupe
+    # Flask-Migrate (-d) puis alembic
+    directory = str(tmp_path / 'migrations')
+    runner = file_app.test_cli_runner()
+    for command in ('init', 'heads'):
+        result = runner.invoke(args=['db', '-d', directory, command])
+        assert result.exit_code == 0, (result.output, result.exception)
+    assert os.path.exists(os.path.join(directory, 'alembic.ini'))
+    assert file_app.extensions['migrate'].db is db
+
+
+def _worker_app_extensions() -> list:
+    """Exécuté dans un processus « spawn » : ce que ferait wsgi.py réimporté par le worker."""
+    from app import create_app
+
+    return sorted(create_app().extensions)
+
+
+def test_no_jobs_in_worker_processes(tmp_path, monkeypatch):
+    monkeypatch.setenv('DATABASE_URL', f"sqlite:///{tmp_path / 'worker.sqlite3'}")
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as executor:
+        extensions = executor.submit(_worker_app_extensions).result(timeout=120)
+    assert 'sqlalchemy' in extensions
+    assert 'jobs' not in extensions and 'jobs_nightly' not in extensions
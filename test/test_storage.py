@@ -0,0 +1,141 @@
+"""
+Tests du profil de stockage (storage.py).
+
+Couvre :
+  1. configure() / init_app() – PRAGMA appliqués à chaque connexion SQLite, une seule fois par moteur
+  2. engine_options()         – pool PostgreSQL, URI postgres:// normalisée, options explicites prioritaires
+  3. migrations de colonnes   – DDL compilé pour SQLite et PostgreSQL, colonnes ajoutées une seule fois
+  4. révision add_query_indexes – mêmes index que les modèles, appliquée sur une base qui les a déjà
+"""
+from __future__ import annotations
+
+import importlib.util
+import os
+
+import pytest
+from flask import Flask
+from sqlalchemy import inspect, text
+from sqlalchemy.dialects import postgresql, sqlite
+
+import storage
+from extensions import db
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+@pytest.fixture
+def file_app(tmp_path):
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'storage.sqlite3'}",
+                      SQLALCHEMY_TRACK_MODIFICATIONS=False, SQLITE_CACHE_SIZE=8192)
+    storage.configure(app)
+    db.init_app(app)
+    storage.init_app(app)
+    storage.init_app(app)  # sans effet : PRAGMA déjà branchés
+    yield app
+    with app.app_context():
+        db.engine.dispose()
+
+
+class TestSqliteProfile:
+    def test_pragmas_on_every_connection(self, file_app):
+        with file_app.app_context():
+            with db.engine.connect() as first, db.engine.connect() as second:
+                for conn in (first, second):
+                    pragma = lambda name: conn.execute(text(f'PRAGMA {name}')).scalar()  # noqa: E731
+                    assert pragma('journal_mode') == 'wal'
+                    assert pragma('synchronous') == 1  # NORMAL
+                    assert pragma('cache_size') == -8192
+                    assert pragma('busy_timeout') == 5000
+                    assert pragma('foreign_keys') == 1
+
+    def test_sqlite_engine_options(self, file_app):
+        assert file_app.config['SQLALCHEMY_ENGINE_OPTIONS'] == {'connect_args': {'timeout': 5.0}}
+        assert storage.sqlite_pragmas({'SQLITE_JOURNAL_MODE': 'DELETE'})[0] == 'PRAGMA journal_mode=DELETE'
+
+
+class TestPostgresProfile:
+    def test_pool_options(self):
+        app = Flask(__name__)
+        app.config.update(SQLALCHEMY_DATABASE_URI='postgres://tennis:secret@db/tennis', DB_POOL_SIZE=4,
+                          SQLALCHEMY_ENGINE_OPTIONS={'pool_recycle': 60})
+        storage.configure(app)
+        assert app.config['SQLALCHEMY_DATABASE_URI'] == 'postgresql://tennis:secret@db/tennis'
+        assert app.config['SQLALCHEMY_ENGINE_OPTIONS'] == {'pool_size': 4, 'max_overflow': 20,
+                                                           'pool_recycle': 60, 'pool_pre_ping': True}
+
+
+class TestColumnMigrations:
+    def test_ddl_per_dialect(self):
+        from models import License, PlayerMatchdayAvailability, PoolSimulation
+
+        column = PlayerMatchdayAvailability.__table__.c.plays_single
+        assert storage.add_column_ddl(column, False, sqlite.dialect()) == \
+            'ALTER TABLE player_matchday_availability ADD COLUMN plays_single BOOLEAN NOT NULL DEFAULT 0'
+        assert storage.add_column_ddl(column, False, postgresql.dialect()) == \
+            'ALTER TABLE player_matchday_availability ADD COLUMN plays_single BOOLEAN NOT NULL DEFAULT false'
+        assert storage.add_column_ddl(PoolSimulation.__table__.c.qualified_count, 1, postgresql.dialect()) == \
+            'ALTER TABLE pool_simulation ADD COLUMN qualified_count INTEGER NOT NULL DEFAULT 1'
+        assert storage.add_column_ddl(License.__table__.c.tenupHash, None, postgresql.dialect()) == \
+            'ALTER TABLE license ADD COLUMN "tenupHash" VARCHAR(16)'
+
+    def test_missing_columns_added_once(self, memory_app):
+        from models import PlayerMatchdayAvailability
+
+        db.session.execute(text('CREATE TABLE legacy_pma (player_id INTEGER, matchday_id INTEGER)'))
+        table = PlayerMatchdayAvailability.__table__
+
+        class Legacy:  # modèle dont la table n'a pas encore les colonnes de rôle
+            __table__ = table.to_metadata(db.MetaData(), name='legacy_pma')
+
+        try:
+            defaults = {'plays_single': False, 'is_substitute': False}
+            assert storage.add_missing_columns(db.session, inspect(db.engine), Legacy, defaults) == list(defaults)
+            db.session.execute(text('INSERT INTO legacy_pma (player_id, matchday_id) VALUES (1, 1)'))
+            assert db.session.execute(text('SELECT plays_single, is_substitute FROM legacy_pma')).one() == (0, 0)
+            assert storage.add_missing_columns(db.session, inspect(db.engine), Legacy, defaults) == []
+            assert storage.widen_columns(db.session, inspect(db.engine), Legacy) == []  # SQLite : rien à faire
+        finally:
+            db.session.rollback()
+            db.session.execute(text('DROP TABLE IF EXISTS legacy_pma'))
+            db.session.commit()
+
+
+def _index_migration():
+    spec = importlib.util.spec_from_file_location(
+        'add_query_indexes', os.path.join(ROOT, 'migrations', 'versions', 'add_query_indexes.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class TestIndexMigration:
+    def test_matches_models(self, memory_app):
+        declared = {index.name: (table.name, [column.name for column in index.columns])
+                    for table in db.metadata.sorted_tables for index in table.indexes}
+        for table, name, columns in _index_migration().INDEXES:
+            assert declared[name] == (table, columns)
+
+    def test_upgrade_idempotent(self, file_app):
+        from alembic.migration import MigrationContext
+        from alembic.operations import Operations
+
+        import models  # noqa: F401  (tables)
+        from blueprints.shop import models as shop_models  # noqa: F401
+
+        migration = _index_migration()
+        names = {name for _, name, _ in migration.INDEXES}
+
+        def indexes():
+            inspector = inspect(db.engine)
+            return {index['name'] for table, _, _ in migration.INDEXES for index in inspector.get_indexes(table)}
+
+        with file_app.app_context():
+            db.create_all()
+            with db.engine.begin() as connection, Operations.context(MigrationContext.configure(connection)):
+                migration.downgrade()
+            assert not names & indexes()
+            for _ in range(2):  # index déjà présents la seconde fois
+                with db.engine.begin() as connection, Operations.context(MigrationContext.configure(connection)):
+                    migration.upgrade()
+                assert names <= indexes()
@@ -0,0 +1,135 @@
+"""
+Tests du cache de force des équipes (models.TeamStrengthCache).
+
+Couvre :
+  1. for_teams()    – poids, ELO moyen et ELO des N meilleurs identiques au calcul direct
+  2. requêtes       – une seule pour toutes les équipes, aucune une fois le cache chaud
+  3. invalidation   – effectif modifié, classement d'une licence modifié, équipe non enregistrée ;
+                      génération publiée dans app_settings pour les autres processus (sync)
+  4. Pool.best_team / worst_team
+"""
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import event
+
+
+def _reference(team, singles_count):
+    from models import ranking_ladder
+
+    ranking_ids = sorted(p.license.rankingId for p in team.players)
+    elos = [ranking_ladder.elo(ranking_id) for ranking_id in ranking_ids]
+    return (ranking_ladder.count() * singles_count - sum(ranking_ids[:singles_count]),
+            sum(elos) / len(elos), sum(elos[:singles_count]))
+
+
+@pytest.fixture
+def statements(memory_app):
+    from extensions import db
+
+    captured = []
+
+    def count(conn, cursor, statement, *args):
+        captured.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', count)
+    yield captured
+    event.remove(db.engine, 'before_cursor_execute', count)
+
+
+@pytest.fixture(scope='module')
+def pool(memory_app, make_pool):
+    from extensions import db
+    from models import Ranking
+
+    pool = make_pool(['15/2', '30', '30/3', '40'], singles_count=3)
+    values = ['5/6', '15', '30/1', '30/5', 'NC', '40']
+    for team in pool.teams:
+        for player, value in zip(team.players, values[team.id % 3:] + values[:team.id % 3]):
+            player.license.rankingId = Ranking.query.filter_by(value=value).first().id
+    db.session.commit()
+    return pool
+
+
+class TestTeamStrength:
+    def test_matches_reference(self, pool):
+        from models import team_strengths
+
+        for team, strength in zip(pool.teams, team_strengths.for_teams(pool.teams, 3)):
+            assert tuple(strength) == pytest.approx(_reference(team, 3))
+            assert team.weight(pool.championship) == strength.weight
+
+    def test_single_query(self, pool, statements):
+        from models import ranking_ladder, team_strengths
+
+        teams = list(pool.teams)
+        ranking_ladder.count()
+        team_strengths.invalidate()
+        statements.clear()
+        team_strengths.for_teams(teams, 3)
+        assert len(statements) == 1
+        team_strengths.sort(teams, 3)
+        [team.weight(pool.championship) for team in teams]
+        assert len(statements) == 1
+
+    def test_invalidation(self, pool):
+        from extensions import db
+        from models import Ranking, team_strengths
+
+        team = pool.teams[0]
+        before = team.weight(pool.championship)
+        best = min(team.players, key=lambda p: p.license.rankingId)
+        best.license.rankingId = Ranking.query.filter_by(value='NC').first().id
+        db.session.commit()
+        assert team.weight(pool.championship) == _reference(team, 3)[0] != before
+
+        average = team_strengths.get(team, 3).average_elo
+        team.players.append(max(pool.teams[1].players, key=lambda p: p.license.rankingId))
+        db.session.commit()
+        assert team_strengths.get(team, 3).average_elo == pytest.approx(_reference(team, 3)[1]) != average
+
+    def test_invalidation_across_processes(self, pool, statements):
+        from extensions import db
+        from models import Ranking, TeamStrengthCache, team_strengths
+
+        other = TeamStrengthCache()  # cache d'un autre worker
+        other.sync()
+        team = pool.teams[1]
+        before = other.get(team, 3)
+        statements.clear()
+        other.sync()  # rien de publié : une requête, cache conservé
+        assert other.get(team, 3) == before
+        assert len(statements) == 1
+
+        db.session.rollback()
+        worst = max(team.players, key=lambda p: p.license.rankingId)
+        worst.license.rankingId = Ranking.query.filter_by(value='5/6').first().id
+        db.session.rollback()  # annulé : rien de publié
+        other.sync()
+        assert other.get(team, 3) == before
+
+        worst = max(team.players, key=lambda p: p.license.rankingId)
+        worst.license.rankingId = Ranking.query.filter_by(value='5/6').first().id
+        db.session.commit()
+        assert other.get(team, 3) == before  # périmé jusqu'à la prochaine requête
+        other.sync()
+        assert tuple(other.get(team, 3)) == pytest.approx(_reference(team, 3)) != pytest.approx(tuple(before))
+        team_strengths.get(team, 3)
+        statements.clear()
+        team_strengths.sync()  # génération écrite par ce processus : cache conservé
+        team_strengths.get(team, 3)
+        assert len(statements) == 1
+
+    def test_unsaved_team(self, pool):
+        from extensions import db
+        from models import Team, team_strengths
+
+        with db.session.no_autoflush:
+            team = Team(name='Nouvelle', players=list(pool.teams[1].players))
+            assert tuple(team_strengths.get(team, 3)) == pytest.approx(_reference(team, 3))
+        db.session.rollback()
+
+    def test_best_and_worst_team(self, pool):
+        weights = {team.id: _reference(team, 3)[0] for team in pool.teams}
+        assert weights[pool.best_team.id] == max(weights.values())
+        assert weights[pool.worst_team.id] == min(weights.values())
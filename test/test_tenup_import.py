@@ -0,0 +1,186 @@
+"""
+Tests de l'import en masse des exports Tenup (tenup_import.py, common.import_players / update_players).
+
+Couvre :
+  0. iter_tenup_csv()   – encodage et séparateur détectés, lecture en un passage, mémoire constante
+  1. read_rows()        – classements résolus sans requête, lignes invalides ignorées
+  2. import_players()   – 1 500 licenciés en quelques requêtes, conflit : rien n'est écrit
+  3. update_players()   – classements mis à jour, joueurs créés, absents supprimés, conflits
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import time
+import tracemalloc
+
+import pytest
+from sqlalchemy import event
+
+import tenup_import
+
+HEADER = 'Nom\tPrénom\tNé en\tLicence\tClub\tC. Tennis\n'
+RANKINGS = ['30/1', '15/2 (ex 5/6)', 'NC (ex 30/4)', 'ND', '40', '30']
+
+
+def _write_csv(path, rows, encoding='utf-8'):
+    with open(path, 'w', encoding=encoding, newline='') as f:
+        f.write(HEADER)
+        for license_id, last_name, year, ranking in rows:
+            f.write(f'{last_name}\tPrénom\t{year}\t{license_id} A - 2025\tCLUB\t{ranking}\n')
+    return str(path)
+
+
+def _rows(first_id, count):
+    return [(first_id + i, f'NOM{i}', 1960 + i % 50, RANKINGS[i % len(RANKINGS)]) for i in range(count)]
+
+
+@pytest.fixture
+def statements(memory_app):
+    from extensions import db
+
+    captured = []
+
+    def count(conn, cursor, statement, *args):
+        captured.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', count)
+    yield captured
+    event.remove(db.engine, 'before_cursor_execute', count)
+
+
+def _club(club_id):
+    from extensions import db
+    from models import Club
+
+    club = Club(id=club_id, name=f'Club {club_id}', city='Testville')
+    db.session.add(club)
+    db.session.commit()
+    return club
+
+
+def _ranking_value(license_id, model_attr='rankingId'):
+    from extensions import db
+    from models import License, ranking_ladder, BestRanking
+
+    license = db.session.get(License, license_id)
+    if model_attr == 'rankingId':
+        return ranking_ladder.value(license.rankingId)
+    return ranking_ladder.value(license.bestRankingId, BestRanking)
+
+
+class TestTenupCsvReader:
+    @pytest.mark.parametrize('encoding, delimiter', [('cp1252', '\t'), ('utf-8-sig', '\t'), ('utf-8', ';')])
+    def test_encoding_and_delimiter(self, tmp_path, encoding, delimiter):
+        path = tmp_path / 'club.csv'
+        path.write_text(f'Nom{delimiter}Prénom{delimiter}Né en{delimiter}Licence{delimiter}Club{delimiter}C. Tennis\n'
+                        f'D’ARTOIS{delimiter}Élodie{delimiter}1990{delimiter}123 A - 2025{delimiter}TC{delimiter}15/2\n',
+                        encoding=encoding)
+        rows = list(tenup_import.iter_tenup_csv(path))
+        assert rows == [{'nom': 'D’ARTOIS', 'prenom': 'Élodie', 'naissance': '1990', 'licence': '123 A - 2025',
+                         'club': 'TC', 'classement': '15/2'}]
+
+    def test_invalid_bytes_after_sample(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(tenup_import, 'SNIFF_SIZE', 256)
+        path = tmp_path / 'mixte.csv'
+        lines = [HEADER] + [f'NOM{i}\tPrénom\t1990\t{i} A - 2025\tCLUB\t30\n' for i in range(1, 20)]
+        path.write_bytes(''.join(lines).encode('utf-8') + 'ZOÉ\tÉva\t1990\t99 A - 2025\tCLUB\t40\n'.encode('cp1252'))
+        rows = list(tenup_import.iter_rows(path))
+        assert len(rows) == 20 and (rows[-1].last_name, rows[-1].first_name) == ('ZOÉ', 'Éva')
+
+    def test_single_streaming_pass(self, tmp_path):
+        path = _write_csv(tmp_path / 'region.csv', _rows(1_000_000, 5_000))
+        digest = hashlib.sha256()
+        rows = tenup_import.iter_rows(path, digest)
+        assert next(rows).license_id == 1_000_000
+        tracemalloc.start()
+        try:
+            count = 1 + sum(1 for _ in rows)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        assert count == 5_000 and peak < 256 * 1024
+        assert digest.hexdigest() == hashlib.sha256(open(path, 'rb').read()).hexdigest()
+
+
+class TestReadRows:
+    def test_rankings_resolved_in_memory(self, memory_app, tmp_path, statements):
+        from models import BestRanking, ranking_ladder
+
+        ranking_ladder.count(), ranking_ladder.count(BestRanking)
+        path = _write_csv(tmp_path / 'club.csv', [(100, 'A', 1990, '15/2 (ex 5/6)'), (101, 'B', 'xx', 'ND'),
+                                                  (102, 'C', 1990, 'ZZ'), (100, 'A', 1990, '15/1')],
+                          encoding='latin-1')
+        statements.clear()
+        rows = tenup_import.read_rows(path, logging.getLogger(__name__))
+        assert statements == []
+        assert list(rows) == [100, 101]  # classement inconnu ignoré, dernière ligne retenue
+        assert ranking_ladder.value(rows[100].ranking_id) == '15/1' and rows[100].best_ranking_id is None
+        assert rows[101].birth_date is None and ranking_ladder.value(rows[101].ranking_id) == 'NC'
+
+
+class TestImportPlayers:
+    def test_bulk_import(self, memory_app, tmp_path, statements):
+        from common import import_players
+        from extensions import db
+        from models import License, Player, PlayerRating
+
+        club = _club('TI000001')
+        path = _write_csv(tmp_path / 'club.csv', _rows(500_000, 1500))
+        statements.clear()
+        start = time.perf_counter()
+        success, conflicts, count = import_players(memory_app, 0, path, club, db)
+        elapsed = time.perf_counter() - start
+        assert success and conflicts == [] and count == 1500
+        assert elapsed < 3.0
+        assert len(statements) < 40
+        assert _ranking_value(500_001) == '15/2' and _ranking_value(500_001, 'best') == '5/6'
+        assert _ranking_value(500_002) == 'NC' and _ranking_value(500_002, 'best') == '30/4'
+        assert PlayerRating.query.filter_by(club_id=club.id).count() == 1500
+        assert db.session.get(License, 500_000).gender == 0
+
+        # Réimport : aucun doublon
+        assert import_players(memory_app, 0, path, club, db)[2] == 1500
+        assert Player.query.filter_by(clubId=club.id).count() == 1500
+
+    def test_conflict_writes_nothing(self, memory_app, make_pool, tmp_path):
+        from common import import_players
+        from extensions import db
+        from models import License
+
+        taken = make_pool(['30', '40']).teams[0].players[0].licenseId
+        club = _club('TI000002')
+        path = _write_csv(tmp_path / 'club.csv', _rows(600_000, 3) + [(taken, 'PRIS', 1990, '30')])
+        success, conflicts, count = import_players(memory_app, 0, path, club, db)
+        assert not success and count == 0
+        assert [c['license_number'] for c in conflicts] == [f'{taken} A']
+        assert db.session.get(License, 600_000) is None
+
+
+class TestUpdatePlayers:
+    def test_update_create_delete(self, memory_app, make_pool, tmp_path):
+        from common import import_players, update_players
+        from extensions import db
+        from models import License, Player, team_strengths
+
+        club = _club('TU000001')
+        import_players(memory_app, 0, _write_csv(tmp_path / 'before.csv', _rows(700_000, 10)), club, db)
+        other = make_pool(['30', '40']).teams[1].players[0]
+
+        rows = _rows(700_000, 8)  # 700008 et 700009 ont quitté le club
+        rows[0] = (700_000, 'NOM0', 1960, '15 (ex 4/6)')
+        rows[1] = (700_001, 'NOM1', 1961, '30/2')  # sans "ex" : meilleur classement conservé
+        rows += [(700_100, 'NOUVEAU', 1999, '40'), (other.licenseId, 'AILLEURS', 1990, '30')]
+        team_strengths.get(other.teams[0], 2)
+        success, conflicts, deleted, updated = update_players(
+            memory_app, 0, _write_csv(tmp_path / 'after.csv', rows), club, db)
+
+        assert success and updated == 9
+        assert [c['license_id'] for c in conflicts] == [other.licenseId]
+        assert conflicts[0]['current_club'] == other.club.name
+        assert sorted(d['license_number'] for d in deleted) == [700_008, 700_009]
+        assert _ranking_value(700_000) == '15' and _ranking_value(700_000, 'best') == '4/6'
+        assert _ranking_value(700_001) == '30/2' and _ranking_value(700_001, 'best') == '5/6'
+        assert db.session.get(License, 700_100).lastName == 'NOUVEAU'
+        assert sorted(p.licenseId for p in Player.query.filter_by(clubId=club.id)) == \
+            list(range(700_000, 700_008)) + [700_100]
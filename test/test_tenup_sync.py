@@ -0,0 +1,193 @@
+"""
+Tests de la resynchronisation incrémentale Tenup (tenup_sync.py).
+
+Couvre :
+  1. plan_sync()   – lignes inchangées ignorées, arrivées / modifications / départs / conflits, aucune écriture
+  2. apply_sync()  – seules les lignes modifiées sont écrites, instantané ELO des joueurs touchés
+  3. empreintes    – fichier identique : aucune écriture ; licences sans empreinte vues une fois
+                     comme modifiées ; import complet ou saisie manuelle entre deux synchronisations
+  4. aperçu        – fichiers conservés par jeton, réservés au club
+"""
+from __future__ import annotations
+
+import io
+import logging
+
+import pytest
+from sqlalchemy import event
+from werkzeug.datastructures import FileStorage
+
+import tenup_sync
+
+HEADER = 'Nom\tPrénom\tNé en\tLicence\tClub\tC. Tennis\n'
+LOGGER = logging.getLogger(__name__)
+
+
+def _write_csv(path, rows):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(HEADER)
+        for license_id, year, ranking in rows:
+            f.write(f'NOM{license_id}\tPrénom\t{year}\t{license_id} A - 2025\tCLUB\t{ranking}\n')
+    return str(path)
+
+
+def _rows(first_id, count):
+    return [(first_id + i, 1960 + i % 50, ('30/1', '15/2 (ex 5/6)', '40')[i % 3]) for i in range(count)]
+
+
+@pytest.fixture
+def statements(memory_app):
+    from extensions import db
+
+    captured = []
+
+    def count(conn, cursor, statement, *args):
+        captured.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', count)
+    yield captured
+    event.remove(db.engine, 'before_cursor_execute', count)
+
+
+@pytest.fixture
+def club(memory_app, tmp_path):
+    """Club importé (200 joueurs) puis synchronisé une première fois avec le même fichier."""
+    from common import import_players
+    from extensions import db
+    from models import Club
+
+    club_id = f'TS{next(_club_ids):06d}'
+    club = Club(id=club_id, name=f'Club {club_id}', city='Testville')
+    db.session.add(club)
+    db.session.commit()
+    first_id = 900_000 + 1000 * int(club_id[2:])
+    path = _write_csv(tmp_path / 'initial.csv', _rows(first_id, 200))
+    import_players(memory_app, 0, path, club, db)
+    assert tenup_sync.apply_sync(tenup_sync.plan_sync(club, 0, path, LOGGER), memory_app)[0]
+    club.first_id = first_id
+    return club
+
+
+_club_ids = iter(range(1, 1000))
+
+
+def _ranking(license_id):
+    from extensions import db
+    from models import License, ranking_ladder
+
+    return ranking_ladder.value(db.session.get(License, license_id).rankingId)
+
+
+class TestSync:
+    def test_identical_file_is_skipped(self, memory_app, club, tmp_path, statements):
+        path = _write_csv(tmp_path / 'same.csv', _rows(club.first_id, 200))
+        club.name  # club rechargé après le commit de la fixture
+        statements.clear()
+        plan = tenup_sync.plan_sync(club, 0, path, LOGGER)
+        assert plan.is_empty and plan.unchanged == 200 and plan.row_count == 200
+        assert len(statements) <= 1
+        statements.clear()
+        assert tenup_sync.apply_sync(plan, memory_app) == (True, [], [], 0)
+        assert not any(s.lstrip().upper().startswith(('INSERT INTO license', 'UPDATE license', 'DELETE'))
+                       for s in statements)
+
+    def test_plan_then_apply(self, memory_app, make_pool, club, tmp_path, statements):
+        from extensions import db
+        from models import Player, PlayerRating, ranking_ladder
+
+        other = make_pool(['30', '40']).teams[0].players[0]
+        first = club.first_id
+        rows = _rows(first, 198)                       # first+198, first+199 : départs
+        rows[0] = (first, 1960, '15 (ex 4/6)')         # classement modifié
+        rows[3] = (first + 3, 1963, '30/2')            # classement modifié
+        rows += [(first + 500, 1999, '30/4'), (other.licenseId, 1990, '30')]  # arrivée, conflit
+        path = _write_csv(tmp_path / 'next.csv', rows)
+        club.name  # club rechargé après le commit de la fixture
+        statements.clear()
+        plan = tenup_sync.plan_sync(club, 0, path, LOGGER)
+        assert not any(s.lstrip().upper().startswith(('INSERT', 'UPDATE', 'DELETE')) for s in statements)
+        assert len(statements) <= 6
+        assert plan.unchanged == 196
+        assert [change.row.license_id for change in plan.changed] == [first, first + 3]
+        assert (plan.changed[0].old_ranking, plan.changed[0].row.ranking_value) == ('30/1', '15')
+        assert [row.license_id for row in plan.added] == [first + 500]
+        assert sorted(d['license_number'] for d in plan.departed) == [first + 198, first + 199]
+        assert [c['license_id'] for c in plan.conflicts] == [other.licenseId]
+        assert _ranking(first) == '30/1'  # aperçu : rien d'écrit
+
+        statements.clear()
+        success, conflicts, deleted, updated = tenup_sync.apply_sync(plan, memory_app)
+        assert success and updated == 3 and len(conflicts) == 1 and len(deleted) == 2
+        assert len([s for s in statements if s.lstrip().startswith('UPDATE license')]) == 1
+        assert len(statements) < 40  # indépendant des 196 lignes inchangées
+        assert _ranking(first) == '15' and _ranking(first + 3) == '30/2' and _ranking(first + 500) == '30/4'
+        assert Player.query.filter_by(clubId=club.id).count() == 199
+        rating = db.session.get(PlayerRating, Player.query.filter_by(licenseId=first).one().id)
+        assert rating.ranking_id == ranking_ladder.id_of('15')
+        assert Player.query.filter_by(licenseId=first + 500).one().rating is not None
+
+        # Même fichier renvoyé : rien à faire
+        assert tenup_sync.plan_sync(club, 0, path, LOGGER).is_empty
+
+    def test_licenses_without_hash_are_resynced_once(self, memory_app, club, tmp_path):
+        from extensions import db
+        from models import License
+
+        License.query.filter(License.id.in_([club.first_id, club.first_id + 1])).update(
+            {License.tenupHash: None}, synchronize_session=False)
+        db.session.commit()
+        path = _write_csv(tmp_path / 'legacy.csv', _rows(club.first_id, 200) + [(club.first_id + 700, 1980, '40')])
+        plan = tenup_sync.plan_sync(club, 0, path, LOGGER)
+        assert [change.row.license_id for change in plan.changed] == [club.first_id, club.first_id + 1]
+        tenup_sync.apply_sync(plan, memory_app)
+        path = _write_csv(tmp_path / 'legacy2.csv', _rows(club.first_id, 200) + [(club.first_id + 700, 1980, '40'),
+                                                                                  (club.first_id + 701, 1980, '40')])
+        plan = tenup_sync.plan_sync(club, 0, path, LOGGER)
+        assert plan.changed == [] and plan.unchanged == 201 and len(plan.added) == 1
+
+    def test_full_update_between_syncs(self, memory_app, club, tmp_path):
+        from common import update_players
+        from extensions import db
+
+        path = _write_csv(tmp_path / 'a.csv', _rows(club.first_id, 200))
+        rows = _rows(club.first_id, 199)
+        rows[0] = (club.first_id, 1960, '15')
+        update_players(memory_app, 0, _write_csv(tmp_path / 'b.csv', rows), club, db)
+        assert _ranking(club.first_id) == '15'
+
+        # Fichier A renvoyé après l'import complet de B : l'écart avec la base est réappliqué
+        plan = tenup_sync.plan_sync(club, 0, path, LOGGER)
+        assert [change.row.license_id for change in plan.changed] == [club.first_id]
+        assert [row.license_id for row in plan.joined + plan.added] == [club.first_id + 199]
+        success, conflicts, deleted, updated = tenup_sync.apply_sync(plan, memory_app)
+        assert success and updated == 2
+        assert _ranking(club.first_id) == '30/1'
+
+    def test_manual_ranking_is_resynced(self, memory_app, club, tmp_path):
+        from extensions import db
+        from models import License, ranking_ladder
+
+        license = db.session.get(License, club.first_id + 3)
+        license.rankingId = ranking_ladder.id_of('15')
+        db.session.commit()
+        assert license.tenupHash is None
+
+        plan = tenup_sync.plan_sync(club, 0, _write_csv(tmp_path / 'same.csv', _rows(club.first_id, 200)), LOGGER)
+        assert [change.row.license_id for change in plan.changed] == [club.first_id + 3]
+        tenup_sync.apply_sync(plan, memory_app)
+        assert _ranking(club.first_id + 3) == '30/1'
+        assert db.session.get(License, club.first_id + 3).tenupHash is not None
+
+
+class TestStaging:
+    def test_staged_files_are_bound_to_club(self, memory_app):
+        upload = FileStorage(stream=io.BytesIO(HEADER.encode()), filename='men.csv')
+        token = tenup_sync.stage_uploads('CLUB0001', {0: upload})
+        try:
+            staged = tenup_sync.staged_files(token, 'CLUB0001')
+            assert list(staged) == [0] and open(staged[0], encoding='utf-8').read() == HEADER
+            assert tenup_sync.staged_files(token, 'CLUB0002') == {}
+            assert tenup_sync.staged_files('../etc', 'CLUB0001') == {}
+        finally:
+            tenup_sync.discard(token)
+        assert tenup_sync.staged_files(token, 'CLUB0001') == {}
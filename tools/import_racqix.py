@@ -147,7 +147,7 @@ def import_strings(app):
 
 
 if __name__ == "__main__":
-    app = create_app()
+    app = create_app(background_jobs=False)
     with app.app_context():
         import_racquets(app)
         import_strings(app)
@@ -0,0 +1,155 @@
+"""
+Banc d'essai des profils de stockage (voir storage.py) : débit lectures / écritures concurrentes.
+
+Charge représentative d'un soir de championnat : des capitaines enregistrent
+des disponibilités (une écriture validée par clic) pendant que d'autres pages
+lisent les effectifs disponibles par journée.  Chaque profil tourne sur une
+base neuve avec le même jeu de données :
+  - sqlite-rollback : réglages SQLite d'origine (journal DELETE, synchronous FULL) ;
+  - sqlite-wal      : profil par défaut de l'application ;
+  - postgresql      : si --postgres (ou BENCH_DATABASE_URL) désigne une base de test, VIDÉE au préalable.
+
+Usage :
+    python tools/storage_benchmark.py [--seconds 5] [--readers 8] [--writers 4] [--postgres URL]
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+from flask import Flask
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import OperationalError
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import storage  # noqa: E402
+from blueprints.shop import models as shop_models  # noqa: E402,F401  (tables référencées par player)
+from common import load_rankings  # noqa: E402
+from extensions import db  # noqa: E402
+from models import (BestRanking, Club, License, Matchday, Player, PlayerMatchdayAvailability,  # noqa: E402
+                    Ranking)
+
+PLAYERS = 400
+MATCHDAYS = 10
+
+# Réglages SQLite d'origine (journal de rollback, cache par défaut de 2 Mio)
+ROLLBACK_PROFILE = {'SQLITE_JOURNAL_MODE': 'DELETE', 'SQLITE_SYNCHRONOUS': 'FULL',
+                    'SQLITE_MMAP_SIZE': 0, 'SQLITE_CACHE_SIZE': 2000}
+
+
+def _make_app(uri: str, settings: dict) -> Flask:
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI=uri, SQLALCHEMY_TRACK_MODIFICATIONS=False, **settings)
+    storage.configure(app)
+    db.init_app(app)
+    storage.init_app(app)
+    return app
+
+
+def _seed(app):
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        load_rankings(db, Ranking)
+        load_rankings(db, BestRanking)
+        ranking = Ranking.query.filter_by(value='30/1').one()
+        db.session.add(Club(id='BENCH001', name='Club banc d\'essai', city='Testville'))
+        db.session.add_all(License(id=i, firstName='Joueur', lastName=f'Banc {i}', letter='A', year=1990,
+                                   gender=0, rankingId=ranking.id, bestRankingId=ranking.id)
+                           for i in range(1, PLAYERS + 1))
+        db.session.add_all(Player(birthDate=datetime(1990, 1, 1), clubId='BENCH001', licenseId=i)
+                           for i in range(1, PLAYERS + 1))
+        matchdays = [Matchday(date=date(2025, 10, 5) + timedelta(weeks=d)) for d in range(MATCHDAYS)]
+        db.session.add_all(matchdays)
+        db.session.flush()
+        PlayerMatchdayAvailability.ensure([p.id for p in Player.query], [m.id for m in matchdays])
+        db.session.commit()
+        return ([p.id for p in Player.query], [m.id for m in matchdays])
+
+
+def _run(app, player_ids, matchday_ids, seconds, readers, writers) -> dict:
+    pma = PlayerMatchdayAvailability.__table__
+    roster = (select(pma.c.matchday_id, func.count())
+              .join(Player.__table__, Player.__table__.c.id == pma.c.player_id)
+              .join(License.__table__, License.__table__.c.id == Player.__table__.c.licenseId)
+              .where(pma.c.is_available.is_(True), Player.__table__.c.clubId == 'BENCH001')
+              .group_by(pma.c.matchday_id))
+    counts = {'reads': 0, 'writes': 0, 'errors': 0}
+    latencies = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def worker(write: bool, seed: int):
+        rnd = random.Random(seed)
+        done, errors, spent = 0, 0, []
+        with app.app_context():
+            engine = db.engine
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    with engine.begin() as conn:
+                        if write:
+                            conn.execute(update(pma)
+                                         .where(pma.c.player_id == rnd.choice(player_ids),
+                                                pma.c.matchday_id == rnd.choice(matchday_ids))
+                                         .values(is_available=rnd.random() < 0.8, updated_at=datetime.utcnow()))
+                        else:
+                            conn.execute(roster).all()
+                    done += 1
+                    if write:
+                        spent.append(time.perf_counter() - start)
+                except OperationalError:
+                    errors += 1
+        with lock:
+            counts['writes' if write else 'reads'] += done
+            counts['errors'] += errors
+            latencies.extend(spent)
+
+    threads = [threading.Thread(target=worker, args=(i < writers, i)) for i in range(readers + writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    latencies.sort()
+    return {'reads/s': counts['reads'] / seconds,
+            'writes/s': counts['writes'] / seconds,
+            'errors': counts['errors'],
+            'p95 write (ms)': 1000 * latencies[int(0.95 * (len(latencies) - 1))] if latencies else float('nan')}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--postgres', default=os.getenv('BENCH_DATABASE_URL'),
+                        help='base PostgreSQL de test (vidée puis recréée)')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='storage-bench-')
+    profiles = [('sqlite-rollback', f"sqlite:///{os.path.join(workdir, 'rollback.sqlite3')}", ROLLBACK_PROFILE),
+                ('sqlite-wal', f"sqlite:///{os.path.join(workdir, 'wal.sqlite3')}", {})]
+    if args.postgres:
+        profiles.append(('postgresql', args.postgres, {}))
+
+    print(f'{args.readers} lecteurs, {args.writers} écrivains, {args.seconds:g} s par profil')
+    print(f"{'profil':<16}{'lectures/s':>12}{'écritures/s':>13}{'p95 écriture':>14}{'erreurs':>9}")
+    for name, uri, settings in profiles:
+        app = _make_app(uri, settings)
+        player_ids, matchday_ids = _seed(app)
+        result = _run(app, player_ids, matchday_ids, args.seconds, args.readers, args.writers)
+        print(f"{name:<16}{result['reads/s']:>12.0f}{result['writes/s']:>13.0f}"
+              f"{result['p95 write (ms)']:>11.1f} ms{result['errors']:>9}")
+        with app.app_context():
+            db.engine.dispose()
+
+
+if __name__ == '__main__':
+    main()